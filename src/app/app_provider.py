@@ -1,11 +1,18 @@
 from dishka import Provider, Scope, provide
 
-from app.audit import GetUserAuditUseCase
-from app.events import SaveEventsUseCase
+from app.audit import GetUserAuditUseCase, WatchUserAuditUseCase
+from app.delivery import DeliverNotificationsUseCase
+from app.events import QueueEventsUseCase, SaveEventsUseCase
 from app.health import ReadinessCheckUseCase, ReadyChecker
+from app.notifications.dispatch_due_notifications_use_case import (
+    DispatchDueNotificationsUseCase,
+)
+from app.notifications.notification_rules_engine import NotificationRulesEngine
 from app.notifications.trigger_notifications_use_case import (
     TriggerNotificationsUseCase,
 )
+from app.persistence.notification_repository import NotificationRepository
+from app.persistence.notification_rule_repository import NotificationRuleRepository
 
 
 class AppProvider(Provider):
@@ -14,6 +21,21 @@ class AppProvider(Provider):
         provide(ReadinessCheckUseCase)
         + provide(ReadyChecker)
         + provide(SaveEventsUseCase)
+        + provide(QueueEventsUseCase)
         + provide(TriggerNotificationsUseCase)
+        + provide(DispatchDueNotificationsUseCase)
+        + provide(DeliverNotificationsUseCase)
         + provide(GetUserAuditUseCase)
+        + provide(WatchUserAuditUseCase)
     )
+
+    @provide(scope=Scope.APP)
+    async def get_notification_rules_engine(
+        self,
+        notification_repository: NotificationRepository,
+        notification_rule_repository: NotificationRuleRepository,
+    ) -> NotificationRulesEngine:
+        return NotificationRulesEngine(
+            notification_rules=await notification_rule_repository.get_all(),
+            notifications=await notification_repository.get_all(),
+        )
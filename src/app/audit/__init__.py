@@ -1,11 +1,24 @@
+from app.audit.audit_feed import AuditFeed, AuditUpdate
+from app.audit.exceptions import InvalidAuditCursorException
 from app.audit.get_user_audit_use_case import (
+    AuditCache,
     GetUserAuditRequest,
     GetUserAuditResponse,
     GetUserAuditUseCase,
 )
+from app.audit.watch_user_audit_use_case import (
+    WatchUserAuditRequest,
+    WatchUserAuditUseCase,
+)
 
 __all__ = [
+    "AuditCache",
+    "AuditFeed",
+    "AuditUpdate",
     "GetUserAuditRequest",
     "GetUserAuditResponse",
     "GetUserAuditUseCase",
+    "InvalidAuditCursorException",
+    "WatchUserAuditRequest",
+    "WatchUserAuditUseCase",
 ]
@@ -0,0 +1,29 @@
+import base64
+import binascii
+from datetime import datetime
+from uuid import UUID
+
+from app.audit.exceptions import InvalidAuditCursorException
+from app.persistence.audit_repository import AuditPosition
+
+
+def encode_cursor(position: AuditPosition) -> str:
+    raw = f"{position.timestamp.isoformat()}/{position.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> AuditPosition:
+    """
+    The position encode_cursor made cursor of, raises InvalidAuditCursorException for
+    anything else
+    """
+    try:
+        timestamp, id_ = base64.urlsafe_b64decode(cursor).decode().split("/")
+        position = AuditPosition(datetime.fromisoformat(timestamp), UUID(id_))
+    except (binascii.Error, ValueError) as e:
+        raise InvalidAuditCursorException(cursor) from e
+
+    # compared against timestamptz, a naive one would be read in the server's zone
+    if position.timestamp.tzinfo is None:
+        raise InvalidAuditCursorException(cursor)
+    return position
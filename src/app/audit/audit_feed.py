@@ -0,0 +1,30 @@
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Protocol
+
+from app.audit.get_user_audit_use_case import EventAuditItem, NotificationAuditItem
+
+
+@dataclass
+class AuditUpdate:
+    """
+    A new event or notification of a user, as their audit shows it
+    """
+
+    user_id: str
+    event: EventAuditItem | None = None
+    notification: NotificationAuditItem | None = None
+
+
+class AuditFeed(Protocol):
+    async def publish(self, updates: list[AuditUpdate]) -> None: ...
+
+    def watch(
+        self, user_id: str, heartbeat: timedelta
+    ) -> AsyncIterator[AuditUpdate | None]:
+        """
+        The updates of the user from now on: None once subscribed, then the updates
+        and None whenever there was none for a heartbeat
+        """
+        ...
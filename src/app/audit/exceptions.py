@@ -0,0 +1,13 @@
+from http import HTTPStatus
+
+from app.exceptions import WebApplicationException
+
+
+class InvalidAuditCursorException(WebApplicationException):
+    def __init__(self, cursor: str) -> None:
+        super().__init__(
+            "E_INVALID_AUDIT_CURSOR",
+            f"Invalid audit cursor {cursor!r}, pass one from a previous page",
+            HTTPStatus.BAD_REQUEST,
+        )
+        self.cursor = cursor
@@ -1,12 +1,16 @@
-from dataclasses import dataclass
+import asyncio
+from dataclasses import dataclass, field
 from datetime import datetime
+from typing import Protocol
 
-from app.persistence.event_repository import EventRepository
-from app.persistence.notification_history_record_repository import (
-    NotificationHistoryRecordRepository,
-)
+from app.audit.audit_cursor import decode_cursor, encode_cursor
+from app.persistence.audit_repository import AuditPosition, AuditRepository
 from app.usecase import UseCase
-from domain.notification_history_record import NotificationStatus
+from domain import Event
+from domain.notification_history_record import (
+    NotificationHistoryRecord,
+    NotificationStatus,
+)
 
 
 @dataclass
@@ -26,10 +30,22 @@ class NotificationAuditItem:
     suppression_reason: str | None
 
 
+# the most events, and notifications, a page holds whatever limit asks for
+MAX_PAGE_SIZE = 200
+
+
 @dataclass
 class GetUserAuditRequest:
     user_id: str
     limit: int = 50
+    since: datetime | None = None
+    until: datetime | None = None
+    # every type when empty
+    event_types: list[str] = field(default_factory=list)
+    notification_types: list[str] = field(default_factory=list)
+    # the next_*_cursor of the previous page, the newest page when not given
+    events_cursor: str | None = None
+    notifications_cursor: str | None = None
 
 
 @dataclass
@@ -37,57 +53,121 @@ class GetUserAuditResponse:
     user_id: str
     recent_events: list[EventAuditItem]
     notification_history: list[NotificationAuditItem]
+    # None once there is nothing older
+    next_events_cursor: str | None = None
+    next_notifications_cursor: str | None = None
+
+
+class AuditCache(Protocol):
+    """
+    Audits answered recently, dropped once the user has new events or notifications
+    """
+
+    async def get(self, user_id: str, limit: int) -> GetUserAuditResponse | None: ...
+
+    async def set(self, response: GetUserAuditResponse, limit: int) -> None: ...
 
 
 class GetUserAuditUseCase(UseCase[GetUserAuditRequest, GetUserAuditResponse]):
     def __init__(
         self,
-        event_repository: EventRepository,
-        notification_history_record_repository: NotificationHistoryRecordRepository,
+        audit_repository: AuditRepository,
+        audit_cache: AuditCache,
     ) -> None:
         super().__init__()
-        self.event_repository = event_repository
-        self.notification_history_record_repository = notification_history_record_repository
+        self.audit_repository = audit_repository
+        self.audit_cache = audit_cache
 
     async def handle(self, request: GetUserAuditRequest) -> GetUserAuditResponse:
-        events = await self.event_repository.find_recent_by_user(
-            user_id=request.user_id,
-            limit=request.limit,
+        limit = min(request.limit, MAX_PAGE_SIZE)
+        events_before = (
+            decode_cursor(request.events_cursor) if request.events_cursor else None
+        )
+        notifications_before = (
+            decode_cursor(request.notifications_cursor)
+            if request.notifications_cursor
+            else None
         )
 
-        notifications = await self.notification_history_record_repository.find_recent_by_user(
-            user_id=request.user_id,
-            limit=request.limit,
+        # only the newest page of everything is cached, the one opened the most
+        newest = request == GetUserAuditRequest(request.user_id, request.limit)
+        if newest:
+            cached = await self.audit_cache.get(request.user_id, limit)
+            if cached is not None:
+                return cached
+
+        # one more than the page, to know whether there is a next one
+        events, notifications = await asyncio.gather(
+            self.audit_repository.find_events(
+                user_id=request.user_id,
+                limit=limit + 1,
+                event_types=request.event_types,
+                since=request.since,
+                until=request.until,
+                before=events_before,
+            ),
+            self.audit_repository.find_notifications(
+                user_id=request.user_id,
+                limit=limit + 1,
+                notification_types=request.notification_types,
+                since=request.since,
+                until=request.until,
+                before=notifications_before,
+            ),
         )
 
-        event_items = [
-            EventAuditItem(
-                event_id=str(event.id),
-                event_type=event.type,
-                event_timestamp=event.event_timestamp,
-                properties=event.properties,
-            )
-            for event in events
-        ]
-
-        notification_items = [
-            NotificationAuditItem(
-                notification_type=record.type,
-                trigger_event=record.trigger,
-                status=record.status.value if isinstance(record.status, NotificationStatus) else record.status,
-                created_at=record.created_at,
-                suppression_reason=self._format_suppression_reason(record),
-            )
-            for record in notifications
-        ]
-
-        return GetUserAuditResponse(
+        response = GetUserAuditResponse(
             user_id=request.user_id,
-            recent_events=event_items,
-            notification_history=notification_items,
+            recent_events=[event_audit_item(event) for event in events[:limit]],
+            notification_history=[
+                notification_audit_item(record) for record in notifications[:limit]
+            ],
+            next_events_cursor=(
+                encode_cursor(_event_position(events[limit - 1]))
+                if len(events) > limit
+                else None
+            ),
+            next_notifications_cursor=(
+                encode_cursor(_record_position(notifications[limit - 1]))
+                if len(notifications) > limit
+                else None
+            ),
         )
+        if newest:
+            await self.audit_cache.set(response, limit)
+        return response
+
+
+def _event_position(event: Event) -> AuditPosition:
+    return AuditPosition(event.event_timestamp, event.id)
+
+
+def _record_position(record: NotificationHistoryRecord) -> AuditPosition:
+    return AuditPosition(record.created_at, record.id)
+
+
+def event_audit_item(event: Event) -> EventAuditItem:
+    return EventAuditItem(
+        event_id=str(event.id),
+        event_type=event.type,
+        event_timestamp=event.event_timestamp,
+        properties=event.properties,
+    )
+
+
+def notification_audit_item(record: NotificationHistoryRecord) -> NotificationAuditItem:
+    return NotificationAuditItem(
+        notification_type=record.type,
+        trigger_event=record.trigger,
+        status=record.status.value
+        if isinstance(record.status, NotificationStatus)
+        else record.status,
+        created_at=record.created_at,
+        suppression_reason=_format_suppression_reason(record),
+    )
+
 
-    def _format_suppression_reason(self, record) -> str | None:
-        if record.status == NotificationStatus.SUPPRESSED and record.suppressed_because:
-            return f"skipped {record.type}: {record.suppressed_because}"
-        return None
+def _format_suppression_reason(record: NotificationHistoryRecord) -> str | None:
+    if record.status == NotificationStatus.SUPPRESSED and record.suppressed_because:
+        return f"skipped {record.type}: {record.suppressed_because}"
+    return None
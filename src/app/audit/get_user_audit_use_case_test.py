@@ -0,0 +1,221 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+
+from app.audit import (
+    GetUserAuditRequest,
+    GetUserAuditResponse,
+    GetUserAuditUseCase,
+    InvalidAuditCursorException,
+)
+from app.audit.audit_cursor import decode_cursor, encode_cursor
+from app.audit.get_user_audit_use_case import (
+    MAX_PAGE_SIZE,
+    EventAuditItem,
+    NotificationAuditItem,
+)
+from app.persistence.audit_repository import AuditPosition
+from domain import Event, NotificationHistoryRecord, NotificationStatus
+
+NOW = datetime.now(UTC)
+
+
+def _event(event_timestamp: datetime = NOW) -> Event:
+    event = Event()
+    event.id = uuid4()
+    event.user_id = "u_12345"
+    event.type = "signup_completed"
+    event.event_timestamp = event_timestamp
+    event.event_date = event_timestamp.date()
+    event.properties = {"signup_method": "email"}
+    event.user_traits = {}
+    return event
+
+
+def _record() -> NotificationHistoryRecord:
+    return NotificationHistoryRecord(
+        id=uuid4(),
+        type="WELCOME_EMAIL",
+        trigger="signup_completed",
+        user_id="u_12345",
+        status=NotificationStatus.SENT,
+        created_at=NOW,
+    )
+
+
+@pytest.mark.anyio
+async def test_handle__not_cached__reads_concurrently_and_caches_the_response():
+    event, record = _event(), _record()
+    # neither read returns before the other has started
+    both_started = asyncio.Barrier(2)
+
+    async def find_events(**kwargs) -> list[Event]:
+        await both_started.wait()
+        return [event]
+
+    async def find_notifications(**kwargs) -> list[NotificationHistoryRecord]:
+        await both_started.wait()
+        return [record]
+
+    mock_audit_repo = AsyncMock()
+    mock_audit_repo.find_events.side_effect = find_events
+    mock_audit_repo.find_notifications.side_effect = find_notifications
+    mock_audit_cache = AsyncMock()
+    mock_audit_cache.get.return_value = None
+    use_case = GetUserAuditUseCase(
+        audit_repository=mock_audit_repo, audit_cache=mock_audit_cache
+    )
+
+    async with asyncio.timeout(5):
+        response = await use_case.handle(GetUserAuditRequest(user_id="u_12345"))
+
+    assert response == GetUserAuditResponse(
+        user_id="u_12345",
+        recent_events=[
+            EventAuditItem(
+                event_id=str(event.id),
+                event_type="signup_completed",
+                event_timestamp=NOW,
+                properties={"signup_method": "email"},
+            )
+        ],
+        notification_history=[
+            NotificationAuditItem(
+                notification_type="WELCOME_EMAIL",
+                trigger_event="signup_completed",
+                status="sent",
+                created_at=NOW,
+                suppression_reason=None,
+            )
+        ],
+    )
+    mock_audit_cache.get.assert_awaited_once_with("u_12345", 50)
+    mock_audit_cache.set.assert_awaited_once_with(response, 50)
+
+
+@pytest.mark.anyio
+async def test_handle__cached__answers_without_reading():
+    cached = GetUserAuditResponse(
+        user_id="u_12345", recent_events=[], notification_history=[]
+    )
+    mock_audit_repo = AsyncMock()
+    mock_audit_cache = AsyncMock()
+    mock_audit_cache.get.return_value = cached
+    use_case = GetUserAuditUseCase(
+        audit_repository=mock_audit_repo, audit_cache=mock_audit_cache
+    )
+
+    response = await use_case.handle(GetUserAuditRequest(user_id="u_12345", limit=10))
+
+    assert response is cached
+    mock_audit_cache.get.assert_awaited_once_with("u_12345", 10)
+    mock_audit_repo.find_events.assert_not_awaited()
+    mock_audit_repo.find_notifications.assert_not_awaited()
+    mock_audit_cache.set.assert_not_awaited()
+
+
+@pytest.mark.anyio
+async def test_handle__more_than_a_page__cursor_of_the_last_one_and_next_page_after_it():
+    events = [_event(NOW - timedelta(minutes=minutes)) for minutes in range(3)]
+    mock_audit_repo = AsyncMock()
+    mock_audit_repo.find_events.return_value = events
+    mock_audit_repo.find_notifications.return_value = []
+    mock_audit_cache = AsyncMock()
+    mock_audit_cache.get.return_value = None
+    use_case = GetUserAuditUseCase(
+        audit_repository=mock_audit_repo, audit_cache=mock_audit_cache
+    )
+
+    response = await use_case.handle(GetUserAuditRequest(user_id="u_12345", limit=2))
+
+    # one more is read, to know there is a next page
+    assert mock_audit_repo.find_events.await_args.kwargs["limit"] == 3
+    assert [item.event_id for item in response.recent_events] == [
+        str(event.id) for event in events[:2]
+    ]
+    assert response.next_events_cursor is not None
+    assert response.next_notifications_cursor is None
+
+    mock_audit_repo.find_events.return_value = events[2:]
+    response = await use_case.handle(
+        GetUserAuditRequest(
+            user_id="u_12345", limit=2, events_cursor=response.next_events_cursor
+        )
+    )
+
+    assert mock_audit_repo.find_events.await_args.kwargs["before"] == AuditPosition(
+        events[1].event_timestamp, events[1].id
+    )
+    assert [item.event_id for item in response.recent_events] == [str(events[2].id)]
+    assert response.next_events_cursor is None
+
+
+@pytest.mark.anyio
+async def test_handle__filtered_or_paged__neither_cached_nor_answered_from_cache():
+    mock_audit_repo = AsyncMock()
+    mock_audit_repo.find_events.return_value = []
+    mock_audit_repo.find_notifications.return_value = []
+    mock_audit_cache = AsyncMock()
+    use_case = GetUserAuditUseCase(
+        audit_repository=mock_audit_repo, audit_cache=mock_audit_cache
+    )
+    cursor = encode_cursor(AuditPosition(NOW, uuid4()))
+
+    for request in (
+        GetUserAuditRequest(user_id="u_12345", since=NOW - timedelta(days=1)),
+        GetUserAuditRequest(user_id="u_12345", event_types=["payment_failed"]),
+        GetUserAuditRequest(user_id="u_12345", notifications_cursor=cursor),
+    ):
+        await use_case.handle(request)
+
+    mock_audit_cache.get.assert_not_awaited()
+    mock_audit_cache.set.assert_not_awaited()
+
+
+@pytest.mark.anyio
+async def test_handle__limit_above_the_cap__capped():
+    mock_audit_repo = AsyncMock()
+    mock_audit_repo.find_events.return_value = []
+    mock_audit_repo.find_notifications.return_value = []
+    mock_audit_cache = AsyncMock()
+    mock_audit_cache.get.return_value = None
+    use_case = GetUserAuditUseCase(
+        audit_repository=mock_audit_repo, audit_cache=mock_audit_cache
+    )
+
+    await use_case.handle(GetUserAuditRequest(user_id="u_12345", limit=10_000))
+
+    assert mock_audit_repo.find_events.await_args.kwargs["limit"] == MAX_PAGE_SIZE + 1
+    assert (
+        mock_audit_repo.find_notifications.await_args.kwargs["limit"]
+        == MAX_PAGE_SIZE + 1
+    )
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not a cursor",
+        encode_cursor(AuditPosition(datetime(2025, 10, 31), uuid4())),
+        "MjAyNS0xMC0zMVQxOTowMDowMCswMDowMC9ub3QtYS11dWlk",
+    ],
+)
+async def test_handle__invalid_cursor__raises(cursor: str):
+    use_case = GetUserAuditUseCase(
+        audit_repository=AsyncMock(), audit_cache=AsyncMock()
+    )
+
+    with pytest.raises(InvalidAuditCursorException):
+        await use_case.handle(
+            GetUserAuditRequest(user_id="u_12345", events_cursor=cursor)
+        )
+
+
+def test_decode_cursor__encoded_position__same_position():
+    position = AuditPosition(NOW, uuid4())
+
+    assert decode_cursor(encode_cursor(position)) == position
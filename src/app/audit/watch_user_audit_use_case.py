@@ -0,0 +1,30 @@
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from datetime import timedelta
+
+from app.audit.audit_feed import AuditFeed, AuditUpdate
+from app.usecase import UseCase
+
+
+@dataclass
+class WatchUserAuditRequest:
+    user_id: str
+    heartbeat: timedelta
+
+
+class WatchUserAuditUseCase(
+    UseCase[WatchUserAuditRequest, AsyncIterator[AuditUpdate | None]]
+):
+    """
+    New events and notifications of a user as the workers produce them, without
+    touching the database
+    """
+
+    def __init__(self, audit_feed: AuditFeed) -> None:
+        super().__init__()
+        self.audit_feed = audit_feed
+
+    async def handle(
+        self, request: WatchUserAuditRequest
+    ) -> AsyncIterator[AuditUpdate | None]:
+        return self.audit_feed.watch(request.user_id, request.heartbeat)
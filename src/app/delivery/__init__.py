@@ -0,0 +1,21 @@
+from app.delivery.channel_dispatcher import (
+    ChannelDispatcher,
+    ChannelDispatchers,
+    DeliveryFailure,
+)
+from app.delivery.deliver_notifications_use_case import (
+    DeliverNotificationsRequest,
+    DeliverNotificationsResponse,
+    DeliverNotificationsUseCase,
+)
+from app.delivery.retry_policy import RetryPolicy
+
+__all__ = [
+    "ChannelDispatcher",
+    "ChannelDispatchers",
+    "DeliverNotificationsRequest",
+    "DeliverNotificationsResponse",
+    "DeliverNotificationsUseCase",
+    "DeliveryFailure",
+    "RetryPolicy",
+]
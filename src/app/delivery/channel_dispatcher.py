@@ -0,0 +1,29 @@
+from dataclasses import dataclass
+from typing import Protocol
+
+from app.queue import Delivery
+from domain.notification import NotificationChannel
+
+
+@dataclass(frozen=True)
+class DeliveryFailure:
+    delivery: Delivery
+    reason: str
+    # whether sending it again later may work, e.g. the provider was unavailable,
+    # rather than it rejecting the recipient
+    retryable: bool
+
+
+class ChannelDispatcher(Protocol):
+    """
+    Sends deliveries of one channel a batch at a time, over connections kept across
+    batches. Delivery problems are returned, not raised: a batch may partly succeed.
+    """
+
+    async def send(self, deliveries: list[Delivery]) -> list[DeliveryFailure]: ...
+
+
+class ChannelDispatchers(dict[NotificationChannel, ChannelDispatcher]):
+    """
+    The dispatcher of every channel there is a delivery worker for
+    """
@@ -0,0 +1,164 @@
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+
+from app.delivery.channel_dispatcher import ChannelDispatchers, DeliveryFailure
+from app.delivery.retry_policy import RetryPolicy
+from app.persistence.notification_history_record_repository import (
+    NotificationHistoryRecordRepository,
+)
+from app.queue import Delivery, DeliveryQueue
+from app.usecase import UseCase
+from domain import NotificationStatus
+from domain.notification import NotificationChannel
+
+# a record still not PENDING this long after it was queued was sent by an earlier
+# attempt, or its transaction was rolled back; either way there is nothing to send
+UNSEEN_GIVE_UP_AFTER = timedelta(minutes=5)
+
+
+@dataclass
+class DeliverNotificationsRequest:
+    channel: NotificationChannel
+    now: datetime
+    limit: int
+    retry_policy: RetryPolicy
+
+
+@dataclass
+class DeliverNotificationsResponse:
+    popped: int
+    sent: int
+    failed: int
+    requeued: int
+
+    # the ones that could not be sent, retryable or not
+    failures: list[DeliveryFailure] = field(default_factory=list)
+    # to ack once the transaction is committed, until then they stay leased
+    done: list[Delivery] = field(default_factory=list)
+    # (leased, next attempt) to retry once the transaction is committed
+    retried: list[tuple[Delivery, Delivery]] = field(default_factory=list)
+
+
+class DeliverNotificationsUseCase(
+    UseCase[DeliverNotificationsRequest, DeliverNotificationsResponse]
+):
+    """
+    Sends a batch of deliveries of a channel with its dispatcher: PENDING records
+    become SENT, or FAILED when the recipient is rejected for good or every attempt
+    has failed. Until then failed ones are retried after a backoff
+    """
+
+    def __init__(
+        self,
+        delivery_queue: DeliveryQueue,
+        notification_history_record_repository: NotificationHistoryRecordRepository,
+        channel_dispatchers: ChannelDispatchers,
+    ) -> None:
+        super().__init__()
+        self.delivery_queue = delivery_queue
+        self.notification_history_record_repository = (
+            notification_history_record_repository
+        )
+        self.channel_dispatchers = channel_dispatchers
+
+    async def handle(
+        self, request: DeliverNotificationsRequest
+    ) -> DeliverNotificationsResponse:
+        queue = self.delivery_queue
+        requeued = await queue.requeue_expired(request.channel, request.now)
+        popped = await queue.pop(request.channel, request.now, request.limit)
+
+        response = DeliverNotificationsResponse(
+            popped=len(popped), sent=0, failed=0, requeued=requeued
+        )
+        if not popped:
+            return response
+
+        # deliveries are queued before the records are committed, so only the ones
+        # seen as PENDING are sent, the others stay leased and are retried
+        pending = set(
+            await self.notification_history_record_repository.find_pending(
+                [delivery.record_id for delivery in popped]
+            )
+        )
+        to_send = [delivery for delivery in popped if delivery.record_id in pending]
+        response.done.extend(
+            delivery
+            for delivery in popped
+            if delivery.record_id not in pending
+            and request.now - delivery.queued_at > UNSEEN_GIVE_UP_AFTER
+        )
+
+        response.failures = [
+            DeliveryFailure(
+                delivery,
+                f"The triggering event has no {request.channel.value} recipient",
+                retryable=False,
+            )
+            for delivery in to_send
+            if delivery.recipient is None
+        ]
+        with_recipient = [
+            delivery for delivery in to_send if delivery.recipient is not None
+        ]
+        if with_recipient:
+            dispatcher = self.channel_dispatchers[request.channel]
+            response.failures += await dispatcher.send(with_recipient)
+
+        failed = {failure.delivery.record_id for failure in response.failures}
+        sent = [delivery for delivery in to_send if delivery.record_id not in failed]
+        given_up = [
+            failure.delivery for failure in response.failures if not failure.retryable
+        ]
+        retryable = [
+            failure.delivery for failure in response.failures if failure.retryable
+        ]
+
+        repository = self.notification_history_record_repository
+        # the failed attempts as the record counts them, with one statement for the
+        # batch however many failed; the count in the queue may be behind it, e.g.
+        # when a worker died before replacing the leased delivery
+        retries = dict(
+            await repository.increment_retries(
+                [delivery.record_id for delivery in retryable]
+            )
+        )
+        to_retry: list[Delivery] = []
+        for delivery in retryable:
+            if delivery.record_id not in retries:
+                # resolved meanwhile, nothing left to retry
+                response.done.append(delivery)
+            elif retries[delivery.record_id] >= (
+                delivery.max_attempts or request.retry_policy.max_attempts
+            ):
+                given_up.append(delivery)
+            else:
+                to_retry.append(delivery)
+
+        response.sent = len(
+            await repository.resolve_pending(
+                [delivery.record_id for delivery in sent], NotificationStatus.SENT
+            )
+        )
+        response.failed = len(
+            await repository.resolve_pending(
+                [delivery.record_id for delivery in given_up],
+                NotificationStatus.FAILED,
+            )
+        )
+        response.done.extend(sent + given_up)
+
+        response.retried = [
+            (
+                delivery,
+                replace(
+                    delivery,
+                    retries=retries[delivery.record_id],
+                    retry_at=request.now
+                    + request.retry_policy.backoff(retries[delivery.record_id] - 1),
+                ),
+            )
+            for delivery in to_retry
+        ]
+
+        return response
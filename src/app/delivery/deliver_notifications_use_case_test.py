@@ -0,0 +1,221 @@
+from dataclasses import replace
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+
+from app.delivery import (
+    ChannelDispatchers,
+    DeliverNotificationsRequest,
+    DeliverNotificationsUseCase,
+    DeliveryFailure,
+    RetryPolicy,
+)
+from app.queue import Delivery
+from domain import NotificationStatus
+from domain.notification import NotificationChannel
+
+NOW = datetime.now(UTC)
+RETRY_POLICY = RetryPolicy(
+    max_attempts=3,
+    base_backoff=timedelta(seconds=30),
+    max_backoff=timedelta(minutes=10),
+)
+
+
+def _delivery(
+    recipient: str | None = "maria@example.com", queued_at: datetime = NOW
+) -> Delivery:
+    return Delivery(
+        record_id=uuid4(),
+        notification_type="WELCOME_EMAIL",
+        channel=NotificationChannel.EMAIL,
+        recipient=recipient,
+        text="Welcome to our payment platform!",
+        queued_at=queued_at,
+    )
+
+
+def _use_case(
+    mock_delivery_queue: AsyncMock,
+    mock_notification_history_repo: AsyncMock,
+    mock_dispatcher: AsyncMock,
+) -> DeliverNotificationsUseCase:
+    return DeliverNotificationsUseCase(
+        delivery_queue=mock_delivery_queue,
+        notification_history_record_repository=mock_notification_history_repo,
+        channel_dispatchers=ChannelDispatchers(
+            {NotificationChannel.EMAIL: mock_dispatcher}
+        ),
+    )
+
+
+@pytest.mark.anyio
+async def test_handle__sent_and_rejected__resolved_sent_and_failed_retryable_retried():
+    sent, rejected, unavailable = _delivery(), _delivery(), _delivery()
+    no_recipient = _delivery(recipient=None)
+
+    mock_delivery_queue = AsyncMock()
+    mock_delivery_queue.requeue_expired.return_value = 0
+    mock_delivery_queue.pop.return_value = [sent, rejected, unavailable, no_recipient]
+    mock_notification_history_repo = AsyncMock()
+    mock_notification_history_repo.find_pending.side_effect = lambda ids: ids
+    mock_notification_history_repo.resolve_pending.side_effect = (
+        lambda record_ids, status: record_ids
+    )
+    mock_notification_history_repo.increment_retries.side_effect = lambda ids: [
+        (record_id, 1) for record_id in ids
+    ]
+    mock_dispatcher = AsyncMock()
+    mock_dispatcher.send.return_value = [
+        DeliveryFailure(rejected, "550 No such user", retryable=False),
+        DeliveryFailure(unavailable, "Connection refused", retryable=True),
+    ]
+
+    use_case = _use_case(
+        mock_delivery_queue, mock_notification_history_repo, mock_dispatcher
+    )
+    response = await use_case.handle(
+        DeliverNotificationsRequest(
+            channel=NotificationChannel.EMAIL,
+            now=NOW,
+            limit=10,
+            retry_policy=RETRY_POLICY,
+        )
+    )
+
+    assert (response.popped, response.sent, response.failed) == (4, 1, 2)
+    mock_delivery_queue.pop.assert_called_once_with(NotificationChannel.EMAIL, NOW, 10)
+    # only the ones with a recipient reach the provider
+    mock_dispatcher.send.assert_called_once_with([sent, rejected, unavailable])
+
+    resolved = {
+        call.args[1]: call.args[0]
+        for call in mock_notification_history_repo.resolve_pending.call_args_list
+    }
+    assert resolved == {
+        NotificationStatus.SENT: [sent.record_id],
+        NotificationStatus.FAILED: [no_recipient.record_id, rejected.record_id],
+    }
+    assert set(response.done) == {sent, rejected, no_recipient}
+
+    mock_notification_history_repo.increment_retries.assert_called_once_with(
+        [unavailable.record_id]
+    )
+    ((leased, next_attempt),) = response.retried
+    assert leased == unavailable
+    assert next_attempt.retries == 1
+    assert next_attempt.record_id == unavailable.record_id
+    assert next_attempt.retry_at is not None
+    assert timedelta(seconds=15) <= next_attempt.retry_at - NOW <= timedelta(seconds=30)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    ("max_attempts", "retries", "failed"),
+    [(None, 2, False), (None, 3, True), (5, 3, False), (1, 1, True)],
+)
+async def test_handle__retryable_failure__failed_once_the_record_is_out_of_attempts(
+    max_attempts: int | None, retries: int, failed: bool
+):
+    # the queue's count is behind, e.g. the worker died before retrying it; the
+    # record's count after this attempt decides
+    delivery = replace(_delivery(), max_attempts=max_attempts, retries=0)
+
+    mock_delivery_queue = AsyncMock()
+    mock_delivery_queue.requeue_expired.return_value = 0
+    mock_delivery_queue.pop.return_value = [delivery]
+    mock_notification_history_repo = AsyncMock()
+    mock_notification_history_repo.find_pending.side_effect = lambda ids: ids
+    mock_notification_history_repo.resolve_pending.side_effect = (
+        lambda record_ids, status: record_ids
+    )
+    mock_notification_history_repo.increment_retries.side_effect = lambda ids: [
+        (record_id, retries) for record_id in ids
+    ]
+    mock_dispatcher = AsyncMock()
+    mock_dispatcher.send.return_value = [
+        DeliveryFailure(delivery, "503 Service unavailable", retryable=True)
+    ]
+
+    use_case = _use_case(
+        mock_delivery_queue, mock_notification_history_repo, mock_dispatcher
+    )
+    response = await use_case.handle(
+        DeliverNotificationsRequest(
+            channel=NotificationChannel.EMAIL,
+            now=NOW,
+            limit=10,
+            retry_policy=RETRY_POLICY,
+        )
+    )
+
+    assert response.failed == int(failed)
+    assert response.done == ([delivery] if failed else [])
+    assert [leased for leased, _ in response.retried] == ([] if failed else [delivery])
+    assert [attempt.retries for _, attempt in response.retried] == (
+        [] if failed else [retries]
+    )
+
+
+@pytest.mark.anyio
+async def test_handle__record_not_pending__not_sent_and_left_leased_for_a_while():
+    delivery = _delivery()
+    # e.g. the transaction that saved it has not committed yet
+    mock_delivery_queue = AsyncMock()
+    mock_delivery_queue.requeue_expired.return_value = 0
+    mock_delivery_queue.pop.return_value = [delivery]
+    mock_notification_history_repo = AsyncMock()
+    mock_notification_history_repo.find_pending.return_value = []
+    mock_notification_history_repo.resolve_pending.return_value = []
+    mock_notification_history_repo.increment_retries.return_value = []
+    mock_dispatcher = AsyncMock()
+
+    use_case = _use_case(
+        mock_delivery_queue, mock_notification_history_repo, mock_dispatcher
+    )
+
+    response = await use_case.handle(
+        DeliverNotificationsRequest(
+            channel=NotificationChannel.EMAIL,
+            now=NOW,
+            limit=10,
+            retry_policy=RETRY_POLICY,
+        )
+    )
+    assert (response.popped, response.sent, response.done) == (1, 0, [])
+    mock_dispatcher.send.assert_not_called()
+
+    response = await use_case.handle(
+        DeliverNotificationsRequest(
+            channel=NotificationChannel.EMAIL,
+            now=NOW + timedelta(hours=1),
+            limit=10,
+            retry_policy=RETRY_POLICY,
+        )
+    )
+    assert response.done == [delivery]
+
+
+@pytest.mark.anyio
+async def test_handle__nothing_queued__no_reads():
+    mock_delivery_queue = AsyncMock()
+    mock_delivery_queue.requeue_expired.return_value = 0
+    mock_delivery_queue.pop.return_value = []
+    mock_notification_history_repo = AsyncMock()
+
+    use_case = _use_case(
+        mock_delivery_queue, mock_notification_history_repo, AsyncMock()
+    )
+    response = await use_case.handle(
+        DeliverNotificationsRequest(
+            channel=NotificationChannel.EMAIL,
+            now=NOW,
+            limit=10,
+            retry_policy=RETRY_POLICY,
+        )
+    )
+
+    assert response.popped == 0
+    mock_notification_history_repo.find_pending.assert_not_called()
@@ -0,0 +1,71 @@
+import re
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from app.queue import Delivery
+from domain import Event, Notification
+from domain.notification import NotificationChannel
+
+_VARIABLE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+def is_deliverable(notification: Notification | None) -> bool:
+    """
+    Private notifications are internal only, and ones without a definition in
+    notifications.yaml have nothing to send; both are SENT once created
+    """
+    return notification is not None and not notification.private
+
+
+def render_delivery(
+    record_id: UUID,
+    notification: Notification,
+    event: Event,
+    queued_at: datetime,
+    max_attempts: int | None = None,
+) -> Delivery:
+    return Delivery(
+        record_id=record_id,
+        notification_type=notification.type,
+        channel=notification.channel,
+        recipient=_recipient(notification.channel, event),
+        text=render_text(notification.text, event),
+        queued_at=queued_at,
+        max_attempts=max_attempts,
+    )
+
+
+def render_text(template: str, event: Event) -> str:
+    """
+    Fills {{variable}} from the event; variables it does not have are left as they
+    are, so a template out of step with the events shows in what is sent
+    """
+    variables: dict[str, Any] = {
+        "user_id": event.user_id,
+        "event_type": event.type,
+        "event_timestamp": event.event_timestamp.isoformat(),
+        **(event.user_traits or {}),
+        **(event.properties or {}),
+    }
+
+    def substitute(match: re.Match[str]) -> str:
+        name = match.group(1)
+        if name not in variables or variables[name] is None:
+            return match.group(0)
+        return str(variables[name])
+
+    return _VARIABLE.sub(substitute, template)
+
+
+def _recipient(channel: NotificationChannel, event: Event) -> str | None:
+    user_traits = event.user_traits or {}
+    match channel:
+        case NotificationChannel.EMAIL:
+            recipient = user_traits.get("email")
+        case NotificationChannel.SMS:
+            recipient = user_traits.get("phone")
+        case NotificationChannel.PIDGEON:
+            # pigeons find the user by their id
+            recipient = event.user_id
+    return str(recipient) if recipient else None
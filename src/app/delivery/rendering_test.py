@@ -0,0 +1,61 @@
+from datetime import UTC, datetime
+from uuid import uuid4
+
+from app.delivery.rendering import is_deliverable, render_delivery
+from domain import Event, Notification
+from domain.notification import NotificationChannel
+
+NOW = datetime.now(UTC)
+
+
+def _event() -> Event:
+    event = Event()
+    event.id = uuid4()
+    event.user_id = "u_12345"
+    event.type = "payment_failed"
+    event.event_timestamp = NOW
+    event.event_date = NOW.date()
+    event.properties = {"amount": 1425.0, "currency": "USD"}
+    event.user_traits = {"email": "maria@example.com"}
+    return event
+
+
+def _notification(
+    channel: NotificationChannel = NotificationChannel.EMAIL, private: bool = False
+) -> Notification:
+    notification = Notification()
+    notification.type = "INSUFFICIENT_FUNDS_EMAIL"
+    notification.private = private
+    notification.channel = channel
+    notification.text = "Your payment of {{amount}} {{ currency }} failed ({{reason}})"
+    return notification
+
+
+def test_render_delivery__variables_from_the_event_unknown_ones_left_as_they_are():
+    record_id = uuid4()
+
+    delivery = render_delivery(record_id, _notification(), _event(), NOW)
+
+    assert delivery.record_id == record_id
+    assert delivery.notification_type == "INSUFFICIENT_FUNDS_EMAIL"
+    assert delivery.channel is NotificationChannel.EMAIL
+    assert delivery.recipient == "maria@example.com"
+    assert delivery.text == "Your payment of 1425.0 USD failed ({{reason}})"
+    assert delivery.queued_at == NOW
+
+
+def test_render_delivery__recipient_by_channel():
+    event = _event()
+
+    assert (
+        render_delivery(uuid4(), _notification(NotificationChannel.SMS), event, NOW)
+    ).recipient is None
+    assert (
+        render_delivery(uuid4(), _notification(NotificationChannel.PIDGEON), event, NOW)
+    ).recipient == "u_12345"
+
+
+def test_is_deliverable__private_or_undefined__not_deliverable():
+    assert is_deliverable(_notification())
+    assert not is_deliverable(_notification(private=True))
+    assert not is_deliverable(None)
@@ -0,0 +1,25 @@
+import random
+from dataclasses import dataclass
+from datetime import timedelta
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    How a channel retries deliveries its provider could not take: up to
+    max_attempts in all, each retry waiting twice as long as the one before, from
+    base_backoff up to max_backoff
+    """
+
+    max_attempts: int
+    base_backoff: timedelta
+    max_backoff: timedelta
+
+    def backoff(self, retries: int) -> timedelta:
+        """
+        Before retry number `retries` + 1; jittered between half and all of it, so
+        the deliveries that failed together during an outage do not all come back at
+        the same moment
+        """
+        ceiling = min(self.max_backoff, self.base_backoff * 2 ** min(retries, 32))
+        return ceiling * random.uniform(0.5, 1.0)
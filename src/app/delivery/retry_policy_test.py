@@ -0,0 +1,15 @@
+from datetime import timedelta
+
+from app.delivery import RetryPolicy
+
+
+def test_backoff__doubles_jittered_up_to_the_max():
+    policy = RetryPolicy(
+        max_attempts=3,
+        base_backoff=timedelta(seconds=30),
+        max_backoff=timedelta(minutes=10),
+    )
+
+    for retries, ceiling in [(0, 30), (1, 60), (4, 480), (5, 600), (1000, 600)]:
+        backoff = policy.backoff(retries)
+        assert timedelta(seconds=ceiling / 2) <= backoff <= timedelta(seconds=ceiling)
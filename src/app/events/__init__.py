@@ -1,7 +1,17 @@
+from .exceptions import UnsupportedMediaTypeException
 from .save_events_usecase import (
+    QueueEventsRequest,
+    QueueEventsUseCase,
     SaveEventsRequest,
     SaveEventsResponse,
     SaveEventsUseCase,
 )
 
-__all__ = ["SaveEventsRequest", "SaveEventsResponse", "SaveEventsUseCase"]
+__all__ = [
+    "QueueEventsRequest",
+    "QueueEventsUseCase",
+    "SaveEventsRequest",
+    "SaveEventsResponse",
+    "SaveEventsUseCase",
+    "UnsupportedMediaTypeException",
+]
@@ -0,0 +1,15 @@
+from collections.abc import Sequence
+from http import HTTPStatus
+
+from app.exceptions import WebApplicationException
+
+
+class UnsupportedMediaTypeException(WebApplicationException):
+    def __init__(self, media_type: str, supported: Sequence[str]) -> None:
+        super().__init__(
+            "E_UNSUPPORTED_MEDIA_TYPE",
+            f"Unsupported media type {media_type!r}, expected one of: "
+            f"{', '.join(supported)}",
+            HTTPStatus.UNSUPPORTED_MEDIA_TYPE,
+        )
+        self.media_type = media_type
@@ -10,6 +10,9 @@ from domain import Event
 @dataclass
 class SaveEventsRequest:
     events: list[Event]
+    # False to only save them, for the caller to queue them with QueueEventsUseCase
+    # once the transaction saving them has committed
+    queue: bool = True
 
 
 @dataclass
@@ -28,6 +31,11 @@ class SaveEventsUseCase(UseCase[SaveEventsRequest, SaveEventsResponse]):
         self.event_queue = event_queue
 
     async def handle(self, request: SaveEventsRequest) -> SaveEventsResponse:
+        if not request.queue:
+            return SaveEventsResponse(
+                saved_count=await self.event_repository.save_all(request.events)
+            )
+
         save_all_task = self.event_repository.save_all(request.events)
         events_received_task = self.event_queue.events_received(request.events)
         (saved_count, queue_ex) = await asyncio.gather(
@@ -41,3 +49,21 @@ class SaveEventsUseCase(UseCase[SaveEventsRequest, SaveEventsResponse]):
 
         assert isinstance(saved_count, int)
         return SaveEventsResponse(saved_count=saved_count)
+
+
+@dataclass
+class QueueEventsRequest:
+    events: list[Event]
+
+
+class QueueEventsUseCase(UseCase[QueueEventsRequest, None]):
+    """
+    Hands events already saved, and committed, to the workers
+    """
+
+    def __init__(self, event_queue: EventQueue) -> None:
+        super().__init__()
+        self.event_queue = event_queue
+
+    async def handle(self, request: QueueEventsRequest) -> None:
+        await self.event_queue.events_received(request.events)
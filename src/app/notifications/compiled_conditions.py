@@ -0,0 +1,231 @@
+import operator
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any
+
+from domain import Event
+from domain.notification_rule import (
+    EventCondition,
+    EventProximity,
+    LogicOperator,
+    PropertyMatch,
+    PropertyOperator,
+)
+
+# event attributes a property_xpath may start with (mirrors Event.to_dict)
+PROPERTY_ROOTS = ("properties", "user_traits")
+
+# returned by accessors when the path does not exist in the event
+MISSING: Any = object()
+
+_NUMERIC_OPERATORS: dict[PropertyOperator, Callable[[float, float], bool]] = {
+    PropertyOperator.GT: operator.gt,
+    PropertyOperator.GTE: operator.ge,
+    PropertyOperator.LT: operator.lt,
+    PropertyOperator.LTE: operator.le,
+}
+
+type PropertyAccessor = Callable[[Event], Any]
+
+
+def compile_property_accessor(property_xpath: str) -> PropertyAccessor:
+    """
+    Turns "user_traits.marketing_opt_in" into a function doing plain dict lookups
+    """
+    root, *path = property_xpath.split(".")
+    if root not in PROPERTY_ROOTS or not path or not all(path):
+        raise ValueError(
+            f"property_xpath must look like '<{'|'.join(PROPERTY_ROOTS)}>.key[.key...]', got {property_xpath!r}"
+        )
+
+    if len(path) == 1:
+        (key,) = path
+
+        def single_key_accessor(event: Event) -> Any:
+            value = getattr(event, root)
+            if isinstance(value, dict):
+                return value.get(key, MISSING)
+            return MISSING
+
+        return single_key_accessor
+
+    def nested_accessor(event: Event) -> Any:
+        value = getattr(event, root)
+        for key in path:
+            if not isinstance(value, dict) or key not in value:
+                return MISSING
+            value = value[key]
+        return value
+
+    return nested_accessor
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledPropertyMatch:
+    property_match: PropertyMatch
+    accessor: PropertyAccessor
+
+    # the configured value, already lowercased (EQ) or cast to float (numeric)
+    operand: str | float
+
+    def matches(self, event: Event) -> bool:
+        actual = self.accessor(event)
+        if actual is MISSING:
+            return False
+
+        if self.property_match.operator is PropertyOperator.EQ:
+            return str(actual).lower() == self.operand
+
+        # not a number to the database either, where the same match runs as jsonpath
+        if isinstance(actual, bool):
+            return False
+        try:
+            actual_number = float(actual)
+        except TypeError, ValueError:
+            return False
+        return _NUMERIC_OPERATORS[self.property_match.operator](
+            actual_number, self.operand
+        )
+
+
+def compile_property_match(property_match: PropertyMatch) -> CompiledPropertyMatch:
+    if property_match.operator is PropertyOperator.EQ:
+        operand: str | float = str(property_match.value).lower()
+    elif property_match.operator in _NUMERIC_OPERATORS:
+        operand = float(property_match.value)
+    else:
+        raise NotImplementedError(
+            f"Sorry, PropertyOperator {property_match.operator.name} is not supported for now"
+        )
+
+    return CompiledPropertyMatch(
+        property_match=property_match,
+        accessor=compile_property_accessor(property_match.property_xpath),
+        operand=operand,
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledEventProximity:
+    event_proximity: EventProximity
+
+    # what the proximate event must match, checked by the events query itself
+    property_matches: tuple[CompiledPropertyMatch, ...]
+
+    # equal for the proximities looking for the same events, to share their lookups
+    key: tuple
+
+    @property
+    def event_type(self) -> str:
+        return self.event_proximity.event_type
+
+    @property
+    def time_proximity(self) -> timedelta | None:
+        return self.event_proximity.time_proximity
+
+
+def compile_event_proximity(event_proximity: EventProximity) -> CompiledEventProximity:
+    property_matches = tuple(
+        compile_property_match(property_match)
+        for property_match in _flatten_property_matches(
+            event_proximity.event_conditions
+        )
+    )
+    return CompiledEventProximity(
+        event_proximity=event_proximity,
+        property_matches=property_matches,
+        key=(
+            event_proximity.event_type,
+            *(
+                (
+                    match.property_match.property_xpath,
+                    match.property_match.operator,
+                    match.operand,
+                )
+                for match in property_matches
+            ),
+        ),
+    )
+
+
+def _flatten_property_matches(conditions: list[EventCondition]) -> list[PropertyMatch]:
+    """
+    The conditions of a proximate event boil down to property matches that must all
+    hold, so they can be handed to the database
+    """
+    property_matches = []
+    for condition in conditions:
+        if condition.event_proximity:
+            raise NotImplementedError(
+                "Sorry, event proximity of a proximate event isn't supported for now"
+            )
+        if condition.property_match:
+            property_matches.append(condition.property_match)
+        if condition.event_logic:
+            if condition.event_logic.logic is not LogicOperator.AND:
+                raise NotImplementedError(
+                    "Sorry, the only supported LogicOperator for now is AND"
+                )
+            property_matches.extend(
+                _flatten_property_matches(condition.event_logic.event_conditions)
+            )
+    return property_matches
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledEventLogic:
+    logic: LogicOperator
+    event_conditions: list[CompiledEventCondition]
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledEventCondition:
+    property_match: CompiledPropertyMatch | None
+    event_proximity: CompiledEventProximity | None
+    event_logic: CompiledEventLogic | None
+
+
+def compile_event_conditions(
+    conditions: list[EventCondition],
+) -> list[CompiledEventCondition]:
+    compiled = []
+    for condition in conditions:
+        event_logic = None
+        if condition.event_logic:
+            event_logic = CompiledEventLogic(
+                logic=condition.event_logic.logic,
+                event_conditions=compile_event_conditions(
+                    condition.event_logic.event_conditions
+                ),
+            )
+
+        compiled.append(
+            CompiledEventCondition(
+                property_match=compile_property_match(condition.property_match)
+                if condition.property_match
+                else None,
+                event_proximity=compile_event_proximity(condition.event_proximity)
+                if condition.event_proximity
+                else None,
+                event_logic=event_logic,
+            )
+        )
+    return compiled
+
+
+def collect_proximities(
+    conditions: list[CompiledEventCondition],
+) -> list[CompiledEventProximity]:
+    """
+    Every event proximity of the conditions, including the ones inside event logic
+    """
+    proximities = []
+    for condition in conditions:
+        if condition.event_proximity:
+            proximities.append(condition.event_proximity)
+        if condition.event_logic:
+            proximities.extend(
+                collect_proximities(condition.event_logic.event_conditions)
+            )
+    return proximities
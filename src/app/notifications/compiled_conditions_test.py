@@ -0,0 +1,168 @@
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+
+from app.notifications.compiled_conditions import (
+    MISSING,
+    compile_event_proximity,
+    compile_property_accessor,
+    compile_property_match,
+)
+from domain import Event
+from domain.notification_rule import (
+    EventCondition,
+    EventLogic,
+    EventProximity,
+    LogicOperator,
+    PropertyMatch,
+    PropertyOperator,
+)
+
+
+def _event(properties: dict, user_traits: dict) -> Event:
+    now = datetime.now(UTC)
+    return Event(
+        id=uuid4(),
+        user_id="u_12345",
+        type="payment_failed",
+        event_timestamp=now,
+        event_date=now.date(),
+        properties=properties,
+        user_traits=user_traits,
+    )
+
+
+def test_compile_property_accessor__reads_nested_paths():
+    event = _event({"card": {"brand": "visa"}}, {"country": "PT"})
+
+    assert compile_property_accessor("properties.card.brand")(event) == "visa"
+    assert compile_property_accessor("user_traits.country")(event) == "PT"
+    assert compile_property_accessor("properties.card.missing")(event) is MISSING
+    assert compile_property_accessor("user_traits.country.code")(event) is MISSING
+
+
+@pytest.mark.parametrize(
+    "property_xpath", ["user_id", "properties", "event.properties.a", "properties..a"]
+)
+def test_compile_property_accessor__rejects_unsupported_paths(property_xpath: str):
+    with pytest.raises(ValueError):
+        compile_property_accessor(property_xpath)
+
+
+def test_compile_property_match__eq_is_case_insensitive_string_compare():
+    match = compile_property_match(
+        PropertyMatch(
+            property_xpath="user_traits.marketing_opt_in",
+            value="true",
+            operator=PropertyOperator.EQ,
+        )
+    )
+
+    assert match.operand == "true"
+    assert match.matches(_event({}, {"marketing_opt_in": True}))
+    assert match.matches(_event({}, {"marketing_opt_in": "TRUE"}))
+    assert not match.matches(_event({}, {"marketing_opt_in": False}))
+    assert not match.matches(_event({}, {}))
+
+
+@pytest.mark.parametrize(
+    ("operator", "attempt_number", "expected"),
+    [
+        (PropertyOperator.GTE, 3, True),
+        (PropertyOperator.GTE, 2, False),
+        (PropertyOperator.GT, 3, False),
+        (PropertyOperator.LT, 2, True),
+        (PropertyOperator.LTE, "3", True),
+        (PropertyOperator.GTE, "not a number", False),
+        (PropertyOperator.GTE, None, False),
+        (PropertyOperator.LT, True, False),
+    ],
+)
+def test_compile_property_match__numeric_operators_cast_to_float(
+    operator: PropertyOperator, attempt_number, expected: bool
+):
+    match = compile_property_match(
+        PropertyMatch(
+            property_xpath="properties.attempt_number", value="3", operator=operator
+        )
+    )
+
+    assert match.operand == 3.0
+    assert match.matches(_event({"attempt_number": attempt_number}, {})) is expected
+
+
+def test_compile_property_match__unsupported_operator__fails_at_compile_time():
+    with pytest.raises(NotImplementedError):
+        compile_property_match(
+            PropertyMatch(
+                property_xpath="properties.currency",
+                value=["EUR"],
+                operator=PropertyOperator.IN,
+            )
+        )
+
+
+def _proximity(event_conditions: list[EventCondition]) -> EventProximity:
+    return EventProximity(
+        event_type="signup_completed",
+        time_proximity=timedelta(days=1),
+        event_conditions=event_conditions,
+    )
+
+
+def _condition(
+    property_match: PropertyMatch | None = None,
+    event_proximity: EventProximity | None = None,
+    event_logic: EventLogic | None = None,
+) -> EventCondition:
+    return EventCondition(
+        property_match=property_match,
+        event_proximity=event_proximity,
+        event_logic=event_logic,
+    )
+
+
+def test_compile_event_proximity__and_logic_flattened_into_property_matches():
+    country = PropertyMatch(
+        property_xpath="user_traits.country", value="PT", operator=PropertyOperator.EQ
+    )
+    age = PropertyMatch(
+        property_xpath="user_traits.age", value=18, operator=PropertyOperator.GTE
+    )
+
+    proximity = compile_event_proximity(
+        _proximity(
+            [
+                _condition(property_match=country),
+                _condition(
+                    event_logic=EventLogic(
+                        logic=LogicOperator.AND,
+                        event_conditions=[_condition(property_match=age)],
+                    )
+                ),
+            ]
+        )
+    )
+
+    assert [m.property_match for m in proximity.property_matches] == [country, age]
+    assert proximity.key == (
+        "signup_completed",
+        ("user_traits.country", PropertyOperator.EQ, "pt"),
+        ("user_traits.age", PropertyOperator.GTE, 18.0),
+    )
+    assert compile_event_proximity(_proximity([])).key == ("signup_completed",)
+
+
+@pytest.mark.parametrize(
+    "condition",
+    [
+        _condition(event_proximity=_proximity([])),
+        _condition(event_logic=EventLogic(logic=LogicOperator.OR, event_conditions=[])),
+    ],
+)
+def test_compile_event_proximity__unsupported_nested_conditions__fail_at_compile_time(
+    condition: EventCondition,
+):
+    with pytest.raises(NotImplementedError):
+        compile_event_proximity(_proximity([condition]))
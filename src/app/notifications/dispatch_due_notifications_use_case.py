@@ -0,0 +1,277 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from app.delivery.rendering import is_deliverable, render_delivery
+from app.notifications.notification_rules_engine import (
+    CompiledNotificationRule,
+    NotificationRulesEngine,
+)
+from app.notifications.notification_rules_relay import NotificationRulesRelay
+from app.persistence.event_repository import EventRepository
+from app.persistence.notification_history_record_repository import (
+    NotificationHistoryRecordRepository,
+)
+from app.queue import (
+    DelayedNotification,
+    DelayedNotificationQueue,
+    Delivery,
+    DeliveryQueue,
+)
+from app.usecase import UseCase
+from domain import Event, NotificationStatus
+
+# a record still not PENDING this long after it was due got resolved by an earlier
+# attempt, or its transaction was rolled back; either way there is nothing left to do
+UNRESOLVED_GIVE_UP_AFTER = timedelta(minutes=5)
+
+
+@dataclass
+class DispatchDueNotificationsRequest:
+    now: datetime
+    limit: int
+
+
+@dataclass
+class DispatchDueNotificationsResponse:
+    popped: int
+    sent: int
+    suppressed: int
+    requeued: int
+    # handed to the delivery workers, still PENDING until they send them
+    queued: int = 0
+
+    # to ack once the transaction is committed, until then they stay leased
+    done: list[DelayedNotification] = field(default_factory=list)
+
+
+class DispatchDueNotificationsUseCase(
+    UseCase[DispatchDueNotificationsRequest, DispatchDueNotificationsResponse]
+):
+    """
+    Resolves a batch of due delayed notifications: PENDING records are queued for
+    delivery (or become SENT when there is nothing to deliver), or SUPPRESSED when
+    their rule asks for a recheck and the conditions no longer hold
+    """
+
+    def __init__(
+        self,
+        event_repository: EventRepository,
+        notification_history_record_repository: NotificationHistoryRecordRepository,
+        notification_rules_engine: NotificationRulesEngine,
+        delayed_notification_queue: DelayedNotificationQueue,
+        delivery_queue: DeliveryQueue,
+    ) -> None:
+        super().__init__()
+        self.event_repository = event_repository
+        self.notification_history_record_repository = (
+            notification_history_record_repository
+        )
+        self.notification_rules_engine = notification_rules_engine
+        self.delayed_notification_queue = delayed_notification_queue
+        self.delivery_queue = delivery_queue
+        # the dispatcher sees no events, so there is no recent events index to use
+        self.relay = NotificationRulesRelay(
+            event_repo=event_repository,
+            notification_history_repo=notification_history_record_repository,
+            rules_engine=notification_rules_engine,
+        )
+
+    async def handle(
+        self, request: DispatchDueNotificationsRequest
+    ) -> DispatchDueNotificationsResponse:
+        queue = self.delayed_notification_queue
+        requeued = await queue.requeue_expired(request.now)
+        due = await queue.pop_due(request.now, request.limit)
+
+        # (status, suppressed because) -> notifications
+        outcomes: defaultdict[
+            tuple[NotificationStatus, str | None], list[DelayedNotification]
+        ] = defaultdict(list)
+        rules: dict[DelayedNotification, CompiledNotificationRule] = {}
+
+        for notification in due:
+            compiled_rule = self.notification_rules_engine.rule_for(
+                notification.trigger, notification.notification_type
+            )
+            if compiled_rule is None:
+                outcomes[
+                    (
+                        NotificationStatus.SUPPRESSED,
+                        f"Rule for {notification.notification_type} upon {notification.trigger} no longer exists",
+                    )
+                ].append(notification)
+            else:
+                rules[notification] = compiled_rule
+
+        # rechecks look at the event, and deliveries fill their text in from it
+        events = await self._find_events(
+            [
+                notification
+                for notification, compiled_rule in rules.items()
+                if compiled_rule.rule.recheck
+                or is_deliverable(compiled_rule.notification)
+            ]
+        )
+
+        to_send = [
+            notification
+            for notification, compiled_rule in rules.items()
+            if not compiled_rule.rule.recheck
+        ]
+        for notification, still_matches in await self._recheck(
+            [
+                (notification, compiled_rule)
+                for notification, compiled_rule in rules.items()
+                if compiled_rule.rule.recheck
+            ],
+            events,
+        ):
+            if still_matches is None:
+                outcomes[
+                    (NotificationStatus.SUPPRESSED, "Triggering event not found")
+                ].append(notification)
+            elif still_matches:
+                to_send.append(notification)
+            else:
+                outcomes[
+                    (
+                        NotificationStatus.SUPPRESSED,
+                        "Event conditions no longer met after the delay",
+                    )
+                ].append(notification)
+
+        to_deliver: list[
+            tuple[DelayedNotification, CompiledNotificationRule, Event]
+        ] = []
+        for notification in to_send:
+            definition = rules[notification].notification
+            if definition is None or not is_deliverable(definition):
+                outcomes[(NotificationStatus.SENT, None)].append(notification)
+            elif notification.event_id not in events:
+                outcomes[
+                    (NotificationStatus.SUPPRESSED, "Triggering event not found")
+                ].append(notification)
+            else:
+                to_deliver.append(
+                    (notification, rules[notification], events[notification.event_id])
+                )
+
+        response = DispatchDueNotificationsResponse(
+            popped=len(due), sent=0, suppressed=0, requeued=requeued
+        )
+        for (status, suppressed_because), notifications in outcomes.items():
+            resolved = set(
+                await self.notification_history_record_repository.resolve_pending(
+                    [notification.record_id for notification in notifications],
+                    status,
+                    suppressed_because,
+                )
+            )
+            if status is NotificationStatus.SENT:
+                response.sent += len(resolved)
+            else:
+                response.suppressed += len(resolved)
+
+            # the rest stay leased, so they are retried once the lease expires
+            response.done.extend(
+                notification
+                for notification in notifications
+                if notification.record_id in resolved
+                or request.now - notification.due_at > UNRESOLVED_GIVE_UP_AFTER
+            )
+
+        queued = await self._queue_deliveries(to_deliver)
+        response.queued = len(queued)
+        response.done.extend(
+            notification
+            for notification, _, _ in to_deliver
+            if notification.record_id in queued
+            or request.now - notification.due_at > UNRESOLVED_GIVE_UP_AFTER
+        )
+
+        return response
+
+    async def _find_events(
+        self, notifications: list[DelayedNotification]
+    ) -> dict[UUID, Event]:
+        if not notifications:
+            return {}
+
+        return {
+            event.id: event
+            for event in await self.event_repository.find_by_keys(
+                list(
+                    dict.fromkeys(
+                        (notification.event_id, notification.event_date)
+                        for notification in notifications
+                    )
+                )
+            )
+        }
+
+    async def _recheck(
+        self,
+        to_recheck: list[tuple[DelayedNotification, CompiledNotificationRule]],
+        events: dict[UUID, Event],
+    ) -> list[tuple[DelayedNotification, bool | None]]:
+        """
+        Whether the conditions still hold, None when the event is gone
+        """
+        if not to_recheck:
+            return []
+
+        found = [
+            (notification, events[notification.event_id], compiled_rule)
+            for notification, compiled_rule in to_recheck
+            if notification.event_id in events
+        ]
+        results = await self.relay.recheck_batch(
+            [(event, compiled_rule) for _, event, compiled_rule in found]
+        )
+
+        return [
+            (notification, None)
+            for notification, _ in to_recheck
+            if notification.event_id not in events
+        ] + [
+            (notification, still_matches)
+            for (notification, _, _), still_matches in zip(found, results, strict=True)
+        ]
+
+    async def _queue_deliveries(
+        self,
+        to_deliver: list[tuple[DelayedNotification, CompiledNotificationRule, Event]],
+    ) -> set[UUID]:
+        """
+        Queues the notifications whose records are PENDING for delivery, returns
+        their record ids; the records stay PENDING until the delivery workers send them
+        """
+        if not to_deliver:
+            return set()
+
+        pending = set(
+            await self.notification_history_record_repository.find_pending(
+                [notification.record_id for notification, _, _ in to_deliver]
+            )
+        )
+        deliveries: list[Delivery] = []
+        for notification, compiled_rule, event in to_deliver:
+            if notification.record_id not in pending:
+                continue
+            assert compiled_rule.notification is not None
+            deliveries.append(
+                # queued as of when it was due, so queuing it again after a crash is
+                # a no-op rather than a second delivery
+                render_delivery(
+                    notification.record_id,
+                    compiled_rule.notification,
+                    event,
+                    notification.due_at,
+                    compiled_rule.rule.max_delivery_attempts,
+                )
+            )
+        if deliveries:
+            await self.delivery_queue.push(deliveries)
+        return {delivery.record_id for delivery in deliveries}
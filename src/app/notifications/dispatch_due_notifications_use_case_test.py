@@ -0,0 +1,250 @@
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+
+from app.notifications.dispatch_due_notifications_use_case import (
+    DispatchDueNotificationsRequest,
+    DispatchDueNotificationsUseCase,
+)
+from app.notifications.notification_rules_engine import NotificationRulesEngine
+from app.queue import DelayedNotification
+from domain import Event, NotificationRule, NotificationStatus
+from domain.notification_rule import EventCondition, EventProximity
+from infrastructure.staticyaml import StaticNotificationRepository
+
+NOW = datetime.now(UTC)
+
+
+def _rule(notification_type: str, recheck: bool) -> NotificationRule:
+    return NotificationRule(
+        notification_type=notification_type,
+        event_type="signup_completed",
+        event_conditions=[
+            EventCondition(
+                property_match=None,
+                event_proximity=EventProximity(
+                    event_type="link_bank_success",
+                    time_proximity=timedelta(days=1),
+                    event_conditions=[],
+                ),
+                event_logic=None,
+            )
+        ],
+        delay=timedelta(hours=1),
+        recheck=recheck,
+    )
+
+
+def _event() -> Event:
+    event = Event()
+    event.id = uuid4()
+    event.user_id = "u_12345"
+    event.type = "signup_completed"
+    event.event_timestamp = NOW - timedelta(hours=1)
+    event.event_date = event.event_timestamp.date()
+    event.properties = {}
+    event.user_traits = {}
+    return event
+
+
+def _delayed(notification_type: str, event: Event) -> DelayedNotification:
+    return DelayedNotification(
+        record_id=uuid4(),
+        notification_type=notification_type,
+        trigger="signup_completed",
+        event_id=event.id,
+        event_date=event.event_date,
+        due_at=NOW,
+    )
+
+
+async def _use_case(
+    mock_event_repo: AsyncMock,
+    mock_notification_history_repo: AsyncMock,
+    mock_delayed_notification_queue: AsyncMock,
+    mock_delivery_queue: AsyncMock | None = None,
+) -> DispatchDueNotificationsUseCase:
+    return DispatchDueNotificationsUseCase(
+        event_repository=mock_event_repo,
+        notification_history_record_repository=mock_notification_history_repo,
+        notification_rules_engine=NotificationRulesEngine(
+            notification_rules=[
+                _rule("BANK_LINK_NUDGE_SMS", recheck=True),
+                _rule("WELCOME_EMAIL", recheck=False),
+                _rule("HIGH_RISK_ALERT", recheck=False),
+            ],
+            notifications=await StaticNotificationRepository().get_all(),
+        ),
+        delayed_notification_queue=mock_delayed_notification_queue,
+        delivery_queue=mock_delivery_queue or AsyncMock(),
+    )
+
+
+@pytest.mark.anyio
+async def test_handle__recheck_fails__suppressed_while_no_recheck_is_queued():
+    event = _event()
+    rechecked = _delayed("BANK_LINK_NUDGE_SMS", event)
+    not_rechecked = _delayed("WELCOME_EMAIL", event)
+
+    mock_event_repo = AsyncMock()
+    mock_event_repo.find_by_keys.return_value = [event]
+    # no link_bank_success since the signup
+    mock_event_repo.find_latest_timestamps_by_users.return_value = {}
+    mock_notification_history_repo = AsyncMock()
+    mock_notification_history_repo.resolve_pending.side_effect = (
+        lambda record_ids, status, suppressed_because: record_ids
+    )
+    mock_notification_history_repo.find_pending.side_effect = lambda ids: ids
+    mock_delayed_notification_queue = AsyncMock()
+    mock_delayed_notification_queue.requeue_expired.return_value = 0
+    mock_delayed_notification_queue.pop_due.return_value = [rechecked, not_rechecked]
+    mock_delivery_queue = AsyncMock()
+
+    use_case = await _use_case(
+        mock_event_repo,
+        mock_notification_history_repo,
+        mock_delayed_notification_queue,
+        mock_delivery_queue,
+    )
+    response = await use_case.handle(DispatchDueNotificationsRequest(now=NOW, limit=10))
+
+    assert (response.popped, response.sent, response.suppressed) == (2, 0, 1)
+    assert response.queued == 1
+    assert set(response.done) == {rechecked, not_rechecked}
+    # the event is read once, for both the recheck and the delivery
+    mock_event_repo.find_by_keys.assert_called_once_with([(event.id, event.event_date)])
+
+    mock_notification_history_repo.resolve_pending.assert_called_once_with(
+        [rechecked.record_id],
+        NotificationStatus.SUPPRESSED,
+        "Event conditions no longer met after the delay",
+    )
+    (delivery,) = mock_delivery_queue.push.call_args[0][0]
+    assert (delivery.record_id, delivery.notification_type) == (
+        not_rechecked.record_id,
+        "WELCOME_EMAIL",
+    )
+    assert delivery.queued_at == not_rechecked.due_at
+
+
+@pytest.mark.anyio
+async def test_handle__recheck_passes__queued_for_delivery():
+    event = _event()
+    rechecked = _delayed("BANK_LINK_NUDGE_SMS", event)
+
+    mock_event_repo = AsyncMock()
+    mock_event_repo.find_by_keys.return_value = [event]
+    mock_event_repo.find_latest_timestamps_by_users.return_value = {
+        "u_12345": NOW - timedelta(minutes=30)
+    }
+    mock_notification_history_repo = AsyncMock()
+    mock_notification_history_repo.find_pending.return_value = [rechecked.record_id]
+    mock_delayed_notification_queue = AsyncMock()
+    mock_delayed_notification_queue.requeue_expired.return_value = 0
+    mock_delayed_notification_queue.pop_due.return_value = [rechecked]
+    mock_delivery_queue = AsyncMock()
+
+    use_case = await _use_case(
+        mock_event_repo,
+        mock_notification_history_repo,
+        mock_delayed_notification_queue,
+        mock_delivery_queue,
+    )
+    response = await use_case.handle(DispatchDueNotificationsRequest(now=NOW, limit=10))
+
+    assert (response.sent, response.suppressed, response.queued) == (0, 0, 1)
+    assert response.done == [rechecked]
+    # still PENDING, until the delivery workers send it
+    mock_notification_history_repo.resolve_pending.assert_not_called()
+    (delivery,) = mock_delivery_queue.push.call_args[0][0]
+    assert delivery.record_id == rechecked.record_id
+
+
+@pytest.mark.anyio
+async def test_handle__record_not_pending_yet__left_leased_for_a_retry():
+    event = _event()
+    delayed = _delayed("WELCOME_EMAIL", event)
+    mock_event_repo = AsyncMock()
+    mock_event_repo.find_by_keys.return_value = [event]
+    # e.g. the transaction that saved it has not committed yet
+    mock_notification_history_repo = AsyncMock()
+    mock_notification_history_repo.find_pending.return_value = []
+    mock_delayed_notification_queue = AsyncMock()
+    mock_delayed_notification_queue.requeue_expired.return_value = 0
+    mock_delayed_notification_queue.pop_due.return_value = [delayed]
+    mock_delivery_queue = AsyncMock()
+
+    use_case = await _use_case(
+        mock_event_repo,
+        mock_notification_history_repo,
+        mock_delayed_notification_queue,
+        mock_delivery_queue,
+    )
+
+    response = await use_case.handle(DispatchDueNotificationsRequest(now=NOW, limit=10))
+    assert (response.popped, response.queued, response.done) == (1, 0, [])
+    mock_delivery_queue.push.assert_not_called()
+
+    response = await use_case.handle(
+        DispatchDueNotificationsRequest(now=NOW + timedelta(hours=1), limit=10)
+    )
+    assert response.done == [delayed]
+
+
+@pytest.mark.anyio
+async def test_handle__rule_or_event_gone__suppressed():
+    event = _event()
+    rule_gone = _delayed("REMOVED_NOTIFICATION", event)
+    event_gone = _delayed("BANK_LINK_NUDGE_SMS", event)
+
+    mock_event_repo = AsyncMock()
+    mock_event_repo.find_by_keys.return_value = []
+    mock_notification_history_repo = AsyncMock()
+    mock_notification_history_repo.resolve_pending.side_effect = (
+        lambda record_ids, status, suppressed_because: record_ids
+    )
+    mock_delayed_notification_queue = AsyncMock()
+    mock_delayed_notification_queue.requeue_expired.return_value = 0
+    mock_delayed_notification_queue.pop_due.return_value = [rule_gone, event_gone]
+
+    use_case = await _use_case(
+        mock_event_repo, mock_notification_history_repo, mock_delayed_notification_queue
+    )
+    response = await use_case.handle(DispatchDueNotificationsRequest(now=NOW, limit=10))
+
+    assert (response.sent, response.suppressed) == (0, 2)
+    assert all(
+        call.args[1] is NotificationStatus.SUPPRESSED and call.args[2]
+        for call in mock_notification_history_repo.resolve_pending.call_args_list
+    )
+
+
+@pytest.mark.anyio
+async def test_handle__private_notification__sent_without_delivery():
+    event = _event()
+    delayed = _delayed("HIGH_RISK_ALERT", event)
+
+    mock_event_repo = AsyncMock()
+    mock_notification_history_repo = AsyncMock()
+    mock_notification_history_repo.resolve_pending.return_value = [delayed.record_id]
+    mock_delayed_notification_queue = AsyncMock()
+    mock_delayed_notification_queue.requeue_expired.return_value = 0
+    mock_delayed_notification_queue.pop_due.return_value = [delayed]
+    mock_delivery_queue = AsyncMock()
+
+    use_case = await _use_case(
+        mock_event_repo,
+        mock_notification_history_repo,
+        mock_delayed_notification_queue,
+        mock_delivery_queue,
+    )
+    response = await use_case.handle(DispatchDueNotificationsRequest(now=NOW, limit=10))
+
+    assert (response.sent, response.queued, response.done) == (1, 0, [delayed])
+    mock_notification_history_repo.resolve_pending.assert_called_once_with(
+        [delayed.record_id], NotificationStatus.SENT, None
+    )
+    mock_event_repo.find_by_keys.assert_not_called()
+    mock_delivery_queue.push.assert_not_called()
@@ -7,3 +7,5 @@ class NotificationIntent:
     notification_type: str
     delay: timedelta | None
     debounced_because: str | None
+    # None = the channel's
+    max_delivery_attempts: int | None = None
@@ -0,0 +1,111 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from app.notifications.compiled_conditions import (
+    CompiledEventCondition,
+    collect_proximities,
+    compile_event_conditions,
+)
+from domain import Notification, NotificationRule
+
+# "ever" is represented as a very long window, so the debounce query stays the same
+ETERNITY = timedelta(weeks=52 * 100)  # 100 years hack :)
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledNotificationRule:
+    rule: NotificationRule
+    notification: Notification | None
+    event_conditions: list[CompiledEventCondition]
+
+    # None when the rule has no debounce at all
+    debounce_window: timedelta | None
+    debounce_calendar_day: bool
+
+    def debounce_offset(self, now: datetime) -> timedelta:
+        """
+        How far back to count already created notifications, as of `now`
+        """
+        assert self.debounce_window is not None
+        if self.debounce_calendar_day:
+            return now - now.replace(hour=0, minute=0, second=0, microsecond=0)
+        return self.debounce_window
+
+
+class NotificationRulesEngine:
+    """
+    Notification rules compiled once (per process) into an event type index.
+    Holds no I/O dependencies, so it is safe to share across requests.
+    """
+
+    def __init__(
+        self,
+        notification_rules: list[NotificationRule],
+        notifications: list[Notification],
+    ) -> None:
+        self._notifications: dict[str, Notification] = {
+            notification.type: notification for notification in notifications
+        }
+
+        triggers: dict[str, list[CompiledNotificationRule]] = {}
+        for rule in notification_rules:
+            triggers.setdefault(rule.event_type, []).append(self._compile(rule))
+
+        self._triggers: dict[str, tuple[CompiledNotificationRule, ...]] = {
+            event_type: tuple(rules) for event_type, rules in triggers.items()
+        }
+
+        proximities = [
+            proximity
+            for rules in triggers.values()
+            for compiled_rule in rules
+            for proximity in collect_proximities(compiled_rule.event_conditions)
+        ]
+        # how far back the debounce of some rule counts at most, "ever" left out
+        self.longest_debounce_window: timedelta | None = max(
+            (
+                compiled_rule.debounce_window
+                for rules in triggers.values()
+                for compiled_rule in rules
+                if compiled_rule.debounce_window not in (None, ETERNITY)
+            ),
+            default=None,
+        )
+
+        # event types some rule looks back for, and how far back at most
+        self.proximity_event_types = frozenset(p.event_type for p in proximities)
+        self.longest_time_proximity: timedelta | None = max(
+            (p.time_proximity for p in proximities if p.time_proximity is not None),
+            default=None,
+        )
+
+    def rules_for(self, event_type: str) -> tuple[CompiledNotificationRule, ...]:
+        return self._triggers.get(event_type, ())
+
+    def rule_for(
+        self, event_type: str, notification_type: str
+    ) -> CompiledNotificationRule | None:
+        for compiled_rule in self.rules_for(event_type):
+            if compiled_rule.rule.notification_type == notification_type:
+                return compiled_rule
+        return None
+
+    def notification_for(self, notification_type: str) -> Notification | None:
+        return self._notifications.get(notification_type)
+
+    def _compile(self, rule: NotificationRule) -> CompiledNotificationRule:
+        debounce_window = None
+        if rule.debounce_limit is not None and rule.debounce_limit > 0:
+            debounce_window = ETERNITY
+            if rule.debounce_period is not None:
+                debounce_window = rule.debounce_period
+
+        return CompiledNotificationRule(
+            rule=rule,
+            notification=self._notifications.get(rule.notification_type),
+            event_conditions=compile_event_conditions(rule.event_conditions),
+            debounce_window=debounce_window,
+            debounce_calendar_day=(
+                rule.debounce_period == timedelta(days=1) and rule.debounce_calendar_day
+            ),
+        )
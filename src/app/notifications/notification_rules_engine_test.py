@@ -0,0 +1,82 @@
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from app.notifications.notification_rules_engine import (
+    ETERNITY,
+    NotificationRulesEngine,
+)
+from domain.notification_rule import NotificationRule
+from infrastructure.staticyaml import (
+    StaticNotificationRepository,
+    StaticNotificationRuleRepository,
+)
+
+
+@pytest.mark.anyio
+async def test_rules_for__indexes_rules_by_event_type():
+    engine = NotificationRulesEngine(
+        notification_rules=await StaticNotificationRuleRepository().get_all(),
+        notifications=await StaticNotificationRepository().get_all(),
+    )
+
+    payment_failed_rules = engine.rules_for("payment_failed")
+
+    assert {r.rule.notification_type for r in payment_failed_rules} == {
+        "INSUFFICIENT_FUNDS_EMAIL",
+        "HIGH_RISK_ALERT",
+    }
+    assert all(r.notification is not None for r in payment_failed_rules)
+    assert engine.rules_for("unknown_event") == ()
+
+
+def test_compile__debounce_windows_are_precomputed():
+    once_ever = NotificationRule(
+        notification_type="ONCE_EVER",
+        event_type="test_event",
+        event_conditions=[],
+        delay=None,
+        debounce_limit=1,
+    )
+    calendar_day = NotificationRule(
+        notification_type="ONCE_A_DAY",
+        event_type="test_event",
+        event_conditions=[],
+        delay=None,
+        debounce_period=timedelta(days=1),
+        debounce_limit=1,
+        debounce_calendar_day=True,
+    )
+    no_debounce = NotificationRule(
+        notification_type="ALWAYS",
+        event_type="test_event",
+        event_conditions=[],
+        delay=None,
+        debounce_limit=0,
+    )
+
+    engine = NotificationRulesEngine(
+        notification_rules=[once_ever, calendar_day, no_debounce], notifications=[]
+    )
+    compiled = {r.rule.notification_type: r for r in engine.rules_for("test_event")}
+
+    assert compiled["ONCE_EVER"].debounce_window == ETERNITY
+    assert compiled["ALWAYS"].debounce_window is None
+    now = datetime(2025, 1, 2, 10, 30, tzinfo=UTC)
+    assert compiled["ONCE_A_DAY"].debounce_offset(now) == timedelta(
+        hours=10, minutes=30
+    )
+    assert compiled["ONCE_EVER"].debounce_offset(now) == ETERNITY
+    # "ever" is not a period the history has to be kept for
+    assert engine.longest_debounce_window == timedelta(days=1)
+
+
+@pytest.mark.anyio
+async def test_proximities__event_types_and_longest_lookback_are_collected():
+    engine = NotificationRulesEngine(
+        notification_rules=await StaticNotificationRuleRepository().get_all(),
+        notifications=await StaticNotificationRepository().get_all(),
+    )
+
+    assert engine.proximity_event_types == {"signup_completed"}
+    assert engine.longest_time_proximity == timedelta(days=1)
@@ -1,13 +1,133 @@
+from collections import defaultdict
+from collections.abc import Sequence
 from datetime import UTC, datetime, timedelta
-from glom import glom
+from typing import Protocol
 
+from app.notifications.compiled_conditions import (
+    CompiledEventCondition,
+    CompiledEventProximity,
+    collect_proximities,
+)
 from app.notifications.notification_intent import NotificationIntent
+from app.notifications.notification_rules_engine import (
+    CompiledNotificationRule,
+    NotificationRulesEngine,
+)
+from app.notifications.recent_events_index import RecentEventsIndex
 from app.persistence.event_repository import EventRepository
 from app.persistence.notification_history_record_repository import (
     NotificationHistoryRecordRepository,
 )
-from domain import Event, Notification, NotificationRule
-from domain.notification_rule import EventCondition, LogicOperator, PropertyOperator
+from domain import Event
+from domain.notification_rule import LogicOperator
+
+
+class _Lookups(Protocol):
+    """
+    Where the relay gets the facts it cannot derive from the event itself
+    """
+
+    async def has_event_within(
+        self, proximity: CompiledEventProximity, event: Event
+    ) -> bool: ...
+
+    async def count_notifications(
+        self, user_id: str, notification_type: str, timerange: timedelta
+    ) -> int: ...
+
+    def notification_created(self, user_id: str, notification_type: str) -> None: ...
+
+
+class _RepositoryLookups:
+    """
+    One query per question, used for single events
+    """
+
+    def __init__(
+        self,
+        event_repo: EventRepository,
+        notification_history_repo: NotificationHistoryRecordRepository,
+        recent_events_index: RecentEventsIndex | None,
+    ) -> None:
+        self._event_repo = event_repo
+        self._notification_history_repo = notification_history_repo
+        self._recent_events_index = recent_events_index
+
+    async def has_event_within(
+        self, proximity: CompiledEventProximity, event: Event
+    ) -> bool:
+        assert proximity.time_proximity is not None
+        # the index only knows timestamps, not what the events were like
+        if (
+            not proximity.property_matches
+            and self._recent_events_index is not None
+            and self._recent_events_index.has_event_since(
+                event.user_id,
+                proximity.event_type,
+                event.event_timestamp - proximity.time_proximity,
+            )
+        ):
+            return True
+
+        # the conditions on the proximate event are checked by the query itself
+        return await self._event_repo.exists_for_user_within_time(
+            proximity.event_type,
+            event.user_id,
+            proximity.time_proximity,
+            event.event_timestamp,
+            [match.property_match for match in proximity.property_matches],
+        )
+
+    async def count_notifications(
+        self, user_id: str, notification_type: str, timerange: timedelta
+    ) -> int:
+        return await self._notification_history_repo.count_by_user_and_type_within_time(
+            user_id=user_id,
+            notification_type=notification_type,
+            timerange=timerange,
+        )
+
+    def notification_created(self, user_id: str, notification_type: str) -> None:
+        # the record is saved before the next event gets routed, so queries will see it
+        pass
+
+
+class _PrefetchedLookups:
+    """
+    Answers for a whole batch, fetched upfront with one query per distinct proximity
+    (event type and conditions on it) and per debounced rule. Notifications produced while routing the batch are
+    counted in memory, as they are only saved once the batch is routed.
+    """
+
+    def __init__(
+        self,
+        latest_events: dict[tuple, dict[str, datetime]],
+        notification_counts: dict[tuple[str, timedelta], dict[str, int]],
+    ) -> None:
+        # proximity key -> user id -> latest matching event timestamp
+        self._latest_events = latest_events
+        # (notification type, timerange) -> user id -> count
+        self._notification_counts = notification_counts
+        self._created: defaultdict[tuple[str, str], int] = defaultdict(int)
+
+    async def has_event_within(
+        self, proximity: CompiledEventProximity, event: Event
+    ) -> bool:
+        assert proximity.time_proximity is not None
+        latest = self._latest_events[proximity.key].get(event.user_id)
+        return (
+            latest is not None
+            and latest >= event.event_timestamp - proximity.time_proximity
+        )
+
+    async def count_notifications(
+        self, user_id: str, notification_type: str, timerange: timedelta
+    ) -> int:
+        counts = self._notification_counts[(notification_type, timerange)]
+        return counts.get(user_id, 0) + self._created[(user_id, notification_type)]
+
+    def notification_created(self, user_id: str, notification_type: str) -> None:
+        self._created[(user_id, notification_type)] += 1
 
 
 class NotificationRulesRelay:
@@ -15,27 +135,139 @@ class NotificationRulesRelay:
         self,
         event_repo: EventRepository,
         notification_history_repo: NotificationHistoryRecordRepository,
-        notification_rules: list[NotificationRule],
-        notifications: list[Notification],
+        rules_engine: NotificationRulesEngine,
+        recent_events_index: RecentEventsIndex | None = None,
     ) -> None:
         self._event_repo = event_repo
         self._notification_history_repo = notification_history_repo
-        self._notification_rules_triggers: dict[str, list[NotificationRule]] = {
-            rule.event_type: [] for rule in notification_rules
+        self._rules_engine = rules_engine
+        self._recent_events_index = recent_events_index
+
+    async def route(self, event: Event) -> list[NotificationIntent]:
+        lookups = _RepositoryLookups(
+            self._event_repo,
+            self._notification_history_repo,
+            self._recent_events_index,
+        )
+        return await self._route(event, lookups, datetime.now(UTC))
+
+    async def route_batch(self, events: list[Event]) -> list[list[NotificationIntent]]:
+        """
+        Same as route() for every event in order, but with a constant number of queries
+        per batch instead of per event
+        """
+        now = datetime.now(UTC)
+        lookups = await self._prefetch(
+            [(event, self._rules_engine.rules_for(event.type)) for event in events], now
+        )
+        return [await self._route(event, lookups, now) for event in events]
+
+    async def recheck_batch(
+        self, checks: list[tuple[Event, CompiledNotificationRule]]
+    ) -> list[bool]:
+        """
+        Whether the conditions of each rule still hold for its event, once a delayed
+        notification is due. Debounce is not checked again: the pending notification
+        was already counted when it was created.
+        """
+        lookups = await self._prefetch(
+            [(event, (compiled_rule,)) for event, compiled_rule in checks],
+            datetime.now(UTC),
+            debounce=False,
+        )
+        return [
+            await self._check_event_against_conditions(
+                event, compiled_rule.event_conditions, lookups
+            )
+            for event, compiled_rule in checks
+        ]
+
+    async def _prefetch(
+        self,
+        routed: list[tuple[Event, Sequence[CompiledNotificationRule]]],
+        now: datetime,
+        debounce: bool = True,
+    ) -> _PrefetchedLookups:
+        # proximity key -> user id -> (oldest, newest) timestamp to look back to
+        proximity_thresholds: defaultdict[
+            tuple, dict[str, tuple[datetime, datetime]]
+        ] = defaultdict(dict)
+        proximities: dict[tuple, CompiledEventProximity] = {}
+        # (notification type, timerange) -> users to count for
+        debounced_users: defaultdict[tuple[str, timedelta], set[str]] = defaultdict(set)
+
+        for event, rules in routed:
+            for compiled_rule in rules:
+                for proximity in collect_proximities(compiled_rule.event_conditions):
+                    assert proximity.time_proximity is not None
+                    proximities.setdefault(proximity.key, proximity)
+                    thresholds = proximity_thresholds[proximity.key]
+                    threshold = event.event_timestamp - proximity.time_proximity
+                    oldest, newest = thresholds.get(
+                        event.user_id, (threshold, threshold)
+                    )
+                    thresholds[event.user_id] = (
+                        min(oldest, threshold),
+                        max(newest, threshold),
+                    )
+
+                if debounce and compiled_rule.debounce_window is not None:
+                    key = (
+                        compiled_rule.rule.notification_type,
+                        compiled_rule.debounce_offset(now),
+                    )
+                    debounced_users[key].add(event.user_id)
+
+        latest_events = {
+            key: await self._find_latest_events(proximities[key], thresholds)
+            for key, thresholds in proximity_thresholds.items()
         }
 
-        self._notifications: dict[str, Notification] = {
-            notification.type: notification for notification in notifications
+        history_repo = self._notification_history_repo
+        notification_counts = {
+            key: await history_repo.count_by_users_and_type_within_time(
+                user_ids=list(user_ids),
+                notification_type=key[0],
+                timerange=key[1],
+            )
+            for key, user_ids in debounced_users.items()
         }
 
-        for rule in notification_rules:
-            self._notification_rules_triggers[rule.event_type].append(rule)
+        return _PrefetchedLookups(latest_events, notification_counts)
 
-    async def route(self, event: Event) -> list[NotificationIntent]:
-        if event.type not in self._notification_rules_triggers:
-            return []
+    async def _find_latest_events(
+        self,
+        proximity: CompiledEventProximity,
+        thresholds: dict[str, tuple[datetime, datetime]],
+    ) -> dict[str, datetime]:
+        latest_events, missing = {}, {}
+        for user_id, (oldest, newest) in thresholds.items():
+            latest = None
+            if self._recent_events_index is not None and not proximity.property_matches:
+                latest = self._recent_events_index.latest(user_id, proximity.event_type)
+
+            # good enough for every event of the user in the batch
+            if latest is not None and latest >= newest:
+                latest_events[user_id] = latest
+            else:
+                missing[user_id] = oldest
+
+        if missing:
+            latest_events |= await self._event_repo.find_latest_timestamps_by_users(
+                event_type=proximity.event_type,
+                user_ids=list(missing),
+                since=min(missing.values()),
+                property_matches=[
+                    match.property_match for match in proximity.property_matches
+                ],
+            )
 
-        rules = self._notification_rules_triggers[event.type]
+        return latest_events
+
+    async def _route(
+        self, event: Event, lookups: _Lookups, now: datetime
+    ) -> list[NotificationIntent]:
+        rules = self._rules_engine.rules_for(event.type)
 
         if len(rules) == 0:
             return []
@@ -44,36 +276,23 @@ class NotificationRulesRelay:
 
         # for every rule that references this event type, let's check if conditions allow sending the notification
         # (one event can trigger several notifications)
-        for rule in rules:
-            # delays
-            if rule.delay is not None:
-                raise NotImplementedError(
-                    "Sorry, for now delayed notification is not supported"
-                )
+        for compiled_rule in rules:
+            rule = compiled_rule.rule
 
             # conditions check
             match = await self._check_event_against_conditions(
-                event, rule.event_conditions
+                event, compiled_rule.event_conditions, lookups
             )
             if not match:
                 continue
 
             # frequency debounce
-            if rule.debounce_limit is not None and rule.debounce_limit > 0:
-                offset = timedelta(weeks=52 * 100)  # 100 years hack :)
-                if rule.debounce_period is not None:
-                    offset = rule.debounce_period
-                if (
-                    rule.debounce_period == timedelta(days=1)
-                    and rule.debounce_calendar_day
-                ):
-                    offset = datetime.now(UTC) - datetime.now(UTC).replace(
-                        hour=0, minute=0, second=0, microsecond=0
-                    )
-                sent_count = await self._notification_history_repo.count_by_user_and_type_within_time(
-                    user_id=event.user_id,
-                    notification_type=rule.notification_type,
-                    timerange=offset,
+            if compiled_rule.debounce_window is not None:
+                assert rule.debounce_limit is not None
+                sent_count = await lookups.count_notifications(
+                    event.user_id,
+                    rule.notification_type,
+                    compiled_rule.debounce_offset(now),
                 )
 
                 if sent_count >= rule.debounce_limit:
@@ -91,15 +310,20 @@ class NotificationRulesRelay:
                     notification_type=rule.notification_type,
                     delay=rule.delay,
                     debounced_because=None,
+                    max_delivery_attempts=rule.max_delivery_attempts,
                 )
             )
 
+        for intent in intents + debounced_intents:
+            lookups.notification_created(event.user_id, intent.notification_type)
+
         return intents + debounced_intents
 
     async def _check_event_against_conditions(
         self,
         event: Event,
-        conditions: list[EventCondition],
+        conditions: list[CompiledEventCondition],
+        lookups: _Lookups,
     ) -> bool:
         """
         1. Is there a notification in memory? If not, then skip
@@ -111,49 +335,14 @@ class NotificationRulesRelay:
 
         for condition in conditions:
             # if it's a property match
-            if condition.property_match:
-                if condition.property_match.operator not in (
-                    PropertyOperator.EQ,
-                    PropertyOperator.GTE,
-                ):
-                    raise NotImplementedError(
-                        "Sorry, the only supported PropertyOperator for now is EQ"
-                    )
-                event_dict = event.to_dict()
-
-                # EQ
-                if (
-                    condition.property_match.operator is PropertyOperator.EQ
-                    and str(condition.property_match.value).lower()
-                    != str(
-                        glom(event_dict, condition.property_match.property_xpath)
-                    ).lower()
-                ):
-                    return False
-
-                # GTE
-                if condition.property_match.operator is PropertyOperator.GTE and float(
-                    glom(event_dict, condition.property_match.property_xpath)
-                ) < float(condition.property_match.value):
-                    return False
+            if condition.property_match and not condition.property_match.matches(event):
+                return False
 
             # if it's event proximity
-            if condition.event_proximity:
-                assert condition.event_proximity.time_proximity is not None
-                events_within_range = await self._event_repo.find_for_user_within_time(
-                    condition.event_proximity.event_type,
-                    event.user_id,
-                    condition.event_proximity.time_proximity,
-                    event.event_timestamp,
-                )
-
-                if len(events_within_range) == 0:
-                    return False
-
-                if len(condition.event_proximity.event_conditions) != 0:
-                    raise NotImplementedError(
-                        "Sorry, embedded events conditions aren't supported for now"
-                    )
+            if condition.event_proximity and not await lookups.has_event_within(
+                condition.event_proximity, event
+            ):
+                return False
 
             # if it's event logic (not a single set of conditions but a bunch of other conditions with some logic operator)
             if condition.event_logic:
@@ -163,7 +352,7 @@ class NotificationRulesRelay:
                     )
 
                 results = await self._check_event_against_conditions(
-                    event, condition.event_logic.event_conditions
+                    event, condition.event_logic.event_conditions, lookups
                 )
 
                 if not results:
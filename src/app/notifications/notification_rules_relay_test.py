@@ -4,9 +4,17 @@ from uuid import uuid4
 
 import pytest
 
+from app.notifications.notification_rules_engine import NotificationRulesEngine
 from app.notifications.notification_rules_relay import NotificationRulesRelay
+from app.notifications.recent_events_index import RecentEventsIndex
 from domain import Event
-from domain.notification_rule import NotificationRule
+from domain.notification_rule import (
+    EventCondition,
+    EventProximity,
+    NotificationRule,
+    PropertyMatch,
+    PropertyOperator,
+)
 from infrastructure.staticyaml import (
     StaticNotificationRepository,
     StaticNotificationRuleRepository,
@@ -28,8 +36,9 @@ async def test_route__signup_with_marketing_consent__triggers_welcome_email():
     relay = NotificationRulesRelay(
         event_repo=mock_event_repo,
         notification_history_repo=mock_notification_history_repo,
-        notification_rules=rules,
-        notifications=notifications,
+        rules_engine=NotificationRulesEngine(
+            notification_rules=rules, notifications=notifications
+        ),
     )
 
     event = Event()
@@ -63,8 +72,9 @@ async def test_route__payment_failed_insufficient_funds__triggers_email():
     relay = NotificationRulesRelay(
         event_repo=mock_event_repo,
         notification_history_repo=mock_notification_history_repo,
-        notification_rules=rules,
-        notifications=notifications,
+        rules_engine=NotificationRulesEngine(
+            notification_rules=rules, notifications=notifications
+        ),
     )
 
     event = Event()
@@ -101,8 +111,9 @@ async def test_route__payment_failed_third_attempt__triggers_high_risk_alert():
     relay = NotificationRulesRelay(
         event_repo=mock_event_repo,
         notification_history_repo=mock_notification_history_repo,
-        notification_rules=rules,
-        notifications=notifications,
+        rules_engine=NotificationRulesEngine(
+            notification_rules=rules, notifications=notifications
+        ),
     )
 
     event = Event()
@@ -132,16 +143,7 @@ async def test_route__bank_linked_after_signup__triggers_nudge_sms():
     mock_notification_history_repo = AsyncMock()
     mock_notification_history_repo.count_by_user_and_type_within_time.return_value = 0
 
-    signup_event = Event()
-    signup_event.id = uuid4()
-    signup_event.user_id = "u_12345"
-    signup_event.type = "signup_completed"
-    signup_event.event_timestamp = datetime.now(UTC)
-    signup_event.event_date = signup_event.event_timestamp.date()
-    signup_event.properties = {}
-    signup_event.user_traits = {}
-
-    mock_event_repo.find_for_user_within_time.return_value = [signup_event]
+    mock_event_repo.exists_for_user_within_time.return_value = True
 
     notification_repo = StaticNotificationRepository()
     rule_repo = StaticNotificationRuleRepository()
@@ -152,8 +154,9 @@ async def test_route__bank_linked_after_signup__triggers_nudge_sms():
     relay = NotificationRulesRelay(
         event_repo=mock_event_repo,
         notification_history_repo=mock_notification_history_repo,
-        notification_rules=rules,
-        notifications=notifications,
+        rules_engine=NotificationRulesEngine(
+            notification_rules=rules, notifications=notifications
+        ),
     )
 
     event = Event()
@@ -169,6 +172,39 @@ async def test_route__bank_linked_after_signup__triggers_nudge_sms():
 
     assert len(intents) == 1
     assert intents[0].notification_type == "BANK_LINK_NUDGE_SMS"
+    mock_event_repo.exists_for_user_within_time.assert_called_once_with(
+        "signup_completed", "u_12345", timedelta(days=1), event.event_timestamp, []
+    )
+    mock_event_repo.find_for_user_within_time.assert_not_called()
+
+
+@pytest.mark.anyio
+async def test_route__bank_linked_without_recent_signup__no_nudge_sms():
+    mock_event_repo = AsyncMock()
+    mock_notification_history_repo = AsyncMock()
+    mock_event_repo.exists_for_user_within_time.return_value = False
+
+    relay = NotificationRulesRelay(
+        event_repo=mock_event_repo,
+        notification_history_repo=mock_notification_history_repo,
+        rules_engine=NotificationRulesEngine(
+            notification_rules=await StaticNotificationRuleRepository().get_all(),
+            notifications=await StaticNotificationRepository().get_all(),
+        ),
+    )
+
+    event = Event()
+    event.id = uuid4()
+    event.user_id = "u_12345"
+    event.type = "link_bank_success"
+    event.event_timestamp = datetime.now(UTC)
+    event.event_date = event.event_timestamp.date()
+    event.properties = {"bank_name": "Santander"}
+    event.user_traits = {"email": "maria@example.com"}
+
+    intents = await relay.route(event)
+
+    assert intents == []
 
 
 @pytest.mark.anyio
@@ -187,8 +223,9 @@ async def test_route__payment_failed_insufficient_funds__debounced_when_limit_re
     relay = NotificationRulesRelay(
         event_repo=mock_event_repo,
         notification_history_repo=mock_notification_history_repo,
-        notification_rules=rules,
-        notifications=notifications,
+        rules_engine=NotificationRulesEngine(
+            notification_rules=rules, notifications=notifications
+        ),
     )
 
     event = Event()
@@ -239,8 +276,10 @@ async def test_route__debounce_with_no_period__uses_eternity_fallback():
     relay = NotificationRulesRelay(
         event_repo=mock_event_repo,
         notification_history_repo=mock_notification_history_repo,
-        notification_rules=[rule_with_eternity_debounce],
-        notifications=notifications,
+        rules_engine=NotificationRulesEngine(
+            notification_rules=[rule_with_eternity_debounce],
+            notifications=notifications,
+        ),
     )
 
     event = Event()
@@ -286,8 +325,9 @@ async def test_route__calendar_day_debounce__resets_at_midnight():
     relay = NotificationRulesRelay(
         event_repo=mock_event_repo,
         notification_history_repo=mock_notification_history_repo,
-        notification_rules=[insufficient_funds_rule],
-        notifications=notifications,
+        rules_engine=NotificationRulesEngine(
+            notification_rules=[insufficient_funds_rule], notifications=notifications
+        ),
     )
 
     # Current time: 00:00:01 on Jan 2, 2025
@@ -348,8 +388,9 @@ async def test_route__calendar_day_debounce__blocks_same_day():
     relay = NotificationRulesRelay(
         event_repo=mock_event_repo,
         notification_history_repo=mock_notification_history_repo,
-        notification_rules=[insufficient_funds_rule],
-        notifications=notifications,
+        rules_engine=NotificationRulesEngine(
+            notification_rules=[insufficient_funds_rule], notifications=notifications
+        ),
     )
 
     # Current time: 23:59:59 on Jan 1, 2025 (same day as previous notification)
@@ -388,3 +429,240 @@ async def test_route__calendar_day_debounce__blocks_same_day():
     assert len(intents) == 1
     assert intents[0].notification_type == "INSUFFICIENT_FUNDS_EMAIL"
     assert intents[0].debounced_because is not None
+
+
+@pytest.mark.anyio
+async def test_route_batch__queries_once_per_rule_not_per_event():
+    mock_event_repo = AsyncMock()
+    mock_notification_history_repo = AsyncMock()
+    mock_notification_history_repo.count_by_users_and_type_within_time.return_value = {}
+    now = datetime.now(UTC)
+    mock_event_repo.find_latest_timestamps_by_users.return_value = {
+        "u_1": now - timedelta(hours=1),
+        "u_2": now - timedelta(days=2),
+    }
+
+    relay = NotificationRulesRelay(
+        event_repo=mock_event_repo,
+        notification_history_repo=mock_notification_history_repo,
+        rules_engine=NotificationRulesEngine(
+            notification_rules=await StaticNotificationRuleRepository().get_all(),
+            notifications=await StaticNotificationRepository().get_all(),
+        ),
+    )
+
+    events = []
+    for user_id in ("u_1", "u_2", "u_3"):
+        for event_type in ("link_bank_success", "payment_failed"):
+            event = Event()
+            event.id = uuid4()
+            event.user_id = user_id
+            event.type = event_type
+            event.event_timestamp = now
+            event.event_date = now.date()
+            event.properties = {"failure_reason": "OTHER", "attempt_number": 1}
+            event.user_traits = {}
+            events.append(event)
+
+    routed = await relay.route_batch(events)
+
+    # one proximity query (signup_completed) and one debounce count (INSUFFICIENT_FUNDS_EMAIL)
+    mock_event_repo.find_latest_timestamps_by_users.assert_called_once()
+    proximity_call = mock_event_repo.find_latest_timestamps_by_users.call_args.kwargs
+    assert proximity_call["event_type"] == "signup_completed"
+    assert set(proximity_call["user_ids"]) == {"u_1", "u_2", "u_3"}
+    assert proximity_call["since"] == now - timedelta(days=1)
+    mock_notification_history_repo.count_by_users_and_type_within_time.assert_called_once()
+    mock_event_repo.find_for_user_within_time.assert_not_called()
+    mock_event_repo.exists_for_user_within_time.assert_not_called()
+    mock_notification_history_repo.count_by_user_and_type_within_time.assert_not_called()
+
+    assert [[i.notification_type for i in intents] for intents in routed] == [
+        ["BANK_LINK_NUDGE_SMS"],
+        [],
+        [],
+        [],
+        [],
+        [],
+    ]
+
+
+@pytest.mark.anyio
+async def test_route_batch__counts_notifications_created_earlier_in_the_same_batch():
+    mock_event_repo = AsyncMock()
+    mock_notification_history_repo = AsyncMock()
+    mock_notification_history_repo.count_by_users_and_type_within_time.return_value = {
+        "u_debounced": 1
+    }
+
+    relay = NotificationRulesRelay(
+        event_repo=mock_event_repo,
+        notification_history_repo=mock_notification_history_repo,
+        rules_engine=NotificationRulesEngine(
+            notification_rules=await StaticNotificationRuleRepository().get_all(),
+            notifications=await StaticNotificationRepository().get_all(),
+        ),
+    )
+
+    events = []
+    for user_id in ("u_fresh", "u_fresh", "u_debounced"):
+        event = Event()
+        event.id = uuid4()
+        event.user_id = user_id
+        event.type = "payment_failed"
+        event.event_timestamp = datetime.now(UTC)
+        event.event_date = event.event_timestamp.date()
+        event.properties = {"failure_reason": "INSUFFICIENT_FUNDS", "attempt_number": 1}
+        event.user_traits = {}
+        events.append(event)
+
+    routed = await relay.route_batch(events)
+
+    assert all(len(intents) == 1 for intents in routed)
+    assert routed[0][0].debounced_because is None
+    # the first event's notification has not been saved yet, but still counts
+    assert routed[1][0].debounced_because is not None
+    assert routed[2][0].debounced_because is not None
+
+
+@pytest.mark.anyio
+async def test_route_batch__recent_events_in_memory__proximity_not_queried():
+    mock_event_repo = AsyncMock()
+    mock_notification_history_repo = AsyncMock()
+    mock_event_repo.find_latest_timestamps_by_users.return_value = {}
+    now = datetime.now(UTC)
+
+    signup = Event()
+    signup.id = uuid4()
+    signup.user_id = "u_1"
+    signup.type = "signup_completed"
+    signup.event_timestamp = now - timedelta(hours=1)
+    signup.event_date = signup.event_timestamp.date()
+    signup.properties = {}
+    signup.user_traits = {}
+
+    recent_events_index = RecentEventsIndex(ttl=timedelta(days=1), max_users=100)
+    recent_events_index.add_all([signup])
+
+    relay = NotificationRulesRelay(
+        event_repo=mock_event_repo,
+        notification_history_repo=mock_notification_history_repo,
+        rules_engine=NotificationRulesEngine(
+            notification_rules=await StaticNotificationRuleRepository().get_all(),
+            notifications=await StaticNotificationRepository().get_all(),
+        ),
+        recent_events_index=recent_events_index,
+    )
+
+    events = []
+    for user_id in ("u_1", "u_2"):
+        event = Event()
+        event.id = uuid4()
+        event.user_id = user_id
+        event.type = "link_bank_success"
+        event.event_timestamp = now
+        event.event_date = now.date()
+        event.properties = {}
+        event.user_traits = {}
+        events.append(event)
+
+    routed = await relay.route_batch(events)
+    single = await relay.route(events[0])
+
+    # u_1 is answered from memory, only u_2 goes to the database
+    mock_event_repo.find_latest_timestamps_by_users.assert_called_once_with(
+        event_type="signup_completed",
+        user_ids=["u_2"],
+        since=now - timedelta(days=1),
+        property_matches=[],
+    )
+    mock_event_repo.exists_for_user_within_time.assert_not_called()
+    assert [[i.notification_type for i in intents] for intents in routed] == [
+        ["BANK_LINK_NUDGE_SMS"],
+        [],
+    ]
+    assert [i.notification_type for i in single] == ["BANK_LINK_NUDGE_SMS"]
+
+
+@pytest.mark.anyio
+async def test_route_batch__proximity_with_conditions__pushed_down_and_not_from_memory():
+    mock_event_repo = AsyncMock()
+    mock_notification_history_repo = AsyncMock()
+    now = datetime.now(UTC)
+    mock_event_repo.find_latest_timestamps_by_users.return_value = {}
+
+    signup = Event()
+    signup.id = uuid4()
+    signup.user_id = "u_1"
+    signup.type = "signup_completed"
+    signup.event_timestamp = now - timedelta(hours=1)
+    signup.event_date = signup.event_timestamp.date()
+    signup.properties = {}
+    signup.user_traits = {"country": "ES"}
+
+    recent_events_index = RecentEventsIndex(ttl=timedelta(days=1), max_users=100)
+    recent_events_index.add_all([signup])
+
+    from_portugal = PropertyMatch(
+        property_xpath="user_traits.country", value="PT", operator=PropertyOperator.EQ
+    )
+
+    def rule(notification_type: str, conditions: list[EventCondition]):
+        return NotificationRule(
+            notification_type=notification_type,
+            event_type="link_bank_success",
+            event_conditions=[
+                EventCondition(
+                    property_match=None,
+                    event_proximity=EventProximity(
+                        event_type="signup_completed",
+                        time_proximity=timedelta(days=1),
+                        event_conditions=conditions,
+                    ),
+                    event_logic=None,
+                )
+            ],
+            delay=None,
+        )
+
+    relay = NotificationRulesRelay(
+        event_repo=mock_event_repo,
+        notification_history_repo=mock_notification_history_repo,
+        rules_engine=NotificationRulesEngine(
+            notification_rules=[
+                rule("BANK_LINK_NUDGE_SMS", []),
+                rule(
+                    "WELCOME_EMAIL",
+                    [
+                        EventCondition(
+                            property_match=from_portugal,
+                            event_proximity=None,
+                            event_logic=None,
+                        )
+                    ],
+                ),
+            ],
+            notifications=await StaticNotificationRepository().get_all(),
+        ),
+        recent_events_index=recent_events_index,
+    )
+
+    event = Event()
+    event.id = uuid4()
+    event.user_id = "u_1"
+    event.type = "link_bank_success"
+    event.event_timestamp = now
+    event.event_date = now.date()
+    event.properties = {}
+    event.user_traits = {}
+
+    (routed,) = await relay.route_batch([event])
+
+    # the signup in memory only answers the unconditional proximity
+    mock_event_repo.find_latest_timestamps_by_users.assert_called_once_with(
+        event_type="signup_completed",
+        user_ids=["u_1"],
+        since=now - timedelta(days=1),
+        property_matches=[from_portugal],
+    )
+    assert [i.notification_type for i in routed] == ["BANK_LINK_NUDGE_SMS"]
@@ -0,0 +1,83 @@
+import bisect
+from collections import OrderedDict
+from collections.abc import Collection
+from datetime import UTC, datetime, timedelta
+from enum import Enum
+
+from domain import Event
+
+
+class EvictionPolicy(str, Enum):
+    LRU = "lru"  # drop the user looked up or seen the longest ago
+    FIFO = "fifo"  # drop the user seen first
+
+
+class RecentEventsIndex:
+    """
+    Timestamps of the recent events per user and event type, fed by the worker with the
+    events it consumes. Only answers "yes, there is one": anything it did not see (other
+    workers, evicted users, events before a restart) is still in the database, so a miss
+    means "ask the repository".
+    """
+
+    def __init__(
+        self,
+        ttl: timedelta | None,
+        max_users: int,
+        eviction: EvictionPolicy = EvictionPolicy.LRU,
+        event_types: Collection[str] | None = None,
+    ) -> None:
+        """
+        ttl: how long timestamps are kept, None disables the index
+        event_types: the only event types worth keeping, None for every type
+        """
+        self._ttl = ttl
+        self._max_users = max_users
+        self._eviction = eviction
+        self._event_types = frozenset(event_types) if event_types is not None else None
+        # user id -> event type -> sorted timestamps
+        self._users: OrderedDict[str, dict[str, list[datetime]]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def add_all(self, events: list[Event]) -> None:
+        if self._ttl is None:
+            return
+
+        expired_before = datetime.now(UTC) - self._ttl
+        for event in events:
+            if event.event_timestamp < expired_before:
+                continue
+            if self._event_types is not None and event.type not in self._event_types:
+                continue
+
+            timestamps = self._touch(event.user_id).setdefault(event.type, [])
+            bisect.insort(timestamps, event.event_timestamp)
+            del timestamps[: bisect.bisect_left(timestamps, expired_before)]
+
+        while len(self._users) > self._max_users:
+            self._users.popitem(last=False)
+
+    def latest(self, user_id: str, event_type: str) -> datetime | None:
+        types = self._users.get(user_id)
+        if types is None:
+            return None
+
+        if self._eviction is EvictionPolicy.LRU:
+            self._users.move_to_end(user_id)
+
+        timestamps = types.get(event_type)
+        return timestamps[-1] if timestamps else None
+
+    def has_event_since(self, user_id: str, event_type: str, since: datetime) -> bool:
+        latest = self.latest(user_id, event_type)
+        return latest is not None and latest >= since
+
+    def _touch(self, user_id: str) -> dict[str, list[datetime]]:
+        types = self._users.get(user_id)
+        if types is None:
+            types = self._users[user_id] = {}
+        elif self._eviction is EvictionPolicy.LRU:
+            self._users.move_to_end(user_id)
+        return types
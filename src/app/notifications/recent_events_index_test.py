@@ -0,0 +1,84 @@
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+from app.notifications.recent_events_index import EvictionPolicy, RecentEventsIndex
+from domain import Event
+
+
+def _event(user_id: str, event_type: str, event_timestamp: datetime) -> Event:
+    event = Event()
+    event.id = uuid4()
+    event.user_id = user_id
+    event.type = event_type
+    event.event_timestamp = event_timestamp
+    event.event_date = event_timestamp.date()
+    event.properties = {}
+    event.user_traits = {}
+    return event
+
+
+def test_has_event_since__only_events_within_ttl_are_kept():
+    now = datetime.now(UTC)
+    index = RecentEventsIndex(ttl=timedelta(days=1), max_users=10)
+
+    index.add_all(
+        [
+            _event("u_1", "signup_completed", now - timedelta(days=2)),
+            _event("u_2", "signup_completed", now - timedelta(hours=1)),
+        ]
+    )
+
+    assert not index.has_event_since("u_1", "signup_completed", now - timedelta(days=3))
+    assert index.has_event_since("u_2", "signup_completed", now - timedelta(hours=2))
+    assert not index.has_event_since("u_2", "signup_completed", now)
+    assert not index.has_event_since("u_2", "payment_failed", now - timedelta(days=1))
+
+
+def test_add_all__event_types_nobody_looks_for__not_kept():
+    now = datetime.now(UTC)
+    index = RecentEventsIndex(
+        ttl=timedelta(days=1), max_users=10, event_types={"signup_completed"}
+    )
+
+    index.add_all([_event("u_1", "payment_failed", now)])
+
+    assert index.latest("u_1", "payment_failed") is None
+    assert len(index) == 0
+
+
+def test_add_all__no_ttl__index_disabled():
+    index = RecentEventsIndex(ttl=None, max_users=10)
+
+    index.add_all([_event("u_1", "signup_completed", datetime.now(UTC))])
+
+    assert len(index) == 0
+
+
+def test_add_all__over_max_users__lru_keeps_recently_looked_up_users():
+    now = datetime.now(UTC)
+    index = RecentEventsIndex(
+        ttl=timedelta(days=1), max_users=2, eviction=EvictionPolicy.LRU
+    )
+    index.add_all([_event(u, "signup_completed", now) for u in ("u_1", "u_2")])
+
+    index.latest("u_1", "signup_completed")
+    index.add_all([_event("u_3", "signup_completed", now)])
+
+    assert index.latest("u_1", "signup_completed") == now
+    assert index.latest("u_2", "signup_completed") is None
+    assert index.latest("u_3", "signup_completed") == now
+
+
+def test_add_all__over_max_users__fifo_drops_first_seen_users():
+    now = datetime.now(UTC)
+    index = RecentEventsIndex(
+        ttl=timedelta(days=1), max_users=2, eviction=EvictionPolicy.FIFO
+    )
+    index.add_all([_event(u, "signup_completed", now) for u in ("u_1", "u_2")])
+
+    index.latest("u_1", "signup_completed")
+    index.add_all([_event("u_3", "signup_completed", now)])
+
+    assert index.latest("u_1", "signup_completed") is None
+    assert index.latest("u_2", "signup_completed") == now
+    assert len(index) == 2
@@ -1,15 +1,28 @@
 from dataclasses import dataclass
 from datetime import UTC, datetime
+from itertools import islice
 from uuid import uuid4
 
+from app.audit import AuditUpdate
+from app.audit.get_user_audit_use_case import (
+    event_audit_item,
+    notification_audit_item,
+)
+from app.delivery.rendering import is_deliverable, render_delivery
 from app.notifications.notification_intent import NotificationIntent
+from app.notifications.notification_rules_engine import NotificationRulesEngine
 from app.notifications.notification_rules_relay import NotificationRulesRelay
+from app.notifications.recent_events_index import RecentEventsIndex
 from app.persistence.event_repository import EventRepository
 from app.persistence.notification_history_record_repository import (
     NotificationHistoryRecordRepository,
 )
-from app.persistence.notification_repository import NotificationRepository
-from app.persistence.notification_rule_repository import NotificationRuleRepository
+from app.queue import (
+    DelayedNotification,
+    DelayedNotificationQueue,
+    Delivery,
+    DeliveryQueue,
+)
 from app.usecase import UseCase
 from domain import Event
 from domain.notification_history_record import (
@@ -21,6 +34,8 @@ from domain.notification_history_record import (
 @dataclass
 class TriggerNotificationsResponse:
     intents: list[NotificationIntent]
+    # the event and its notifications, for the audits being watched once committed
+    audit_updates: list[AuditUpdate]
 
 
 class TriggerNotificationsUseCase(UseCase[Event, TriggerNotificationsResponse]):
@@ -28,43 +43,145 @@ class TriggerNotificationsUseCase(UseCase[Event, TriggerNotificationsResponse]):
         self,
         event_repository: EventRepository,
         notification_history_record_repository: NotificationHistoryRecordRepository,
-        notification_repository: NotificationRepository,
-        notification_rule_repository: NotificationRuleRepository,
+        notification_rules_engine: NotificationRulesEngine,
+        recent_events_index: RecentEventsIndex,
+        delayed_notification_queue: DelayedNotificationQueue,
+        delivery_queue: DeliveryQueue,
     ) -> None:
         super().__init__()
         self.event_repository = event_repository
         self.notification_history_record_repository = (
             notification_history_record_repository
         )
-        self.notification_repository = notification_repository
-        self.notification_rule_repository = notification_rule_repository
+        self.notification_rules_engine = notification_rules_engine
+        self.recent_events_index = recent_events_index
+        self.delayed_notification_queue = delayed_notification_queue
+        self.delivery_queue = delivery_queue
+        self.relay = NotificationRulesRelay(
+            event_repo=event_repository,
+            notification_history_repo=notification_history_record_repository,
+            rules_engine=notification_rules_engine,
+            recent_events_index=recent_events_index,
+        )
 
     async def handle(self, request: Event) -> TriggerNotificationsResponse:
-        notifications = await self.notification_repository.get_all()
-        rules = await self.notification_rule_repository.get_all()
-
-        relay = NotificationRulesRelay(
-            event_repo=self.event_repository,
-            notification_history_repo=self.notification_history_record_repository,
-            notification_rules=rules,
-            notifications=notifications,
+        # the events are already saved, so the index only remembers what the database has
+        self.recent_events_index.add_all([request])
+        intents = await self.relay.route(request)
+
+        records = await self._save([(request, intent) for intent in intents])
+
+        return TriggerNotificationsResponse(
+            intents=intents, audit_updates=_audit_updates(request, records)
+        )
+
+    async def handle_batch(
+        self, events: list[Event]
+    ) -> list[TriggerNotificationsResponse]:
+        """
+        Routes the whole batch at once; responses are in the order of events
+        """
+        self.recent_events_index.add_all(events)
+        routed = await self.relay.route_batch(events)
+
+        records = iter(
+            await self._save(
+                [
+                    (event, intent)
+                    for event, intents in zip(events, routed, strict=True)
+                    for intent in intents
+                ]
+            )
         )
 
-        intents = await relay.route(request)
-
-        for intent in intents:
-            record = NotificationHistoryRecord(
-                id=uuid4(),
-                type=intent.notification_type,
-                trigger=request.type,
-                user_id=request.user_id,
-                status=NotificationStatus.SUPPRESSED
-                if intent.debounced_because
-                else NotificationStatus.SENT,
-                retries=0,
-                suppressed_because=intent.debounced_because,
-                created_at=datetime.now(UTC),
+        # the records are in the order of the events and their intents
+        return [
+            TriggerNotificationsResponse(
+                intents=intents,
+                audit_updates=_audit_updates(
+                    event, list(islice(records, len(intents)))
+                ),
             )
-            await self.notification_history_record_repository.save(record)
+            for event, intents in zip(events, routed, strict=True)
+        ]
 
-        return TriggerNotificationsResponse(intents=intents)
+    async def _save(
+        self, routed: list[tuple[Event, NotificationIntent]]
+    ) -> list[NotificationHistoryRecord]:
+        records: list[NotificationHistoryRecord] = []
+        delayed: list[DelayedNotification] = []
+        deliveries: list[Delivery] = []
+        for event, intent in routed:
+            notification = self.notification_rules_engine.notification_for(
+                intent.notification_type
+            )
+            record = self._to_record(event, intent, is_deliverable(notification))
+            records.append(record)
+
+            if record.status is not NotificationStatus.PENDING:
+                continue
+            if intent.delay is not None:
+                delayed.append(
+                    DelayedNotification(
+                        record_id=record.id,
+                        notification_type=record.type,
+                        trigger=record.trigger,
+                        event_id=event.id,
+                        event_date=event.event_date,
+                        due_at=record.created_at + intent.delay,
+                    )
+                )
+            else:
+                assert notification is not None
+                deliveries.append(
+                    render_delivery(
+                        record.id,
+                        notification,
+                        event,
+                        record.created_at,
+                        intent.max_delivery_attempts,
+                    )
+                )
+
+        await self.notification_history_record_repository.save_all(records)
+        # queued before the records are committed, the dispatcher and the delivery
+        # workers only handle the ones they can see as PENDING and retry the others
+        if delayed:
+            await self.delayed_notification_queue.schedule(delayed)
+        if deliveries:
+            await self.delivery_queue.push(deliveries)
+        return records
+
+    def _to_record(
+        self, event: Event, intent: NotificationIntent, deliverable: bool
+    ) -> NotificationHistoryRecord:
+        """
+        PENDING until sent by the delivery workers, or until due when delayed
+        """
+        status = NotificationStatus.SENT
+        if intent.debounced_because:
+            status = NotificationStatus.SUPPRESSED
+        elif intent.delay is not None or deliverable:
+            status = NotificationStatus.PENDING
+
+        return NotificationHistoryRecord(
+            id=uuid4(),
+            type=intent.notification_type,
+            trigger=event.type,
+            user_id=event.user_id,
+            status=status,
+            retries=0,
+            suppressed_because=intent.debounced_because,
+            created_at=datetime.now(UTC),
+        )
+
+
+def _audit_updates(
+    event: Event, records: list[NotificationHistoryRecord]
+) -> list[AuditUpdate]:
+    return [AuditUpdate(user_id=event.user_id, event=event_audit_item(event))] + [
+        AuditUpdate(
+            user_id=record.user_id, notification=notification_audit_item(record)
+        )
+        for record in records
+    ]
@@ -1,11 +1,14 @@
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
 from unittest.mock import AsyncMock, call
 from uuid import uuid4
 
 import pytest
 
+from app.notifications.notification_rules_engine import NotificationRulesEngine
+from app.notifications.recent_events_index import RecentEventsIndex
 from app.notifications.trigger_notifications_use_case import TriggerNotificationsUseCase
-from domain import Event
+from domain import Event, NotificationRule
+from domain.notification import NotificationChannel
 from domain.notification_history_record import NotificationStatus
 from infrastructure.staticyaml import (
     StaticNotificationRepository,
@@ -14,10 +17,11 @@ from infrastructure.staticyaml import (
 
 
 @pytest.mark.anyio
-async def test_handle__creates_history_record_for_sent_notification():
+async def test_handle__creates_pending_history_record_and_queues_its_delivery():
     mock_event_repo = AsyncMock()
     mock_notification_history_repo = AsyncMock()
     mock_notification_history_repo.count_by_user_and_type_within_time.return_value = 0
+    mock_delivery_queue = AsyncMock()
 
     notification_repo = StaticNotificationRepository()
     rule_repo = StaticNotificationRuleRepository()
@@ -25,8 +29,13 @@ async def test_handle__creates_history_record_for_sent_notification():
     use_case = TriggerNotificationsUseCase(
         event_repository=mock_event_repo,
         notification_history_record_repository=mock_notification_history_repo,
-        notification_repository=notification_repo,
-        notification_rule_repository=rule_repo,
+        notification_rules_engine=NotificationRulesEngine(
+            notification_rules=await rule_repo.get_all(),
+            notifications=await notification_repo.get_all(),
+        ),
+        recent_events_index=RecentEventsIndex(ttl=timedelta(days=1), max_users=100),
+        delayed_notification_queue=AsyncMock(),
+        delivery_queue=mock_delivery_queue,
     )
 
     event = Event()
@@ -40,17 +49,24 @@ async def test_handle__creates_history_record_for_sent_notification():
 
     await use_case.handle(event)
 
-    assert mock_notification_history_repo.save.call_count == 1
+    assert mock_notification_history_repo.save_all.call_count == 1
 
-    saved_record = mock_notification_history_repo.save.call_args[0][0]
+    (saved_record,) = mock_notification_history_repo.save_all.call_args[0][0]
     assert saved_record.type == "WELCOME_EMAIL"
     assert saved_record.trigger == "signup_completed"
     assert saved_record.user_id == "u_12345"
-    assert saved_record.status == NotificationStatus.SENT
+    assert saved_record.status == NotificationStatus.PENDING
     assert saved_record.retries == 0
     assert saved_record.suppressed_because is None
     assert saved_record.created_at is not None
 
+    (delivery,) = mock_delivery_queue.push.call_args[0][0]
+    assert delivery.record_id == saved_record.id
+    assert delivery.channel is NotificationChannel.EMAIL
+    assert delivery.recipient == "maria@example.com"
+    assert delivery.text.startswith("Welcome to our payment platform!")
+    assert delivery.queued_at == saved_record.created_at
+
 
 @pytest.mark.anyio
 async def test_handle__creates_history_record_for_debounced_notification():
@@ -65,8 +81,13 @@ async def test_handle__creates_history_record_for_debounced_notification():
     use_case = TriggerNotificationsUseCase(
         event_repository=mock_event_repo,
         notification_history_record_repository=mock_notification_history_repo,
-        notification_repository=notification_repo,
-        notification_rule_repository=rule_repo,
+        notification_rules_engine=NotificationRulesEngine(
+            notification_rules=await rule_repo.get_all(),
+            notifications=await notification_repo.get_all(),
+        ),
+        recent_events_index=RecentEventsIndex(ttl=timedelta(days=1), max_users=100),
+        delayed_notification_queue=AsyncMock(),
+        delivery_queue=AsyncMock(),
     )
 
     event = Event()
@@ -84,9 +105,9 @@ async def test_handle__creates_history_record_for_debounced_notification():
 
     await use_case.handle(event)
 
-    assert mock_notification_history_repo.save.call_count == 1
+    assert mock_notification_history_repo.save_all.call_count == 1
 
-    saved_record = mock_notification_history_repo.save.call_args[0][0]
+    (saved_record,) = mock_notification_history_repo.save_all.call_args[0][0]
     assert saved_record.type == "INSUFFICIENT_FUNDS_EMAIL"
     assert saved_record.trigger == "payment_failed"
     assert saved_record.user_id == "u_12345"
@@ -108,8 +129,13 @@ async def test_handle__creates_multiple_history_records_for_multiple_intents():
     use_case = TriggerNotificationsUseCase(
         event_repository=mock_event_repo,
         notification_history_record_repository=mock_notification_history_repo,
-        notification_repository=notification_repo,
-        notification_rule_repository=rule_repo,
+        notification_rules_engine=NotificationRulesEngine(
+            notification_rules=await rule_repo.get_all(),
+            notifications=await notification_repo.get_all(),
+        ),
+        recent_events_index=RecentEventsIndex(ttl=timedelta(days=1), max_users=100),
+        delayed_notification_queue=AsyncMock(),
+        delivery_queue=AsyncMock(),
     )
 
     event = Event()
@@ -127,17 +153,166 @@ async def test_handle__creates_multiple_history_records_for_multiple_intents():
 
     await use_case.handle(event)
 
-    assert mock_notification_history_repo.save.call_count == 2
+    # both records are written with a single call
+    assert mock_notification_history_repo.save_all.call_count == 1
+    saved_records = mock_notification_history_repo.save_all.call_args[0][0]
+    assert len(saved_records) == 2
 
-    saved_types = {
-        mock_notification_history_repo.save.call_args_list[i][0][0].type
-        for i in range(2)
-    }
+    saved_types = {record.type for record in saved_records}
     assert "INSUFFICIENT_FUNDS_EMAIL" in saved_types
     assert "HIGH_RISK_ALERT" in saved_types
 
-    for call_args in mock_notification_history_repo.save.call_args_list:
-        record = call_args[0][0]
+    for record in saved_records:
         assert record.trigger == "payment_failed"
         assert record.user_id == "u_12345"
-        assert record.status == NotificationStatus.SENT
+    # the private alert is not delivered to the user
+    assert {record.type: record.status for record in saved_records} == {
+        "INSUFFICIENT_FUNDS_EMAIL": NotificationStatus.PENDING,
+        "HIGH_RISK_ALERT": NotificationStatus.SENT,
+    }
+
+
+@pytest.mark.anyio
+async def test_handle_batch__creates_history_records_per_event_in_order():
+    mock_event_repo = AsyncMock()
+    mock_notification_history_repo = AsyncMock()
+    mock_notification_history_repo.count_by_users_and_type_within_time.return_value = {}
+
+    notification_repo = StaticNotificationRepository()
+    rule_repo = StaticNotificationRuleRepository()
+
+    use_case = TriggerNotificationsUseCase(
+        event_repository=mock_event_repo,
+        notification_history_record_repository=mock_notification_history_repo,
+        notification_rules_engine=NotificationRulesEngine(
+            notification_rules=await rule_repo.get_all(),
+            notifications=await notification_repo.get_all(),
+        ),
+        recent_events_index=RecentEventsIndex(ttl=timedelta(days=1), max_users=100),
+        delayed_notification_queue=AsyncMock(),
+        delivery_queue=AsyncMock(),
+    )
+
+    signup = Event()
+    signup.id = uuid4()
+    signup.user_id = "u_1"
+    signup.type = "signup_completed"
+    signup.event_timestamp = datetime.now(UTC)
+    signup.event_date = signup.event_timestamp.date()
+    signup.properties = {}
+    signup.user_traits = {"marketing_opt_in": True}
+
+    payment_failed = Event()
+    payment_failed.id = uuid4()
+    payment_failed.user_id = "u_2"
+    payment_failed.type = "payment_failed"
+    payment_failed.event_timestamp = datetime.now(UTC)
+    payment_failed.event_date = payment_failed.event_timestamp.date()
+    payment_failed.properties = {"failure_reason": "OTHER", "attempt_number": 5}
+    payment_failed.user_traits = {}
+
+    responses = await use_case.handle_batch([signup, payment_failed])
+
+    assert [r.intents[0].notification_type for r in responses] == [
+        "WELCOME_EMAIL",
+        "HIGH_RISK_ALERT",
+    ]
+    mock_notification_history_repo.save_all.assert_called_once()
+    saved_records = mock_notification_history_repo.save_all.call_args[0][0]
+    assert [(r.user_id, r.type, r.trigger) for r in saved_records] == [
+        ("u_1", "WELCOME_EMAIL", "signup_completed"),
+        ("u_2", "HIGH_RISK_ALERT", "payment_failed"),
+    ]
+    assert [r.status for r in saved_records] == [
+        NotificationStatus.PENDING,
+        NotificationStatus.SENT,
+    ]
+
+
+@pytest.mark.anyio
+async def test_handle__delayed_rule__saves_pending_record_and_schedules_it():
+    mock_notification_history_repo = AsyncMock()
+    mock_delayed_notification_queue = AsyncMock()
+
+    use_case = TriggerNotificationsUseCase(
+        event_repository=AsyncMock(),
+        notification_history_record_repository=mock_notification_history_repo,
+        notification_rules_engine=NotificationRulesEngine(
+            notification_rules=[
+                NotificationRule(
+                    notification_type="WELCOME_EMAIL",
+                    event_type="signup_completed",
+                    event_conditions=[],
+                    delay=timedelta(minutes=5),
+                    recheck=True,
+                )
+            ],
+            notifications=await StaticNotificationRepository().get_all(),
+        ),
+        recent_events_index=RecentEventsIndex(ttl=timedelta(days=1), max_users=100),
+        delayed_notification_queue=mock_delayed_notification_queue,
+        delivery_queue=AsyncMock(),
+    )
+
+    event = Event()
+    event.id = uuid4()
+    event.user_id = "u_12345"
+    event.type = "signup_completed"
+    event.event_timestamp = datetime.now(UTC)
+    event.event_date = event.event_timestamp.date()
+    event.properties = {}
+    event.user_traits = {}
+
+    await use_case.handle(event)
+
+    (saved_record,) = mock_notification_history_repo.save_all.call_args[0][0]
+    assert saved_record.status == NotificationStatus.PENDING
+
+    (scheduled,) = mock_delayed_notification_queue.schedule.call_args[0][0]
+    assert scheduled.record_id == saved_record.id
+    assert scheduled.notification_type == "WELCOME_EMAIL"
+    assert scheduled.trigger == "signup_completed"
+    assert (scheduled.event_id, scheduled.event_date) == (event.id, event.event_date)
+    assert scheduled.due_at == saved_record.created_at + timedelta(minutes=5)
+
+
+@pytest.mark.anyio
+async def test_handle_batch__events_and_records_returned_as_audit_updates():
+    mock_notification_history_repo = AsyncMock()
+    mock_notification_history_repo.count_by_users_and_type_within_time.return_value = {}
+
+    use_case = TriggerNotificationsUseCase(
+        event_repository=AsyncMock(),
+        notification_history_record_repository=mock_notification_history_repo,
+        notification_rules_engine=NotificationRulesEngine(
+            notification_rules=await StaticNotificationRuleRepository().get_all(),
+            notifications=await StaticNotificationRepository().get_all(),
+        ),
+        recent_events_index=RecentEventsIndex(ttl=timedelta(days=1), max_users=100),
+        delayed_notification_queue=AsyncMock(),
+        delivery_queue=AsyncMock(),
+    )
+
+    signup, other = Event(), Event()
+    for event, event_type in ((signup, "signup_completed"), (other, "app_opened")):
+        event.id = uuid4()
+        event.user_id = "u_12345"
+        event.type = event_type
+        event.event_timestamp = datetime.now(UTC)
+        event.event_date = event.event_timestamp.date()
+        event.properties = {"signup_method": "email"}
+        event.user_traits = {"marketing_opt_in": "true"}
+
+    signup_response, other_response = await use_case.handle_batch([signup, other])
+
+    assert [
+        (u.event.event_id if u.event else None, u.notification)
+        for u in other_response.audit_updates
+    ] == [(str(other.id), None)]
+    event_update, *notification_updates = signup_response.audit_updates
+    assert event_update.event is not None
+    assert event_update.event.event_id == str(signup.id)
+    assert [
+        u.notification.notification_type for u in notification_updates if u.notification
+    ] == ["WELCOME_EMAIL"]
+    assert {u.user_id for u in signup_response.audit_updates} == {"u_12345"}
@@ -0,0 +1,44 @@
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Protocol
+from uuid import UUID
+
+from domain import Event, NotificationHistoryRecord
+
+
+@dataclass(frozen=True)
+class AuditPosition:
+    """
+    Where a page of the audit ended: the timestamp and id of its last, oldest item
+    """
+
+    timestamp: datetime
+    id: UUID
+
+
+class AuditRepository(Protocol):
+    """
+    The reads of the audit of a user, newest first, and only older than before when
+    given. Each runs on a connection of its own, so they may be awaited concurrently.
+    """
+
+    async def find_events(
+        self,
+        user_id: str,
+        limit: int,
+        event_types: Sequence[str] = (),
+        since: datetime | None = None,
+        until: datetime | None = None,
+        before: AuditPosition | None = None,
+    ) -> list[Event]: ...
+
+    async def find_notifications(
+        self,
+        user_id: str,
+        limit: int,
+        notification_types: Sequence[str] = (),
+        since: datetime | None = None,
+        until: datetime | None = None,
+        before: AuditPosition | None = None,
+    ) -> list[NotificationHistoryRecord]: ...
@@ -1,7 +1,11 @@
-from datetime import datetime, timedelta
+from collections.abc import Sequence
+from datetime import date, datetime, timedelta
 from typing import Protocol
+from uuid import UUID
 
+from app.persistence.audit_repository import AuditPosition
 from domain import Event
+from domain.notification_rule import PropertyMatch
 
 
 class EventRepository(Protocol):
@@ -13,10 +17,34 @@ class EventRepository(Protocol):
         user_id: str,
         timerange: timedelta,
         event_timestamp: datetime,
+        property_matches: Sequence[PropertyMatch] = (),
     ) -> list[Event]: ...
 
+    async def exists_for_user_within_time(
+        self,
+        event_type: str,
+        user_id: str,
+        timerange: timedelta,
+        event_timestamp: datetime,
+        property_matches: Sequence[PropertyMatch] = (),
+    ) -> bool: ...
+
+    async def find_latest_timestamps_by_users(
+        self,
+        event_type: str,
+        user_ids: list[str],
+        since: datetime,
+        property_matches: Sequence[PropertyMatch] = (),
+    ) -> dict[str, datetime]: ...
+
+    async def find_by_keys(self, keys: list[tuple[UUID, date]]) -> list[Event]: ...
+
     async def find_recent_by_user(
         self,
         user_id: str,
         limit: int = 50,
+        event_types: Sequence[str] = (),
+        since: datetime | None = None,
+        until: datetime | None = None,
+        before: AuditPosition | None = None,
     ) -> list[Event]: ...
@@ -1,12 +1,17 @@
-from datetime import timedelta
+from collections.abc import Sequence
+from datetime import datetime, timedelta
 from typing import Protocol
+from uuid import UUID
 
-from domain import NotificationHistoryRecord
+from app.persistence.audit_repository import AuditPosition
+from domain import NotificationHistoryRecord, NotificationStatus
 
 
 class NotificationHistoryRecordRepository(Protocol):
     async def save(self, record: NotificationHistoryRecord) -> None: ...
 
+    async def save_all(self, records: list[NotificationHistoryRecord]) -> None: ...
+
     async def count_by_user_and_type_within_time(
         self,
         user_id: str,
@@ -14,9 +19,32 @@ class NotificationHistoryRecordRepository(Protocol):
         timerange: timedelta,
     ) -> int: ...
 
+    async def count_by_users_and_type_within_time(
+        self,
+        user_ids: list[str],
+        notification_type: str,
+        timerange: timedelta,
+    ) -> dict[str, int]: ...
+
+    async def resolve_pending(
+        self,
+        record_ids: list[UUID],
+        status: NotificationStatus,
+        suppressed_because: str | None = None,
+    ) -> list[UUID]: ...
+
+    async def find_pending(self, record_ids: list[UUID]) -> list[UUID]: ...
+
+    async def increment_retries(
+        self, record_ids: list[UUID]
+    ) -> list[tuple[UUID, int]]: ...
+
     async def find_recent_by_user(
         self,
         user_id: str,
         limit: int = 50,
+        notification_types: Sequence[str] = (),
+        since: datetime | None = None,
+        until: datetime | None = None,
+        before: AuditPosition | None = None,
     ) -> list[NotificationHistoryRecord]: ...
-
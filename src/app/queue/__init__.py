@@ -1,3 +1,11 @@
+from .delayed_notification_queue import DelayedNotification, DelayedNotificationQueue
+from .delivery_queue import Delivery, DeliveryQueue
 from .event_queue import EventQueue
 
-__all__ = ["EventQueue"]
+__all__ = [
+    "DelayedNotification",
+    "DelayedNotificationQueue",
+    "Delivery",
+    "DeliveryQueue",
+    "EventQueue",
+]
@@ -0,0 +1,33 @@
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Protocol
+from uuid import UUID
+
+
+@dataclass(frozen=True)
+class DelayedNotification:
+    # the PENDING notification history record
+    record_id: UUID
+    notification_type: str
+    trigger: str
+
+    # the event that triggered it, to recheck the conditions against
+    event_id: UUID
+    event_date: date
+
+    due_at: datetime
+
+
+class DelayedNotificationQueue(Protocol):
+    """
+    Popped notifications are only leased: unless acked in time they go back to the
+    queue with requeue_expired(), so a crashed dispatcher does not lose them
+    """
+
+    async def schedule(self, notifications: list[DelayedNotification]) -> None: ...
+
+    async def pop_due(self, now: datetime, limit: int) -> list[DelayedNotification]: ...
+
+    async def ack(self, notifications: list[DelayedNotification]) -> None: ...
+
+    async def requeue_expired(self, now: datetime) -> int: ...
@@ -0,0 +1,54 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Protocol
+from uuid import UUID
+
+from domain.notification import NotificationChannel
+
+
+@dataclass(frozen=True)
+class Delivery:
+    # the PENDING notification history record
+    record_id: UUID
+    notification_type: str
+    channel: NotificationChannel
+
+    # the email address, phone number or user id it goes to, None when the event
+    # did not carry one
+    recipient: str | None
+    # the text of the notification, its variables already filled in
+    text: str
+
+    # deliveries of a channel are sent oldest first
+    queued_at: datetime
+
+    # times to try it in all, None = the channel's
+    max_attempts: int | None = None
+    # the failed attempts so far, and when to make the next one; None = right away.
+    # The record's retries are what counts against max_attempts, this may be behind
+    retries: int = 0
+    retry_at: datetime | None = None
+
+
+class DeliveryQueue(Protocol):
+    """
+    One queue per channel, so each is drained at its own pace. Popped deliveries are
+    only leased: unless acked in time they go back to the queue with
+    requeue_expired(), so a crashed delivery worker does not lose them. Failed ones
+    are replaced with their next attempt by retry(), which is not popped before its
+    retry_at
+    """
+
+    async def push(self, deliveries: list[Delivery]) -> None: ...
+
+    async def pop(
+        self, channel: NotificationChannel, now: datetime, limit: int
+    ) -> list[Delivery]: ...
+
+    async def ack(self, deliveries: list[Delivery]) -> None: ...
+
+    async def retry(self, attempts: list[tuple[Delivery, Delivery]]) -> None: ...
+
+    async def requeue_expired(
+        self, channel: NotificationChannel, now: datetime
+    ) -> int: ...
@@ -0,0 +1,191 @@
+"""
+Latency of GET /audit/{user_id} under concurrent readers, on 10M events and 10M
+notification history records: both reads one after the other on the session of the
+request (as before), both at once on connections of their own, and the latter with
+the Redis audit cache in front.
+Needs the local Postgres (migrated with `make migrate`) and Redis. Seeding takes a few
+minutes; the seeded rows are deleted afterwards.
+
+    cd src && python -m benchmarks.audit_reads_load
+"""
+
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable
+from datetime import timedelta
+from uuid import uuid4
+
+from redis.asyncio import Redis
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.audit import GetUserAuditRequest, GetUserAuditUseCase
+from benchmarks.timing import percentile
+from infrastructure.database.persistence.sqla_audit_repository import (
+    SQLAAuditRepository,
+)
+from infrastructure.database.persistence.sqla_event_repository import (
+    SQLAEventRepository,
+)
+from infrastructure.database.persistence.sqla_notification_history_record_repository import (
+    SQLANotificationHistoryRecordRepository,
+)
+from infrastructure.env_config import EnvConfig
+from infrastructure.redis import RedisAuditCache
+
+ROWS = 10_000_000
+SEED_CHUNK = 1_000_000
+USERS = 100_000
+# users read during a run, so the cache gets hits as it would on a dashboard
+READ_USERS = 10_000
+LIMIT = 50
+DAYS = 30
+CONCURRENCY = 32
+DURATION_SECONDS = 15
+
+SEED_EVENTS = text(
+    """
+    INSERT INTO events
+        (id, user_id, type, event_timestamp, event_date, properties, user_traits)
+    SELECT gen_random_uuid(), :prefix || (i % :users), 'payment_failed', ts, ts::date,
+           '{"amount": 1425.0, "failure_reason": "INSUFFICIENT_FUNDS"}', '{}'
+    FROM generate_series(CAST(:start AS integer), CAST(:stop AS integer) - 1) AS i,
+         LATERAL (SELECT now() - random() * :days * interval '1 day' AS ts) AS t
+    """
+)
+
+SEED_HISTORY = text(
+    """
+    INSERT INTO notifications_history_records
+        (id, type, trigger, user_id, status, retries, suppressed_because, created_at)
+    SELECT gen_random_uuid(), 'INSUFFICIENT_FUNDS_EMAIL', 'payment_failed',
+           :prefix || (i % :users), 'sent', 0, NULL,
+           now() - random() * :days * interval '1 day'
+    FROM generate_series(CAST(:start AS integer), CAST(:stop AS integer) - 1) AS i
+    """
+)
+
+
+class NoAuditCache:
+    async def get(self, user_id: str, limit: int) -> None:
+        return None
+
+    async def set(self, response: object, limit: int) -> None:
+        pass
+
+
+async def _seed(session_factory: async_sessionmaker, prefix: str) -> None:
+    for stmt, table in (
+        (SEED_EVENTS, "events"),
+        (SEED_HISTORY, "notifications_history_records"),
+    ):
+        for start in range(0, ROWS, SEED_CHUNK):
+            async with session_factory() as session, session.begin():
+                await session.execute(
+                    stmt,
+                    {
+                        "prefix": prefix,
+                        "start": start,
+                        "stop": start + SEED_CHUNK,
+                        "users": USERS,
+                        "days": DAYS,
+                    },
+                )
+        async with session_factory() as session, session.begin():
+            await session.execute(text(f"ANALYZE {table}"))
+
+
+async def _reader(
+    read: Callable[[str], Awaitable[object]],
+    prefix: str,
+    deadline: float,
+    latencies: list[float],
+) -> None:
+    while time.perf_counter() < deadline:
+        user_id = f"{prefix}{random.randrange(READ_USERS)}"
+        started = time.perf_counter()
+        await read(user_id)
+        latencies.append(time.perf_counter() - started)
+
+
+async def _run(
+    name: str, read: Callable[[str], Awaitable[object]], prefix: str
+) -> None:
+    latencies: list[float] = []
+    deadline = time.perf_counter() + DURATION_SECONDS
+    await asyncio.gather(
+        *(_reader(read, prefix, deadline, latencies) for _ in range(CONCURRENCY))
+    )
+    print(
+        f"{name:<28} {len(latencies) / DURATION_SECONDS:>8,.0f} audits/s, "
+        f"p50 {percentile(latencies, 50) * 1e3:.2f} ms, "
+        f"p99 {percentile(latencies, 99) * 1e3:.2f} ms"
+    )
+
+
+async def main() -> None:
+    settings = EnvConfig()
+    # enough connections for every reader to hold two, the same for every run
+    engine = create_async_engine(
+        str(settings.database_url_async), pool_size=2 * CONCURRENCY
+    )
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    redis = Redis.from_url(str(settings.redis_url))
+    prefix = f"u_audit_{uuid4().hex[:8]}_"
+
+    try:
+        await _seed(session_factory, prefix)
+        print(f"{ROWS:,} events and {ROWS:,} notifications, {CONCURRENCY} readers")
+
+        async def read_in_turn(user_id: str) -> object:
+            # the reads as GetUserAuditUseCase made them before, on the one session
+            # of the request
+            async with session_factory() as session:
+                events = await SQLAEventRepository(session).find_recent_by_user(
+                    user_id, LIMIT
+                )
+                records = await SQLANotificationHistoryRecordRepository(
+                    session
+                ).find_recent_by_user(user_id, LIMIT)
+            return events, records
+
+        audit_repository = SQLAAuditRepository(session_factory)
+        uncached = GetUserAuditUseCase(audit_repository, NoAuditCache())
+        cached = GetUserAuditUseCase(
+            audit_repository,
+            RedisAuditCache(redis, ttl=timedelta(seconds=DURATION_SECONDS)),
+        )
+
+        await _run("in turn, one session", read_in_turn, prefix)
+        for name, use_case in (
+            ("concurrent, own connections", uncached),
+            ("concurrent, cached", cached),
+        ):
+            await _run(
+                name,
+                lambda user_id, use_case=use_case: use_case.handle(
+                    GetUserAuditRequest(user_id=user_id, limit=LIMIT)
+                ),
+                prefix,
+            )
+    finally:
+        async for key in redis.scan_iter(match=f"audit-cache:{prefix}*"):
+            await redis.delete(key)
+        async with session_factory() as session, session.begin():
+            params = {"prefix": f"{prefix}%"}
+            await session.execute(
+                text("DELETE FROM events WHERE user_id LIKE :prefix"), params
+            )
+            await session.execute(
+                text(
+                    "DELETE FROM notifications_history_records WHERE user_id LIKE :prefix"
+                ),
+                params,
+            )
+        await redis.aclose()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
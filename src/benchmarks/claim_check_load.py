@@ -0,0 +1,191 @@
+"""
+Redis memory taken by queued event messages, and the time from saving a batch to the
+worker having processed it, per EventsQueuePayload: the whole events vs only their keys
+(the worker then loads the events from Postgres).
+Needs the local Postgres (migrated with `make migrate`) and Redis; the worker is
+started as a `taskiq worker` subprocess. Everything created is deleted afterwards.
+
+    cd src && python -m benchmarks.claim_check_load
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from datetime import UTC, datetime
+from uuid import uuid4
+
+from redis.asyncio import Redis
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from benchmarks.timing import percentile
+from domain import Event
+from infrastructure.database.persistence.sqla_event_repository import (
+    SQLAEventRepository,
+)
+from infrastructure.env_config import EnvConfig, EventsIngestionMode, EventsQueuePayload
+from infrastructure.taskiq import TaskiqEventQueue, broker
+from infrastructure.taskiq.partitioning import partition_queue_name
+
+BATCH_SIZE = 1_000
+BACKLOG_BATCHES = 20
+LATENCY_BATCHES = 50
+WORKER_STARTUP_SECONDS = 5
+TIMEOUT_SECONDS = 300
+
+
+def _events(user_prefix: str, count: int) -> list[Event]:
+    events = []
+    for i in range(count):
+        event = Event()
+        event.id = uuid4()
+        event.user_id = f"{user_prefix}{i % 200}"
+        event.type = "payment_failed"
+        event.event_timestamp = datetime.now(UTC)
+        event.event_date = event.event_timestamp.date()
+        event.properties = {
+            "amount": 1425.0,
+            "attempt_number": 2,
+            "failure_reason": "INSUFFICIENT_FUNDS",
+            "payment_method": "card",
+            "merchant": {"id": "m_8812", "name": "Visible Bank", "country": "PT"},
+        }
+        event.user_traits = {
+            "email": f"{event.user_id}@example.com",
+            "country": "PT",
+            "marketing_opt_in": True,
+            "risk_segment": "MEDIUM",
+            "plan": "premium",
+        }
+        events.append(event)
+    return events
+
+
+def _start_worker() -> subprocess.Popen:
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "taskiq",
+            "worker",
+            "entrypoint.queue:broker",
+            "--workers",
+            "1",
+        ],
+        env=os.environ | {"EVENTS_PARTITIONS": "1"},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def _send(
+    session_factory: async_sessionmaker, queue: TaskiqEventQueue, batch: list[Event]
+) -> None:
+    async with session_factory() as session, session.begin():
+        repository = SQLAEventRepository(
+            session, ingestion_mode=EventsIngestionMode.COPY
+        )
+        await repository.save_all(batch)
+    await queue.events_received(batch)
+
+
+async def _wait_processed(
+    session_factory: async_sessionmaker, prefix: str, count: int, poll: float
+) -> None:
+    # every payment_failed leaves exactly one record, to send or suppressed
+    started = time.perf_counter()
+    while True:
+        async with session_factory() as session:
+            processed = await session.scalar(
+                text(
+                    "SELECT count(*) FROM notifications_history_records "
+                    "WHERE user_id LIKE :prefix"
+                ),
+                {"prefix": f"{prefix}%"},
+            )
+        if processed >= count:
+            return
+        if time.perf_counter() - started > TIMEOUT_SECONDS:
+            raise TimeoutError(f"Only {processed} of {count} processed")
+        await asyncio.sleep(poll)
+
+
+async def _stream_bytes(redis: Redis) -> int:
+    return await redis.memory_usage(partition_queue_name(0), samples=0) or 0
+
+
+async def _run(
+    session_factory: async_sessionmaker, redis: Redis, payload: EventsQueuePayload
+) -> None:
+    user_prefix = f"u_claim_{uuid4().hex[:8]}_"
+    queue = TaskiqEventQueue(partitions=1, payload=payload)
+
+    try:
+        # queued while no worker reads them, so they are all in Redis at once
+        stream_before = await _stream_bytes(redis)
+        for _ in range(BACKLOG_BATCHES):
+            await _send(session_factory, queue, _events(user_prefix, BATCH_SIZE))
+        stream_bytes = await _stream_bytes(redis) - stream_before
+
+        process = _start_worker()
+        try:
+            started = time.perf_counter()
+            await _wait_processed(
+                session_factory, user_prefix, BACKLOG_BATCHES * BATCH_SIZE, poll=0.1
+            )
+            # includes the startup of the worker, the same for both
+            drained = time.perf_counter() - started
+            await asyncio.sleep(WORKER_STARTUP_SECONDS)
+
+            latencies = []
+            for i in range(LATENCY_BATCHES):
+                batch_prefix = f"{user_prefix}l{i}_"
+                started = time.perf_counter()
+                await _send(session_factory, queue, _events(batch_prefix, BATCH_SIZE))
+                await _wait_processed(
+                    session_factory, batch_prefix, BATCH_SIZE, poll=0.005
+                )
+                latencies.append(time.perf_counter() - started)
+        finally:
+            process.terminate()
+            process.wait()
+    finally:
+        async with session_factory() as session, session.begin():
+            params = {"prefix": f"{user_prefix}%"}
+            await session.execute(
+                text("DELETE FROM events WHERE user_id LIKE :prefix"), params
+            )
+            await session.execute(
+                text(
+                    "DELETE FROM notifications_history_records WHERE user_id LIKE :prefix"
+                ),
+                params,
+            )
+
+    print(
+        f"{payload.value:<6} stream {stream_bytes / BACKLOG_BATCHES:>10,.0f} bytes "
+        f"per batch of {BATCH_SIZE}, backlog drained in {drained:.1f} s, "
+        f"save to processed p50 {percentile(latencies, 50) * 1e3:.0f} ms "
+        f"p95 {percentile(latencies, 95) * 1e3:.0f} ms"
+    )
+
+
+async def main() -> None:
+    settings = EnvConfig()
+    engine = create_async_engine(str(settings.database_url_async))
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    redis = Redis.from_url(str(settings.redis_url))
+    await broker.startup()
+
+    for payload in EventsQueuePayload:
+        await _run(session_factory, redis, payload)
+
+    await broker.shutdown()
+    await redis.aclose()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,132 @@
+"""
+Requests per second of POST /api/v1/events with small batches from many concurrent
+clients, without and with EVENTS_COALESCING_ENABLED.
+Needs the local Postgres (migrated with `make migrate`) and Redis. The events saved
+are deleted afterwards; the messages sent stay in the event queues, so run it without
+workers or with the queues flushed afterwards.
+
+    cd src && python -m benchmarks.events_coalescing_load
+"""
+
+import asyncio
+import time
+from datetime import UTC, datetime
+from uuid import uuid4
+
+import httpx
+from dishka import Provider, Scope, provide
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from benchmarks.timing import percentile
+from infrastructure import dependencies_providers
+from infrastructure.env_config import EnvConfig
+from infrastructure.fastapi.main import create_api
+
+BATCH_SIZES = (1, 5)
+CONCURRENCY = 64
+DURATION_SECONDS = 10
+
+
+def _body(user_prefix: str, batch_size: int) -> list[dict]:
+    return [
+        {
+            "user_id": f"{user_prefix}{i}",
+            "event_type": "payment_failed",
+            "event_timestamp": datetime.now(UTC).isoformat(),
+            "properties": {
+                "amount": 1425.0,
+                "attempt_number": 2,
+                "failure_reason": "INSUFFICIENT_FUNDS",
+            },
+            "user_traits": {"email": "maria@example.com", "country": "PT"},
+        }
+        for i in range(batch_size)
+    ]
+
+
+async def _client(
+    client: httpx.AsyncClient,
+    user_prefix: str,
+    batch_size: int,
+    deadline: float,
+    latencies: list[float],
+) -> None:
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.post(
+            "/api/v1/events", json=_body(user_prefix, batch_size)
+        )
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+
+
+async def _run(settings: EnvConfig, batch_size: int) -> tuple[float, float]:
+    """
+    Requests per second, and their p95 latency
+    """
+
+    class BenchmarkProvider(Provider):
+        @provide(scope=Scope.APP)
+        def settings(self) -> EnvConfig:
+            return settings
+
+        @provide(scope=Scope.APP)
+        def get_async_engine(self) -> AsyncEngine:
+            # without the SQL echo of the API
+            return create_async_engine(str(settings.database_url_async))
+
+    user_prefix = f"u_coalesce_{uuid4().hex[:8]}_"
+    app = create_api(settings, dependencies_providers + [BenchmarkProvider()])
+    transport = httpx.ASGITransport(app=app)
+    latencies: list[float] = []
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://api") as c:
+            started = time.perf_counter()
+            deadline = started + DURATION_SECONDS
+            await asyncio.gather(
+                *(
+                    _client(c, user_prefix, batch_size, deadline, latencies)
+                    for _ in range(CONCURRENCY)
+                )
+            )
+            elapsed = time.perf_counter() - started
+    finally:
+        await app.state.dishka_container.close()
+
+        engine = create_async_engine(str(settings.database_url_async))
+        async with engine.begin() as connection:
+            params = {"prefix": f"{user_prefix}%"}
+            await connection.execute(
+                text(
+                    "DELETE FROM events_outbox USING events"
+                    " WHERE events_outbox.event_id = events.id"
+                    " AND events.user_id LIKE :prefix"
+                ),
+                params,
+            )
+            await connection.execute(
+                text("DELETE FROM events WHERE user_id LIKE :prefix"), params
+            )
+        await engine.dispose()
+
+    return len(latencies) / elapsed, percentile(latencies, 95)
+
+
+async def main() -> None:
+    for batch_size in BATCH_SIZES:
+        results = []
+        for coalescing in (False, True):
+            settings = EnvConfig(events_coalescing_enabled=coalescing)
+            results.append(await _run(settings, batch_size))
+
+        (before, before_p95), (after, after_p95) = results
+        print(
+            f"{batch_size} events per request, {CONCURRENCY} clients: "
+            f"{before:,.0f} -> {after:,.0f} requests/s (x{after / before:.1f}), "
+            f"p95 {before_p95 * 1e3:.1f} -> {after_p95 * 1e3:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
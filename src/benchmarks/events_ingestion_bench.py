@@ -0,0 +1,71 @@
+"""
+SQLAEventRepository.save_all latency for 1000-event batches against a local Postgres
+(migrated with `make migrate`), per EventsIngestionMode.
+Every batch is rolled back afterwards.
+
+    cd src && python -m benchmarks.events_ingestion_bench
+"""
+
+import asyncio
+from datetime import UTC, datetime
+from functools import partial
+from uuid import uuid4
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from benchmarks.timing import percentile, sample
+from domain import Event
+from infrastructure.database.persistence.sqla_event_repository import (
+    SQLAEventRepository,
+)
+from infrastructure.env_config import EnvConfig, EventsIngestionMode
+
+BATCH_SIZE = 1_000
+ITERATIONS = 200
+
+
+def _events(count: int) -> list[Event]:
+    events = []
+    for i in range(count):
+        event = Event()
+        event.id = uuid4()
+        event.user_id = f"u_bench_{i % 100}"
+        event.type = "payment_failed"
+        event.event_timestamp = datetime.now(UTC)
+        event.event_date = event.event_timestamp.date()
+        event.properties = {
+            "amount": 1425.0,
+            "attempt_number": 2,
+            "failure_reason": "INSUFFICIENT_FUNDS",
+        }
+        event.user_traits = {"email": "maria@example.com", "country": "PT"}
+        events.append(event)
+    return events
+
+
+async def _save_batch(
+    session_factory: async_sessionmaker, mode: EventsIngestionMode
+) -> None:
+    events = _events(BATCH_SIZE)
+    async with session_factory() as session:
+        await session.begin()
+        await SQLAEventRepository(session, ingestion_mode=mode).save_all(events)
+        await session.rollback()
+
+
+async def main() -> None:
+    engine = create_async_engine(str(EnvConfig().database_url_async))
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    for mode in EventsIngestionMode:
+        samples = await sample(partial(_save_batch, session_factory, mode), ITERATIONS)
+        print(
+            f"{mode.value}: p50 {percentile(samples, 50) * 1e3:.1f} ms, "
+            f"p99 {percentile(samples, 99) * 1e3:.1f} ms"
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
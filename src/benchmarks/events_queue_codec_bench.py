@@ -0,0 +1,166 @@
+"""
+Size of an events_received message and the time to encode it (events -> bytes) and to
+decode it (bytes -> events) for typical batches: the list of per event dicts through
+the default JSON serializer (before) vs the columnar payload through each serializer.
+
+    cd src && python -m benchmarks.events_queue_codec_bench
+"""
+
+import asyncio
+import random
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+from uuid import UUID, uuid4
+
+from taskiq.abc.serializer import TaskiqSerializer
+from taskiq.serializers import JSONSerializer
+
+from domain import Event
+from infrastructure.taskiq.events_codec import decode_events, encode_events
+from infrastructure.taskiq.serializers import PydanticCoreSerializer, ZstdSerializer
+
+BATCH_SIZES = (1, 100, 1_000)
+ITERATIONS = 20_000
+
+
+def _synthetic_events(count: int) -> list[Event]:
+    rng = random.Random(42)
+    now = datetime.now(UTC)
+    events = []
+    for _ in range(count):
+        event_type = rng.choice(["payment_failed", "signup_completed"])
+        events.append(
+            Event(
+                id=uuid4(),
+                user_id=f"u_{rng.randint(1, 50)}",
+                type=event_type,
+                event_timestamp=now - timedelta(seconds=rng.randint(0, 3600)),
+                event_date=now.date(),
+                properties={
+                    "amount": round(rng.uniform(1, 5000), 2),
+                    "attempt_number": rng.randint(1, 5),
+                    "failure_reason": rng.choice(
+                        ["INSUFFICIENT_FUNDS", "CARD_EXPIRED"]
+                    ),
+                }
+                if event_type == "payment_failed"
+                else {"signup_method": "email", "device_type": "mobile"},
+                user_traits={
+                    "email": "bench@example.com",
+                    "country": "PT",
+                    "marketing_opt_in": rng.choice([True, False]),
+                    "risk_segment": "MEDIUM",
+                },
+            )
+        )
+    return events
+
+
+def _event_to_dict(event: Event) -> dict:
+    return {
+        "id": str(event.id),
+        "user_id": event.user_id,
+        "type": event.type,
+        "event_timestamp": event.event_timestamp.isoformat(),
+        "event_date": event.event_date.isoformat(),
+        "properties": event.properties,
+        "user_traits": event.user_traits,
+    }
+
+
+def _dict_to_event(data: dict) -> Event:
+    return Event(
+        id=UUID(data["id"]),
+        user_id=data["user_id"],
+        type=data["type"],
+        event_timestamp=datetime.fromisoformat(data["event_timestamp"]),
+        event_date=datetime.fromisoformat(data["event_date"]).date(),
+        properties=data["properties"],
+        user_traits=data["user_traits"],
+    )
+
+
+def _message(payload: Any) -> dict:
+    """
+    What taskiq puts on the wire around the task argument
+    """
+    return {
+        "task_id": uuid4().hex,
+        "task_name": "infrastructure.taskiq.messages:events_received",
+        "labels": {"queue_name": "visible-notify:events:0"},
+        "labels_types": None,
+        "args": [payload],
+        "kwargs": {},
+    }
+
+
+def _seconds_per_call(fn: Callable[[], object], iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations
+
+
+def _report(
+    name: str,
+    events: list[Event],
+    encode: Callable[[list[Event]], Any],
+    decode: Callable[[Any], list[Event]],
+    serializer: TaskiqSerializer,
+) -> None:
+    data = serializer.dumpb(_message(encode(events)))
+    assert len(decode(serializer.loadb(data)["args"][0])) == len(events)
+
+    iterations = max(10, ITERATIONS // len(events))
+    encoding = _seconds_per_call(
+        lambda: serializer.dumpb(_message(encode(events))), iterations
+    )
+    decoding = _seconds_per_call(
+        lambda: decode(serializer.loadb(data)["args"][0]), iterations
+    )
+    print(
+        f"  {name:<32} {len(data):>9,} bytes  "
+        f"encode {encoding * 1e6:>9.1f} us  decode {decoding * 1e6:>9.1f} us"
+    )
+
+
+async def main() -> None:
+    def encode_dicts(events: list[Event]) -> list[dict]:
+        return [_event_to_dict(event) for event in events]
+
+    def decode_dicts(payload: list[dict]) -> list[Event]:
+        return [_dict_to_event(data) for data in payload]
+
+    for batch_size in BATCH_SIZES:
+        events = _synthetic_events(batch_size)
+        print(f"batch of {batch_size}:")
+        _report(
+            "dicts + json (before)",
+            events,
+            encode_dicts,
+            decode_dicts,
+            JSONSerializer(),
+        )
+        _report(
+            "columnar + json", events, encode_events, decode_events, JSONSerializer()
+        )
+        _report(
+            "columnar + pydantic_core",
+            events,
+            encode_events,
+            decode_events,
+            PydanticCoreSerializer(),
+        )
+        _report(
+            "columnar + pydantic_core + zstd",
+            events,
+            encode_events,
+            decode_events,
+            ZstdSerializer(PydanticCoreSerializer(), compress_above=0),
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+"""
+Validation of POST /api/v1/events bodies: json.loads + list[EventDTO | Any] +
+EventDTO.model_validate per item (what the handler used to do) vs one TypeAdapter pass
+over the raw bytes, only the invalid items validated again for their errors. Building
+the domain events is left out of both, it costs the same either way.
+
+    cd src && python -m benchmarks.events_validation_bench
+"""
+
+import asyncio
+import json
+import random
+from typing import Any
+
+from pydantic import TypeAdapter
+
+from benchmarks.timing import measure
+from presentation.api.events.events_validation import EventDTO, validate_events
+
+BATCH_SIZES = (1, 100, 10_000)
+# the share of items that are not valid events
+INVALID_RATIO = 0.05
+
+_UNION_ADAPTER = TypeAdapter(list[EventDTO | Any])
+
+
+def _body(count: int) -> bytes:
+    rng = random.Random(42)
+    items: list[Any] = []
+    for i in range(count):
+        if rng.random() < INVALID_RATIO:
+            items.append({"user_id": f"u_{i}"})
+            continue
+        items.append(
+            {
+                "user_id": f"u_{rng.randint(1, 1000)}",
+                "event_type": "payment_failed",
+                "event_timestamp": "2025-10-31T19:22:11Z",
+                "properties": {
+                    "amount": rng.uniform(1, 5000),
+                    "attempt_number": rng.randint(1, 5),
+                    "failure_reason": "INSUFFICIENT_FUNDS",
+                },
+                "user_traits": {"email": "bench@example.com", "marketing_opt_in": True},
+            }
+        )
+    return json.dumps(items).encode()
+
+
+def _validate_twice(body: bytes) -> list[EventDTO]:
+    events = []
+    for item in _UNION_ADAPTER.validate_python(json.loads(body)):
+        try:
+            events.append(EventDTO.model_validate(item))
+        except ValueError:
+            continue
+    return events
+
+
+async def _events_per_second(batch_size: int) -> tuple[float, float]:
+    body = _body(batch_size)
+    assert len(_validate_twice(body)) == len(validate_events(body).events)
+
+    async def before() -> None:
+        _validate_twice(body)
+
+    async def after() -> None:
+        validate_events(body)
+
+    iterations = max(1, 20_000 // batch_size)
+    warmup = max(1, iterations // 10)
+    return (
+        batch_size / await measure(before, iterations, warmup),
+        batch_size / await measure(after, iterations, warmup),
+    )
+
+
+async def main() -> None:
+    for batch_size in BATCH_SIZES:
+        before, after = await _events_per_second(batch_size)
+        print(
+            f"batch of {batch_size}: before {before:,.0f} events/s, "
+            f"after {after:,.0f} events/s, x{after / before:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
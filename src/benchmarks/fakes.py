@@ -0,0 +1,59 @@
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+
+from domain import Event, NotificationHistoryRecord
+from domain.notification_rule import PropertyMatch
+
+
+class InMemoryEventRepository:
+    """
+    Pretends every proximity lookup finds a matching event
+    """
+
+    async def save_all(self, events: list[Event]) -> int:
+        return len(events)
+
+    async def find_for_user_within_time(
+        self,
+        event_type: str,
+        user_id: str,
+        timerange: timedelta,
+        event_timestamp: datetime,
+        property_matches: Sequence[PropertyMatch] = (),
+    ) -> list[Event]:
+        return [Event()]
+
+    async def exists_for_user_within_time(
+        self,
+        event_type: str,
+        user_id: str,
+        timerange: timedelta,
+        event_timestamp: datetime,
+        property_matches: Sequence[PropertyMatch] = (),
+    ) -> bool:
+        return True
+
+    async def find_recent_by_user(self, user_id: str, limit: int = 50) -> list[Event]:
+        return []
+
+
+class InMemoryNotificationHistoryRecordRepository:
+    """
+    Never debounces anything, so every matching rule goes the full path
+    """
+
+    async def save(self, record: NotificationHistoryRecord) -> None:
+        pass
+
+    async def count_by_user_and_type_within_time(
+        self,
+        user_id: str,
+        notification_type: str,
+        timerange: timedelta,
+    ) -> int:
+        return 0
+
+    async def find_recent_by_user(
+        self, user_id: str, limit: int = 50
+    ) -> list[NotificationHistoryRecord]:
+        return []
@@ -0,0 +1,92 @@
+"""
+NotificationHistoryRecord writes per second against a local Postgres (migrated with
+`make migrate`): add + flush per record vs a single save_all.
+Everything is rolled back afterwards.
+
+    cd src && python -m benchmarks.history_records_insert_bench
+"""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime
+from uuid import uuid4
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from domain import NotificationHistoryRecord, NotificationStatus
+from infrastructure.database.persistence.sqla_notification_history_record_repository import (
+    SQLANotificationHistoryRecordRepository,
+)
+from infrastructure.env_config import EnvConfig
+
+BATCH_SIZES = (1, 10, 100, 1_000, 5_000)
+
+
+def _records(count: int) -> list[NotificationHistoryRecord]:
+    return [
+        NotificationHistoryRecord(
+            id=uuid4(),
+            type="INSUFFICIENT_FUNDS_EMAIL",
+            trigger="payment_failed",
+            user_id=f"u_bench_{i % 100}",
+            status=NotificationStatus.SENT,
+            retries=0,
+            suppressed_because=None,
+            created_at=datetime.now(UTC),
+        )
+        for i in range(count)
+    ]
+
+
+async def _records_per_second(
+    session_factory: async_sessionmaker,
+    write: Callable[
+        [SQLANotificationHistoryRecordRepository, list[NotificationHistoryRecord]],
+        Awaitable[None],
+    ],
+    count: int,
+) -> float:
+    records = _records(count)
+    async with session_factory() as session:
+        await session.begin()
+        repository = SQLANotificationHistoryRecordRepository(session)
+        started = time.perf_counter()
+        await write(repository, records)
+        elapsed = time.perf_counter() - started
+        await session.rollback()
+    return count / elapsed
+
+
+async def _save_one_by_one(
+    repository: SQLANotificationHistoryRecordRepository,
+    records: list[NotificationHistoryRecord],
+) -> None:
+    for record in records:
+        await repository.save(record)
+
+
+async def _save_all(
+    repository: SQLANotificationHistoryRecordRepository,
+    records: list[NotificationHistoryRecord],
+) -> None:
+    await repository.save_all(records)
+
+
+async def main() -> None:
+    engine = create_async_engine(str(EnvConfig().database_url_async))
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    for count in BATCH_SIZES:
+        before = await _records_per_second(session_factory, _save_one_by_one, count)
+        after = await _records_per_second(session_factory, _save_all, count)
+        print(
+            f"{count} records: save {before:,.0f} rec/s, save_all {after:,.0f} rec/s, "
+            f"x{after / before:.1f}"
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,184 @@
+"""
+Worker throughput with 1, 2 and 4 worker processes sharing EVENTS_PARTITIONS=4, and
+no duplicate sends: every user gets a burst of payment_failed events, while
+INSUFFICIENT_FUNDS_EMAIL may only be sent once a calendar day.
+Needs the local Postgres (migrated with `make migrate`) and Redis; the workers are
+started as `taskiq worker` subprocesses. Everything created is deleted afterwards.
+
+    cd src && python -m benchmarks.partitioned_workers_load
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import UTC, datetime
+from uuid import uuid4
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from domain import Event
+from infrastructure.database.persistence.sqla_event_repository import (
+    SQLAEventRepository,
+)
+from infrastructure.env_config import EnvConfig, EventsIngestionMode
+from infrastructure.taskiq import TaskiqEventQueue, broker
+
+PARTITIONS = 4
+WORKER_COUNTS = (1, 2, 4)
+USERS = 500
+EVENTS_PER_USER = 10
+BATCH_SIZE = 100
+WORKER_STARTUP_SECONDS = 5
+TIMEOUT_SECONDS = 300
+
+
+def _events(user_prefix: str) -> list[Event]:
+    events = []
+    # interleaved, so every batch has events of many users
+    for _ in range(EVENTS_PER_USER):
+        for i in range(USERS):
+            event = Event()
+            event.id = uuid4()
+            event.user_id = f"{user_prefix}{i}"
+            event.type = "payment_failed"
+            event.event_timestamp = datetime.now(UTC)
+            event.event_date = event.event_timestamp.date()
+            event.properties = {
+                "amount": 10.0,
+                "attempt_number": 1,
+                "failure_reason": "INSUFFICIENT_FUNDS",
+            }
+            event.user_traits = {}
+            events.append(event)
+    return events
+
+
+def _start_workers(count: int) -> list[subprocess.Popen]:
+    workers = []
+    for worker in range(count):
+        owned = [p for p in range(PARTITIONS) if p % count == worker]
+        env = os.environ | {
+            "EVENTS_PARTITIONS": str(PARTITIONS),
+            "EVENTS_WORKER_PARTITIONS": json.dumps(owned),
+        }
+        workers.append(
+            subprocess.Popen(
+                [
+                    sys.executable,
+                    "-m",
+                    "taskiq",
+                    "worker",
+                    "entrypoint.queue:broker",
+                    "--workers",
+                    "1",
+                    "--max-async-tasks",
+                    "1",
+                ],
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        )
+    return workers
+
+
+async def _run(session_factory: async_sessionmaker, workers: int) -> tuple[float, int]:
+    """
+    Events per second, and how many users were sent the notification more than once
+    """
+    user_prefix = f"u_load_{uuid4().hex[:8]}_"
+    events = _events(user_prefix)
+    queue = TaskiqEventQueue(partitions=PARTITIONS)
+    params = {"prefix": f"{user_prefix}%"}
+
+    processes = _start_workers(workers)
+    try:
+        await asyncio.sleep(WORKER_STARTUP_SECONDS)
+
+        started = time.perf_counter()
+        for start in range(0, len(events), BATCH_SIZE):
+            batch = events[start : start + BATCH_SIZE]
+            async with session_factory() as session, session.begin():
+                repository = SQLAEventRepository(
+                    session, ingestion_mode=EventsIngestionMode.COPY
+                )
+                await repository.save_all(batch)
+            await queue.events_received(batch)
+
+        # every payment_failed leaves exactly one record, to send or suppressed
+        while True:
+            async with session_factory() as session:
+                processed = await session.scalar(
+                    text(
+                        "SELECT count(*) FROM notifications_history_records "
+                        "WHERE user_id LIKE :prefix"
+                    ),
+                    params,
+                )
+            if processed >= len(events):
+                break
+            if time.perf_counter() - started > TIMEOUT_SECONDS:
+                raise TimeoutError(f"Only {processed} of {len(events)} processed")
+            await asyncio.sleep(0.1)
+        elapsed = time.perf_counter() - started
+
+        # not suppressed: pending until the delivery workers send it, which this
+        # does not run
+        async with session_factory() as session:
+            duplicates = await session.scalar(
+                text(
+                    "SELECT count(*) FROM ("
+                    " SELECT user_id FROM notifications_history_records"
+                    " WHERE user_id LIKE :prefix AND status <> 'suppressed'"
+                    " GROUP BY user_id HAVING count(*) > 1"
+                    ") AS duplicated"
+                ),
+                params,
+            )
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+        async with session_factory() as session, session.begin():
+            await session.execute(
+                text("DELETE FROM events WHERE user_id LIKE :prefix"), params
+            )
+            await session.execute(
+                text(
+                    "DELETE FROM notifications_history_records WHERE user_id LIKE :prefix"
+                ),
+                params,
+            )
+
+    return len(events) / elapsed, duplicates
+
+
+async def main() -> None:
+    engine = create_async_engine(str(EnvConfig().database_url_async))
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    await broker.startup()
+
+    any_duplicates = False
+    for workers in WORKER_COUNTS:
+        events_per_second, duplicates = await _run(session_factory, workers)
+        any_duplicates |= duplicates > 0
+        print(
+            f"{workers} workers: {events_per_second:,.0f} events/s, "
+            f"{duplicates} users sent INSUFFICIENT_FUNDS_EMAIL more than once"
+        )
+
+    await broker.shutdown()
+    await engine.dispose()
+
+    if any_duplicates:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
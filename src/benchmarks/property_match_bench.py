@@ -0,0 +1,98 @@
+"""
+property_match evaluation over the rules in notification_rules.yml: event.to_dict() +
+glom() + per-call operand normalisation vs precompiled accessors.
+
+    cd src && python -m benchmarks.property_match_bench
+"""
+
+import asyncio
+import random
+from datetime import UTC, datetime
+from uuid import uuid4
+
+from glom import glom
+
+from app.notifications.compiled_conditions import compile_property_match
+from benchmarks.timing import measure, report
+from domain import Event
+from domain.notification_rule import PropertyMatch, PropertyOperator
+from infrastructure.staticyaml import StaticNotificationRuleRepository
+
+ITERATIONS = 2_000
+EVENTS = 100
+
+
+def _glom_matches(event: Event, property_match: PropertyMatch) -> bool:
+    event_dict = event.to_dict()
+    if property_match.operator is PropertyOperator.EQ:
+        return (
+            str(property_match.value).lower()
+            == str(glom(event_dict, property_match.property_xpath)).lower()
+        )
+    return float(glom(event_dict, property_match.property_xpath)) >= float(
+        property_match.value
+    )
+
+
+def _synthetic_events(count: int) -> list[Event]:
+    rng = random.Random(42)
+    now = datetime.now(UTC)
+    return [
+        Event(
+            id=uuid4(),
+            user_id=f"u_{rng.randint(1, 1000)}",
+            type="payment_failed",
+            event_timestamp=now,
+            event_date=now.date(),
+            properties={
+                "amount": rng.uniform(1, 5000),
+                "attempt_number": rng.randint(1, 5),
+                "failure_reason": rng.choice(["INSUFFICIENT_FUNDS", "CARD_EXPIRED"]),
+            },
+            user_traits={
+                "email": "bench@example.com",
+                "marketing_opt_in": rng.choice([True, False]),
+                "risk_segment": "MEDIUM",
+            },
+        )
+        for _ in range(count)
+    ]
+
+
+async def main() -> None:
+    rules = await StaticNotificationRuleRepository().get_all()
+    property_matches = [
+        condition.property_match
+        for rule in rules
+        for condition in rule.event_conditions
+        if condition.property_match
+    ]
+    compiled_matches = [compile_property_match(pm) for pm in property_matches]
+    events = _synthetic_events(EVENTS)
+
+    for property_match, compiled in zip(
+        property_matches, compiled_matches, strict=True
+    ):
+        assert all(
+            _glom_matches(event, property_match) == compiled.matches(event)
+            for event in events
+        )
+
+    async def with_glom() -> None:
+        for event in events:
+            for property_match in property_matches:
+                _glom_matches(event, property_match)
+
+    async def with_compiled() -> None:
+        for event in events:
+            for compiled in compiled_matches:
+                compiled.matches(event)
+
+    checks = EVENTS * len(property_matches)
+    before = await measure(with_glom, ITERATIONS, warmup=10) / checks
+    after = await measure(with_compiled, ITERATIONS, warmup=10) / checks
+    report(f"property_match x{len(property_matches)} rules", before, after)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+"""
+Per-event routing overhead: rebuilding the relay from repositories for every event
+(the old TriggerNotificationsUseCase behaviour) vs borrowing a compiled engine.
+
+    cd src && python -m benchmarks.rules_routing_bench
+"""
+
+import asyncio
+from datetime import UTC, datetime
+from uuid import uuid4
+
+from app.notifications.notification_rules_engine import NotificationRulesEngine
+from app.notifications.notification_rules_relay import NotificationRulesRelay
+from benchmarks.fakes import (
+    InMemoryEventRepository,
+    InMemoryNotificationHistoryRecordRepository,
+)
+from benchmarks.timing import measure, report
+from domain import Event
+from infrastructure.staticyaml import (
+    StaticNotificationRepository,
+    StaticNotificationRuleRepository,
+)
+
+ITERATIONS = 20_000
+
+
+def _event(event_type: str) -> Event:
+    now = datetime.now(UTC)
+    return Event(
+        id=uuid4(),
+        user_id="u_bench",
+        type=event_type,
+        event_timestamp=now,
+        event_date=now.date(),
+        properties={"failure_reason": "INSUFFICIENT_FUNDS", "attempt_number": 3},
+        user_traits={"marketing_opt_in": True},
+    )
+
+
+async def main() -> None:
+    event_repo = InMemoryEventRepository()
+    history_repo = InMemoryNotificationHistoryRecordRepository()
+    notification_repo = StaticNotificationRepository()
+    rule_repo = StaticNotificationRuleRepository()
+
+    engine = NotificationRulesEngine(
+        notification_rules=await rule_repo.get_all(),
+        notifications=await notification_repo.get_all(),
+    )
+    borrowed_relay = NotificationRulesRelay(
+        event_repo=event_repo,
+        notification_history_repo=history_repo,
+        rules_engine=engine,
+    )
+
+    for event_type in ("payment_failed", "signup_completed", "page_viewed"):
+        event = _event(event_type)
+
+        async def rebuilt_per_event(event: Event = event) -> None:
+            relay = NotificationRulesRelay(
+                event_repo=event_repo,
+                notification_history_repo=history_repo,
+                rules_engine=NotificationRulesEngine(
+                    notification_rules=await rule_repo.get_all(),
+                    notifications=await notification_repo.get_all(),
+                ),
+            )
+            await relay.route(event)
+
+        async def borrowed(event: Event = event) -> None:
+            await borrowed_relay.route(event)
+
+        report(
+            f"route({event_type})",
+            await measure(rebuilt_per_event, ITERATIONS),
+            await measure(borrowed, ITERATIONS),
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
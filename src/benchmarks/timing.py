@@ -0,0 +1,46 @@
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+
+
+async def measure(
+    fn: Callable[[], Awaitable[object]], iterations: int, warmup: int = 100
+) -> float:
+    """
+    Average seconds per call of an async callable
+    """
+    for _ in range(warmup):
+        await fn()
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await fn()
+    return (time.perf_counter() - started) / iterations
+
+
+def report(name: str, before: float, after: float) -> None:
+    print(
+        f"{name}: before {before * 1e6:.2f} us/op, after {after * 1e6:.2f} us/op, "
+        f"x{before / after:.1f}"
+    )
+
+
+async def sample(
+    fn: Callable[[], Awaitable[object]], iterations: int, warmup: int = 10
+) -> list[float]:
+    """
+    Seconds taken by every single call of an async callable
+    """
+    for _ in range(warmup):
+        await fn()
+
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def percentile(samples: list[float], p: int) -> float:
+    return statistics.quantiles(samples, n=100, method="inclusive")[p - 1]
@@ -1,16 +1,20 @@
 from domain.base import Base
 from domain.event import Event
+from domain.event_outbox_entry import EventOutboxEntry
 from domain.notification import Notification
 from domain.notification_history_record import (
     NotificationHistoryRecord,
     NotificationStatus,
 )
+from domain.notification_history_rollup import NotificationHistoryRollup
 from domain.notification_rule import NotificationRule
 
 __all__ = [
     "Base",
     "Event",
+    "EventOutboxEntry",
     "NotificationHistoryRecord",
+    "NotificationHistoryRollup",
     "NotificationStatus",
     "Notification",
     "NotificationRule",
@@ -1,7 +1,8 @@
 from datetime import date, datetime
 from uuid import UUID
 
-from sqlalchemy import JSON, Date, DateTime, Index, String, Uuid
+from sqlalchemy import Date, DateTime, Index, String, Uuid
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
 from domain.base import Base
@@ -9,15 +10,31 @@ from domain.base import Base
 
 class Event(Base):
     __tablename__ = "events"
-    __table_args__ = (Index("ix__user_id__event_date", "user_id", "event_date"),)
+    __table_args__ = (
+        Index("ix__user_id__event_date", "user_id", "event_date"),
+        # proximity lookups, and the audit filtered by type; event_date is included
+        # so its filter skips the heap
+        Index(
+            "ix__user_id__type__event_timestamp__id",
+            "user_id",
+            "type",
+            "event_timestamp",
+            "id",
+            postgresql_include=["event_date"],
+        ),
+        # the audit, newest first; id orders events of the same timestamp
+        Index("ix__user_id__event_timestamp__id", "user_id", "event_timestamp", "id"),
+        # partitions are created and expired by the events partition maintenance job
+        {"postgresql_partition_by": "RANGE (event_date)"},
+    )
 
     id: Mapped[UUID] = mapped_column(Uuid, primary_key=True)
     user_id: Mapped[str] = mapped_column(String)
     type: Mapped[str] = mapped_column(String)
     event_timestamp: Mapped[datetime] = mapped_column(DateTime(timezone=True))
     event_date: Mapped[date] = mapped_column(Date, primary_key=True)
-    properties: Mapped[dict] = mapped_column(JSON)
-    user_traits: Mapped[dict] = mapped_column(JSON)
+    properties: Mapped[dict] = mapped_column(JSONB)
+    user_traits: Mapped[dict] = mapped_column(JSONB)
 
     def to_dict(self) -> dict:
         return {
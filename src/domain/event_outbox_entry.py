@@ -0,0 +1,21 @@
+from datetime import date
+from uuid import UUID
+
+from sqlalchemy import BigInteger, Date, Identity, Uuid
+from sqlalchemy.orm import Mapped, mapped_column
+
+from domain.base import Base
+
+
+class EventOutboxEntry(Base):
+    """
+    An event saved but not published to the event queues yet: written in the
+    transaction saving the event, and deleted by the outbox relay publishing it
+    """
+
+    __tablename__ = "events_outbox"
+
+    # the order events were saved in, and are published in
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    event_id: Mapped[UUID] = mapped_column(Uuid)
+    event_date: Mapped[date] = mapped_column(Date)
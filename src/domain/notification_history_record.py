@@ -2,7 +2,7 @@ from datetime import datetime
 from enum import Enum
 from uuid import UUID
 
-from sqlalchemy import DateTime, Integer, String, Uuid
+from sqlalchemy import DateTime, Index, Integer, String, Uuid
 from sqlalchemy.orm import Mapped, mapped_column
 
 from domain.base import Base
@@ -17,6 +17,17 @@ class NotificationStatus(str, Enum):
 
 class NotificationHistoryRecord(Base):
     __tablename__ = "notifications_history_records"
+    __table_args__ = (
+        # debounce counts are answered from the index alone; id orders the audit
+        # filtered by type
+        Index(
+            "ix__user_id__type__created_at__id", "user_id", "type", "created_at", "id"
+        ),
+        # the compaction job picks the records past the retention
+        Index("ix__created_at", "created_at"),
+        # the audit, newest first; id orders records created at the same time
+        Index("ix__user_id__created_at__id", "user_id", "created_at", "id"),
+    )
 
     id: Mapped[UUID] = mapped_column(Uuid, primary_key=True)
     type: Mapped[str] = mapped_column(String)
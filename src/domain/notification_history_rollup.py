@@ -0,0 +1,21 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from domain.base import Base
+
+
+class NotificationHistoryRollup(Base):
+    """
+    What is left of the notification history records past the retention: how many
+    there were per user and type, and when the oldest and newest were created
+    """
+
+    __tablename__ = "notifications_history_rollups"
+
+    user_id: Mapped[str] = mapped_column(String, primary_key=True)
+    type: Mapped[str] = mapped_column(String, primary_key=True)
+    count: Mapped[int] = mapped_column(BigInteger)
+    oldest_created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    newest_created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
@@ -78,3 +78,6 @@ class NotificationRule:
     debounce_period: timedelta | None = None
     debounce_limit: int | None = None
     debounce_calendar_day: bool = False
+
+    # how many times to try delivering before it is FAILED, None = the channel's
+    max_delivery_attempts: int | None = None
@@ -0,0 +1,7 @@
+import asyncio
+
+from infrastructure.delivery import run_delivery
+
+# meant to be run with python -m entrypoint.delivery
+if __name__ == "__main__":
+    asyncio.run(run_delivery())
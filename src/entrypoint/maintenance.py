@@ -0,0 +1,7 @@
+import asyncio
+
+from infrastructure.maintenance import run_maintenance
+
+# meant to be run with python -m entrypoint.maintenance
+if __name__ == "__main__":
+    asyncio.run(run_maintenance())
@@ -0,0 +1,7 @@
+import asyncio
+
+from infrastructure.outbox import run_outbox_relay
+
+# meant to be run with python -m entrypoint.outbox_relay
+if __name__ == "__main__":
+    asyncio.run(run_outbox_relay())
@@ -0,0 +1,7 @@
+import asyncio
+
+from infrastructure.scheduler import run_scheduler
+
+# meant to be run with python -m entrypoint.scheduler
+if __name__ == "__main__":
+    asyncio.run(run_scheduler())
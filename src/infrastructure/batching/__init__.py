@@ -0,0 +1,3 @@
+from .micro_batcher import MicroBatcher
+
+__all__ = ["MicroBatcher"]
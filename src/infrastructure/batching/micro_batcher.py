@@ -0,0 +1,81 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import timedelta
+
+
+class MicroBatcher[T]:
+    """
+    Gathers the items submitted concurrently and flushes them together, once there
+    are max_items of them or the first has waited max_delay. Every submit returns once
+    its items are flushed, or raises what flushing them raised.
+    Submitted items are never split, a single submit of max_items or more is flushed
+    right away with whatever was waiting.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[list[T]], Awaitable[object]],
+        max_items: int,
+        max_delay: timedelta,
+    ) -> None:
+        self.flush = flush
+        self.max_items = max_items
+        self.max_delay = max_delay
+        self._items: list[T] = []
+        self._waiters: list[asyncio.Future[None]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._flushing: set[asyncio.Task[None]] = set()
+
+    async def submit(self, items: list[T]) -> None:
+        """
+        Cancelling it does not take the items back, they are flushed all the same
+        """
+        if not items:
+            return
+
+        loop = asyncio.get_running_loop()
+        waiter: asyncio.Future[None] = loop.create_future()
+        self._items.extend(items)
+        self._waiters.append(waiter)
+
+        if len(self._items) >= self.max_items:
+            self._flush_waiting()
+        elif self._timer is None:
+            self._timer = loop.call_later(
+                self.max_delay.total_seconds(), self._flush_waiting
+            )
+
+        await waiter
+
+    async def close(self) -> None:
+        """
+        Flushes what is waiting, and waits for every flush in progress
+        """
+        if self._items:
+            self._flush_waiting()
+        await asyncio.gather(*self._flushing, return_exceptions=True)
+
+    def _flush_waiting(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        items, waiters = self._items, self._waiters
+        self._items, self._waiters = [], []
+
+        # flushes run concurrently, the next batch does not wait for this one
+        task = asyncio.create_task(self._flush(items, waiters))
+        self._flushing.add(task)
+        task.add_done_callback(self._flushing.discard)
+
+    async def _flush(self, items: list[T], waiters: list[asyncio.Future[None]]) -> None:
+        try:
+            await self.flush(items)
+        except Exception as e:
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(e)
+        else:
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
@@ -0,0 +1,69 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+from infrastructure.batching import MicroBatcher
+
+FOREVER = timedelta(hours=1)
+
+
+class _Flushes:
+    def __init__(self, error: Exception | None = None) -> None:
+        self.batches: list[list[int]] = []
+        self.error = error
+
+    async def __call__(self, items: list[int]) -> None:
+        await asyncio.sleep(0)
+        self.batches.append(items)
+        if self.error is not None:
+            raise self.error
+
+
+@pytest.mark.anyio
+async def test_submit__concurrent_submits__flushed_together_after_delay():
+    flushes = _Flushes()
+    batcher = MicroBatcher(flushes, max_items=100, max_delay=timedelta(milliseconds=10))
+
+    await asyncio.gather(
+        batcher.submit([1, 2]), batcher.submit([3]), batcher.submit([])
+    )
+
+    assert flushes.batches == [[1, 2, 3]]
+
+
+@pytest.mark.anyio
+async def test_submit__max_items_reached__flushed_without_waiting():
+    flushes = _Flushes()
+    batcher = MicroBatcher(flushes, max_items=3, max_delay=FOREVER)
+
+    async with asyncio.timeout(1):
+        await asyncio.gather(batcher.submit([1, 2]), batcher.submit([3, 4]))
+
+    # a submit is never split
+    assert flushes.batches == [[1, 2, 3, 4]]
+
+
+@pytest.mark.anyio
+async def test_submit__flush_fails__every_submit_of_the_batch_raises():
+    flushes = _Flushes(error=RuntimeError("database is gone"))
+    batcher = MicroBatcher(flushes, max_items=2, max_delay=FOREVER)
+
+    results = await asyncio.gather(
+        batcher.submit([1]), batcher.submit([2]), return_exceptions=True
+    )
+
+    assert [str(result) for result in results] == ["database is gone"] * 2
+
+
+@pytest.mark.anyio
+async def test_close__items_waiting__flushed():
+    flushes = _Flushes()
+    batcher = MicroBatcher(flushes, max_items=100, max_delay=FOREVER)
+    submitted = asyncio.create_task(batcher.submit([1]))
+    await asyncio.sleep(0)
+
+    await batcher.close()
+
+    await submitted
+    assert flushes.batches == [[1]]
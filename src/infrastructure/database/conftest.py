@@ -0,0 +1,45 @@
+import os
+from collections.abc import AsyncIterator, Generator
+
+import pytest
+from pydantic import PostgresDsn
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from testcontainers.postgres import PostgresContainer
+
+from infrastructure.database.migrations.apply_migrations import update_head
+from infrastructure.env_config import EnvConfig
+
+
+@pytest.fixture(scope="package")
+def test_db_container() -> Generator[PostgresContainer]:
+    with PostgresContainer("postgres:17-alpine") as pgcont:
+        yield pgcont
+
+
+@pytest.fixture(scope="package")
+def migrated_db_url(test_db_container: PostgresContainer) -> str:
+    envconfig = EnvConfig()
+    envconfig.database_url_sync = PostgresDsn(
+        test_db_container.get_connection_url(driver="psycopg2")
+    )
+
+    # migrations dsn hack, env.py reads EnvConfig on its own
+    os.environ["DATABASE_URL_SYNC"] = test_db_container.get_connection_url(
+        driver="psycopg2"
+    )
+
+    update_head(envconfig)
+    return test_db_container.get_connection_url(driver="asyncpg")
+
+
+@pytest.fixture
+async def async_session(migrated_db_url: str) -> AsyncIterator[AsyncSession]:
+    """
+    A session in a transaction that is rolled back after the test
+    """
+    engine = create_async_engine(migrated_db_url)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        await session.begin()
+        yield session
+        await session.rollback()
+    await engine.dispose()
@@ -0,0 +1,58 @@
+"""Debounce and proximity indexes
+
+Revision ID: 3b9c4e7d21f5
+Revises: ece1f7f09878
+Create Date: 2026-10-18 10:12:37.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9c4e7d21f5'
+down_revision: Union[str, Sequence[str], None] = 'ece1f7f09878'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY can't run inside a transaction, but it doesn't block the writers
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix__user_id__type__created_at',
+            'notifications_history_records',
+            ['user_id', 'type', 'created_at'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix__user_id__type__event_timestamp',
+            'events',
+            ['user_id', 'type', 'event_timestamp'],
+            unique=False,
+            postgresql_include=['event_date'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix__user_id__type__event_timestamp',
+            table_name='events',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'ix__user_id__type__created_at',
+            table_name='notifications_history_records',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,87 @@
+"""Partition events by event_date
+
+Revision ID: 8f2d6c1a4b07
+Revises: 3b9c4e7d21f5
+Create Date: 2026-10-18 14:05:12.730561
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2d6c1a4b07'
+down_revision: Union[str, Sequence[str], None] = '3b9c4e7d21f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_events_table(**kwargs) -> None:
+    op.create_table('events',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('type', sa.String(), nullable=False),
+    sa.Column('event_timestamp', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('event_date', sa.Date(), nullable=False),
+    sa.Column('properties', sa.JSON(), nullable=False),
+    sa.Column('user_traits', sa.JSON(), nullable=False),
+    sa.PrimaryKeyConstraint('id', 'event_date', name='events_pkey'),
+    **kwargs,
+    )
+    op.create_index('ix__user_id__event_date', 'events', ['user_id', 'event_date'], unique=False)
+    op.create_index('ix__user_id__type__event_timestamp', 'events', ['user_id', 'type', 'event_timestamp'], unique=False, postgresql_include=['event_date'])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # the bound of the legacy partition is checked while ingestion goes on: the
+    # constraint is validated under SHARE UPDATE EXCLUSIVE only, and ATTACH relies
+    # on it instead of scanning the table once it is locked. The margin covers the
+    # events of timezones ahead, saved meanwhile
+    with op.get_context().autocommit_block():
+        bound = op.get_bind().execute(
+            sa.text('SELECT greatest(max(event_date), current_date) + 2 FROM events')
+        ).scalar_one()
+        op.execute(
+            'ALTER TABLE events ADD CONSTRAINT events_event_date_bound '
+            f"CHECK (event_date IS NOT NULL AND event_date < '{bound.isoformat()}') NOT VALID"
+        )
+        op.execute('ALTER TABLE events VALIDATE CONSTRAINT events_event_date_bound')
+
+    # the existing rows are not copied: the old table becomes the partition of
+    # everything up to the bound, and the maintenance job takes it from there
+    op.rename_table('events', 'events_legacy')
+    op.execute('ALTER TABLE events_legacy RENAME CONSTRAINT events_pkey TO events_legacy_pkey')
+    op.execute('ALTER INDEX ix__user_id__event_date RENAME TO events_legacy_user_id_event_date_idx')
+    op.execute('ALTER INDEX ix__user_id__type__event_timestamp RENAME TO events_legacy_user_id_type_event_timestamp_idx')
+
+    _create_events_table(postgresql_partition_by='RANGE (event_date)')
+
+    # its indexes match the ones of the parent, so they are attached as they are
+    op.execute(
+        'ALTER TABLE events ATTACH PARTITION events_legacy '
+        f"FOR VALUES FROM (MINVALUE) TO ('{bound.isoformat()}')"
+    )
+    # the partition bound holds it from now on
+    op.execute('ALTER TABLE events_legacy DROP CONSTRAINT events_event_date_bound')
+    # rows no partition covers yet, so ingestion never fails on a missing partition
+    op.execute('CREATE TABLE events_default PARTITION OF events DEFAULT')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # rows of detached partitions are not brought back
+    op.rename_table('events', 'events_partitioned')
+    op.execute('ALTER TABLE events_partitioned RENAME CONSTRAINT events_pkey TO events_partitioned_pkey')
+    op.execute('ALTER INDEX ix__user_id__event_date RENAME TO events_partitioned_user_id_event_date_idx')
+    op.execute('ALTER INDEX ix__user_id__type__event_timestamp RENAME TO events_partitioned_user_id_type_event_timestamp_idx')
+
+    _create_events_table()
+
+    op.execute(
+        'INSERT INTO events (id, user_id, type, event_timestamp, event_date, properties, user_traits) '
+        'SELECT id, user_id, type, event_timestamp, event_date, properties, user_traits FROM events_partitioned'
+    )
+    op.drop_table('events_partitioned')
@@ -0,0 +1,51 @@
+"""Notifications history rollups
+
+Revision ID: c41e9a7d0b58
+Revises: 8f2d6c1a4b07
+Create Date: 2026-10-18 16:40:03.118342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e9a7d0b58'
+down_revision: Union[str, Sequence[str], None] = '8f2d6c1a4b07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('notifications_history_rollups',
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('type', sa.String(), nullable=False),
+    sa.Column('count', sa.BigInteger(), nullable=False),
+    sa.Column('oldest_created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('newest_created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'type')
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix__created_at',
+            'notifications_history_records',
+            ['created_at'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix__created_at',
+            table_name='notifications_history_records',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_table('notifications_history_rollups')
@@ -0,0 +1,32 @@
+"""Events properties and user_traits as jsonb
+
+Revision ID: 5e8b3f0c9a16
+Revises: c41e9a7d0b58
+Create Date: 2026-10-18 19:22:47.402815
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e8b3f0c9a16'
+down_revision: Union[str, Sequence[str], None] = 'c41e9a7d0b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # rewrites every partition under an exclusive lock, ingestion waits meanwhile
+    op.alter_column('events', 'properties', type_=postgresql.JSONB(), postgresql_using='properties::jsonb')
+    op.alter_column('events', 'user_traits', type_=postgresql.JSONB(), postgresql_using='user_traits::jsonb')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('events', 'user_traits', type_=sa.JSON(), postgresql_using='user_traits::json')
+    op.alter_column('events', 'properties', type_=sa.JSON(), postgresql_using='properties::json')
@@ -0,0 +1,46 @@
+"""Audit indexes
+
+Revision ID: a9e3d5b1c274
+Revises: d7a4c2e9f310
+Create Date: 2026-10-18 23:15:54.118306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9e3d5b1c274'
+down_revision: Union[str, Sequence[str], None] = 'd7a4c2e9f310'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # indexes of a partitioned table can't be built concurrently
+    op.create_index('ix__user_id__event_timestamp__id', 'events', ['user_id', 'event_timestamp', 'id'], unique=False)
+    # CONCURRENTLY can't run inside a transaction, but it doesn't block the writers
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix__user_id__created_at__id',
+            'notifications_history_records',
+            ['user_id', 'created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix__user_id__created_at__id',
+            table_name='notifications_history_records',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_index('ix__user_id__event_timestamp__id', table_name='events')
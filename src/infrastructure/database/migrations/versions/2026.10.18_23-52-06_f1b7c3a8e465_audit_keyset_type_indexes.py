@@ -0,0 +1,64 @@
+"""Audit keyset indexes by type
+
+Revision ID: f1b7c3a8e465
+Revises: a9e3d5b1c274
+Create Date: 2026-10-18 23:52:06.731942
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1b7c3a8e465'
+down_revision: Union[str, Sequence[str], None] = 'a9e3d5b1c274'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # id is appended for the audit pages filtered by type; the debounce and proximity
+    # queries are served by the new indexes as well as by the ones they replace
+    # indexes of a partitioned table can't be built concurrently
+    op.create_index('ix__user_id__type__event_timestamp__id', 'events', ['user_id', 'type', 'event_timestamp', 'id'], unique=False, postgresql_include=['event_date'])
+    op.drop_index('ix__user_id__type__event_timestamp', table_name='events', postgresql_include=['event_date'])
+    # CONCURRENTLY can't run inside a transaction, but it doesn't block the writers
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix__user_id__type__created_at__id',
+            'notifications_history_records',
+            ['user_id', 'type', 'created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix__user_id__type__created_at',
+            table_name='notifications_history_records',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix__user_id__type__created_at',
+            'notifications_history_records',
+            ['user_id', 'type', 'created_at'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix__user_id__type__created_at__id',
+            table_name='notifications_history_records',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.create_index('ix__user_id__type__event_timestamp', 'events', ['user_id', 'type', 'event_timestamp'], unique=False, postgresql_include=['event_date'])
+    op.drop_index('ix__user_id__type__event_timestamp__id', table_name='events', postgresql_include=['event_date'])
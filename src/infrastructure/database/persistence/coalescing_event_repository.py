@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from domain import Event
+from infrastructure.batching import MicroBatcher
+from infrastructure.database.persistence.sqla_event_repository import (
+    SQLAEventRepository,
+)
+from infrastructure.env_config import EventsIngestionMode
+
+
+class EventsSaveCoalescer:
+    """
+    Saves the events of concurrent requests together, in one transaction of its own
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        ingestion_mode: EventsIngestionMode,
+        outbox: bool,
+        max_events: int,
+        max_delay: timedelta,
+    ) -> None:
+        self.session_factory = session_factory
+        self.ingestion_mode = ingestion_mode
+        self.outbox = outbox
+        self.batcher = MicroBatcher(
+            self._save_all, max_items=max_events, max_delay=max_delay
+        )
+
+    async def save_all(self, events: list[Event]) -> int:
+        """
+        Returns once the transaction saving them has committed
+        """
+        await self.batcher.submit(events)
+        return len(events)
+
+    async def close(self) -> None:
+        await self.batcher.close()
+
+    async def _save_all(self, events: list[Event]) -> None:
+        async with self.session_factory() as session, session.begin():
+            repository = SQLAEventRepository(
+                session, ingestion_mode=self.ingestion_mode, outbox=self.outbox
+            )
+            await repository.save_all(events)
+
+
+class CoalescingEventRepository(SQLAEventRepository):
+    """
+    Saves through the EventsSaveCoalescer, in a transaction committed before save_all
+    returns; everything else is read in the session of the request
+    """
+
+    def __init__(
+        self, async_session: AsyncSession, coalescer: EventsSaveCoalescer
+    ) -> None:
+        super().__init__(async_session)
+        self.coalescer = coalescer
+
+    async def save_all(self, events: list[Event]) -> int:
+        return await self.coalescer.save_all(events)
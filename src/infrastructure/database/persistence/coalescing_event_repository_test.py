@@ -0,0 +1,75 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import delete, event as sqla_event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from domain import Event
+from infrastructure.database.persistence.coalescing_event_repository import (
+    CoalescingEventRepository,
+    EventsSaveCoalescer,
+)
+from infrastructure.env_config import EventsIngestionMode
+
+
+def _event(user_id: str) -> Event:
+    event = Event()
+    event.id = uuid4()
+    event.user_id = user_id
+    event.type = "signup_completed"
+    event.event_timestamp = datetime.now(UTC)
+    event.event_date = event.event_timestamp.date()
+    event.properties = {}
+    event.user_traits = {}
+    return event
+
+
+@pytest.mark.anyio
+async def test_save_all__concurrent_requests__committed_in_one_transaction(
+    migrated_db_url: str,
+):
+    engine = create_async_engine(migrated_db_url)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    coalescer = EventsSaveCoalescer(
+        session_factory,
+        ingestion_mode=EventsIngestionMode.CORE,
+        outbox=False,
+        max_events=100,
+        max_delay=timedelta(milliseconds=10),
+    )
+    user_id = f"u_coalesced_{uuid4().hex[:8]}"
+    commits = 0
+
+    def count_commit(conn):
+        nonlocal commits
+        commits += 1
+
+    sqla_event.listen(engine.sync_engine, "commit", count_commit)
+    try:
+        async with session_factory() as first, session_factory() as second:
+            saved = await asyncio.gather(
+                CoalescingEventRepository(first, coalescer).save_all(
+                    [_event(user_id), _event(user_id)]
+                ),
+                CoalescingEventRepository(second, coalescer).save_all(
+                    [_event(user_id)]
+                ),
+            )
+
+        assert saved == [2, 1]
+        assert commits == 1
+        async with session_factory() as session:
+            assert (
+                await session.scalar(
+                    select(func.count(Event.id)).where(Event.user_id == user_id)
+                )
+                == 3
+            )
+    finally:
+        sqla_event.remove(engine.sync_engine, "commit", count_commit)
+        async with session_factory() as session, session.begin():
+            await session.execute(delete(Event).where(Event.user_id == user_id))
+        await coalescer.close()
+        await engine.dispose()
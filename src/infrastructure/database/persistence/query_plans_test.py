@@ -0,0 +1,295 @@
+"""
+The debounce, proximity and audit queries must stay index lookups no matter how much
+history there is, and pages of the audit no matter how deep. Tables are seeded with
+generate_series in the test's own transaction, which is rolled back afterwards.
+"""
+
+import json
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+from uuid import UUID
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.persistence.audit_repository import AuditPosition
+from infrastructure.database.persistence.sqla_event_repository import (
+    SQLAEventRepository,
+)
+from infrastructure.database.persistence.sqla_notification_history_record_repository import (
+    SQLANotificationHistoryRecordRepository,
+)
+
+SMALL_TABLE_ROWS = 100_000
+LARGE_TABLE_ROWS = 3_000_000
+USERS = 50_000
+TYPES = 5
+MINUTES_IN_YEAR = 525_600
+
+# rows of the queried user, they do not grow with the table
+TARGET_USER_ROWS = 200
+
+# execution time on the large table may not be worse than this times the small one
+FLAT_LATENCY_FACTOR = 3
+# ...or this many ms, to not fail on sub-millisecond noise
+FLAT_LATENCY_FLOOR_MS = 5.0
+
+SEED_HISTORY = text(
+    """
+    INSERT INTO notifications_history_records
+        (id, type, trigger, user_id, status, retries, suppressed_because, created_at)
+    SELECT gen_random_uuid(), 'TYPE_' || (i % :types), 'payment_failed',
+           coalesce(:user_id, 'u_' || (i % :users)), 'sent', 0, NULL,
+           now() - (i % :minutes) * interval '1 minute'
+    FROM generate_series(CAST(:start AS integer), CAST(:stop AS integer) - 1) AS i
+    """
+)
+
+SEED_EVENTS = text(
+    """
+    INSERT INTO events
+        (id, user_id, type, event_timestamp, event_date, properties, user_traits)
+    SELECT gen_random_uuid(), coalesce(:user_id, 'u_' || (i % :users)),
+           'type_' || (i % :types), ts, ts::date, '{}', '{}'
+    FROM generate_series(CAST(:start AS integer), CAST(:stop AS integer) - 1) AS i,
+         LATERAL (SELECT now() - (i % :minutes) * interval '1 minute' AS ts) AS t
+    """
+)
+
+
+async def _seed(
+    session: AsyncSession,
+    stmt: Any,
+    table: str,
+    start: int,
+    stop: int,
+    user_id: str | None = None,
+) -> None:
+    await session.execute(
+        stmt,
+        {
+            "start": start,
+            "stop": stop,
+            "user_id": user_id,
+            "users": USERS,
+            "types": TYPES,
+            "minutes": MINUTES_IN_YEAR,
+        },
+    )
+    await session.execute(text(f"ANALYZE {table}"))
+
+
+async def _explain(
+    session: AsyncSession, query: Callable[[], Awaitable[object]]
+) -> tuple[set[str], set[str], float]:
+    """
+    Runs the repository query, then EXPLAIN ANALYZE of the exact SQL it emitted.
+    Returns used index names, scan node types and execution time in ms.
+    """
+    captured: list[tuple[str, Any]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    assert session.bind is not None
+    sync_engine = session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", capture)
+    try:
+        await query()
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", capture)
+
+    (statement, parameters), *_ = captured
+    connection = await session.connection()
+    result = await connection.exec_driver_sql(
+        f"EXPLAIN (ANALYZE, FORMAT JSON) {statement}", parameters
+    )
+    # the json codec of SQLAlchemy's asyncpg dialect hands out raw strings
+    (plan,) = json.loads(result.scalar_one())
+
+    index_names, node_types = set(), set()
+    nodes = [plan["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        node_types.add(node["Node Type"])
+        if "Index Name" in node:
+            index_names.add(node["Index Name"])
+        nodes.extend(node.get("Plans", []))
+
+    return index_names, node_types, plan["Execution Time"]
+
+
+def _assert_flat(small_ms: float, large_ms: float) -> None:
+    assert large_ms <= max(small_ms * FLAT_LATENCY_FACTOR, FLAT_LATENCY_FLOOR_MS), (
+        f"{small_ms:.2f} ms on {SMALL_TABLE_ROWS} rows vs "
+        f"{large_ms:.2f} ms on {LARGE_TABLE_ROWS} rows"
+    )
+
+
+@pytest.mark.anyio
+async def test_debounce_counts__millions_of_records__index_only_and_flat(
+    async_session: AsyncSession,
+):
+    repository = SQLANotificationHistoryRecordRepository(async_session)
+    table = "notifications_history_records"
+
+    async def count_one() -> int:
+        return await repository.count_by_user_and_type_within_time(
+            user_id="u_target",
+            notification_type="TYPE_1",
+            timerange=timedelta(days=7),
+        )
+
+    async def count_batch() -> dict[str, int]:
+        return await repository.count_by_users_and_type_within_time(
+            user_ids=["u_target", "u_1", "u_2"],
+            notification_type="TYPE_1",
+            timerange=timedelta(days=7),
+        )
+
+    await _seed(async_session, SEED_HISTORY, table, 0, TARGET_USER_ROWS, "u_target")
+    await _seed(async_session, SEED_HISTORY, table, 0, SMALL_TABLE_ROWS)
+    small = [await _explain(async_session, q) for q in (count_one, count_batch)]
+
+    await _seed(async_session, SEED_HISTORY, table, SMALL_TABLE_ROWS, LARGE_TABLE_ROWS)
+    large = [await _explain(async_session, q) for q in (count_one, count_batch)]
+
+    for (_, _, small_ms), (index_names, node_types, large_ms) in zip(
+        small, large, strict=True
+    ):
+        assert index_names == {"ix__user_id__type__created_at__id"}
+        assert "Seq Scan" not in node_types
+        _assert_flat(small_ms, large_ms)
+
+
+@pytest.mark.anyio
+async def test_proximity_lookups__millions_of_events__index_scan_and_flat(
+    async_session: AsyncSession,
+):
+    repository = SQLAEventRepository(async_session)
+    now = datetime.now(UTC)
+
+    async def find_one() -> object:
+        return await repository.find_for_user_within_time(
+            event_type="type_1",
+            user_id="u_target",
+            timerange=timedelta(days=7),
+            event_timestamp=now,
+        )
+
+    async def exists_one() -> bool:
+        return await repository.exists_for_user_within_time(
+            event_type="type_1",
+            user_id="u_target",
+            timerange=timedelta(days=7),
+            event_timestamp=now,
+        )
+
+    async def find_batch() -> dict[str, datetime]:
+        return await repository.find_latest_timestamps_by_users(
+            event_type="type_1",
+            user_ids=["u_target", "u_1", "u_2"],
+            since=now - timedelta(days=7),
+        )
+
+    await _seed(async_session, SEED_EVENTS, "events", 0, TARGET_USER_ROWS, "u_target")
+    await _seed(async_session, SEED_EVENTS, "events", 0, SMALL_TABLE_ROWS)
+    small = [
+        await _explain(async_session, q) for q in (find_one, exists_one, find_batch)
+    ]
+
+    await _seed(
+        async_session, SEED_EVENTS, "events", SMALL_TABLE_ROWS, LARGE_TABLE_ROWS
+    )
+    large = [
+        await _explain(async_session, q) for q in (find_one, exists_one, find_batch)
+    ]
+
+    for (_, _, small_ms), (index_names, node_types, large_ms) in zip(
+        small, large, strict=True
+    ):
+        # the indexes of the partitions, attached to
+        # ix__user_id__type__event_timestamp__id, named after their columns
+        assert index_names
+        assert all("_user_id_type_event_timestamp_id_" in name for name in index_names)
+        assert "Seq Scan" not in node_types
+        _assert_flat(small_ms, large_ms)
+
+
+@pytest.mark.anyio
+async def test_audit_pages__millions_of_rows__index_range_and_flat_at_any_depth(
+    async_session: AsyncSession,
+):
+    events = SQLAEventRepository(async_session)
+    history = SQLANotificationHistoryRecordRepository(async_session)
+    # halfway through the rows of the queried user
+    deep = AuditPosition(
+        datetime.now(UTC) - timedelta(minutes=TARGET_USER_ROWS // 2), UUID(int=0)
+    )
+
+    def events_page(before: AuditPosition | None, *event_types: str):
+        async def query() -> object:
+            return await events.find_recent_by_user(
+                "u_target", limit=50, event_types=event_types, before=before
+            )
+
+        return query
+
+    def history_page(before: AuditPosition | None, *notification_types: str):
+        async def query() -> object:
+            return await history.find_recent_by_user(
+                "u_target",
+                limit=50,
+                notification_types=notification_types,
+                before=before,
+            )
+
+        return query
+
+    # query, whether an index it used is expected, whether the pages read from the
+    # index of each type are merged with a sort
+    pages = [
+        (events_page(None), lambda name: "_user_id_event_timestamp_id_" in name, False),
+        (events_page(deep), lambda name: "_user_id_event_timestamp_id_" in name, False),
+        (
+            events_page(deep, "type_1", "type_2"),
+            lambda name: "_user_id_type_event_timestamp_id_" in name,
+            True,
+        ),
+        (history_page(None), lambda name: name == "ix__user_id__created_at__id", False),
+        (history_page(deep), lambda name: name == "ix__user_id__created_at__id", False),
+        (
+            history_page(deep, "TYPE_1", "TYPE_2"),
+            lambda name: name == "ix__user_id__type__created_at__id",
+            True,
+        ),
+    ]
+
+    for stmt, table in (
+        (SEED_EVENTS, "events"),
+        (SEED_HISTORY, "notifications_history_records"),
+    ):
+        await _seed(async_session, stmt, table, 0, TARGET_USER_ROWS, "u_target")
+        await _seed(async_session, stmt, table, 0, SMALL_TABLE_ROWS)
+    small = [await _explain(async_session, query) for query, _, _ in pages]
+
+    for stmt, table in (
+        (SEED_EVENTS, "events"),
+        (SEED_HISTORY, "notifications_history_records"),
+    ):
+        await _seed(async_session, stmt, table, SMALL_TABLE_ROWS, LARGE_TABLE_ROWS)
+    large = [await _explain(async_session, query) for query, _, _ in pages]
+
+    for (_, expected_index, merged), (_, _, small_ms), (
+        index_names,
+        node_types,
+        large_ms,
+    ) in zip(pages, small, large, strict=True):
+        # the events ones are the indexes of the partitions, named after the columns
+        assert index_names
+        assert all(map(expected_index, index_names)), index_names
+        assert "Seq Scan" not in node_types
+        assert ("Sort" in node_types) is merged
+        _assert_flat(small_ms, large_ms)
@@ -0,0 +1,53 @@
+from collections.abc import Sequence
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.persistence.audit_repository import AuditPosition
+from domain import Event, NotificationHistoryRecord
+from infrastructure.database.persistence.sqla_event_repository import (
+    SQLAEventRepository,
+)
+from infrastructure.database.persistence.sqla_notification_history_record_repository import (
+    SQLANotificationHistoryRecordRepository,
+)
+
+
+class SQLAAuditRepository:
+    """
+    Runs every read in a session of its own, checked out of the pool for that query
+    only, instead of the session of the request, which can only run one at a time
+    """
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        self.session_factory = session_factory
+
+    async def find_events(
+        self,
+        user_id: str,
+        limit: int,
+        event_types: Sequence[str] = (),
+        since: datetime | None = None,
+        until: datetime | None = None,
+        before: AuditPosition | None = None,
+    ) -> list[Event]:
+        async with self.session_factory() as session:
+            return await SQLAEventRepository(session).find_recent_by_user(
+                user_id, limit, event_types, since, until, before
+            )
+
+    async def find_notifications(
+        self,
+        user_id: str,
+        limit: int,
+        notification_types: Sequence[str] = (),
+        since: datetime | None = None,
+        until: datetime | None = None,
+        before: AuditPosition | None = None,
+    ) -> list[NotificationHistoryRecord]:
+        async with self.session_factory() as session:
+            return await SQLANotificationHistoryRecordRepository(
+                session
+            ).find_recent_by_user(
+                user_id, limit, notification_types, since, until, before
+            )
@@ -1,37 +1,206 @@
-from datetime import UTC, datetime, timedelta
+import json
+from collections.abc import Sequence
+from datetime import UTC, date, datetime, timedelta
+from typing import Any
+from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import (
+    ColumnElement,
+    Select,
+    String,
+    cast,
+    func,
+    insert,
+    literal,
+    select,
+    tuple_,
+    union_all,
+)
+from sqlalchemy.dialects.postgresql import JSONB, JSONPATH
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
-from domain import Event
+from app.notifications.compiled_conditions import compile_property_match
+from app.persistence.audit_repository import AuditPosition
+from domain import Event, EventOutboxEntry
+from domain.notification_rule import PropertyMatch, PropertyOperator
+from infrastructure.env_config import EventsIngestionMode
+
+# column order of the rows handed to COPY
+COPY_COLUMNS = (
+    "id",
+    "user_id",
+    "type",
+    "event_timestamp",
+    "event_date",
+    "properties",
+    "user_traits",
+)
+
+# event_date is the date where the event happened, at most a day off the date in UTC
+# (offsets run from -12:00 to +14:00), so the dates bounding a query for partition
+# pruning are widened by a day and the timestamps do the exact filtering
+_LOCAL_DATE_SLACK = timedelta(days=1)
+
+_JSONPATH_OPERATORS = {
+    PropertyOperator.GT: ">",
+    PropertyOperator.GTE: ">=",
+    PropertyOperator.LT: "<",
+    PropertyOperator.LTE: "<=",
+}
+
+
+def property_match_clause(property_match: PropertyMatch) -> ColumnElement[bool]:
+    """
+    The JSONB predicate matching the same events as CompiledPropertyMatch.matches:
+    EQ compares lowercased text, numeric operators compare the value cast to a number,
+    and events missing the path or holding something else never match
+    """
+    compiled = compile_property_match(property_match)
+    root, *path = property_match.property_xpath.split(".")
+    column = getattr(Event, root)
+
+    if property_match.operator is PropertyOperator.EQ:
+        return func.lower(column[tuple(path)].astext) == compiled.operand
+
+    # strict, so a missing key is an error rather than an empty match, and errors
+    # are silenced by the last argument
+    keys = "".join(f".{json.dumps(key)}" for key in path)
+    jsonpath = (
+        f"strict ${keys} ? "
+        f"(@.double() {_JSONPATH_OPERATORS[property_match.operator]} $operand)"
+    )
+    return func.jsonb_path_exists(
+        column,
+        cast(literal(jsonpath, String), JSONPATH),
+        cast(literal(json.dumps({"operand": compiled.operand}), String), JSONB),
+        True,
+    )
+
+
+def _earliest_event_date(instant: datetime) -> date:
+    """
+    The earliest event_date an event at `instant` or later can have, wherever it
+    happened; naive instants are taken as UTC
+    """
+    if instant.tzinfo is None:
+        instant = instant.replace(tzinfo=UTC)
+    return instant.astimezone(UTC).date() - _LOCAL_DATE_SLACK
+
+
+def _latest_event_date(instant: datetime) -> date:
+    """
+    The latest event_date an event at `instant` or earlier can have
+    """
+    if instant.tzinfo is None:
+        instant = instant.replace(tzinfo=UTC)
+    return instant.astimezone(UTC).date() + _LOCAL_DATE_SLACK
 
 
 class SQLAEventRepository:
-    def __init__(self, async_session: AsyncSession) -> None:
+    def __init__(
+        self,
+        async_session: AsyncSession,
+        ingestion_mode: EventsIngestionMode = EventsIngestionMode.ORM,
+        outbox: bool = False,
+    ) -> None:
+        """
+        outbox: saved events are also written to the events outbox, for the outbox
+        relay to publish once the transaction has committed
+        """
         self.async_session = async_session
+        self.ingestion_mode = ingestion_mode
+        self.outbox = outbox
 
     async def save_all(self, events: list[Event]) -> int:
-        self.async_session.add_all(events)
-        await self.async_session.flush()
+        if not events:
+            return 0
+
+        match self.ingestion_mode:
+            case EventsIngestionMode.COPY:
+                await self._copy(events)
+            case EventsIngestionMode.CORE:
+                await self._insert(events)
+            case _:
+                self.async_session.add_all(events)
+                await self.async_session.flush()
+
+        if self.outbox:
+            await self.async_session.execute(
+                insert(EventOutboxEntry),
+                [
+                    {"event_id": event.id, "event_date": event.event_date}
+                    for event in events
+                ],
+            )
+
         return len(events)
 
+    async def _insert(self, events: list[Event]) -> None:
+        """
+        executemany of a Core INSERT, bypassing the unit of work
+        """
+        await self.async_session.execute(
+            insert(Event),
+            [
+                {
+                    "id": event.id,
+                    "user_id": event.user_id,
+                    "type": event.type,
+                    "event_timestamp": event.event_timestamp,
+                    "event_date": event.event_date,
+                    "properties": event.properties,
+                    "user_traits": event.user_traits,
+                }
+                for event in events
+            ],
+        )
+
+    async def _copy(self, events: list[Event]) -> None:
+        """
+        Binary COPY on the session's own connection, so it is a part of the same
+        transaction as everything else in the request
+        """
+        connection = await self.async_session.connection()
+        raw_connection = await connection.get_raw_connection()
+        asyncpg_connection: Any = raw_connection.driver_connection
+
+        # the jsonb codec registered by SQLAlchemy's asyncpg dialect expects strings
+        await asyncpg_connection.copy_records_to_table(
+            Event.__tablename__,
+            columns=COPY_COLUMNS,
+            records=[
+                (
+                    event.id,
+                    event.user_id,
+                    event.type,
+                    event.event_timestamp,
+                    event.event_date,
+                    json.dumps(event.properties),
+                    json.dumps(event.user_traits),
+                )
+                for event in events
+            ],
+        )
+
     async def find_for_user_within_time(
         self,
         event_type: str,
         user_id: str,
         timerange: timedelta,
         event_timestamp: datetime,
+        property_matches: Sequence[PropertyMatch] = (),
     ) -> list[Event]:
         threshold_datetime = event_timestamp - timerange
-        threshold_date = threshold_datetime.date()
 
         stmt = (
             select(Event)
             .where(
-                Event.event_date >= threshold_date,
+                Event.event_date >= _earliest_event_date(threshold_datetime),
                 Event.type == event_type,
                 Event.user_id == user_id,
                 Event.event_timestamp >= threshold_datetime,
+                *map(property_match_clause, property_matches),
             )
             .order_by(Event.event_timestamp.desc())
         )
@@ -39,17 +208,122 @@ class SQLAEventRepository:
         result = await self.async_session.execute(stmt)
         return list(result.scalars().all())
 
+    async def exists_for_user_within_time(
+        self,
+        event_type: str,
+        user_id: str,
+        timerange: timedelta,
+        event_timestamp: datetime,
+        property_matches: Sequence[PropertyMatch] = (),
+    ) -> bool:
+        threshold_datetime = event_timestamp - timerange
+
+        matching = (
+            select(Event.id)
+            .where(
+                Event.event_date >= _earliest_event_date(threshold_datetime),
+                Event.type == event_type,
+                Event.user_id == user_id,
+                Event.event_timestamp >= threshold_datetime,
+                *map(property_match_clause, property_matches),
+            )
+            .limit(1)
+        )
+
+        result = await self.async_session.execute(select(matching.exists()))
+        return bool(result.scalar())
+
+    async def find_latest_timestamps_by_users(
+        self,
+        event_type: str,
+        user_ids: list[str],
+        since: datetime,
+        property_matches: Sequence[PropertyMatch] = (),
+    ) -> dict[str, datetime]:
+        if not user_ids:
+            return {}
+
+        stmt = (
+            select(Event.user_id, func.max(Event.event_timestamp))
+            .where(
+                Event.event_date >= _earliest_event_date(since),
+                Event.type == event_type,
+                Event.user_id.in_(user_ids),
+                Event.event_timestamp >= since,
+                *map(property_match_clause, property_matches),
+            )
+            .group_by(Event.user_id)
+        )
+
+        result = await self.async_session.execute(stmt)
+        return {user_id: latest for user_id, latest in result.all()}
+
+    async def find_by_keys(self, keys: list[tuple[UUID, date]]) -> list[Event]:
+        """
+        Events by their primary key, (id, event_date); missing ones are left out
+        """
+        if not keys:
+            return []
+
+        stmt = select(Event).where(tuple_(Event.id, Event.event_date).in_(keys))
+
+        result = await self.async_session.execute(stmt)
+        return list(result.scalars().all())
+
     async def find_recent_by_user(
         self,
         user_id: str,
         limit: int = 50,
+        event_types: Sequence[str] = (),
+        since: datetime | None = None,
+        until: datetime | None = None,
+        before: AuditPosition | None = None,
     ) -> list[Event]:
-        stmt = (
-            select(Event)
-            .where(Event.user_id == user_id)
-            .order_by(Event.event_timestamp.desc())
-            .limit(limit)
-        )
+        """
+        Newest first, from before on when given. Every page is a range of an index,
+        however deep: several types are read from the index of each and merged.
+        """
+        conditions = [Event.user_id == user_id]
+        if since is not None:
+            conditions += [
+                Event.event_date >= _earliest_event_date(since),
+                Event.event_timestamp >= since,
+            ]
+        if until is not None:
+            conditions += [
+                Event.event_date <= _latest_event_date(until),
+                Event.event_timestamp < until,
+            ]
+        if before is not None:
+            conditions += [
+                Event.event_date <= _latest_event_date(before.timestamp),
+                tuple_(Event.event_timestamp, Event.id)
+                < tuple_(before.timestamp, before.id),
+            ]
+
+        def newest(*where: ColumnElement[bool]) -> Select[tuple[Event]]:
+            return (
+                select(Event)
+                .where(*conditions, *where)
+                .order_by(Event.event_timestamp.desc(), Event.id.desc())
+                .limit(limit)
+            )
+
+        if len(event_types) <= 1:
+            stmt = newest(*(Event.type == event_type for event_type in event_types))
+        else:
+            pages = union_all(
+                *(
+                    newest(Event.type == event_type)
+                    for event_type in dict.fromkeys(event_types)
+                )
+            ).subquery()
+            merged = aliased(Event, pages)
+            stmt = (
+                select(merged)
+                .order_by(merged.event_timestamp.desc(), merged.id.desc())
+                .limit(limit)
+            )
 
         result = await self.async_session.execute(stmt)
         return list(result.scalars().all())
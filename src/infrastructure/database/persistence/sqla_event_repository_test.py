@@ -0,0 +1,237 @@
+from datetime import UTC, datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.notifications.compiled_conditions import compile_property_match
+from app.persistence.audit_repository import AuditPosition
+from domain import Event
+from domain.notification_rule import PropertyMatch, PropertyOperator
+from infrastructure.database.persistence.sqla_event_repository import (
+    SQLAEventRepository,
+)
+from infrastructure.env_config import EventsIngestionMode
+from infrastructure.taskiq.events_codec import decode_events, encode_events
+
+
+def _event(user_id: str, event_timestamp: datetime) -> Event:
+    event = Event()
+    event.id = uuid4()
+    event.user_id = user_id
+    event.type = "payment_failed"
+    event.event_timestamp = event_timestamp
+    event.event_date = event_timestamp.date()
+    event.properties = {"amount": 1425.0, "failure_reason": "INSUFFICIENT_FUNDS"}
+    event.user_traits = {"email": "maria@example.com", "marketing_opt_in": True}
+    return event
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("ingestion_mode", list(EventsIngestionMode))
+async def test_save_all__any_ingestion_mode__events_are_readable_back(
+    async_session: AsyncSession, ingestion_mode: EventsIngestionMode
+):
+    repository = SQLAEventRepository(async_session, ingestion_mode=ingestion_mode)
+    user_id = f"u_{ingestion_mode.value}"
+    now = datetime.now(UTC)
+    events = [_event(user_id, now - timedelta(minutes=i)) for i in range(3)]
+
+    saved = await repository.save_all(events)
+
+    assert saved == 3
+    found = await repository.find_recent_by_user(user_id)
+    assert [event.id for event in found] == [event.id for event in events]
+    assert found[0].properties == {
+        "amount": 1425.0,
+        "failure_reason": "INSUFFICIENT_FUNDS",
+    }
+    assert found[0].user_traits == {
+        "email": "maria@example.com",
+        "marketing_opt_in": True,
+    }
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("ingestion_mode", list(EventsIngestionMode))
+async def test_save_all__empty_list__nothing_saved(
+    async_session: AsyncSession, ingestion_mode: EventsIngestionMode
+):
+    repository = SQLAEventRepository(async_session, ingestion_mode=ingestion_mode)
+
+    assert await repository.save_all([]) == 0
+
+
+@pytest.mark.anyio
+async def test_find_by_keys__found_ones_only(async_session: AsyncSession):
+    repository = SQLAEventRepository(async_session)
+    now = datetime.now(UTC)
+    events = [_event("u_keys", now - timedelta(days=i)) for i in range(2)]
+    await repository.save_all(events)
+
+    found = await repository.find_by_keys(
+        [
+            (events[0].id, events[0].event_date),
+            # right id, wrong partition key
+            (events[1].id, events[0].event_date - timedelta(days=7)),
+            (uuid4(), events[0].event_date),
+        ]
+    )
+
+    assert [event.id for event in found] == [events[0].id]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "property_match",
+    [
+        PropertyMatch("properties.card.brand", "VISA", PropertyOperator.EQ),
+        PropertyMatch("properties.card.brand", "true", PropertyOperator.EQ),
+        PropertyMatch("properties.card.brand", 3, PropertyOperator.EQ),
+        PropertyMatch("properties.card.brand", "3", PropertyOperator.GTE),
+        PropertyMatch("properties.card.brand", 3, PropertyOperator.LT),
+    ],
+)
+async def test_find_latest_timestamps_by_users__property_matches__same_as_in_memory(
+    async_session: AsyncSession, property_match: PropertyMatch
+):
+    repository = SQLAEventRepository(async_session)
+    now = datetime.now(UTC)
+    values = ["visa", "Visa", True, 3, 3.5, 2, "3", "not a number", None, {"a": 1}]
+
+    events = []
+    for i, value in enumerate(values):
+        event = _event(f"u_match_{i}", now)
+        event.properties = {"card": {"brand": value}}
+        events.append(event)
+    missing = _event("u_match_missing", now)
+    missing.properties = {"card": "visa"}
+    events.append(missing)
+    await repository.save_all(events)
+
+    found = await repository.find_latest_timestamps_by_users(
+        event_type="payment_failed",
+        user_ids=[event.user_id for event in events],
+        since=now - timedelta(minutes=1),
+        property_matches=[property_match],
+    )
+
+    compiled = compile_property_match(property_match)
+    assert set(found) == {event.user_id for event in events if compiled.matches(event)}
+
+
+@pytest.mark.anyio
+async def test_proximity__events_west_of_utc__matched_though_sent_in_utc(
+    async_session: AsyncSession,
+):
+    repository = SQLAEventRepository(async_session)
+    baker_island = timezone(timedelta(hours=-12))
+    # 2026-03-10 11:30 UTC, saved under the local date of the day before
+    proximate = _event("u_west", datetime(2026, 3, 9, 23, 30, tzinfo=baker_island))
+    await repository.save_all([proximate])
+
+    # workers get the triggering event with its timestamp in UTC
+    (trigger,) = decode_events(
+        encode_events(
+            [_event("u_west", datetime(2026, 3, 10, 23, 0, tzinfo=baker_island))]
+        )
+    )
+    assert trigger.event_timestamp.tzinfo == UTC
+
+    assert await repository.exists_for_user_within_time(
+        event_type="payment_failed",
+        user_id="u_west",
+        timerange=timedelta(days=1),
+        event_timestamp=trigger.event_timestamp,
+    )
+    found = await repository.find_latest_timestamps_by_users(
+        event_type="payment_failed",
+        user_ids=["u_west"],
+        since=trigger.event_timestamp - timedelta(days=1),
+    )
+    assert found == {"u_west": proximate.event_timestamp}
+
+
+@pytest.mark.anyio
+async def test_find_recent_by_user__paged_by_position__every_match_once_newest_first(
+    async_session: AsyncSession,
+):
+    repository = SQLAEventRepository(async_session)
+    now = datetime.now(UTC)
+    events = []
+    for i, event_type in enumerate(["payment_failed", "signup_completed", "login"] * 4):
+        # two by two at the same timestamp, the id decides
+        event = _event("u_paged", now - timedelta(minutes=i // 2))
+        event.type = event_type
+        events.append(event)
+    await repository.save_all(events)
+    since = now - timedelta(minutes=4)
+    expected = sorted(
+        (
+            event
+            for event in events
+            if event.type != "login" and event.event_timestamp >= since
+        ),
+        key=lambda event: (event.event_timestamp, event.id),
+        reverse=True,
+    )
+
+    pages, before = [], None
+    while True:
+        page = await repository.find_recent_by_user(
+            "u_paged",
+            limit=3,
+            event_types=["payment_failed", "signup_completed"],
+            since=since,
+            before=before,
+        )
+        if not page:
+            break
+        pages.append(page)
+        before = AuditPosition(page[-1].event_timestamp, page[-1].id)
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [event.id for page in pages for event in page] == [
+        event.id for event in expected
+    ]
+
+
+@pytest.mark.anyio
+async def test_find_recent_by_user__events_off_utc_near_midnight__none_left_out(
+    async_session: AsyncSession,
+):
+    repository = SQLAEventRepository(async_session)
+    # saved under local dates a day after and a day before their dates in UTC
+    east = _event(
+        "u_offsets", datetime(2026, 3, 10, 0, 30, tzinfo=timezone(timedelta(hours=14)))
+    )
+    utc = _event("u_offsets", datetime(2026, 3, 9, 20, 0, tzinfo=UTC))
+    west = _event(
+        "u_offsets", datetime(2026, 3, 9, 23, 30, tzinfo=timezone(timedelta(hours=-12)))
+    )
+    await repository.save_all([east, utc, west])
+
+    pages, before = [], None
+    while page := await repository.find_recent_by_user(
+        "u_offsets",
+        limit=1,
+        since=datetime(2026, 3, 9, tzinfo=UTC),
+        until=datetime(2026, 3, 11, tzinfo=UTC),
+        before=before,
+    ):
+        pages.append(page)
+        before = AuditPosition(page[-1].event_timestamp, page[-1].id)
+    assert [event.id for page in pages for event in page] == [
+        west.id,
+        utc.id,
+        east.id,
+    ]
+
+    found = await repository.find_recent_by_user(
+        "u_offsets", since=datetime(2026, 3, 10, 11, tzinfo=UTC)
+    )
+    assert [event.id for event in found] == [west.id]
+    found = await repository.find_recent_by_user(
+        "u_offsets", until=datetime(2026, 3, 9, 12, tzinfo=UTC)
+    )
+    assert [event.id for event in found] == [east.id]
@@ -1,9 +1,30 @@
+from collections.abc import Sequence
 from datetime import UTC, datetime, timedelta
+from uuid import UUID
 
-from sqlalchemy import func, select
+from sqlalchemy import (
+    ColumnElement,
+    Select,
+    func,
+    insert,
+    select,
+    tuple_,
+    union_all,
+    update,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
-from domain import NotificationHistoryRecord
+from app.notifications.notification_rules_engine import ETERNITY
+from app.persistence.audit_repository import AuditPosition
+from domain import (
+    NotificationHistoryRecord,
+    NotificationHistoryRollup,
+    NotificationStatus,
+)
+
+# keeps a single INSERT well below the 32767 bind parameters limit of Postgres
+INSERT_CHUNK_SIZE = 1000
 
 
 class SQLANotificationHistoryRecordRepository:
@@ -14,6 +35,29 @@ class SQLANotificationHistoryRecordRepository:
         self.async_session.add(record)
         await self.async_session.flush()
 
+    async def save_all(self, records: list[NotificationHistoryRecord]) -> None:
+        """
+        One multi-row INSERT per chunk, bypassing the unit of work
+        """
+        for start in range(0, len(records), INSERT_CHUNK_SIZE):
+            chunk = records[start : start + INSERT_CHUNK_SIZE]
+            stmt = insert(NotificationHistoryRecord).values(
+                [
+                    {
+                        "id": record.id,
+                        "type": record.type,
+                        "trigger": record.trigger,
+                        "user_id": record.user_id,
+                        "status": record.status,
+                        "retries": record.retries,
+                        "suppressed_because": record.suppressed_because,
+                        "created_at": record.created_at,
+                    }
+                    for record in chunk
+                ]
+            )
+            await self.async_session.execute(stmt)
+
     async def count_by_user_and_type_within_time(
         self,
         user_id: str,
@@ -29,19 +73,270 @@ class SQLANotificationHistoryRecordRepository:
         )
 
         result = await self.async_session.execute(stmt)
-        return result.scalar() or 0
+        count = result.scalar() or 0
+
+        if timerange >= ETERNITY:
+            rolled_up = await self._count_rolled_up(
+                [user_id], notification_type, threshold
+            )
+            count += rolled_up.get(user_id, 0)
+
+        return count
+
+    async def count_by_users_and_type_within_time(
+        self,
+        user_ids: list[str],
+        notification_type: str,
+        timerange: timedelta,
+    ) -> dict[str, int]:
+        if not user_ids:
+            return {}
+
+        threshold = datetime.now(UTC) - timerange
+
+        stmt = (
+            select(NotificationHistoryRecord.user_id, func.count())
+            .where(
+                NotificationHistoryRecord.user_id.in_(user_ids),
+                NotificationHistoryRecord.type == notification_type,
+                NotificationHistoryRecord.created_at >= threshold,
+            )
+            .group_by(NotificationHistoryRecord.user_id)
+        )
+
+        result = await self.async_session.execute(stmt)
+        counts = {user_id: count for user_id, count in result.all()}
+
+        if timerange >= ETERNITY:
+            rolled_up = await self._count_rolled_up(
+                user_ids, notification_type, threshold
+            )
+            for user_id, count in rolled_up.items():
+                counts[user_id] = counts.get(user_id, 0) + count
+
+        return counts
+
+    async def _count_rolled_up(
+        self,
+        user_ids: list[str],
+        notification_type: str,
+        threshold: datetime,
+    ) -> dict[str, int]:
+        """
+        Only "ever" debounces reach past the retention, every finite debounce period
+        is shorter than it (see NotificationHistoryCompactor)
+        """
+        stmt = select(
+            NotificationHistoryRollup.user_id, NotificationHistoryRollup.count
+        ).where(
+            NotificationHistoryRollup.user_id.in_(user_ids),
+            NotificationHistoryRollup.type == notification_type,
+            NotificationHistoryRollup.oldest_created_at >= threshold,
+        )
+
+        result = await self.async_session.execute(stmt)
+        return {user_id: count for user_id, count in result.all()}
+
+    async def find_created_by_users_and_type_since(
+        self,
+        user_ids: list[str],
+        notification_type: str,
+        since: datetime,
+    ) -> dict[str, list[tuple[UUID, datetime]]]:
+        """
+        Ids and creation times of every record since `since`, per user
+        """
+        if not user_ids:
+            return {}
+
+        stmt = select(
+            NotificationHistoryRecord.user_id,
+            NotificationHistoryRecord.id,
+            NotificationHistoryRecord.created_at,
+        ).where(
+            NotificationHistoryRecord.user_id.in_(user_ids),
+            NotificationHistoryRecord.type == notification_type,
+            NotificationHistoryRecord.created_at >= since,
+        )
+
+        result = await self.async_session.execute(stmt)
+        created: dict[str, list[tuple[UUID, datetime]]] = {}
+        for user_id, record_id, created_at in result.all():
+            created.setdefault(user_id, []).append((record_id, created_at))
+        return created
+
+    async def summarize_by_users_and_type_before(
+        self,
+        user_ids: list[str],
+        notification_type: str,
+        before: datetime,
+    ) -> dict[str, tuple[int, datetime]]:
+        """
+        Count and oldest creation time of the records before `before`, per user,
+        rolled up ones included
+        """
+        if not user_ids:
+            return {}
+
+        stmt = (
+            select(
+                NotificationHistoryRecord.user_id,
+                func.count(),
+                func.min(NotificationHistoryRecord.created_at),
+            )
+            .where(
+                NotificationHistoryRecord.user_id.in_(user_ids),
+                NotificationHistoryRecord.type == notification_type,
+                NotificationHistoryRecord.created_at < before,
+            )
+            .group_by(NotificationHistoryRecord.user_id)
+        )
+
+        result = await self.async_session.execute(stmt)
+        summaries = {
+            user_id: (count, oldest) for user_id, count, oldest in result.all()
+        }
+
+        rolled_up = await self.async_session.execute(
+            select(
+                NotificationHistoryRollup.user_id,
+                NotificationHistoryRollup.count,
+                NotificationHistoryRollup.oldest_created_at,
+            ).where(
+                NotificationHistoryRollup.user_id.in_(user_ids),
+                NotificationHistoryRollup.type == notification_type,
+            )
+        )
+        for user_id, count, oldest in rolled_up.all():
+            if user_id in summaries:
+                raw_count, raw_oldest = summaries[user_id]
+                summaries[user_id] = (raw_count + count, min(raw_oldest, oldest))
+            else:
+                summaries[user_id] = (count, oldest)
+
+        return summaries
+
+    async def resolve_pending(
+        self,
+        record_ids: list[UUID],
+        status: NotificationStatus,
+        suppressed_because: str | None = None,
+    ) -> list[UUID]:
+        """
+        Moves PENDING records to `status`, returns the ids of the ones that were
+        PENDING (not yet committed ones, or the already resolved, are left out)
+        """
+        if not record_ids:
+            return []
+
+        stmt = (
+            update(NotificationHistoryRecord)
+            .where(
+                NotificationHistoryRecord.id.in_(record_ids),
+                NotificationHistoryRecord.status == NotificationStatus.PENDING,
+            )
+            .values(status=status, suppressed_because=suppressed_because)
+            .returning(NotificationHistoryRecord.id)
+        )
+
+        result = await self.async_session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def find_pending(self, record_ids: list[UUID]) -> list[UUID]:
+        """
+        The ids of the records still PENDING, as of this transaction
+        """
+        if not record_ids:
+            return []
+
+        stmt = select(NotificationHistoryRecord.id).where(
+            NotificationHistoryRecord.id.in_(record_ids),
+            NotificationHistoryRecord.status == NotificationStatus.PENDING,
+        )
+
+        result = await self.async_session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def increment_retries(self, record_ids: list[UUID]) -> list[tuple[UUID, int]]:
+        """
+        Counts one more retry for each PENDING record, with one statement for the
+        whole batch; returns the ones that were PENDING, with their retries now
+        """
+        if not record_ids:
+            return []
+
+        stmt = (
+            update(NotificationHistoryRecord)
+            .where(
+                NotificationHistoryRecord.id.in_(record_ids),
+                NotificationHistoryRecord.status == NotificationStatus.PENDING,
+            )
+            .values(retries=NotificationHistoryRecord.retries + 1)
+            .returning(NotificationHistoryRecord.id, NotificationHistoryRecord.retries)
+        )
+
+        result = await self.async_session.execute(stmt)
+        return [(record_id, retries) for record_id, retries in result.all()]
 
     async def find_recent_by_user(
         self,
         user_id: str,
         limit: int = 50,
+        notification_types: Sequence[str] = (),
+        since: datetime | None = None,
+        until: datetime | None = None,
+        before: AuditPosition | None = None,
     ) -> list[NotificationHistoryRecord]:
-        stmt = (
-            select(NotificationHistoryRecord)
-            .where(NotificationHistoryRecord.user_id == user_id)
-            .order_by(NotificationHistoryRecord.created_at.desc())
-            .limit(limit)
-        )
+        """
+        Newest first, from before on when given. Every page is a range of an index,
+        however deep: several types are read from the index of each and merged.
+        """
+        conditions = [NotificationHistoryRecord.user_id == user_id]
+        if since is not None:
+            conditions.append(NotificationHistoryRecord.created_at >= since)
+        if until is not None:
+            conditions.append(NotificationHistoryRecord.created_at < until)
+        if before is not None:
+            conditions.append(
+                tuple_(
+                    NotificationHistoryRecord.created_at, NotificationHistoryRecord.id
+                )
+                < tuple_(before.timestamp, before.id)
+            )
+
+        def newest(
+            *where: ColumnElement[bool],
+        ) -> Select[tuple[NotificationHistoryRecord]]:
+            return (
+                select(NotificationHistoryRecord)
+                .where(*conditions, *where)
+                .order_by(
+                    NotificationHistoryRecord.created_at.desc(),
+                    NotificationHistoryRecord.id.desc(),
+                )
+                .limit(limit)
+            )
+
+        if len(notification_types) <= 1:
+            stmt = newest(
+                *(
+                    NotificationHistoryRecord.type == type_
+                    for type_ in notification_types
+                )
+            )
+        else:
+            pages = union_all(
+                *(
+                    newest(NotificationHistoryRecord.type == type_)
+                    for type_ in dict.fromkeys(notification_types)
+                )
+            ).subquery()
+            merged = aliased(NotificationHistoryRecord, pages)
+            stmt = (
+                select(merged)
+                .order_by(merged.created_at.desc(), merged.id.desc())
+                .limit(limit)
+            )
 
         result = await self.async_session.execute(stmt)
         return list(result.scalars().all())
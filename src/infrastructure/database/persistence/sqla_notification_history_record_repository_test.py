@@ -0,0 +1,122 @@
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.persistence.audit_repository import AuditPosition
+from domain import NotificationHistoryRecord, NotificationStatus
+from infrastructure.database.persistence.sqla_notification_history_record_repository import (
+    SQLANotificationHistoryRecordRepository,
+)
+
+
+def _record(status: NotificationStatus) -> NotificationHistoryRecord:
+    return NotificationHistoryRecord(
+        id=uuid4(),
+        type="WELCOME_EMAIL",
+        trigger="signup_completed",
+        user_id="u_pending",
+        status=status,
+        retries=0,
+        suppressed_because=None,
+        created_at=datetime.now(UTC),
+    )
+
+
+@pytest.mark.anyio
+async def test_resolve_pending__only_pending_records_change(
+    async_session: AsyncSession,
+):
+    repository = SQLANotificationHistoryRecordRepository(async_session)
+    pending = _record(NotificationStatus.PENDING)
+    sent = _record(NotificationStatus.SENT)
+    await repository.save_all([pending, sent])
+
+    resolved = await repository.resolve_pending(
+        [pending.id, sent.id, uuid4()],
+        NotificationStatus.SUPPRESSED,
+        "Event conditions no longer met after the delay",
+    )
+
+    assert resolved == [pending.id]
+    statuses = {
+        record.id: (record.status, record.suppressed_because)
+        for record in await repository.find_recent_by_user("u_pending")
+    }
+    assert statuses == {
+        pending.id: (
+            NotificationStatus.SUPPRESSED,
+            "Event conditions no longer met after the delay",
+        ),
+        sent.id: (NotificationStatus.SENT, None),
+    }
+
+
+@pytest.mark.anyio
+async def test_find_pending__only_pending_records(async_session: AsyncSession):
+    repository = SQLANotificationHistoryRecordRepository(async_session)
+    pending = _record(NotificationStatus.PENDING)
+    sent = _record(NotificationStatus.SENT)
+    await repository.save_all([pending, sent])
+
+    assert await repository.find_pending([pending.id, sent.id, uuid4()]) == [pending.id]
+    assert await repository.find_pending([]) == []
+
+
+@pytest.mark.anyio
+async def test_increment_retries__only_pending_records(async_session: AsyncSession):
+    repository = SQLANotificationHistoryRecordRepository(async_session)
+    pending = _record(NotificationStatus.PENDING)
+    failed = _record(NotificationStatus.FAILED)
+    await repository.save_all([pending, failed])
+
+    assert await repository.increment_retries([pending.id, failed.id]) == [
+        (pending.id, 1)
+    ]
+    assert await repository.increment_retries([pending.id]) == [(pending.id, 2)]
+    assert await repository.increment_retries([]) == []
+
+    retries = {
+        record.id: record.retries
+        for record in await repository.find_recent_by_user("u_pending")
+    }
+    assert retries == {pending.id: 2, failed.id: 0}
+
+
+@pytest.mark.anyio
+async def test_find_recent_by_user__paged_by_position__every_match_once_newest_first(
+    async_session: AsyncSession,
+):
+    repository = SQLANotificationHistoryRecordRepository(async_session)
+    now = datetime.now(UTC)
+    records = []
+    for i, notification_type in enumerate(["WELCOME_EMAIL", "FRAUD_SMS"] * 5):
+        record = _record(NotificationStatus.SENT)
+        record.user_id = "u_paged"
+        record.type = notification_type
+        # two by two at the same time, the id decides
+        record.created_at = now - timedelta(minutes=i // 2)
+        records.append(record)
+    await repository.save_all(records)
+    until = now - timedelta(seconds=30)
+    expected = sorted(
+        (record for record in records if record.created_at < until),
+        key=lambda record: (record.created_at, record.id),
+        reverse=True,
+    )
+
+    pages, before = [], None
+    while True:
+        page = await repository.find_recent_by_user(
+            "u_paged", limit=3, until=until, before=before
+        )
+        if not page:
+            break
+        pages.append(page)
+        before = AuditPosition(page[-1].created_at, page[-1].id)
+
+    assert [len(page) for page in pages] == [3, 3, 2]
+    assert [record.id for page in pages for record in page] == [
+        record.id for record in expected
+    ]
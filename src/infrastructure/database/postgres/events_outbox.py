@@ -0,0 +1,87 @@
+from uuid import UUID
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.persistence.event_repository import EventRepository
+from app.queue import EventQueue
+from domain import Event
+
+# held by the relay sending, until its transaction ends; relays running alongside skip
+# their turn instead of sending the events of a user out of order
+_RELAY_LOCK_KEY = 0x6576656E74736F62  # "eventsob"
+
+_TAKE_BATCH = text(
+    """
+    WITH batch AS (
+        SELECT id FROM events_outbox
+        ORDER BY id
+        LIMIT :batch_size
+    )
+    DELETE FROM events_outbox AS o
+    USING batch
+    WHERE o.id = batch.id
+    RETURNING o.id, o.event_id, o.event_date
+    """
+)
+
+
+class OutboxEventQueue:
+    """
+    The EventQueue of the API when the outbox is enabled: SQLAEventRepository has
+    already written the events to the outbox, in the transaction saving them, and
+    the outbox relay sends them to the event queues once it has committed
+    """
+
+    async def events_received(self, events: list[Event]) -> None:
+        pass
+
+
+class EventsOutboxRelay:
+    """
+    Sends the events of the outbox to the event queues in the order they were saved,
+    and deletes them from it. The deletion is committed after sending, so an event
+    is sent again if committing fails, never lost.
+    """
+
+    def __init__(
+        self,
+        async_session: AsyncSession,
+        event_repository: EventRepository,
+        event_queue: EventQueue,
+        batch_size: int,
+    ) -> None:
+        self.async_session = async_session
+        self.event_repository = event_repository
+        self.event_queue = event_queue
+        self.batch_size = batch_size
+
+    async def relay(self) -> int:
+        """
+        Sends one batch of at most batch_size events, returns how many were taken
+        from the outbox, 0 while another relay is sending
+        """
+        locked = await self.async_session.scalar(
+            select(func.pg_try_advisory_xact_lock(_RELAY_LOCK_KEY))
+        )
+        if not locked:
+            return 0
+
+        result = await self.async_session.execute(
+            _TAKE_BATCH, {"batch_size": self.batch_size}
+        )
+        taken = sorted(result.all())
+        if not taken:
+            return 0
+
+        # an event is only gone if its partition expired before it was sent
+        events: dict[UUID, Event] = {
+            event.id: event
+            for event in await self.event_repository.find_by_keys(
+                [(event_id, event_date) for _, event_id, event_date in taken]
+            )
+        }
+        await self.event_queue.events_received(
+            [events[event_id] for _, event_id, _ in taken if event_id in events]
+        )
+        return len(taken)
@@ -0,0 +1,96 @@
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain import Event, EventOutboxEntry
+from infrastructure.database.persistence.sqla_event_repository import (
+    SQLAEventRepository,
+)
+from infrastructure.database.postgres.events_outbox import EventsOutboxRelay
+from infrastructure.env_config import EventsIngestionMode
+
+NOW = datetime.now(UTC)
+
+
+def _event(user_id: str, age: timedelta) -> Event:
+    event = Event()
+    event.id = uuid4()
+    event.user_id = user_id
+    event.type = "signup_completed"
+    event.event_timestamp = NOW - age
+    event.event_date = event.event_timestamp.date()
+    event.properties = {}
+    event.user_traits = {}
+    return event
+
+
+def _relay(
+    async_session: AsyncSession, event_queue: AsyncMock, batch_size: int = 100
+) -> EventsOutboxRelay:
+    return EventsOutboxRelay(
+        async_session,
+        SQLAEventRepository(async_session),
+        event_queue,
+        batch_size=batch_size,
+    )
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("ingestion_mode", list(EventsIngestionMode))
+async def test_relay__saved_with_outbox__sent_in_saved_order_and_deleted(
+    async_session: AsyncSession, ingestion_mode: EventsIngestionMode
+):
+    repository = SQLAEventRepository(
+        async_session, ingestion_mode=ingestion_mode, outbox=True
+    )
+    # an older event saved later is still sent later, and across dates
+    events = [_event("u_outbox", timedelta(days=days)) for days in (0, 2, 1)]
+    await repository.save_all(events[:2])
+    await repository.save_all(events[2:])
+    event_queue = AsyncMock()
+
+    relay = _relay(async_session, event_queue, batch_size=2)
+    assert await relay.relay() == 2
+    assert await relay.relay() == 1
+    assert await relay.relay() == 0
+
+    sent = [call.args[0] for call in event_queue.events_received.call_args_list]
+    assert [[event.id for event in batch] for batch in sent] == [
+        [events[0].id, events[1].id],
+        [events[2].id],
+    ]
+    assert await async_session.scalar(select(func.count(EventOutboxEntry.id))) == 0
+
+
+@pytest.mark.anyio
+async def test_save_all__without_outbox__nothing_to_send(async_session: AsyncSession):
+    await SQLAEventRepository(async_session).save_all([_event("u_outbox", timedelta())])
+    event_queue = AsyncMock()
+
+    assert await _relay(async_session, event_queue).relay() == 0
+    event_queue.events_received.assert_not_called()
+
+
+@pytest.mark.anyio
+async def test_relay__another_relay_sending__skips_its_turn(
+    async_session: AsyncSession,
+):
+    await SQLAEventRepository(async_session, outbox=True).save_all(
+        [_event("u_outbox", timedelta())]
+    )
+    event_queue = AsyncMock()
+
+    assert async_session.bind is not None
+    async with AsyncSession(async_session.bind) as other_session:
+        await other_session.begin()
+        # nothing to send, the event above is not committed, but it holds the lock
+        assert await _relay(other_session, AsyncMock()).relay() == 0
+
+        assert await _relay(async_session, event_queue).relay() == 0
+        await other_session.rollback()
+
+    assert await _relay(async_session, event_queue).relay() == 1
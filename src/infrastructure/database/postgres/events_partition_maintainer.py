@@ -0,0 +1,195 @@
+import re
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from infrastructure.env_config import EventsPartitionInterval, EventsRetentionAction
+
+DEFAULT_PARTITION = "events_default"
+
+# any constant works, as long as nothing else takes the same advisory lock
+_MAINTENANCE_LOCK_ID = 7_281_994
+
+_BOUND = re.compile(r"FOR VALUES FROM \((?P<lower>[^)]+)\) TO \((?P<upper>[^)]+)\)")
+
+
+@dataclass(frozen=True)
+class EventsPartition:
+    name: str
+    # None for MINVALUE / MAXVALUE
+    lower: date | None
+    upper: date | None
+
+
+@dataclass
+class EventsPartitionMaintenanceReport:
+    created: list[str] = field(default_factory=list)
+    detached: list[str] = field(default_factory=list)
+    dropped: list[str] = field(default_factory=list)
+    # rows found in the default partition and moved to a new one; normally none, as
+    # partitions are created well ahead of the events that go in them
+    moved: int = 0
+
+
+class EventsPartitionMaintainer:
+    """
+    Keeps the range partitions of `events` ahead of today, and gets rid of the ones
+    past the retention. Rows that landed in the default partition meanwhile are moved
+    to the partition created for them.
+    """
+
+    def __init__(
+        self,
+        async_session: AsyncSession,
+        interval: EventsPartitionInterval,
+        ahead: int,
+        retention: timedelta | None,
+        retention_action: EventsRetentionAction,
+    ) -> None:
+        self.async_session = async_session
+        self.interval = interval
+        self.ahead = ahead
+        self.retention = retention
+        self.retention_action = retention_action
+
+    async def maintain(self, today: date) -> EventsPartitionMaintenanceReport:
+        report = EventsPartitionMaintenanceReport()
+        # one maintainer at a time, the others wait and then find nothing to do
+        await self.async_session.execute(
+            text("SELECT pg_advisory_xact_lock(:lock_id)"),
+            {"lock_id": _MAINTENANCE_LOCK_ID},
+        )
+
+        partitions = await self.find_partitions()
+        expired_before = today - self.retention if self.retention else None
+
+        start = max(
+            (p.upper for p in partitions if p.upper is not None),
+            default=self._floor(today),
+        )
+        if expired_before is not None:
+            start = max(start, self._floor(expired_before))
+
+        end = self._floor(today)
+        for _ in range(self.ahead + 1):
+            end = self._next(end)
+
+        while start < end:
+            upper = self._next(start)
+            report.created.append(await self._create(start, upper, report))
+            start = upper
+
+        if expired_before is None:
+            return report
+
+        for partition in partitions:
+            if partition.upper is None or partition.upper > expired_before:
+                continue
+
+            if self.retention_action is EventsRetentionAction.DROP:
+                await self.async_session.execute(text(f"DROP TABLE {partition.name}"))
+                report.dropped.append(partition.name)
+            else:
+                await self.async_session.execute(
+                    text(f"ALTER TABLE events DETACH PARTITION {partition.name}")
+                )
+                report.detached.append(partition.name)
+
+        return report
+
+    async def find_partitions(self) -> list[EventsPartition]:
+        """
+        Range partitions of `events` ordered by their bounds, the default one left out
+        """
+        result = await self.async_session.execute(
+            text(
+                """
+                SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+                FROM pg_inherits AS i
+                JOIN pg_class AS c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'events'::regclass
+                """
+            )
+        )
+
+        partitions = []
+        for name, bound in result.all():
+            match = _BOUND.fullmatch(bound)
+            if match is None:
+                continue
+            partitions.append(
+                EventsPartition(
+                    name=name,
+                    lower=_parse_bound(match["lower"]),
+                    upper=_parse_bound(match["upper"]),
+                )
+            )
+
+        return sorted(partitions, key=lambda p: p.lower or date.min)
+
+    async def _create(
+        self, lower: date, upper: date, report: EventsPartitionMaintenanceReport
+    ) -> str:
+        """
+        Creates the partition detached and attaches it once filled, as a partition
+        can't be created over rows the default partition already holds
+        """
+        name = self._name(lower)
+        bounds = {"lower": lower, "upper": upper}
+
+        await self.async_session.execute(
+            text(
+                f"CREATE TABLE {name} "
+                "(LIKE events INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            )
+        )
+        # inserts into the default partition wait until the partition is attached,
+        # one landing in between would fail the check ATTACH makes of the default
+        await self.async_session.execute(
+            text(f"LOCK TABLE {DEFAULT_PARTITION} IN SHARE ROW EXCLUSIVE MODE")
+        )
+        moved = await self.async_session.execute(
+            text(
+                f"""
+                WITH moved AS (
+                    DELETE FROM {DEFAULT_PARTITION}
+                    WHERE event_date >= :lower AND event_date < :upper
+                    RETURNING *
+                )
+                INSERT INTO {name} SELECT * FROM moved
+                """
+            ),
+            bounds,
+        )
+        report.moved += max(moved.rowcount, 0)
+        # the indexes of the parent are created on it while attaching
+        await self.async_session.execute(
+            text(
+                f"ALTER TABLE events ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+            )
+        )
+        return name
+
+    def _floor(self, day: date) -> date:
+        if self.interval is EventsPartitionInterval.MONTH:
+            return day.replace(day=1)
+        return day
+
+    def _next(self, day: date) -> date:
+        if self.interval is EventsPartitionInterval.MONTH:
+            return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+        return day + timedelta(days=1)
+
+    def _name(self, lower: date) -> str:
+        if self.interval is EventsPartitionInterval.MONTH:
+            return f"events_p{lower:%Y%m}"
+        return f"events_p{lower:%Y%m%d}"
+
+
+def _parse_bound(value: str) -> date | None:
+    if value in ("MINVALUE", "MAXVALUE"):
+        return None
+    return date.fromisoformat(value.strip("'"))
@@ -0,0 +1,186 @@
+import json
+from datetime import UTC, date, datetime, timedelta
+from typing import Any
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import event as sqla_event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain import Event
+from infrastructure.database.persistence.sqla_event_repository import (
+    SQLAEventRepository,
+)
+from infrastructure.database.postgres.events_partition_maintainer import (
+    EventsPartitionMaintainer,
+)
+from infrastructure.env_config import EventsPartitionInterval, EventsRetentionAction
+
+TODAY = datetime.now(UTC).date()
+
+
+def _maintainer(
+    async_session: AsyncSession,
+    interval: EventsPartitionInterval = EventsPartitionInterval.DAY,
+    retention: timedelta | None = None,
+    retention_action: EventsRetentionAction = EventsRetentionAction.DETACH,
+) -> EventsPartitionMaintainer:
+    return EventsPartitionMaintainer(
+        async_session,
+        interval=interval,
+        ahead=3,
+        retention=retention,
+        retention_action=retention_action,
+    )
+
+
+def _event(event_date: date) -> Event:
+    event = Event()
+    event.id = uuid4()
+    event.user_id = "u_partitions"
+    event.type = "signup_completed"
+    event.event_timestamp = datetime.combine(event_date, datetime.min.time(), UTC)
+    event.event_date = event_date
+    event.properties = {}
+    event.user_traits = {}
+    return event
+
+
+async def _partition_of(async_session: AsyncSession, event: Event) -> str:
+    result = await async_session.execute(
+        text("SELECT tableoid::regclass::text FROM events WHERE id = :id"),
+        {"id": event.id},
+    )
+    return result.scalar_one()
+
+
+@pytest.mark.anyio
+async def test_maintain__creates_contiguous_partitions_ahead_once(
+    async_session: AsyncSession,
+):
+    maintainer = _maintainer(async_session)
+
+    report = await maintainer.maintain(TODAY)
+
+    partitions = await maintainer.find_partitions()
+    assert partitions[0].name == "events_legacy"
+    assert partitions[0].lower is None
+    for previous, partition in zip(partitions, partitions[1:], strict=False):
+        assert partition.lower == previous.upper
+    assert partitions[-1].upper == TODAY + timedelta(days=4)
+    assert report.created == [p.name for p in partitions[1:]]
+
+    assert (await maintainer.maintain(TODAY)).created == []
+
+
+@pytest.mark.anyio
+async def test_maintain__monthly__partitions_end_on_month_boundaries(
+    async_session: AsyncSession,
+):
+    maintainer = _maintainer(async_session, interval=EventsPartitionInterval.MONTH)
+
+    await maintainer.maintain(TODAY)
+
+    _, *monthly = await maintainer.find_partitions()
+    assert all(p.upper is not None and p.upper.day == 1 for p in monthly)
+    # the month of today, and the 3 ahead
+    last_month = TODAY.year * 12 + TODAY.month - 1 + 3
+    assert monthly[-1].lower == date(last_month // 12, last_month % 12 + 1, 1)
+
+
+@pytest.mark.anyio
+async def test_maintain__rows_in_default_partition__moved_to_the_new_partition(
+    async_session: AsyncSession,
+):
+    far_ahead = TODAY + timedelta(days=30)
+    event = _event(far_ahead)
+    await SQLAEventRepository(async_session).save_all([event])
+    assert await _partition_of(async_session, event) == "events_default"
+
+    report = await _maintainer(async_session).maintain(far_ahead)
+
+    assert report.moved == 1
+    assert await _partition_of(async_session, event) == f"events_p{far_ahead:%Y%m%d}"
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("retention_action", list(EventsRetentionAction))
+async def test_maintain__past_retention__detached_or_dropped(
+    async_session: AsyncSession, retention_action: EventsRetentionAction
+):
+    maintainer = _maintainer(
+        async_session,
+        retention=timedelta(days=5),
+        retention_action=retention_action,
+    )
+    await maintainer.maintain(TODAY)
+
+    report = await maintainer.maintain(TODAY + timedelta(days=10))
+
+    # the migration left events_legacy up to the day after tomorrow
+    expired = ["events_legacy"] + [
+        f"events_p{TODAY + timedelta(days=days):%Y%m%d}" for days in range(2, 4)
+    ]
+    if retention_action is EventsRetentionAction.DROP:
+        assert (report.dropped, report.detached) == (expired, [])
+    else:
+        assert (report.dropped, report.detached) == ([], expired)
+
+    partitions = await maintainer.find_partitions()
+    assert partitions[0].lower == TODAY + timedelta(days=5)
+
+    legacy_exists = await async_session.scalar(
+        text("SELECT to_regclass('events_legacy') IS NOT NULL")
+    )
+    assert legacy_exists is (retention_action is EventsRetentionAction.DETACH)
+
+
+@pytest.mark.anyio
+async def test_find_for_user_within_time__only_partitions_of_the_window(
+    async_session: AsyncSession,
+):
+    await _maintainer(async_session).maintain(TODAY)
+    repository = SQLAEventRepository(async_session)
+
+    captured: list[tuple[str, Any]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    assert async_session.bind is not None
+    sync_engine = async_session.bind.sync_engine
+    sqla_event.listen(sync_engine, "before_cursor_execute", capture)
+    try:
+        await repository.find_for_user_within_time(
+            event_type="signup_completed",
+            user_id="u_partitions",
+            timerange=timedelta(days=1),
+            event_timestamp=datetime.combine(
+                TODAY + timedelta(days=3), datetime.min.time(), UTC
+            ),
+        )
+    finally:
+        sqla_event.remove(sync_engine, "before_cursor_execute", capture)
+
+    (statement, parameters), *_ = captured
+    connection = await async_session.connection()
+    result = await connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {statement}", parameters
+    )
+    (plan,) = json.loads(result.scalar_one())
+
+    relation_names, nodes = set(), [plan["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if "Relation Name" in node:
+            relation_names.add(node["Relation Name"])
+        nodes.extend(node.get("Plans", []))
+
+    # a day more than the window, for the events of other timezones; the migration
+    # left that day in events_legacy
+    assert relation_names == {
+        "events_legacy",
+        f"events_p{TODAY + timedelta(days=2):%Y%m%d}",
+        f"events_p{TODAY + timedelta(days=3):%Y%m%d}",
+        "events_default",
+    }
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain import NotificationStatus
+
+# rows of the batch are locked, so two compactors never roll up the same record
+_COMPACT_BATCH = text(
+    """
+    WITH batch AS (
+        SELECT id FROM notifications_history_records
+        WHERE created_at < :cutoff AND status <> :pending
+        ORDER BY created_at
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    ), deleted AS (
+        DELETE FROM notifications_history_records AS r
+        USING batch
+        WHERE r.id = batch.id
+        RETURNING r.user_id, r.type, r.created_at
+    ), summed AS (
+        SELECT user_id, type, count(*) AS count,
+               min(created_at) AS oldest_created_at,
+               max(created_at) AS newest_created_at
+        FROM deleted
+        GROUP BY user_id, type
+    ), rolled_up AS (
+        INSERT INTO notifications_history_rollups AS rollup
+            (user_id, type, count, oldest_created_at, newest_created_at)
+        SELECT user_id, type, count, oldest_created_at, newest_created_at FROM summed
+        ON CONFLICT (user_id, type) DO UPDATE SET
+            count = rollup.count + excluded.count,
+            oldest_created_at = least(rollup.oldest_created_at, excluded.oldest_created_at),
+            newest_created_at = greatest(rollup.newest_created_at, excluded.newest_created_at)
+    )
+    SELECT count(*) FROM deleted
+    """
+)
+
+
+class NotificationHistoryCompactor:
+    """
+    Rolls the notification history records past the retention up into per user and
+    type counts (notifications_history_rollups), and deletes them. PENDING records are
+    left for the scheduler.
+    Debounce counts stay exact as long as the retention is longer than every finite
+    debounce period, so a shorter retention is raised to the longest one.
+    """
+
+    def __init__(
+        self,
+        async_session: AsyncSession,
+        retention: timedelta | None,
+        batch_size: int,
+        longest_debounce_window: timedelta | None = None,
+    ) -> None:
+        """
+        retention: None disables the compaction
+        """
+        self.async_session = async_session
+        self.retention = retention
+        if retention is not None and longest_debounce_window is not None:
+            self.retention = max(retention, longest_debounce_window)
+        self.batch_size = batch_size
+
+    async def compact(self, now: datetime) -> int:
+        """
+        Rolls up one batch of at most batch_size records, returns how many
+        """
+        if self.retention is None:
+            return 0
+
+        result = await self.async_session.execute(
+            _COMPACT_BATCH,
+            {
+                "cutoff": now - self.retention,
+                "pending": NotificationStatus.PENDING.value,
+                "batch_size": self.batch_size,
+            },
+        )
+        return result.scalar_one()
@@ -0,0 +1,116 @@
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.notifications.notification_rules_engine import ETERNITY
+from domain import (
+    NotificationHistoryRecord,
+    NotificationHistoryRollup,
+    NotificationStatus,
+)
+from infrastructure.database.persistence.sqla_notification_history_record_repository import (
+    SQLANotificationHistoryRecordRepository,
+)
+from infrastructure.database.postgres.notification_history_compactor import (
+    NotificationHistoryCompactor,
+)
+
+NOW = datetime.now(UTC)
+
+
+def _record(
+    age: timedelta, status: NotificationStatus = NotificationStatus.SENT
+) -> NotificationHistoryRecord:
+    return NotificationHistoryRecord(
+        id=uuid4(),
+        type="ONCE_EVER",
+        trigger="signup_completed",
+        user_id="u_compacted",
+        status=status,
+        retries=0,
+        suppressed_because=None,
+        created_at=NOW - age,
+    )
+
+
+@pytest.mark.anyio
+async def test_compact__old_records_rolled_up_and_counts_unchanged(
+    async_session: AsyncSession,
+):
+    repository = SQLANotificationHistoryRecordRepository(async_session)
+    old = [_record(timedelta(days=days)) for days in (40, 50, 60)]
+    recent = _record(timedelta(days=1))
+    pending = _record(timedelta(days=45), NotificationStatus.PENDING)
+    await repository.save_all([*old, recent, pending])
+
+    async def counts() -> tuple[int, int, dict[str, tuple[int, datetime]]]:
+        return (
+            await repository.count_by_user_and_type_within_time(
+                "u_compacted", "ONCE_EVER", ETERNITY
+            ),
+            await repository.count_by_user_and_type_within_time(
+                "u_compacted", "ONCE_EVER", timedelta(days=7)
+            ),
+            await repository.summarize_by_users_and_type_before(
+                ["u_compacted"], "ONCE_EVER", NOW - timedelta(days=2)
+            ),
+        )
+
+    before = await counts()
+
+    compactor = NotificationHistoryCompactor(
+        async_session,
+        retention=timedelta(days=10),
+        batch_size=2,
+        longest_debounce_window=timedelta(days=30),
+    )
+    assert await compactor.compact(NOW) == 2
+    assert await compactor.compact(NOW) == 1
+    assert await compactor.compact(NOW) == 0
+
+    assert (
+        await counts()
+        == before
+        == (5, 1, {"u_compacted": (4, NOW - timedelta(days=60))})
+    )
+
+    rollup = await async_session.scalar(
+        select(NotificationHistoryRollup).where(
+            NotificationHistoryRollup.user_id == "u_compacted"
+        )
+    )
+    assert rollup is not None
+    assert (rollup.count, rollup.oldest_created_at, rollup.newest_created_at) == (
+        3,
+        NOW - timedelta(days=60),
+        NOW - timedelta(days=40),
+    )
+
+    remaining = await repository.find_recent_by_user("u_compacted")
+    assert {record.id for record in remaining} == {recent.id, pending.id}
+
+
+@pytest.mark.anyio
+async def test_compact__retention_shorter_than_a_debounce_period__raised_to_it(
+    async_session: AsyncSession,
+):
+    repository = SQLANotificationHistoryRecordRepository(async_session)
+    await repository.save_all([_record(timedelta(days=20))])
+
+    compactor = NotificationHistoryCompactor(
+        async_session,
+        retention=timedelta(days=10),
+        batch_size=100,
+        longest_debounce_window=timedelta(days=30),
+    )
+
+    assert await compactor.compact(NOW) == 0
+    assert (
+        await repository.count_by_user_and_type_within_time(
+            "u_compacted", "ONCE_EVER", timedelta(days=30)
+        )
+        == 1
+    )
@@ -0,0 +1,12 @@
+from .delivery_workers import run_delivery
+from .http_batch_dispatcher import HttpBatchDispatcher
+from .smtp_email_dispatcher import SmtpEmailDispatcher
+from .stand_ins import HttpProviderMock, SmtpSink
+
+__all__ = [
+    "HttpBatchDispatcher",
+    "HttpProviderMock",
+    "SmtpEmailDispatcher",
+    "SmtpSink",
+    "run_delivery",
+]
@@ -0,0 +1,126 @@
+import asyncio
+from datetime import UTC, datetime
+
+from dishka import AsyncContainer, make_async_container
+
+from app.delivery import (
+    ChannelDispatchers,
+    DeliverNotificationsRequest,
+    DeliverNotificationsUseCase,
+    RetryPolicy,
+)
+from app.logging import Logger
+from app.queue import DeliveryQueue
+from domain.notification import NotificationChannel
+from infrastructure.env_config import EnvConfig
+from infrastructure.logging import configure_logging
+
+
+async def run_delivery() -> None:
+    """
+    Sends queued notifications with a pool of loops per channel; a loop sends batch
+    after batch, and only sleeps for a tick once there were fewer queued than a full
+    batch
+    """
+    settings = EnvConfig()
+    configure_logging(settings.env, service_name="visible-notify-delivery")
+
+    # (concurrency, batch size, max attempts)
+    pools = {
+        NotificationChannel.EMAIL: (
+            settings.delivery_email_concurrency,
+            settings.delivery_email_batch_size,
+            settings.delivery_email_max_attempts,
+        ),
+        NotificationChannel.SMS: (
+            settings.delivery_sms_concurrency,
+            settings.delivery_sms_batch_size,
+            settings.delivery_sms_max_attempts,
+        ),
+        NotificationChannel.PIDGEON: (
+            settings.delivery_pidgeon_concurrency,
+            settings.delivery_pidgeon_batch_size,
+            settings.delivery_pidgeon_max_attempts,
+        ),
+    }
+    channels = settings.delivery_channels or list(NotificationChannel)
+
+    from infrastructure import dependencies_providers
+
+    container = make_async_container(*dependencies_providers)
+    try:
+        queue = await container.get(DeliveryQueue)
+        # connected once, before the loops share them
+        await container.get(ChannelDispatchers)
+
+        async with asyncio.TaskGroup() as task_group:
+            for channel in channels:
+                concurrency, batch_size, max_attempts = pools[channel]
+                retry_policy = RetryPolicy(
+                    max_attempts=max_attempts,
+                    base_backoff=settings.delivery_retry_backoff,
+                    max_backoff=settings.delivery_retry_max_backoff,
+                )
+                for _ in range(concurrency):
+                    task_group.create_task(
+                        _deliver(
+                            container,
+                            queue,
+                            channel,
+                            batch_size,
+                            retry_policy,
+                            settings,
+                        )
+                    )
+    finally:
+        await container.close()
+
+
+async def _deliver(
+    container: AsyncContainer,
+    queue: DeliveryQueue,
+    channel: NotificationChannel,
+    batch_size: int,
+    retry_policy: RetryPolicy,
+    settings: EnvConfig,
+) -> None:
+    while True:
+        async with container() as request_container:
+            logger = await request_container.get(Logger)
+            use_case = await request_container.get(DeliverNotificationsUseCase)
+            response = await use_case.handle(
+                DeliverNotificationsRequest(
+                    channel=channel,
+                    now=datetime.now(UTC),
+                    limit=batch_size,
+                    retry_policy=retry_policy,
+                )
+            )
+        # committed once the request scope is closed
+        await queue.ack(response.done)
+        await queue.retry(response.retried)
+
+        if response.popped or response.requeued:
+            logger.info(
+                "Notifications delivered",
+                channel=channel.value,
+                popped=response.popped,
+                sent=response.sent,
+                failed=response.failed,
+                requeued=response.requeued,
+                retried=len(response.retried),
+                unseen=response.popped - len(response.done) - len(response.retried),
+            )
+        for failure in response.failures:
+            logger.warning(
+                "Notification not delivered",
+                channel=channel.value,
+                record_id=str(failure.delivery.record_id),
+                notification_type=failure.delivery.notification_type,
+                reason=failure.reason,
+                retryable=failure.retryable,
+                attempt=failure.delivery.retries + 1,
+            )
+
+        if response.popped < batch_size:
+            await asyncio.sleep(settings.delivery_tick.total_seconds())
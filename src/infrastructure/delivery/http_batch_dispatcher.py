@@ -0,0 +1,81 @@
+from http import HTTPStatus
+
+import httpx
+
+from app.delivery import DeliveryFailure
+from app.queue import Delivery
+
+# the account or the provider rather than the messages, so they may go through later
+_RETRYABLE_STATUSES = {
+    HTTPStatus.UNAUTHORIZED,
+    HTTPStatus.FORBIDDEN,
+    HTTPStatus.REQUEST_TIMEOUT,
+    HTTPStatus.TOO_MANY_REQUESTS,
+}
+
+
+class HttpBatchDispatcher:
+    """
+    Sends a whole batch with one request to the bulk API of a provider (SMS, pigeon
+    post), over the keep-alive connections of the client:
+
+        POST {"messages": [{"id": "<record id>", "to": "...", "text": "..."}]}
+
+    answered with the messages it rejected, if any:
+
+        {"rejected": [{"id": "<record id>", "reason": "..."}]}
+    """
+
+    def __init__(self, client: httpx.AsyncClient, url: str) -> None:
+        self._client = client
+        self._url = url
+
+    async def send(self, deliveries: list[Delivery]) -> list[DeliveryFailure]:
+        try:
+            response = await self._client.post(
+                self._url,
+                json={
+                    "messages": [
+                        {
+                            "id": str(delivery.record_id),
+                            "to": delivery.recipient,
+                            "text": delivery.text,
+                        }
+                        for delivery in deliveries
+                    ]
+                },
+            )
+        except httpx.HTTPError as e:
+            return [
+                DeliveryFailure(delivery, repr(e), retryable=True)
+                for delivery in deliveries
+            ]
+
+        if response.is_error:
+            reason = f"{response.status_code} {response.text[:200]}"
+            retryable = (
+                response.is_server_error or response.status_code in _RETRYABLE_STATUSES
+            )
+            return [
+                DeliveryFailure(delivery, reason, retryable=retryable)
+                for delivery in deliveries
+            ]
+
+        try:
+            rejected = {
+                item["id"]: item.get("reason", "Rejected")
+                for item in (response.json() if response.content else {}).get(
+                    "rejected", []
+                )
+            }
+        except ValueError, KeyError, TypeError, AttributeError:
+            # accepted, in a body it did not mean to be read
+            rejected = {}
+
+        return [
+            DeliveryFailure(
+                delivery, str(rejected[str(delivery.record_id)]), retryable=False
+            )
+            for delivery in deliveries
+            if str(delivery.record_id) in rejected
+        ]
@@ -0,0 +1,94 @@
+import json
+from datetime import UTC, datetime
+from uuid import uuid4
+
+import httpx
+import pytest
+
+from app.queue import Delivery
+from domain.notification import NotificationChannel
+from infrastructure.delivery import HttpBatchDispatcher, HttpProviderMock
+
+URL = "http://sms.example.com/bulk"
+
+
+def _delivery(recipient: str) -> Delivery:
+    return Delivery(
+        record_id=uuid4(),
+        notification_type="BANK_LINK_NUDGE_SMS",
+        channel=NotificationChannel.SMS,
+        recipient=recipient,
+        text="Great! Your bank account is linked.",
+        queued_at=datetime.now(UTC),
+    )
+
+
+@pytest.mark.anyio
+async def test_send__batch__one_request_rejected_ones_fail_for_good():
+    provider = HttpProviderMock(reject={"+15550000000"})
+    requests: list[httpx.Request] = []
+
+    async def count(request: httpx.Request) -> None:
+        requests.append(request)
+
+    async with httpx.AsyncClient(
+        transport=provider.transport, event_hooks={"request": [count]}
+    ) as client:
+        dispatcher = HttpBatchDispatcher(client, URL)
+        rejected = _delivery("+15550000000")
+        sent = [_delivery(f"+1555000000{i}") for i in range(1, 4)]
+
+        (failure,) = await dispatcher.send([rejected, *sent])
+
+    assert len(requests) == 1
+    assert failure.delivery == rejected
+    assert failure.reason == "Unknown recipient"
+    assert not failure.retryable
+    assert [message["id"] for message in provider.messages] == [
+        str(delivery.record_id) for delivery in sent
+    ]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    ("status_code", "retryable"),
+    [(503, True), (429, True), (401, True), (400, False)],
+)
+async def test_send__error_status__every_one_fails(status_code: int, retryable: bool):
+    transport = httpx.MockTransport(
+        lambda request: httpx.Response(status_code, text="nope")
+    )
+    async with httpx.AsyncClient(transport=transport) as client:
+        deliveries = [_delivery("+15550000001"), _delivery("+15550000002")]
+
+        failures = await HttpBatchDispatcher(client, URL).send(deliveries)
+
+    assert [failure.delivery for failure in failures] == deliveries
+    assert {failure.retryable for failure in failures} == {retryable}
+    assert failures[0].reason == f"{status_code} nope"
+
+
+@pytest.mark.anyio
+async def test_send__provider_unreachable__every_one_retryable():
+    def unreachable(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("Connection refused", request=request)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(unreachable)) as client:
+        failures = await HttpBatchDispatcher(client, URL).send(
+            [_delivery("+15550000001")]
+        )
+
+    assert [failure.retryable for failure in failures] == [True]
+
+
+@pytest.mark.anyio
+async def test_send__accepted_without_a_body__every_one_sent():
+    def accepted(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["messages"][0]["to"] == "+15550000001"
+        return httpx.Response(202)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(accepted)) as client:
+        assert (
+            await HttpBatchDispatcher(client, URL).send([_delivery("+15550000001")])
+            == []
+        )
@@ -0,0 +1,146 @@
+import asyncio
+import smtplib
+from datetime import timedelta
+from email.message import EmailMessage
+
+from app.delivery import DeliveryFailure
+from app.queue import Delivery
+
+
+class SmtpEmailDispatcher:
+    """
+    Sends emails over a pool of SMTP connections kept open across batches, so an
+    email costs its MAIL, RCPT and DATA exchanges rather than a connection, EHLO,
+    STARTTLS and login of its own. smtplib blocks, so a batch is sent in a thread,
+    on a connection no other batch uses meanwhile.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        sender: str,
+        pool_size: int,
+        timeout: timedelta,
+        username: str | None = None,
+        password: str | None = None,
+        starttls: bool = False,
+    ) -> None:
+        self._host = host
+        self._port = port
+        self._sender = sender
+        self._timeout = timeout
+        self._username = username
+        self._password = password
+        self._starttls = starttls
+        # None until first used, or after it was lost
+        self._idle: asyncio.Queue[smtplib.SMTP | None] = asyncio.Queue()
+        for _ in range(pool_size):
+            self._idle.put_nowait(None)
+
+    async def send(self, deliveries: list[Delivery]) -> list[DeliveryFailure]:
+        connection = await self._idle.get()
+        try:
+            connection, failures = await asyncio.to_thread(
+                self._send_all, connection, deliveries
+            )
+        finally:
+            self._idle.put_nowait(connection)
+        return failures
+
+    async def close(self) -> None:
+        while not self._idle.empty():
+            connection = self._idle.get_nowait()
+            if connection is not None:
+                await asyncio.to_thread(_quit, connection)
+
+    def _send_all(
+        self, connection: smtplib.SMTP | None, deliveries: list[Delivery]
+    ) -> tuple[smtplib.SMTP | None, list[DeliveryFailure]]:
+        try:
+            connection = self._usable(connection)
+        except (smtplib.SMTPException, OSError) as e:
+            # e.g. the server is down or the credentials are wrong, nothing to do
+            # with the emails themselves
+            return None, [
+                DeliveryFailure(delivery, repr(e), retryable=True)
+                for delivery in deliveries
+            ]
+
+        failures: list[DeliveryFailure] = []
+        for sent, delivery in enumerate(deliveries):
+            try:
+                connection.send_message(self._message(delivery))
+            except smtplib.SMTPRecipientsRefused as e:
+                code, message = next(iter(e.recipients.values()))
+                failures.append(
+                    DeliveryFailure(
+                        delivery, f"{code} {_text(message)}", retryable=code < 500
+                    )
+                )
+            except smtplib.SMTPResponseException as e:
+                failures.append(
+                    DeliveryFailure(
+                        delivery,
+                        f"{e.smtp_code} {_text(e.smtp_error)}",
+                        retryable=e.smtp_code < 500,
+                    )
+                )
+            except (smtplib.SMTPException, OSError) as e:
+                # the connection is lost: the rest of the batch waits for a later
+                # attempt, on a new one
+                _quit(connection)
+                return None, failures + [
+                    DeliveryFailure(unsent, repr(e), retryable=True)
+                    for unsent in deliveries[sent:]
+                ]
+        return connection, failures
+
+    def _usable(self, connection: smtplib.SMTP | None) -> smtplib.SMTP:
+        """
+        The connection when the server still answers on it, a new one otherwise;
+        servers drop connections idle for too long
+        """
+        if connection is not None:
+            try:
+                if connection.noop()[0] == 250:
+                    return connection
+            except smtplib.SMTPException, OSError:
+                pass
+            _quit(connection)
+
+        connection = smtplib.SMTP(
+            self._host, self._port, timeout=self._timeout.total_seconds()
+        )
+        try:
+            if self._starttls:
+                connection.starttls()
+            if self._username is not None:
+                connection.login(self._username, self._password or "")
+        except BaseException:
+            _quit(connection)
+            raise
+        return connection
+
+    def _message(self, delivery: Delivery) -> EmailMessage:
+        assert delivery.recipient is not None
+        message = EmailMessage()
+        message["From"] = self._sender
+        message["To"] = delivery.recipient
+        # the first line of the notification reads as its title
+        message["Subject"] = delivery.text.strip().partition("\n")[0]
+        # the same for every attempt, so the receiving side can tell resends apart
+        message["Message-ID"] = f"<{delivery.record_id}@visible-notify>"
+        message.set_content(delivery.text)
+        return message
+
+
+def _quit(connection: smtplib.SMTP) -> None:
+    try:
+        connection.quit()
+    except smtplib.SMTPException, OSError:
+        connection.close()
+
+
+def _text(error: bytes | str) -> str:
+    return error.decode(errors="replace") if isinstance(error, bytes) else error
@@ -0,0 +1,102 @@
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+
+from app.queue import Delivery
+from domain.notification import NotificationChannel
+from infrastructure.delivery import SmtpEmailDispatcher, SmtpSink
+
+
+def _delivery(recipient: str) -> Delivery:
+    return Delivery(
+        record_id=uuid4(),
+        notification_type="WELCOME_EMAIL",
+        channel=NotificationChannel.EMAIL,
+        recipient=recipient,
+        text="Welcome to our payment platform!\n\nHi there,\n.\nBest regards",
+        queued_at=datetime.now(UTC),
+    )
+
+
+@pytest.fixture
+async def smtp_sink() -> AsyncIterator[SmtpSink]:
+    sink = SmtpSink(reject={"nobody@example.com"})
+    await sink.start()
+    yield sink
+    await sink.close()
+
+
+def _dispatcher(sink: SmtpSink) -> SmtpEmailDispatcher:
+    return SmtpEmailDispatcher(
+        sink.host,
+        sink.port,
+        sender="notifications@example.com",
+        pool_size=1,
+        timeout=timedelta(seconds=5),
+    )
+
+
+@pytest.mark.anyio
+async def test_send__batches__sent_over_one_connection(smtp_sink: SmtpSink):
+    dispatcher = _dispatcher(smtp_sink)
+    first = [_delivery(f"user{i}@example.com") for i in range(3)]
+    second = [_delivery("maria@example.com")]
+
+    assert await dispatcher.send(first) == []
+    assert await dispatcher.send(second) == []
+    await dispatcher.close()
+
+    assert smtp_sink.connections == 1
+    assert [message["To"] for message in smtp_sink.messages] == [
+        "user0@example.com",
+        "user1@example.com",
+        "user2@example.com",
+        "maria@example.com",
+    ]
+    message = smtp_sink.messages[0]
+    assert message["Subject"] == "Welcome to our payment platform!"
+    assert message["Message-ID"] == f"<{first[0].record_id}@visible-notify>"
+    assert message.get_content().rstrip("\n").endswith("Hi there,\n.\nBest regards")
+
+
+@pytest.mark.anyio
+async def test_send__recipient_refused__fails_for_good_and_the_rest_is_sent(
+    smtp_sink: SmtpSink,
+):
+    dispatcher = _dispatcher(smtp_sink)
+    refused, sent = _delivery("nobody@example.com"), _delivery("maria@example.com")
+
+    (failure,) = await dispatcher.send([refused, sent])
+    await dispatcher.close()
+
+    assert failure.delivery == refused
+    assert failure.reason.startswith("550")
+    assert not failure.retryable
+    assert [message["To"] for message in smtp_sink.messages] == ["maria@example.com"]
+
+
+@pytest.mark.anyio
+async def test_send__server_gone__every_one_retryable_then_sent_on_a_new_connection(
+    smtp_sink: SmtpSink,
+):
+    dispatcher = _dispatcher(smtp_sink)
+    assert await dispatcher.send([_delivery("maria@example.com")]) == []
+    port = smtp_sink.port
+    await smtp_sink.close()
+
+    deliveries = [_delivery("maria@example.com"), _delivery("ana@example.com")]
+    failures = await dispatcher.send(deliveries)
+
+    assert [failure.delivery for failure in failures] == deliveries
+    assert all(failure.retryable for failure in failures)
+
+    restarted = SmtpSink(port=port)
+    await restarted.start()
+    try:
+        assert await dispatcher.send(deliveries) == []
+        await dispatcher.close()
+    finally:
+        await restarted.close()
+    assert len(restarted.messages) == 2
@@ -0,0 +1,128 @@
+import asyncio
+import json
+from collections import deque
+from collections.abc import Collection
+from email import message_from_bytes, policy
+from email.message import EmailMessage
+from http import HTTPStatus
+
+import httpx
+
+
+class SmtpSink:
+    """
+    An SMTP server in the process, keeping the emails it receives in memory, to run
+    the delivery workers without a real relay. Recipients in reject are refused for
+    good, as a relay refuses unknown mailboxes.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        reject: Collection[str] = (),
+        keep: int = 1000,
+    ) -> None:
+        self.host = host
+        # the port picked by the system unless given, known once started
+        self.port = port
+        # the latest ones only, it runs for as long as the workers do
+        self.messages: deque[EmailMessage] = deque(maxlen=keep)
+        self.connections = 0
+        self._reject = set(reject)
+        self._server: asyncio.Server | None = None
+        self._clients: set[asyncio.StreamWriter] = set()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # clients keeping their connection open would be waited for otherwise
+            for writer in self._clients:
+                writer.close()
+            await self._server.wait_closed()
+
+    async def _serve(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        async def reply(line: str) -> None:
+            writer.write(f"{line}\r\n".encode())
+            await writer.drain()
+
+        self.connections += 1
+        self._clients.add(writer)
+        recipients: list[str] = []
+        try:
+            await reply("220 smtp-sink ESMTP")
+            while line := await reader.readline():
+                verb, _, argument = line.decode().strip().partition(" ")
+                match verb.upper():
+                    case "EHLO" | "HELO" | "NOOP":
+                        await reply("250 OK")
+                    case "MAIL" | "RSET":
+                        recipients = []
+                        await reply("250 OK")
+                    case "RCPT":
+                        address = argument.partition("<")[2].partition(">")[0]
+                        if address in self._reject:
+                            await reply("550 No such mailbox")
+                        else:
+                            recipients.append(address)
+                            await reply("250 OK")
+                    case "DATA" if recipients:
+                        await reply("354 End data with <CR><LF>.<CR><LF>")
+                        self.messages.append(await self._read_message(reader))
+                        recipients = []
+                        await reply("250 OK")
+                    case "DATA":
+                        await reply("503 No valid recipients")
+                    case "QUIT":
+                        await reply("221 Bye")
+                        break
+                    case _:
+                        await reply("502 Command not implemented")
+        except ConnectionError:
+            pass
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+
+    async def _read_message(self, reader: asyncio.StreamReader) -> EmailMessage:
+        lines = []
+        while (line := await reader.readline()) not in (b".\r\n", b""):
+            # undo the dot-stuffing of lines starting with a dot
+            line = line[1:] if line.startswith(b"..") else line
+            lines.append(line.removesuffix(b"\r\n") + b"\n")
+        message = message_from_bytes(b"".join(lines), policy=policy.default)
+        assert isinstance(message, EmailMessage)
+        return message
+
+
+class HttpProviderMock:
+    """
+    A bulk messaging API answering in the process, through the transport of an httpx
+    client, to run the delivery workers without the SMS and pigeon providers; it
+    speaks the protocol HttpBatchDispatcher expects. Recipients in reject are
+    rejected.
+    """
+
+    def __init__(self, reject: Collection[str] = (), keep: int = 1000) -> None:
+        # the latest ones only, it runs for as long as the workers do
+        self.messages: deque[dict] = deque(maxlen=keep)
+        self._reject = set(reject)
+        self.transport = httpx.MockTransport(self._handle)
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        messages = json.loads(request.content)["messages"]
+        rejected = [
+            {"id": message["id"], "reason": "Unknown recipient"}
+            for message in messages
+            if message["to"] in self._reject
+        ]
+        self.messages.extend(
+            message for message in messages if message["to"] not in self._reject
+        )
+        return httpx.Response(HTTPStatus.OK, json={"rejected": rejected})
@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+import pytest
+from pydantic import ValidationError
+
+from infrastructure.env_config import EnvConfig, EventsQueuePayload
+
+
+def test_env_config__keys_payload_without_outbox__rejected():
+    with pytest.raises(ValidationError, match="EVENTS_OUTBOX_ENABLED"):
+        EnvConfig(events_queue_payload=EventsQueuePayload.KEYS)
+
+
+def test_env_config__keys_payload_with_outbox__accepted():
+    settings = EnvConfig(
+        events_queue_payload=EventsQueuePayload.KEYS, events_outbox_enabled=True
+    )
+
+    assert settings.events_queue_payload is EventsQueuePayload.KEYS
+
+
+def test_env_config__delivery_lease_shorter_than_slowest_email_batch__rejected():
+    with pytest.raises(ValidationError, match="DELIVERY_LEASE"):
+        EnvConfig(
+            delivery_email_batch_size=50,
+            delivery_timeout=timedelta(seconds=10),
+            delivery_lease=timedelta(seconds=60),
+        )
+
+
+def test_env_config__delivery_lease_outlasting_slowest_email_batch__accepted():
+    settings = EnvConfig(
+        delivery_email_batch_size=50,
+        delivery_timeout=timedelta(seconds=10),
+        delivery_lease=timedelta(minutes=35),
+    )
+
+    assert settings.delivery_lease == timedelta(minutes=35)
@@ -1,6 +1,8 @@
 from collections.abc import AsyncIterable
 
+import httpx
 from dishka import Provider, Scope, provide
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -8,29 +10,67 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 
+from app.audit import AuditCache, AuditFeed
+from app.delivery import ChannelDispatchers
 from app.health.readiness_check_usecase import DatabaseChecker
 from app.logging import Logger
+from app.notifications.notification_rules_engine import NotificationRulesEngine
+from app.notifications.recent_events_index import RecentEventsIndex
+from app.persistence.audit_repository import AuditRepository
 from app.persistence.event_repository import EventRepository
 from app.persistence.notification_history_record_repository import (
     NotificationHistoryRecordRepository,
 )
 from app.persistence.notification_repository import NotificationRepository
 from app.persistence.notification_rule_repository import NotificationRuleRepository
-from app.queue import EventQueue
+from app.queue import DelayedNotificationQueue, DeliveryQueue, EventQueue
+from domain.notification import NotificationChannel
+from infrastructure.database.persistence.coalescing_event_repository import (
+    CoalescingEventRepository,
+    EventsSaveCoalescer,
+)
+from infrastructure.database.persistence.sqla_audit_repository import (
+    SQLAAuditRepository,
+)
 from infrastructure.database.persistence.sqla_event_repository import (
     SQLAEventRepository,
 )
 from infrastructure.database.persistence.sqla_notification_history_record_repository import (
     SQLANotificationHistoryRecordRepository,
 )
+from infrastructure.database.postgres.events_outbox import (
+    EventsOutboxRelay,
+    OutboxEventQueue,
+)
+from infrastructure.database.postgres.events_partition_maintainer import (
+    EventsPartitionMaintainer,
+)
+from infrastructure.database.postgres.notification_history_compactor import (
+    NotificationHistoryCompactor,
+)
 from infrastructure.database.postgres.postgres_db_checker import PostgresDBChecker
+from infrastructure.delivery import (
+    HttpBatchDispatcher,
+    HttpProviderMock,
+    SmtpEmailDispatcher,
+    SmtpSink,
+)
 from infrastructure.env_config import EnvConfig
 from infrastructure.logging import LoguruLogger
+from infrastructure.redis import (
+    CachedNotificationHistoryRecordRepository,
+    RedisAuditCache,
+    RedisAuditHub,
+    RedisDebounceCounterStore,
+    RedisDelayedNotificationQueue,
+    RedisDeliveryQueue,
+)
 from infrastructure.staticyaml import (
     StaticNotificationRepository,
     StaticNotificationRuleRepository,
 )
 from infrastructure.taskiq import TaskiqEventQueue
+from infrastructure.taskiq.coalescing_event_queue import CoalescingEventQueue
 
 
 class InfrastructureProvider(Provider):
@@ -57,25 +97,235 @@ class InfrastructureProvider(Provider):
         async with session_factory() as session, session.begin():
             yield session
 
-    repositories = (
-        provide(SQLAEventRepository, provides=EventRepository, scope=Scope.REQUEST)
-        + provide(
-            SQLANotificationHistoryRecordRepository,
-            provides=NotificationHistoryRecordRepository,
-            scope=Scope.REQUEST,
+    @provide(scope=Scope.APP)
+    async def get_events_save_coalescer(
+        self, session_factory: async_sessionmaker[AsyncSession], settings: EnvConfig
+    ) -> AsyncIterable[EventsSaveCoalescer]:
+        coalescer = EventsSaveCoalescer(
+            session_factory,
+            ingestion_mode=settings.events_ingestion_mode,
+            outbox=settings.events_outbox_enabled,
+            max_events=settings.events_coalescing_max_events,
+            max_delay=settings.events_coalescing_max_delay,
+        )
+        yield coalescer
+        await coalescer.close()
+
+    @provide(scope=Scope.REQUEST)
+    def get_event_repository(
+        self,
+        async_session: AsyncSession,
+        settings: EnvConfig,
+        events_save_coalescer: EventsSaveCoalescer,
+    ) -> EventRepository:
+        if settings.events_coalescing_enabled:
+            return CoalescingEventRepository(async_session, events_save_coalescer)
+        return SQLAEventRepository(
+            async_session,
+            ingestion_mode=settings.events_ingestion_mode,
+            outbox=settings.events_outbox_enabled,
+        )
+
+    @provide(scope=Scope.APP)
+    def get_audit_repository(
+        self, session_factory: async_sessionmaker[AsyncSession]
+    ) -> AuditRepository:
+        return SQLAAuditRepository(session_factory)
+
+    @provide(scope=Scope.REQUEST)
+    def get_events_outbox_relay(
+        self,
+        async_session: AsyncSession,
+        event_repository: EventRepository,
+        settings: EnvConfig,
+    ) -> EventsOutboxRelay:
+        return EventsOutboxRelay(
+            async_session,
+            event_repository,
+            TaskiqEventQueue(
+                partitions=settings.events_partitions,
+                payload=settings.events_queue_payload,
+            ),
+            batch_size=settings.events_outbox_batch_size,
         )
-        + provide(
-            StaticNotificationRepository,
-            provides=NotificationRepository,
-            scope=Scope.APP,
+
+    @provide(scope=Scope.REQUEST)
+    def get_events_partition_maintainer(
+        self, async_session: AsyncSession, settings: EnvConfig
+    ) -> EventsPartitionMaintainer:
+        return EventsPartitionMaintainer(
+            async_session,
+            interval=settings.events_table_partition_interval,
+            ahead=settings.events_table_partitions_ahead,
+            retention=settings.events_table_retention,
+            retention_action=settings.events_table_retention_action,
+        )
+
+    @provide(scope=Scope.REQUEST)
+    def get_notification_history_compactor(
+        self,
+        async_session: AsyncSession,
+        settings: EnvConfig,
+        notification_rules_engine: NotificationRulesEngine,
+    ) -> NotificationHistoryCompactor:
+        return NotificationHistoryCompactor(
+            async_session,
+            retention=settings.notification_history_retention,
+            batch_size=settings.notification_history_compaction_batch_size,
+            longest_debounce_window=notification_rules_engine.longest_debounce_window,
         )
-        + provide(
-            StaticNotificationRuleRepository,
-            provides=NotificationRuleRepository,
-            scope=Scope.APP,
+
+    @provide(scope=Scope.APP)
+    async def get_redis(self, settings: EnvConfig) -> AsyncIterable[Redis]:
+        redis = Redis.from_url(str(settings.redis_url))
+        yield redis
+        await redis.aclose()
+
+    @provide(scope=Scope.APP)
+    async def get_audit_feed(
+        self, redis: Redis, settings: EnvConfig, logger: Logger
+    ) -> AsyncIterable[AuditFeed]:
+        hub = RedisAuditHub(
+            redis, viewer_buffer=settings.audit_stream_viewer_buffer, logger=logger
         )
+        yield hub
+        await hub.close()
+
+    @provide(scope=Scope.APP)
+    def get_audit_cache(self, redis: Redis, settings: EnvConfig) -> AuditCache:
+        return RedisAuditCache(redis, ttl=settings.audit_cache_ttl)
+
+    @provide(scope=Scope.APP)
+    def get_debounce_counter_store(
+        self, redis: Redis, settings: EnvConfig
+    ) -> RedisDebounceCounterStore:
+        return RedisDebounceCounterStore(
+            redis,
+            retention=settings.debounce_cache_retention,
+            key_ttl=settings.debounce_cache_key_ttl,
+            local_cache_size=settings.debounce_cache_local_size,
+            local_cache_ttl=settings.debounce_cache_local_ttl,
+        )
+
+    @provide(scope=Scope.APP)
+    def get_recent_events_index(
+        self, settings: EnvConfig, notification_rules_engine: NotificationRulesEngine
+    ) -> RecentEventsIndex:
+        return RecentEventsIndex(
+            ttl=notification_rules_engine.longest_time_proximity,
+            max_users=settings.recent_events_max_users,
+            eviction=settings.recent_events_eviction,
+            event_types=notification_rules_engine.proximity_event_types,
+        )
+
+    @provide(scope=Scope.REQUEST)
+    def get_notification_history_record_repository(
+        self,
+        async_session: AsyncSession,
+        settings: EnvConfig,
+        debounce_counter_store: RedisDebounceCounterStore,
+    ) -> NotificationHistoryRecordRepository:
+        repository = SQLANotificationHistoryRecordRepository(async_session)
+        if not settings.debounce_cache_enabled:
+            return repository
+        return CachedNotificationHistoryRecordRepository(
+            repository, debounce_counter_store
+        )
+
+    repositories = provide(
+        StaticNotificationRepository,
+        provides=NotificationRepository,
+        scope=Scope.APP,
+    ) + provide(
+        StaticNotificationRuleRepository,
+        provides=NotificationRuleRepository,
+        scope=Scope.APP,
     )
 
-    queues = provide(TaskiqEventQueue, provides=EventQueue, scope=Scope.REQUEST)
+    @provide(scope=Scope.APP)
+    async def get_event_queue(self, settings: EnvConfig) -> AsyncIterable[EventQueue]:
+        if settings.events_outbox_enabled:
+            yield OutboxEventQueue()
+            return
+
+        event_queue = TaskiqEventQueue(
+            partitions=settings.events_partitions, payload=settings.events_queue_payload
+        )
+        if not settings.events_coalescing_enabled:
+            yield event_queue
+            return
+
+        coalescing_event_queue = CoalescingEventQueue(
+            event_queue,
+            max_events=settings.events_coalescing_max_events,
+            max_delay=settings.events_coalescing_max_delay,
+        )
+        yield coalescing_event_queue
+        await coalescing_event_queue.close()
+
+    @provide(scope=Scope.APP)
+    def get_delayed_notification_queue(
+        self, redis: Redis, settings: EnvConfig
+    ) -> DelayedNotificationQueue:
+        return RedisDelayedNotificationQueue(
+            redis, lease=settings.delayed_notifications_lease
+        )
+
+    @provide(scope=Scope.APP)
+    def get_delivery_queue(self, redis: Redis, settings: EnvConfig) -> DeliveryQueue:
+        return RedisDeliveryQueue(redis, lease=settings.delivery_lease)
+
+    @provide(scope=Scope.APP)
+    async def get_channel_dispatchers(
+        self, settings: EnvConfig
+    ) -> AsyncIterable[ChannelDispatchers]:
+        smtp_host, smtp_port, http_transport = (
+            settings.smtp_host,
+            settings.smtp_port,
+            None,
+        )
+        smtp_sink = None
+        if settings.delivery_stand_ins:
+            smtp_sink = SmtpSink()
+            await smtp_sink.start()
+            smtp_host, smtp_port = smtp_sink.host, smtp_sink.port
+            http_transport = HttpProviderMock().transport
+
+        email_dispatcher = SmtpEmailDispatcher(
+            smtp_host,
+            smtp_port,
+            sender=settings.smtp_sender,
+            # a connection for each loop sending emails
+            pool_size=settings.delivery_email_concurrency,
+            timeout=settings.delivery_timeout,
+            username=settings.smtp_username,
+            password=settings.smtp_password,
+            starttls=settings.smtp_starttls,
+        )
+        # keeps a connection to each provider for every loop sending through it
+        http_client = httpx.AsyncClient(
+            transport=http_transport,
+            timeout=settings.delivery_timeout.total_seconds(),
+            limits=httpx.Limits(
+                max_keepalive_connections=settings.delivery_sms_concurrency
+                + settings.delivery_pidgeon_concurrency
+            ),
+        )
+        yield ChannelDispatchers(
+            {
+                NotificationChannel.EMAIL: email_dispatcher,
+                NotificationChannel.SMS: HttpBatchDispatcher(
+                    http_client, str(settings.sms_api_url)
+                ),
+                NotificationChannel.PIDGEON: HttpBatchDispatcher(
+                    http_client, str(settings.pidgeon_api_url)
+                ),
+            }
+        )
+        await email_dispatcher.close()
+        await http_client.aclose()
+        if smtp_sink is not None:
+            await smtp_sink.close()
 
-    loggers = provide(LoguruLogger, provides=Logger, scope=Scope.REQUEST)
+    # holds no state, so the app scoped ones can log too
+    loggers = provide(LoguruLogger, provides=Logger, scope=Scope.APP)
@@ -0,0 +1,3 @@
+from .maintenance import run_maintenance
+
+__all__ = ["run_maintenance"]
@@ -0,0 +1,73 @@
+import asyncio
+from datetime import UTC, datetime
+
+from dishka import AsyncContainer, make_async_container
+
+from app.logging import Logger
+from infrastructure.database.postgres.events_partition_maintainer import (
+    EventsPartitionMaintainer,
+)
+from infrastructure.database.postgres.notification_history_compactor import (
+    NotificationHistoryCompactor,
+)
+from infrastructure.env_config import EnvConfig
+from infrastructure.logging import configure_logging
+
+
+async def run_maintenance() -> None:
+    """
+    Maintains the events partitions and compacts the notification history right
+    away, then every EVENTS_TABLE_MAINTENANCE_EVERY
+    """
+    settings = EnvConfig()
+    configure_logging(settings.env, service_name="visible-notify-maintenance")
+
+    from infrastructure import dependencies_providers
+
+    container = make_async_container(*dependencies_providers)
+    try:
+        while True:
+            await _maintain_events_partitions(container)
+            await _compact_notification_history(container, settings)
+            await asyncio.sleep(settings.events_table_maintenance_every.total_seconds())
+    finally:
+        await container.close()
+
+
+async def _maintain_events_partitions(container: AsyncContainer) -> None:
+    async with container() as request_container:
+        logger = await request_container.get(Logger)
+        maintainer = await request_container.get(EventsPartitionMaintainer)
+        report = await maintainer.maintain(datetime.now(UTC).date())
+
+    logger.info(
+        "Events partitions maintained",
+        created=report.created,
+        detached=report.detached,
+        dropped=report.dropped,
+    )
+    if report.moved:
+        logger.warning(
+            "Events found in the default partition, partitions are not created far "
+            "enough ahead",
+            moved=report.moved,
+        )
+
+
+async def _compact_notification_history(
+    container: AsyncContainer, settings: EnvConfig
+) -> None:
+    # one transaction per batch, so locks and WAL stay small however much is due
+    now, compacted = datetime.now(UTC), 0
+    while True:
+        async with container() as request_container:
+            logger = await request_container.get(Logger)
+            compactor = await request_container.get(NotificationHistoryCompactor)
+            batch = await compactor.compact(now)
+
+        compacted += batch
+        if batch < settings.notification_history_compaction_batch_size:
+            break
+
+    if compacted:
+        logger.info("Notification history compacted", records=compacted)
@@ -0,0 +1,3 @@
+from .events_outbox_relay import run_outbox_relay
+
+__all__ = ["run_outbox_relay"]
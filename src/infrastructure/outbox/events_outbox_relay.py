@@ -0,0 +1,39 @@
+import asyncio
+
+from dishka import make_async_container
+
+from app.logging import Logger
+from infrastructure.database.postgres.events_outbox import EventsOutboxRelay
+from infrastructure.env_config import EnvConfig
+from infrastructure.logging import configure_logging
+from infrastructure.taskiq import broker
+
+
+async def run_outbox_relay() -> None:
+    """
+    Sends the events of the outbox batch after batch, one transaction each, and only
+    sleeps for a tick once there are fewer waiting than a full batch
+    """
+    settings = EnvConfig()
+    configure_logging(settings.env, service_name="visible-notify-outbox-relay")
+
+    from infrastructure import dependencies_providers
+
+    container = make_async_container(*dependencies_providers)
+    await broker.startup()
+    try:
+        while True:
+            async with container() as request_container:
+                logger = await request_container.get(Logger)
+                relay = await request_container.get(EventsOutboxRelay)
+                relayed = await relay.relay()
+            # committed once the request scope is closed
+
+            if relayed:
+                logger.info("Outbox events sent", count=relayed)
+
+            if relayed < settings.events_outbox_batch_size:
+                await asyncio.sleep(settings.events_outbox_tick.total_seconds())
+    finally:
+        await broker.shutdown()
+        await container.close()
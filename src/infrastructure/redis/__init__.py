@@ -0,0 +1,18 @@
+from .audit_cache import RedisAuditCache
+from .audit_hub import RedisAuditHub
+from .cached_notification_history_record_repository import (
+    CachedNotificationHistoryRecordRepository,
+)
+from .debounce_counter_store import DebounceSnapshot, RedisDebounceCounterStore
+from .delayed_notification_queue import RedisDelayedNotificationQueue
+from .delivery_queue import RedisDeliveryQueue
+
+__all__ = [
+    "CachedNotificationHistoryRecordRepository",
+    "DebounceSnapshot",
+    "RedisAuditCache",
+    "RedisAuditHub",
+    "RedisDebounceCounterStore",
+    "RedisDelayedNotificationQueue",
+    "RedisDeliveryQueue",
+]
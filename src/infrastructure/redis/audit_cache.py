@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from pydantic import TypeAdapter
+from redis.asyncio import Redis
+
+from app.audit import GetUserAuditResponse
+
+_RESPONSE_ADAPTER = TypeAdapter(GetUserAuditResponse)
+
+
+def audit_cache_key(user_id: str) -> str:
+    # a hash of the responses by limit, so one DEL drops all of them
+    return f"audit-cache:{user_id}"
+
+
+class RedisAuditCache:
+    """
+    Audit responses by user, for ttl at most. RedisAuditHub drops those of a user
+    when publishing their new events and notifications, but a read that started
+    before can still cache what it read, so the ttl bounds how stale one can be.
+    A ttl of zero turns the cache off.
+    """
+
+    def __init__(self, redis: Redis, ttl: timedelta) -> None:
+        self.redis = redis
+        self.ttl = ttl
+
+    async def get(self, user_id: str, limit: int) -> GetUserAuditResponse | None:
+        if not self.ttl:
+            return None
+
+        cached = await self.redis.hget(audit_cache_key(user_id), str(limit))
+        if cached is None:
+            return None
+        return _RESPONSE_ADAPTER.validate_json(cached)
+
+    async def set(self, response: GetUserAuditResponse, limit: int) -> None:
+        if not self.ttl:
+            return
+
+        key = audit_cache_key(response.user_id)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hset(key, str(limit), _RESPONSE_ADAPTER.dump_json(response))
+            # not pushed back by later limits, every one of them expires in time
+            pipe.expire(key, self.ttl, nx=True)
+            await pipe.execute()
@@ -0,0 +1,63 @@
+from datetime import UTC, datetime, timedelta
+from unittest.mock import Mock
+
+import pytest
+from redis.asyncio import Redis
+
+from app.audit import AuditUpdate, GetUserAuditResponse
+from app.audit.get_user_audit_use_case import EventAuditItem
+from infrastructure.redis import RedisAuditCache, RedisAuditHub
+from infrastructure.redis.audit_cache import audit_cache_key
+
+TTL = timedelta(seconds=5)
+
+EVENT = EventAuditItem(
+    event_id="e_1",
+    event_type="signup_completed",
+    event_timestamp=datetime(2025, 10, 31, 19, 0, tzinfo=UTC),
+    properties={"signup_method": "email"},
+)
+
+
+def _response(user_id: str) -> GetUserAuditResponse:
+    return GetUserAuditResponse(
+        user_id=user_id, recent_events=[EVENT], notification_history=[]
+    )
+
+
+@pytest.mark.anyio
+async def test_get__set_before__same_response_by_limit_until_the_ttl(redis: Redis):
+    cache = RedisAuditCache(redis, ttl=TTL)
+
+    await cache.set(_response("u_1"), limit=50)
+
+    assert await cache.get("u_1", limit=50) == _response("u_1")
+    assert await cache.get("u_1", limit=10) is None
+    assert await cache.get("u_2", limit=50) is None
+    assert 0 < await redis.ttl(audit_cache_key("u_1")) <= TTL.total_seconds()
+
+
+@pytest.mark.anyio
+async def test_get__new_updates_published__dropped(redis: Redis):
+    cache = RedisAuditCache(redis, ttl=TTL)
+    await cache.set(_response("u_1"), limit=50)
+    await cache.set(_response("u_1"), limit=10)
+    await cache.set(_response("u_2"), limit=50)
+
+    hub = RedisAuditHub(redis, viewer_buffer=10, logger=Mock())
+    await hub.publish([AuditUpdate(user_id="u_1", event=EVENT)])
+    await hub.close()
+
+    assert await cache.get("u_1", limit=50) is None
+    assert await cache.get("u_1", limit=10) is None
+    assert await cache.get("u_2", limit=50) == _response("u_2")
+
+
+@pytest.mark.anyio
+async def test_get__no_ttl__never_cached(redis: Redis):
+    cache = RedisAuditCache(redis, ttl=timedelta(0))
+
+    await cache.set(_response("u_1"), limit=50)
+
+    assert await cache.get("u_1", limit=50) is None
+    assert not await redis.exists(audit_cache_key("u_1"))
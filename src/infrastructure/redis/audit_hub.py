@@ -0,0 +1,124 @@
+import asyncio
+from collections.abc import AsyncIterator
+from datetime import timedelta
+
+from pydantic import TypeAdapter, ValidationError
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.audit import AuditUpdate
+from app.logging import Logger
+from infrastructure.redis.audit_cache import audit_cache_key
+
+CHANNEL_PREFIX = "audit:"
+
+_UPDATE_ADAPTER = TypeAdapter(AuditUpdate)
+
+
+class RedisAuditHub:
+    """
+    Publishes audit updates to a Redis channel per user, and fans them out to the
+    viewers of this process over a single pub/sub connection, subscribed to the
+    channels of the users being watched, once each however many watch them.
+    A viewer falling more than viewer_buffer updates behind loses the oldest ones.
+    Publishing also drops the audits RedisAuditCache holds for those users.
+    """
+
+    def __init__(self, redis: Redis, viewer_buffer: int, logger: Logger) -> None:
+        self.redis = redis
+        self.viewer_buffer = viewer_buffer
+        self.logger = logger
+        self._pubsub = redis.pubsub()
+        self._viewers: dict[str, set[asyncio.Queue[AuditUpdate]]] = {}
+        self._listening: asyncio.Task[None] | None = None
+
+    async def publish(self, updates: list[AuditUpdate]) -> None:
+        if not updates:
+            return
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for update in updates:
+                pipe.publish(
+                    f"{CHANNEL_PREFIX}{update.user_id}",
+                    _UPDATE_ADAPTER.dump_json(update),
+                )
+            pipe.delete(*{audit_cache_key(update.user_id) for update in updates})
+            await pipe.execute()
+
+    async def watch(
+        self, user_id: str, heartbeat: timedelta
+    ) -> AsyncIterator[AuditUpdate | None]:
+        channel = f"{CHANNEL_PREFIX}{user_id}"
+        viewer: asyncio.Queue[AuditUpdate] = asyncio.Queue(maxsize=self.viewer_buffer)
+        viewers = self._viewers.setdefault(user_id, set())
+        viewers.add(viewer)
+        try:
+            if len(viewers) == 1:
+                await self._pubsub.subscribe(channel)
+            self._ensure_listening()
+
+            yield None
+            while True:
+                try:
+                    yield await asyncio.wait_for(
+                        viewer.get(), heartbeat.total_seconds()
+                    )
+                except TimeoutError:
+                    yield None
+        finally:
+            viewers.discard(viewer)
+            if not viewers:
+                del self._viewers[user_id]
+                await self._pubsub.unsubscribe(channel)
+
+    async def close(self) -> None:
+        if self._listening is not None:
+            self._listening.cancel()
+        await self._pubsub.aclose()
+
+    def _ensure_listening(self) -> None:
+        """
+        Starts the listener, or starts it again if it died, so the viewers do not
+        silently stop getting updates
+        """
+        if self._listening is not None and not self._listening.done():
+            return
+        if (
+            self._listening is not None
+            and not self._listening.cancelled()
+            and (error := self._listening.exception()) is not None
+        ):
+            self.logger.error(
+                "Audit updates listener died, restarting", error=repr(error)
+            )
+        self._listening = asyncio.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+            except RedisError:
+                # the connection is reestablished, with its subscriptions, by the
+                # next read
+                self.logger.exception("Audit updates subscription failed, retrying")
+                await asyncio.sleep(1)
+                continue
+            if message is None:
+                continue
+
+            try:
+                update = _UPDATE_ADAPTER.validate_json(message["data"])
+            except ValidationError as e:
+                # published by another version, or not by a hub at all
+                self.logger.warning(
+                    "Audit update skipped, not readable",
+                    channel=str(message.get("channel")),
+                    error=str(e),
+                )
+                continue
+            for viewer in self._viewers.get(update.user_id, ()):
+                if viewer.full():
+                    viewer.get_nowait()
+                viewer.put_nowait(update)
@@ -0,0 +1,113 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from unittest.mock import Mock
+
+import pytest
+from redis.asyncio import Redis
+
+from app.audit import AuditUpdate
+from app.audit.get_user_audit_use_case import EventAuditItem
+from infrastructure.redis import RedisAuditHub
+from infrastructure.redis.audit_hub import CHANNEL_PREFIX
+
+HEARTBEAT = timedelta(seconds=5)
+
+
+def _update(user_id: str) -> AuditUpdate:
+    return AuditUpdate(
+        user_id=user_id,
+        event=EventAuditItem(
+            event_id="e_1",
+            event_type="signup_completed",
+            event_timestamp=datetime(2025, 10, 31, 19, 0, tzinfo=UTC),
+            properties={"signup_method": "email"},
+        ),
+    )
+
+
+async def _subscribers(redis: Redis, user_id: str) -> int:
+    ((_, count),) = await redis.pubsub_numsub(f"{CHANNEL_PREFIX}{user_id}")
+    return count
+
+
+@pytest.mark.anyio
+async def test_watch__many_viewers__one_subscription_and_all_get_the_updates(
+    redis: Redis,
+):
+    hub = RedisAuditHub(redis, viewer_buffer=10, logger=Mock())
+    first, second, other = (
+        hub.watch("u_1", HEARTBEAT),
+        hub.watch("u_1", HEARTBEAT),
+        hub.watch("u_2", HEARTBEAT),
+    )
+    # subscribed
+    assert [await anext(viewer) for viewer in (first, second, other)] == [None] * 3
+    assert await _subscribers(redis, "u_1") == 1
+
+    await RedisAuditHub(redis, viewer_buffer=10, logger=Mock()).publish(
+        [_update("u_1")]
+    )
+
+    async with asyncio.timeout(5):
+        assert await anext(first) == _update("u_1")
+        assert await anext(second) == _update("u_1")
+
+    await first.aclose()
+    assert await _subscribers(redis, "u_1") == 1
+    await second.aclose()
+    assert await _subscribers(redis, "u_1") == 0
+
+    await other.aclose()
+    await hub.close()
+
+
+@pytest.mark.anyio
+async def test_watch__nothing_published__heartbeats(redis: Redis):
+    hub = RedisAuditHub(redis, viewer_buffer=10, logger=Mock())
+    viewer = hub.watch("u_1", timedelta(milliseconds=10))
+
+    assert [await anext(viewer) for _ in range(3)] == [None] * 3
+
+    await viewer.aclose()
+    await hub.close()
+
+
+@pytest.mark.anyio
+async def test_watch__unreadable_update__skipped_and_the_next_delivered(redis: Redis):
+    logger = Mock()
+    hub = RedisAuditHub(redis, viewer_buffer=10, logger=logger)
+    viewer = hub.watch("u_1", HEARTBEAT)
+    assert await anext(viewer) is None
+
+    await redis.publish(f"{CHANNEL_PREFIX}u_1", b'{"user_id": "u_1", "event": 42}')
+    await hub.publish([_update("u_1")])
+
+    async with asyncio.timeout(5):
+        assert await anext(viewer) == _update("u_1")
+    logger.warning.assert_called_once()
+
+    await viewer.aclose()
+    await hub.close()
+
+
+@pytest.mark.anyio
+async def test_watch__listener_died__restarted_by_the_next_viewer(redis: Redis):
+    logger = Mock()
+    hub = RedisAuditHub(redis, viewer_buffer=10, logger=logger)
+
+    async def die() -> None:
+        raise RuntimeError("boom")
+
+    hub._listening = asyncio.create_task(die())
+    await asyncio.sleep(0)
+
+    viewer = hub.watch("u_1", HEARTBEAT)
+    assert await anext(viewer) is None
+    await hub.publish([_update("u_1")])
+
+    async with asyncio.timeout(5):
+        assert await anext(viewer) == _update("u_1")
+    logger.error.assert_called_once()
+
+    await viewer.aclose()
+    await hub.close()
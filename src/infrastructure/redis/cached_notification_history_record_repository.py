@@ -0,0 +1,128 @@
+from collections.abc import Sequence
+from datetime import UTC, datetime, timedelta
+from uuid import UUID
+
+from app.persistence.audit_repository import AuditPosition
+from domain import NotificationHistoryRecord, NotificationStatus
+from infrastructure.database.persistence.sqla_notification_history_record_repository import (
+    SQLANotificationHistoryRecordRepository,
+)
+from infrastructure.redis.debounce_counter_store import RedisDebounceCounterStore
+
+
+class CachedNotificationHistoryRecordRepository:
+    """
+    Answers debounce counts from the Redis debounce counter store, loading users from
+    Postgres on the first miss. Everything else goes straight to Postgres.
+    """
+
+    def __init__(
+        self,
+        repository: SQLANotificationHistoryRecordRepository,
+        debounce_counter_store: RedisDebounceCounterStore,
+    ) -> None:
+        self.repository = repository
+        self.debounce_counter_store = debounce_counter_store
+
+    async def save(self, record: NotificationHistoryRecord) -> None:
+        await self.repository.save(record)
+        await self.debounce_counter_store.record([record])
+
+    async def save_all(self, records: list[NotificationHistoryRecord]) -> None:
+        await self.repository.save_all(records)
+        # written before the transaction commits: if it rolls back, the counts stay
+        # too high (suppressing rather than spamming) until the keys expire
+        await self.debounce_counter_store.record(records)
+
+    async def count_by_user_and_type_within_time(
+        self,
+        user_id: str,
+        notification_type: str,
+        timerange: timedelta,
+    ) -> int:
+        counts = await self.count_by_users_and_type_within_time(
+            user_ids=[user_id],
+            notification_type=notification_type,
+            timerange=timerange,
+        )
+        return counts.get(user_id, 0)
+
+    async def count_by_users_and_type_within_time(
+        self,
+        user_ids: list[str],
+        notification_type: str,
+        timerange: timedelta,
+    ) -> dict[str, int]:
+        if not user_ids:
+            return {}
+
+        threshold = datetime.now(UTC) - timerange
+        store = self.debounce_counter_store
+
+        snapshots = await store.get(user_ids, notification_type)
+        missing = [user_id for user_id in user_ids if user_id not in snapshots]
+        if missing:
+            horizon = store.horizon()
+            snapshots |= await store.load(
+                notification_type=notification_type,
+                horizon=horizon,
+                recent=await self.repository.find_created_by_users_and_type_since(
+                    user_ids=missing,
+                    notification_type=notification_type,
+                    since=horizon,
+                ),
+                before=await self.repository.summarize_by_users_and_type_before(
+                    user_ids=missing,
+                    notification_type=notification_type,
+                    before=horizon,
+                ),
+                user_ids=missing,
+            )
+
+        counts, unknown = {}, []
+        for user_id, snapshot in snapshots.items():
+            count = snapshot.count_since(threshold)
+            if count is None:
+                unknown.append(user_id)
+            else:
+                counts[user_id] = count
+
+        if unknown:
+            # the window reaches past the retention of the store
+            counts |= await self.repository.count_by_users_and_type_within_time(
+                user_ids=unknown,
+                notification_type=notification_type,
+                timerange=timerange,
+            )
+
+        return counts
+
+    async def resolve_pending(
+        self,
+        record_ids: list[UUID],
+        status: NotificationStatus,
+        suppressed_because: str | None = None,
+    ) -> list[UUID]:
+        # records are counted whatever their status, so the counts stay as they are
+        return await self.repository.resolve_pending(
+            record_ids, status, suppressed_because
+        )
+
+    async def find_pending(self, record_ids: list[UUID]) -> list[UUID]:
+        return await self.repository.find_pending(record_ids)
+
+    async def increment_retries(self, record_ids: list[UUID]) -> list[tuple[UUID, int]]:
+        return await self.repository.increment_retries(record_ids)
+
+    async def find_recent_by_user(
+        self,
+        user_id: str,
+        limit: int = 50,
+        notification_types: Sequence[str] = (),
+        since: datetime | None = None,
+        until: datetime | None = None,
+        before: AuditPosition | None = None,
+    ) -> list[NotificationHistoryRecord]:
+        return await self.repository.find_recent_by_user(
+            user_id, limit, notification_types, since, until, before
+        )
@@ -0,0 +1,122 @@
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+from redis.asyncio import Redis
+
+from app.persistence.audit_repository import AuditPosition
+from domain import NotificationHistoryRecord, NotificationStatus
+from infrastructure.redis import (
+    CachedNotificationHistoryRecordRepository,
+    RedisDebounceCounterStore,
+)
+
+
+def _repository(
+    redis: Redis, sqla_repository: AsyncMock
+) -> CachedNotificationHistoryRecordRepository:
+    return CachedNotificationHistoryRecordRepository(
+        sqla_repository,
+        RedisDebounceCounterStore(
+            redis,
+            retention=timedelta(days=2),
+            key_ttl=timedelta(hours=1),
+            local_cache_size=100,
+            local_cache_ttl=timedelta(seconds=30),
+        ),
+    )
+
+
+@pytest.mark.anyio
+async def test_count__loads_from_postgres_once_then_counts_saved_records(
+    redis: Redis,
+):
+    sqla_repository = AsyncMock()
+    sqla_repository.find_created_by_users_and_type_since.return_value = {
+        "u_1": [(uuid4(), datetime.now(UTC) - timedelta(hours=3))]
+    }
+    sqla_repository.summarize_by_users_and_type_before.return_value = {}
+    repository = _repository(redis, sqla_repository)
+
+    assert (
+        await repository.count_by_user_and_type_within_time(
+            user_id="u_1",
+            notification_type="INSUFFICIENT_FUNDS_EMAIL",
+            timerange=timedelta(days=1),
+        )
+        == 1
+    )
+
+    await repository.save_all(
+        [
+            NotificationHistoryRecord(
+                id=uuid4(),
+                type="INSUFFICIENT_FUNDS_EMAIL",
+                trigger="payment_failed",
+                user_id="u_1",
+                status=NotificationStatus.SENT,
+                retries=0,
+                suppressed_because=None,
+                created_at=datetime.now(UTC),
+            )
+        ]
+    )
+
+    assert await repository.count_by_users_and_type_within_time(
+        user_ids=["u_1"],
+        notification_type="INSUFFICIENT_FUNDS_EMAIL",
+        timerange=timedelta(days=1),
+    ) == {"u_1": 2}
+    sqla_repository.find_created_by_users_and_type_since.assert_called_once()
+    sqla_repository.summarize_by_users_and_type_before.assert_called_once()
+    sqla_repository.count_by_users_and_type_within_time.assert_not_called()
+    sqla_repository.save_all.assert_called_once()
+
+
+@pytest.mark.anyio
+async def test_count__window_past_the_retention__falls_back_to_postgres(
+    redis: Redis,
+):
+    sqla_repository = AsyncMock()
+    sqla_repository.find_created_by_users_and_type_since.return_value = {}
+    sqla_repository.summarize_by_users_and_type_before.return_value = {
+        "u_1": (5, datetime.now(UTC) - timedelta(days=30))
+    }
+    sqla_repository.count_by_users_and_type_within_time.return_value = {"u_1": 2}
+    repository = _repository(redis, sqla_repository)
+
+    counts = await repository.count_by_users_and_type_within_time(
+        user_ids=["u_1"],
+        notification_type="INSUFFICIENT_FUNDS_EMAIL",
+        timerange=timedelta(days=7),
+    )
+
+    assert counts == {"u_1": 2}
+    sqla_repository.count_by_users_and_type_within_time.assert_called_once_with(
+        user_ids=["u_1"],
+        notification_type="INSUFFICIENT_FUNDS_EMAIL",
+        timerange=timedelta(days=7),
+    )
+
+
+@pytest.mark.anyio
+async def test_find_recent_by_user__filters_passed_through(redis: Redis):
+    sqla_repository = AsyncMock()
+    sqla_repository.find_recent_by_user.return_value = []
+    repository = _repository(redis, sqla_repository)
+    since, until = datetime.now(UTC) - timedelta(days=1), datetime.now(UTC)
+    before = AuditPosition(until - timedelta(minutes=1), uuid4())
+
+    await repository.find_recent_by_user(
+        "u_1",
+        limit=10,
+        notification_types=["WELCOME_EMAIL"],
+        since=since,
+        until=until,
+        before=before,
+    )
+
+    sqla_repository.find_recent_by_user.assert_awaited_once_with(
+        "u_1", 10, ["WELCOME_EMAIL"], since, until, before
+    )
@@ -0,0 +1,22 @@
+from collections.abc import AsyncIterator, Generator
+
+import pytest
+from redis.asyncio import Redis
+from testcontainers.redis import RedisContainer
+
+
+@pytest.fixture(scope="package")
+def test_redis_container() -> Generator[RedisContainer]:
+    with RedisContainer("redis:7-alpine") as redis_container:
+        yield redis_container
+
+
+@pytest.fixture
+async def redis(test_redis_container: RedisContainer) -> AsyncIterator[Redis]:
+    client = Redis(
+        host=test_redis_container.get_container_host_ip(),
+        port=int(test_redis_container.get_exposed_port(6379)),
+    )
+    await client.flushdb()
+    yield client
+    await client.aclose()
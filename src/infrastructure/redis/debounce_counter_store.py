@@ -0,0 +1,296 @@
+import bisect
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from uuid import UUID
+
+from redis.asyncio import Redis
+
+from domain import NotificationHistoryRecord
+
+# KEYS: recent (sorted set), meta (hash)
+# ARGV: horizon, before, oldest or "", key ttl, score/member pairs...
+_LOAD_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[2], 'horizon', ARGV[1], 'before', ARGV[2])
+if ARGV[3] ~= '' then
+    redis.call('HSET', KEYS[2], 'oldest', ARGV[3])
+end
+for i = 5, #ARGV, 2 do
+    redis.call('ZADD', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+return 1
+"""
+
+# KEYS: recent (sorted set), meta (hash)
+# ARGV: horizon, key ttl, score/member pairs...
+_RECORD_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    return 0
+end
+for i = 3, #ARGV, 2 do
+    redis.call('ZADD', KEYS[1], ARGV[i], ARGV[i + 1])
+    local oldest = redis.call('HGET', KEYS[2], 'oldest')
+    if not oldest or tonumber(ARGV[i]) < tonumber(oldest) then
+        redis.call('HSET', KEYS[2], 'oldest', ARGV[i])
+    end
+end
+if tonumber(ARGV[1]) > tonumber(redis.call('HGET', KEYS[2], 'horizon')) then
+    local trimmed = redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[1])
+    redis.call('HINCRBY', KEYS[2], 'before', trimmed)
+    redis.call('HSET', KEYS[2], 'horizon', ARGV[1])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+return 1
+"""
+
+
+@dataclass(slots=True)
+class DebounceSnapshot:
+    """
+    Notifications of one type created for one user: exact creation times since
+    `horizon`, and only how many (and the oldest time) before it. Times are epoch seconds.
+    """
+
+    horizon: float
+    before: int
+    oldest: float | None
+    recent: list[float]  # sorted
+
+    def count_since(self, threshold: datetime) -> int | None:
+        """
+        None when the answer depends on records from before the horizon
+        """
+        since = threshold.timestamp()
+        if since >= self.horizon:
+            return len(self.recent) - bisect.bisect_left(self.recent, since)
+
+        if self.before == 0 or (self.oldest is not None and since <= self.oldest):
+            return self.before + len(self.recent)
+
+        return None
+
+    def add(self, created_at: float, horizon: float) -> None:
+        bisect.insort(self.recent, created_at)
+        if self.oldest is None or created_at < self.oldest:
+            self.oldest = created_at
+
+        if horizon > self.horizon:
+            trimmed = bisect.bisect_left(self.recent, horizon)
+            self.before += trimmed
+            del self.recent[:trimmed]
+            self.horizon = horizon
+
+
+class _LocalSnapshots:
+    """
+    LRU of snapshots, each one trusted for `ttl` after it was fetched
+    """
+
+    def __init__(self, max_size: int, ttl: timedelta) -> None:
+        self._max_size = max_size
+        self._ttl = ttl.total_seconds()
+        self._entries: OrderedDict[tuple[str, str], tuple[float, DebounceSnapshot]] = (
+            OrderedDict()
+        )
+
+    def get(self, key: tuple[str, str]) -> DebounceSnapshot | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, snapshot = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return snapshot
+
+    def put(self, key: tuple[str, str], snapshot: DebounceSnapshot) -> None:
+        self._entries[key] = (time.monotonic() + self._ttl, snapshot)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: tuple[str, str]) -> None:
+        self._entries.pop(key, None)
+
+
+class RedisDebounceCounterStore:
+    """
+    Creation times of notifications per (user_id, notification_type), kept in Redis
+    so debounce checks don't have to COUNT(*) in Postgres, with a small local LRU in
+    front of it. Postgres stays the source of truth: keys only appear once loaded from
+    it, and writes to keys that are not loaded (or expired) are ignored.
+    Times older than the retention are rolled up into a plain count.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        retention: timedelta,
+        key_ttl: timedelta,
+        local_cache_size: int,
+        local_cache_ttl: timedelta,
+    ) -> None:
+        self._redis = redis
+        self._retention = retention
+        self._key_ttl = int(key_ttl.total_seconds())
+        self._local = _LocalSnapshots(local_cache_size, local_cache_ttl)
+        self._load_script = redis.register_script(_LOAD_SCRIPT)
+        self._record_script = redis.register_script(_RECORD_SCRIPT)
+
+    def horizon(self) -> datetime:
+        """
+        Since when creation times are kept one by one
+        """
+        return datetime.now(UTC) - self._retention
+
+    async def get(
+        self, user_ids: list[str], notification_type: str
+    ) -> dict[str, DebounceSnapshot]:
+        """
+        Snapshots of the users that are loaded, missing ones have to be load()-ed
+        """
+        snapshots = {}
+        remote = []
+        for user_id in user_ids:
+            snapshot = self._local.get((user_id, notification_type))
+            if snapshot is None:
+                remote.append(user_id)
+            else:
+                snapshots[user_id] = snapshot
+
+        if not remote:
+            return snapshots
+
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for user_id in remote:
+                recent_key, meta_key = _keys(user_id, notification_type)
+                pipe.hmget(meta_key, "horizon", "before", "oldest")
+                pipe.zrange(recent_key, 0, -1, withscores=True)
+            results = await pipe.execute()
+
+        for user_id, (horizon, before, oldest), recent in zip(
+            remote, results[::2], results[1::2], strict=True
+        ):
+            if horizon is None:
+                continue
+
+            snapshot = DebounceSnapshot(
+                horizon=float(horizon),
+                before=int(before),
+                oldest=float(oldest) if oldest is not None else None,
+                recent=[score for _, score in recent],
+            )
+            self._local.put((user_id, notification_type), snapshot)
+            snapshots[user_id] = snapshot
+
+        return snapshots
+
+    async def load(
+        self,
+        notification_type: str,
+        horizon: datetime,
+        recent: dict[str, list[tuple[UUID, datetime]]],
+        before: dict[str, tuple[int, datetime]],
+        user_ids: list[str],
+    ) -> dict[str, DebounceSnapshot]:
+        """
+        Stores what Postgres knows about `user_ids`: records created since `horizon`,
+        and the count and oldest creation time of the ones before it
+        """
+        snapshots = {}
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for user_id in user_ids:
+                records = sorted(
+                    (created_at.timestamp(), str(record_id))
+                    for record_id, created_at in recent.get(user_id, [])
+                )
+                count_before, oldest_before = before.get(user_id, (0, None))
+
+                oldest = None
+                if oldest_before is not None:
+                    oldest = oldest_before.timestamp()
+                elif records:
+                    oldest = records[0][0]
+
+                snapshot = DebounceSnapshot(
+                    horizon=horizon.timestamp(),
+                    before=count_before,
+                    oldest=oldest,
+                    recent=[created_at for created_at, _ in records],
+                )
+                snapshots[user_id] = snapshot
+                self._local.put((user_id, notification_type), snapshot)
+
+                await self._load_script(
+                    keys=list(_keys(user_id, notification_type)),
+                    args=[
+                        repr(snapshot.horizon),
+                        snapshot.before,
+                        repr(oldest) if oldest is not None else "",
+                        self._key_ttl,
+                        *_score_member_pairs(records),
+                    ],
+                    client=pipe,
+                )
+            await pipe.execute()
+
+        return snapshots
+
+    async def record(self, records: list[NotificationHistoryRecord]) -> None:
+        """
+        Counts freshly saved records in the users that are loaded
+        """
+        if not records:
+            return
+
+        horizon = self.horizon().timestamp()
+        created: defaultdict[tuple[str, str], list[tuple[float, str]]] = defaultdict(
+            list
+        )
+        for record in records:
+            created[(record.user_id, record.type)].append(
+                (record.created_at.timestamp(), str(record.id))
+            )
+
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for (user_id, notification_type), pairs in created.items():
+                await self._record_script(
+                    keys=list(_keys(user_id, notification_type)),
+                    args=[repr(horizon), self._key_ttl, *_score_member_pairs(pairs)],
+                    client=pipe,
+                )
+            applied = await pipe.execute()
+
+        for key, pairs, was_loaded in zip(
+            created, created.values(), applied, strict=True
+        ):
+            snapshot = self._local.get(key)
+            if snapshot is None:
+                continue
+            if not was_loaded:
+                # expired in Redis, so the next read reloads it from Postgres
+                self._local.pop(key)
+                continue
+            for created_at, _ in pairs:
+                snapshot.add(created_at, horizon)
+
+
+def _keys(user_id: str, notification_type: str) -> tuple[str, str]:
+    # same hash slot for both keys, the scripts touch them together
+    tag = f"{{{user_id}:{notification_type}}}"
+    return f"debounce:{tag}:recent", f"debounce:{tag}:meta"
+
+
+def _score_member_pairs(pairs: list[tuple[float, str]]) -> list[str]:
+    return [value for score, member in pairs for value in (repr(score), member)]
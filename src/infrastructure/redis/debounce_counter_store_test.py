@@ -0,0 +1,127 @@
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from redis.asyncio import Redis
+
+from domain import NotificationHistoryRecord, NotificationStatus
+from infrastructure.redis import DebounceSnapshot, RedisDebounceCounterStore
+
+RETENTION = timedelta(days=2)
+
+
+def _store(redis: Redis) -> RedisDebounceCounterStore:
+    return RedisDebounceCounterStore(
+        redis,
+        retention=RETENTION,
+        key_ttl=timedelta(hours=1),
+        local_cache_size=100,
+        local_cache_ttl=timedelta(seconds=30),
+    )
+
+
+def _record(user_id: str, created_at: datetime) -> NotificationHistoryRecord:
+    return NotificationHistoryRecord(
+        id=uuid4(),
+        type="WELCOME_EMAIL",
+        trigger="signup_completed",
+        user_id=user_id,
+        status=NotificationStatus.SENT,
+        retries=0,
+        suppressed_because=None,
+        created_at=created_at,
+    )
+
+
+def test_snapshot__threshold_before_horizon__answers_only_when_it_can():
+    now = datetime.now(UTC)
+    horizon = now - RETENTION
+    snapshot = DebounceSnapshot(
+        horizon=horizon.timestamp(),
+        before=2,
+        oldest=(now - timedelta(days=10)).timestamp(),
+        recent=[(now - timedelta(hours=5)).timestamp(), now.timestamp()],
+    )
+
+    assert snapshot.count_since(now - timedelta(hours=1)) == 1
+    assert snapshot.count_since(now - timedelta(days=1)) == 2
+    # "ever" covers the rolled up records too
+    assert snapshot.count_since(now - timedelta(weeks=520)) == 4
+    # somewhere between the oldest record and the horizon, can't tell
+    assert snapshot.count_since(now - timedelta(days=5)) is None
+
+
+@pytest.mark.anyio
+async def test_get__not_loaded__missing(redis: Redis):
+    store = _store(redis)
+
+    assert await store.get(["u_1"], "WELCOME_EMAIL") == {}
+
+
+@pytest.mark.anyio
+async def test_load__visible_to_other_processes(redis: Redis):
+    now = datetime.now(UTC)
+    horizon = now - RETENTION
+    await _store(redis).load(
+        notification_type="WELCOME_EMAIL",
+        horizon=horizon,
+        recent={"u_1": [(uuid4(), now - timedelta(hours=1))]},
+        before={"u_1": (3, now - timedelta(days=30))},
+        user_ids=["u_1", "u_2"],
+    )
+
+    snapshots = await _store(redis).get(["u_1", "u_2"], "WELCOME_EMAIL")
+
+    assert snapshots["u_1"].count_since(now - timedelta(days=1)) == 1
+    assert snapshots["u_1"].count_since(now - timedelta(weeks=520)) == 4
+    # loaded without any records is still loaded
+    assert snapshots["u_2"].count_since(now - timedelta(weeks=520)) == 0
+
+
+@pytest.mark.anyio
+async def test_record__loaded_user__counted_locally_and_in_redis(redis: Redis):
+    now = datetime.now(UTC)
+    store = _store(redis)
+    await store.load(
+        notification_type="WELCOME_EMAIL",
+        horizon=now - RETENTION,
+        recent={},
+        before={},
+        user_ids=["u_1"],
+    )
+
+    await store.record([_record("u_1", now), _record("u_1", now)])
+
+    (local,) = (await store.get(["u_1"], "WELCOME_EMAIL")).values()
+    (remote,) = (await _store(redis).get(["u_1"], "WELCOME_EMAIL")).values()
+    assert local.count_since(now - timedelta(minutes=1)) == 2
+    assert remote.count_since(now - timedelta(minutes=1)) == 2
+
+
+@pytest.mark.anyio
+async def test_record__past_the_retention__rolled_up_into_before(redis: Redis):
+    now = datetime.now(UTC)
+    old = now - RETENTION - timedelta(hours=1)
+    await _store(redis).load(
+        notification_type="WELCOME_EMAIL",
+        horizon=old - timedelta(hours=1),
+        recent={"u_1": [(uuid4(), old)]},
+        before={},
+        user_ids=["u_1"],
+    )
+
+    await _store(redis).record([_record("u_1", now)])
+
+    (snapshot,) = (await _store(redis).get(["u_1"], "WELCOME_EMAIL")).values()
+    assert snapshot.before == 1
+    assert snapshot.recent == [now.timestamp()]
+    assert snapshot.count_since(now - timedelta(weeks=520)) == 2
+
+
+@pytest.mark.anyio
+async def test_record__not_loaded_user__ignored(redis: Redis):
+    store = _store(redis)
+
+    await store.record([_record("u_1", datetime.now(UTC))])
+
+    assert await store.get(["u_1"], "WELCOME_EMAIL") == {}
@@ -0,0 +1,112 @@
+import json
+from datetime import date, datetime, timedelta
+from uuid import UUID
+
+from redis.asyncio import Redis
+
+from app.queue import DelayedNotification
+
+# keeps a single ZADD / ZREM at a sane size
+COMMAND_CHUNK_SIZE = 1000
+
+# KEYS: due (sorted set), inflight (sorted set)
+# ARGV: now, limit, lease expiry
+POP_DUE_SCRIPT = """
+local members = redis.call('ZRANGE', KEYS[1], '-inf', ARGV[1], 'BYSCORE', 'LIMIT', 0, ARGV[2])
+for _, member in ipairs(members) do
+    redis.call('ZREM', KEYS[1], member)
+    redis.call('ZADD', KEYS[2], ARGV[3], member)
+end
+return members
+"""
+
+# KEYS: due (sorted set), inflight (sorted set)
+# ARGV: now
+REQUEUE_EXPIRED_SCRIPT = """
+local members = redis.call('ZRANGE', KEYS[2], '-inf', ARGV[1], 'BYSCORE')
+for _, member in ipairs(members) do
+    redis.call('ZREM', KEYS[2], member)
+    redis.call('ZADD', KEYS[1], ARGV[1], member)
+end
+return #members
+"""
+
+
+class RedisDelayedNotificationQueue:
+    """
+    Delayed notifications in a sorted set scored by due time: scheduling is a ZADD,
+    and the dispatcher pops everything due with one range query per batch, however
+    many notifications are waiting. Popped ones are moved to a second sorted set,
+    scored by when their lease expires.
+    """
+
+    def __init__(
+        self, redis: Redis, lease: timedelta, name: str = "delayed_notifications"
+    ) -> None:
+        self._redis = redis
+        self._lease = lease
+        # same hash slot for both keys, the scripts touch them together
+        self._due_key = f"{{{name}}}:due"
+        self._inflight_key = f"{{{name}}}:inflight"
+        self._pop_due_script = redis.register_script(POP_DUE_SCRIPT)
+        self._requeue_expired_script = redis.register_script(REQUEUE_EXPIRED_SCRIPT)
+
+    async def schedule(self, notifications: list[DelayedNotification]) -> None:
+        for start in range(0, len(notifications), COMMAND_CHUNK_SIZE):
+            chunk = notifications[start : start + COMMAND_CHUNK_SIZE]
+            await self._redis.zadd(
+                self._due_key,
+                {
+                    _encode(notification): notification.due_at.timestamp()
+                    for notification in chunk
+                },
+            )
+
+    async def pop_due(self, now: datetime, limit: int) -> list[DelayedNotification]:
+        members = await self._pop_due_script(
+            keys=[self._due_key, self._inflight_key],
+            args=[repr(now.timestamp()), limit, repr((now + self._lease).timestamp())],
+        )
+        return [_decode(member) for member in members]
+
+    async def ack(self, notifications: list[DelayedNotification]) -> None:
+        for start in range(0, len(notifications), COMMAND_CHUNK_SIZE):
+            chunk = notifications[start : start + COMMAND_CHUNK_SIZE]
+            await self._redis.zrem(
+                self._inflight_key, *(_encode(notification) for notification in chunk)
+            )
+
+    async def requeue_expired(self, now: datetime) -> int:
+        return await self._requeue_expired_script(
+            keys=[self._due_key, self._inflight_key],
+            args=[repr(now.timestamp())],
+        )
+
+
+def _encode(notification: DelayedNotification) -> str:
+    # acks find the member by its exact encoding, so it has to be deterministic
+    return json.dumps(
+        [
+            str(notification.record_id),
+            notification.notification_type,
+            notification.trigger,
+            str(notification.event_id),
+            notification.event_date.isoformat(),
+            notification.due_at.isoformat(),
+        ],
+        separators=(",", ":"),
+    )
+
+
+def _decode(member: bytes | str) -> DelayedNotification:
+    record_id, notification_type, trigger, event_id, event_date, due_at = json.loads(
+        member
+    )
+    return DelayedNotification(
+        record_id=UUID(record_id),
+        notification_type=notification_type,
+        trigger=trigger,
+        event_id=UUID(event_id),
+        event_date=date.fromisoformat(event_date),
+        due_at=datetime.fromisoformat(due_at),
+    )
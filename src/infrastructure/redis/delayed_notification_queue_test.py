@@ -0,0 +1,70 @@
+from datetime import UTC, date, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from redis.asyncio import Redis
+
+from app.queue import DelayedNotification
+from infrastructure.redis import RedisDelayedNotificationQueue
+
+NOW = datetime.now(UTC)
+
+
+def _delayed(due_at: datetime) -> DelayedNotification:
+    return DelayedNotification(
+        record_id=uuid4(),
+        notification_type="WELCOME_EMAIL",
+        trigger="signup_completed",
+        event_id=uuid4(),
+        event_date=date(2026, 1, 1),
+        due_at=due_at,
+    )
+
+
+@pytest.mark.anyio
+async def test_pop_due__only_due_ones_in_due_order_up_to_limit(redis: Redis):
+    queue = RedisDelayedNotificationQueue(redis, lease=timedelta(seconds=30))
+    later = _delayed(NOW + timedelta(minutes=5))
+    first = _delayed(NOW - timedelta(minutes=2))
+    second = _delayed(NOW - timedelta(minutes=1))
+    third = _delayed(NOW)
+    await queue.schedule([later, third, first, second])
+
+    assert await queue.pop_due(NOW, limit=2) == [first, second]
+    assert await queue.pop_due(NOW, limit=2) == [third]
+    assert await queue.pop_due(NOW, limit=2) == []
+    assert await queue.pop_due(NOW + timedelta(minutes=5), limit=2) == [later]
+
+
+@pytest.mark.anyio
+async def test_requeue_expired__unacked_come_back_once_the_lease_expires(
+    redis: Redis,
+):
+    queue = RedisDelayedNotificationQueue(redis, lease=timedelta(seconds=30))
+    acked, lost = _delayed(NOW), _delayed(NOW)
+    await queue.schedule([acked, lost])
+
+    assert len(await queue.pop_due(NOW, limit=10)) == 2
+    await queue.ack([acked])
+
+    assert await queue.requeue_expired(NOW + timedelta(seconds=10)) == 0
+    assert await queue.pop_due(NOW + timedelta(seconds=10), limit=10) == []
+
+    assert await queue.requeue_expired(NOW + timedelta(seconds=31)) == 1
+    assert await queue.pop_due(NOW + timedelta(seconds=31), limit=10) == [lost]
+
+
+@pytest.mark.anyio
+async def test_schedule__many_pending__popped_in_full_batches(redis: Redis):
+    queue = RedisDelayedNotificationQueue(redis, lease=timedelta(seconds=30))
+    await queue.schedule(
+        [_delayed(NOW - timedelta(seconds=i)) for i in range(2500)]
+        + [_delayed(NOW + timedelta(hours=1)) for _ in range(2500)]
+    )
+
+    batches = []
+    while batch := await queue.pop_due(NOW, limit=1000):
+        batches.append(len(batch))
+        await queue.ack(batch)
+
+    assert batches == [1000, 1000, 500]
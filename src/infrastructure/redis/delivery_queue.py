@@ -0,0 +1,132 @@
+import json
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from redis.asyncio import Redis
+
+from app.queue import Delivery
+from domain.notification import NotificationChannel
+from infrastructure.redis.delayed_notification_queue import (
+    COMMAND_CHUNK_SIZE,
+    POP_DUE_SCRIPT,
+    REQUEUE_EXPIRED_SCRIPT,
+)
+
+
+class RedisDeliveryQueue:
+    """
+    A sorted set of deliveries per channel, scored by when they were queued, so each
+    channel's workers pop the oldest of their own with one range query per batch.
+    Popped ones are moved to a second sorted set of the channel, scored by when their
+    lease expires, as RedisDelayedNotificationQueue does.
+
+    Retries go back to the first set scored by their retry_at, so however many wait
+    for a provider to come back they cost nothing until due, and are then popped
+    in batches like the rest.
+    """
+
+    def __init__(
+        self, redis: Redis, lease: timedelta, name: str = "deliveries"
+    ) -> None:
+        self._redis = redis
+        self._lease = lease
+        self._name = name
+        self._pop_script = redis.register_script(POP_DUE_SCRIPT)
+        self._requeue_expired_script = redis.register_script(REQUEUE_EXPIRED_SCRIPT)
+
+    async def push(self, deliveries: list[Delivery]) -> None:
+        by_channel: dict[NotificationChannel, list[Delivery]] = {}
+        for delivery in deliveries:
+            by_channel.setdefault(delivery.channel, []).append(delivery)
+
+        for channel, channel_deliveries in by_channel.items():
+            ready_key, _ = self._keys(channel)
+            for start in range(0, len(channel_deliveries), COMMAND_CHUNK_SIZE):
+                chunk = channel_deliveries[start : start + COMMAND_CHUNK_SIZE]
+                await self._redis.zadd(
+                    ready_key,
+                    {_encode(delivery): _score(delivery) for delivery in chunk},
+                )
+
+    async def pop(
+        self, channel: NotificationChannel, now: datetime, limit: int
+    ) -> list[Delivery]:
+        members = await self._pop_script(
+            keys=list(self._keys(channel)),
+            args=[repr(now.timestamp()), limit, repr((now + self._lease).timestamp())],
+        )
+        return [_decode(member) for member in members]
+
+    async def ack(self, deliveries: list[Delivery]) -> None:
+        for start in range(0, len(deliveries), COMMAND_CHUNK_SIZE):
+            chunk = deliveries[start : start + COMMAND_CHUNK_SIZE]
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for delivery in chunk:
+                    _, inflight_key = self._keys(delivery.channel)
+                    pipe.zrem(inflight_key, _encode(delivery))
+                await pipe.execute()
+
+    async def retry(self, attempts: list[tuple[Delivery, Delivery]]) -> None:
+        for start in range(0, len(attempts), COMMAND_CHUNK_SIZE):
+            chunk = attempts[start : start + COMMAND_CHUNK_SIZE]
+            # each one is either still leased or waiting for its retry, never both
+            # nor neither; a channel's keys share a hash slot, so MULTI spans them
+            async with self._redis.pipeline(transaction=True) as pipe:
+                for leased, next_attempt in chunk:
+                    ready_key, inflight_key = self._keys(leased.channel)
+                    pipe.zrem(inflight_key, _encode(leased))
+                    pipe.zadd(ready_key, {_encode(next_attempt): _score(next_attempt)})
+                await pipe.execute()
+
+    async def requeue_expired(self, channel: NotificationChannel, now: datetime) -> int:
+        return await self._requeue_expired_script(
+            keys=list(self._keys(channel)), args=[repr(now.timestamp())]
+        )
+
+    def _keys(self, channel: NotificationChannel) -> tuple[str, str]:
+        # same hash slot for both keys of a channel, the scripts touch them together
+        return (
+            f"{{{self._name}:{channel.value}}}:ready",
+            f"{{{self._name}:{channel.value}}}:inflight",
+        )
+
+
+def _score(delivery: Delivery) -> float:
+    return (delivery.retry_at or delivery.queued_at).timestamp()
+
+
+def _encode(delivery: Delivery) -> str:
+    # acks find the member by its exact encoding, so it has to be deterministic
+    return json.dumps(
+        [
+            str(delivery.record_id),
+            delivery.notification_type,
+            delivery.channel.value,
+            delivery.recipient,
+            delivery.text,
+            delivery.queued_at.isoformat(),
+            delivery.max_attempts,
+            delivery.retries,
+            delivery.retry_at.isoformat() if delivery.retry_at else None,
+        ],
+        separators=(",", ":"),
+    )
+
+
+def _decode(member: bytes | str) -> Delivery:
+    record_id, notification_type, channel, recipient, text, queued_at, *retry = (
+        json.loads(member)
+    )
+    # queued before deliveries were retried
+    max_attempts, retries, retry_at = retry or (None, 0, None)
+    return Delivery(
+        record_id=UUID(record_id),
+        notification_type=notification_type,
+        channel=NotificationChannel(channel),
+        recipient=recipient,
+        text=text,
+        queued_at=datetime.fromisoformat(queued_at),
+        max_attempts=max_attempts,
+        retries=retries,
+        retry_at=datetime.fromisoformat(retry_at) if retry_at else None,
+    )
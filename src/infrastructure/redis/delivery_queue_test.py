@@ -0,0 +1,97 @@
+from dataclasses import replace
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from redis.asyncio import Redis
+
+from app.queue import Delivery
+from domain.notification import NotificationChannel
+from infrastructure.redis import RedisDeliveryQueue
+
+NOW = datetime.now(UTC)
+
+
+def _delivery(
+    channel: NotificationChannel = NotificationChannel.EMAIL,
+    queued_at: datetime = NOW,
+) -> Delivery:
+    return Delivery(
+        record_id=uuid4(),
+        notification_type="WELCOME_EMAIL",
+        channel=channel,
+        recipient="maria@example.com",
+        text="Welcome to our payment platform!",
+        queued_at=queued_at,
+    )
+
+
+@pytest.mark.anyio
+async def test_pop__only_the_channel_oldest_first_up_to_limit(redis: Redis):
+    queue = RedisDeliveryQueue(redis, lease=timedelta(seconds=30))
+    first = _delivery(queued_at=NOW - timedelta(seconds=2))
+    second = _delivery(queued_at=NOW - timedelta(seconds=1))
+    third = _delivery()
+    sms = _delivery(NotificationChannel.SMS)
+    await queue.push([third, sms, first, second])
+
+    assert await queue.pop(NotificationChannel.EMAIL, NOW, limit=2) == [first, second]
+    assert await queue.pop(NotificationChannel.EMAIL, NOW, limit=2) == [third]
+    assert await queue.pop(NotificationChannel.EMAIL, NOW, limit=2) == []
+    assert await queue.pop(NotificationChannel.SMS, NOW, limit=2) == [sms]
+
+
+@pytest.mark.anyio
+async def test_push__same_delivery_twice__queued_once(redis: Redis):
+    queue = RedisDeliveryQueue(redis, lease=timedelta(seconds=30))
+    delivery = _delivery()
+
+    await queue.push([delivery])
+    await queue.push([delivery])
+
+    assert await queue.pop(NotificationChannel.EMAIL, NOW, limit=10) == [delivery]
+
+
+@pytest.mark.anyio
+async def test_requeue_expired__unacked_come_back_once_the_lease_expires(
+    redis: Redis,
+):
+    queue = RedisDeliveryQueue(redis, lease=timedelta(seconds=30))
+    acked, lost = _delivery(), _delivery()
+    other_channel = _delivery(NotificationChannel.PIDGEON)
+    await queue.push([acked, lost, other_channel])
+
+    assert len(await queue.pop(NotificationChannel.EMAIL, NOW, limit=10)) == 2
+    assert len(await queue.pop(NotificationChannel.PIDGEON, NOW, limit=10)) == 1
+    await queue.ack([acked, other_channel])
+
+    later = NOW + timedelta(seconds=10)
+    assert await queue.requeue_expired(NotificationChannel.EMAIL, later) == 0
+
+    later = NOW + timedelta(seconds=31)
+    assert await queue.requeue_expired(NotificationChannel.PIDGEON, later) == 0
+    assert await queue.requeue_expired(NotificationChannel.EMAIL, later) == 1
+    assert await queue.pop(NotificationChannel.EMAIL, later, limit=10) == [lost]
+
+
+@pytest.mark.anyio
+async def test_retry__next_attempt_popped_once_due_and_the_leased_one_gone(
+    redis: Redis,
+):
+    queue = RedisDeliveryQueue(redis, lease=timedelta(seconds=30))
+    failed = _delivery(queued_at=NOW - timedelta(seconds=1))
+    waiting = _delivery()
+    await queue.push([failed, waiting])
+    assert await queue.pop(NotificationChannel.EMAIL, NOW, limit=1) == [failed]
+
+    retry_at = NOW + timedelta(minutes=1)
+    next_attempt = replace(failed, max_attempts=3, retries=1, retry_at=retry_at)
+    await queue.retry([(failed, next_attempt)])
+
+    assert await queue.pop(NotificationChannel.EMAIL, NOW, limit=10) == [waiting]
+    later = retry_at - timedelta(seconds=1)
+    assert await queue.requeue_expired(NotificationChannel.EMAIL, later) == 1
+    assert await queue.pop(NotificationChannel.EMAIL, later, limit=10) == [waiting]
+    assert await queue.pop(NotificationChannel.EMAIL, retry_at, limit=10) == [
+        next_attempt
+    ]
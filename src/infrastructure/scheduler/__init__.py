@@ -0,0 +1,3 @@
+from .delayed_notifications_scheduler import run_scheduler
+
+__all__ = ["run_scheduler"]
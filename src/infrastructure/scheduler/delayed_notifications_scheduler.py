@@ -0,0 +1,56 @@
+import asyncio
+from datetime import UTC, datetime
+
+from dishka import make_async_container
+
+from app.logging import Logger
+from app.notifications.dispatch_due_notifications_use_case import (
+    DispatchDueNotificationsRequest,
+    DispatchDueNotificationsUseCase,
+)
+from app.queue import DelayedNotificationQueue
+from infrastructure.env_config import EnvConfig
+from infrastructure.logging import configure_logging
+
+
+async def run_scheduler() -> None:
+    """
+    Dispatches due delayed notifications batch after batch, and only sleeps for a
+    tick once there are fewer due than a full batch
+    """
+    settings = EnvConfig()
+    configure_logging(settings.env, service_name="visible-notify-scheduler")
+
+    from infrastructure import dependencies_providers
+
+    container = make_async_container(*dependencies_providers)
+    try:
+        queue = await container.get(DelayedNotificationQueue)
+        while True:
+            async with container() as request_container:
+                logger = await request_container.get(Logger)
+                use_case = await request_container.get(DispatchDueNotificationsUseCase)
+                response = await use_case.handle(
+                    DispatchDueNotificationsRequest(
+                        now=datetime.now(UTC),
+                        limit=settings.delayed_notifications_batch_size,
+                    )
+                )
+            # committed once the request scope is closed
+            await queue.ack(response.done)
+
+            if response.popped or response.requeued:
+                logger.info(
+                    "Delayed notifications dispatched",
+                    popped=response.popped,
+                    sent=response.sent,
+                    queued=response.queued,
+                    suppressed=response.suppressed,
+                    requeued=response.requeued,
+                    retried_later=response.popped - len(response.done),
+                )
+
+            if response.popped < settings.delayed_notifications_batch_size:
+                await asyncio.sleep(settings.delayed_notifications_tick.total_seconds())
+    finally:
+        await container.close()
@@ -76,6 +76,7 @@ class StaticNotificationRuleRepository:
             debounce_period=debounce_period,
             debounce_limit=data.get("debounce_limit"),
             debounce_calendar_day=data.get("debounce_calendar_day", False),
+            max_delivery_attempts=data.get("max_delivery_attempts"),
         )
 
     def _parse_event_condition(self, data: dict) -> EventCondition:
@@ -112,7 +113,10 @@ class StaticNotificationRuleRepository:
             event_proximity = EventProximity(
                 event_type=ep_data["event_type"],
                 time_proximity=time_proximity_td,
-                event_conditions=ep_data.get("event_conditions", []),
+                event_conditions=[
+                    self._parse_event_condition(nested_data)
+                    for nested_data in ep_data.get("event_conditions") or []
+                ],
             )
 
         # Parse event_logic (not implemented yet, placeholder)
@@ -5,10 +5,22 @@ from taskiq_redis import RedisStreamBroker
 
 from infrastructure.env_config import EnvConfig
 from infrastructure.logging import configure_logging
+from infrastructure.taskiq.partitioning import owned_partitions, partition_queue_name
+from infrastructure.taskiq.serializers import make_serializer
 
 settings = EnvConfig()
 
-broker = RedisStreamBroker(url=str(settings.redis_url))
+# every partition is a stream, owned by a single worker process (see README), so
+# events of one user are handled one batch at a time and in order
+queue_name, *additional_queue_names = [
+    partition_queue_name(partition) for partition in owned_partitions(settings)
+]
+
+broker = RedisStreamBroker(
+    url=str(settings.redis_url),
+    queue_name=queue_name,
+    additional_streams={name: ">" for name in additional_queue_names},
+).with_serializer(make_serializer(settings))
 
 
 @broker.on_event(TaskiqEvents.WORKER_STARTUP)
@@ -19,6 +31,8 @@ async def setup_container(_state) -> None:
 
     container = make_async_container(*dependencies_providers)
     setup_dishka(container, broker)
+    # the tasks open their own request scope, to act once it has committed
+    broker.state.dishka_container = container
 
 
 @broker.on_event(TaskiqEvents.WORKER_SHUTDOWN)
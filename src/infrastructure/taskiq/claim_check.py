@@ -0,0 +1,16 @@
+from app.persistence.event_repository import EventRepository
+from domain import Event
+from infrastructure.taskiq.events_codec import EventKey
+
+
+async def load_events(
+    event_repository: EventRepository, keys: list[EventKey]
+) -> tuple[list[Event], list[EventKey]]:
+    """
+    The events of keys in their order, in one query, and the keys of those not found.
+    Keys are only sent by the outbox relay, once the events have committed, so the
+    missing ones have been deleted since, by retention or otherwise
+    """
+    found = {event.id: event for event in await event_repository.find_by_keys(keys)}
+    missing = [key for key in keys if key[0] not in found]
+    return [found[event_id] for event_id, _ in keys if event_id in found], missing
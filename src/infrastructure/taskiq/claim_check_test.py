@@ -0,0 +1,49 @@
+from datetime import UTC, date, datetime
+from unittest.mock import AsyncMock
+from uuid import UUID, uuid4
+
+import pytest
+
+from domain import Event
+from infrastructure.taskiq.claim_check import load_events
+
+
+def _event() -> Event:
+    event = Event()
+    event.id = uuid4()
+    event.user_id = "u_1"
+    event.type = "signup_completed"
+    event.event_timestamp = datetime.now(UTC)
+    event.event_date = event.event_timestamp.date()
+    event.properties = {}
+    event.user_traits = {}
+    return event
+
+
+def _keys(events: list[Event]) -> list[tuple[UUID, date]]:
+    return [(event.id, event.event_date) for event in events]
+
+
+@pytest.mark.anyio
+async def test_load_events__found__in_key_order():
+    first, second, third = _event(), _event(), _event()
+    repository = AsyncMock()
+    repository.find_by_keys.return_value = [third, first, second]
+
+    events, missing = await load_events(repository, _keys([first, second, third]))
+
+    assert events == [first, second, third]
+    assert missing == []
+    repository.find_by_keys.assert_awaited_once_with(_keys([first, second, third]))
+
+
+@pytest.mark.anyio
+async def test_load_events__deleted__reported_missing():
+    kept, deleted = _event(), _event()
+    repository = AsyncMock()
+    repository.find_by_keys.return_value = [kept]
+
+    events, missing = await load_events(repository, _keys([deleted, kept]))
+
+    assert events == [kept]
+    assert missing == _keys([deleted])
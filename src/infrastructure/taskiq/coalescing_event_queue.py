@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from app.queue import EventQueue
+from domain import Event
+from infrastructure.batching import MicroBatcher
+
+
+class CoalescingEventQueue:
+    """
+    Sends the events of concurrent requests together, so a message per partition
+    carries the events of many requests
+    """
+
+    def __init__(
+        self, event_queue: EventQueue, max_events: int, max_delay: timedelta
+    ) -> None:
+        self.event_queue = event_queue
+        self.batcher = MicroBatcher(
+            event_queue.events_received, max_items=max_events, max_delay=max_delay
+        )
+
+    async def events_received(self, events: list[Event]) -> None:
+        await self.batcher.submit(events)
+
+    async def close(self) -> None:
+        await self.batcher.close()
@@ -0,0 +1,34 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+
+from domain import Event
+from infrastructure.taskiq.coalescing_event_queue import CoalescingEventQueue
+
+
+def _event(user_id: str) -> Event:
+    event = Event()
+    event.id = uuid4()
+    event.user_id = user_id
+    event.type = "signup_completed"
+    event.event_timestamp = datetime.now(UTC)
+    event.event_date = event.event_timestamp.date()
+    event.properties = {}
+    event.user_traits = {}
+    return event
+
+
+@pytest.mark.anyio
+async def test_events_received__concurrent_requests__sent_together():
+    event_queue = AsyncMock()
+    queue = CoalescingEventQueue(
+        event_queue, max_events=100, max_delay=timedelta(milliseconds=10)
+    )
+    first, second = [_event("u_1"), _event("u_2")], [_event("u_1")]
+
+    await asyncio.gather(queue.events_received(first), queue.events_received(second))
+
+    event_queue.events_received.assert_awaited_once_with(first + second)
@@ -1,20 +1,39 @@
-from domain import Event
-from infrastructure.taskiq.messages import events_received
-
+import asyncio
+from collections import defaultdict
 
-def _event_to_dict(event: Event) -> dict:
-    return {
-        "id": str(event.id),
-        "user_id": event.user_id,
-        "type": event.type,
-        "event_timestamp": event.event_timestamp.isoformat(),
-        "event_date": event.event_date.isoformat(),
-        "properties": event.properties,
-        "user_traits": event.user_traits,
-    }
+from domain import Event
+from infrastructure.env_config import EventsQueuePayload
+from infrastructure.taskiq.events_codec import encode_event_keys, encode_events
+from infrastructure.taskiq.messages import event_keys_received, events_received
+from infrastructure.taskiq.partitioning import partition_for, partition_queue_name
 
 
 class TaskiqEventQueue:
+    def __init__(
+        self, partitions: int, payload: EventsQueuePayload = EventsQueuePayload.EVENTS
+    ) -> None:
+        self.partitions = partitions
+        self.payload = payload
+
     async def events_received(self, events: list[Event]) -> None:
-        events_as_dicts = [_event_to_dict(event) for event in events]
-        await events_received.kiq(events_as_dicts)  # type: ignore # kiq signature suddenly does not play well with dishka injections
+        """
+        One message per partition touched, keeping the order of events within it
+        """
+        partitioned: defaultdict[int, list[Event]] = defaultdict(list)
+        for event in events:
+            partition = partition_for(event.user_id, self.partitions)
+            partitioned[partition].append(event)
+
+        if self.payload is EventsQueuePayload.KEYS:
+            task, encode = event_keys_received, encode_event_keys
+        else:
+            task, encode = events_received, encode_events
+
+        await asyncio.gather(
+            *(
+                task.kicker()
+                .with_labels(queue_name=partition_queue_name(partition))
+                .kiq(encode(partition_events))  # type: ignore # kiq signature suddenly does not play well with dishka injections
+                for partition, partition_events in partitioned.items()
+            )
+        )
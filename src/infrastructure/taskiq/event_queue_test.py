@@ -0,0 +1,101 @@
+from datetime import UTC, datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from domain import Event
+from infrastructure.env_config import EnvConfig, EventsQueuePayload
+from infrastructure.taskiq.event_queue import TaskiqEventQueue
+from infrastructure.taskiq.events_codec import decode_event_keys, decode_events
+from infrastructure.taskiq.partitioning import (
+    owned_partitions,
+    partition_for,
+    partition_queue_name,
+)
+
+
+def _event(user_id: str, event_type: str) -> Event:
+    event = Event()
+    event.id = uuid4()
+    event.user_id = user_id
+    event.type = event_type
+    event.event_timestamp = datetime.now(UTC)
+    event.event_date = event.event_timestamp.date()
+    event.properties = {}
+    event.user_traits = {}
+    return event
+
+
+def test_partition_for__same_user__same_partition_everywhere():
+    partitions = {partition_for(f"u_{i}", 4) for i in range(100)}
+
+    assert partitions == {0, 1, 2, 3}
+    # crc32, not the per-process randomized hash()
+    assert partition_for("u_12345", 4) == 1
+
+
+def test_owned_partitions__not_configured__owns_all():
+    assert owned_partitions(EnvConfig(events_partitions=3)) == [0, 1, 2]
+    assert owned_partitions(
+        EnvConfig(events_partitions=3, events_worker_partitions=[2, 0])
+    ) == [0, 2]
+
+
+def test_owned_partitions__out_of_range__refuses_to_start():
+    with pytest.raises(ValueError):
+        owned_partitions(EnvConfig(events_partitions=2, events_worker_partitions=[2]))
+
+
+@pytest.mark.anyio
+async def test_events_received__one_message_per_partition_in_order():
+    kicker = MagicMock()
+    kicker.with_labels.return_value = kicker
+    kicker.kiq = AsyncMock()
+    queue = TaskiqEventQueue(partitions=4)
+
+    first, second, other_user = (
+        _event("u_12345", "signup_completed"),
+        _event("u_12345", "link_bank_success"),
+        _event("u_1", "signup_completed"),
+    )
+    assert partition_for("u_12345", 4) != partition_for("u_1", 4)
+
+    with patch("infrastructure.taskiq.event_queue.events_received") as task:
+        task.kicker.return_value = kicker
+        await queue.events_received([first, other_user, second])
+
+    assert kicker.with_labels.call_count == 2
+    sent = {
+        labels_call.kwargs["queue_name"]: kiq_call.args[0]
+        for labels_call, kiq_call in zip(
+            kicker.with_labels.call_args_list, kicker.kiq.call_args_list, strict=True
+        )
+    }
+    assert [
+        e.id
+        for e in decode_events(sent[partition_queue_name(partition_for("u_12345", 4))])
+    ] == [first.id, second.id]
+    assert [
+        e.id for e in decode_events(sent[partition_queue_name(partition_for("u_1", 4))])
+    ] == [other_user.id]
+
+
+@pytest.mark.anyio
+async def test_events_received__keys_payload__only_keys_sent():
+    kicker = MagicMock()
+    kicker.with_labels.return_value = kicker
+    kicker.kiq = AsyncMock()
+    queue = TaskiqEventQueue(partitions=1, payload=EventsQueuePayload.KEYS)
+    events = [_event("u_1", "signup_completed"), _event("u_2", "signup_completed")]
+
+    with (
+        patch("infrastructure.taskiq.event_queue.events_received") as events_task,
+        patch("infrastructure.taskiq.event_queue.event_keys_received") as keys_task,
+    ):
+        keys_task.kicker.return_value = kicker
+        await queue.events_received(events)
+
+    events_task.kicker.assert_not_called()
+    (kiq_call,) = kicker.kiq.call_args_list
+    assert decode_event_keys(kiq_call.args[0]) == [(e.id, e.event_date) for e in events]
@@ -0,0 +1,156 @@
+from datetime import UTC, date, datetime, timedelta
+from typing import Any
+from uuid import UUID
+
+from domain import Event
+
+# bumped whenever the layout below changes, old workers refuse what they can't read
+COLUMNAR_VERSION = 1
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+type EventsPayload = dict[str, Any] | list[dict[str, Any]]
+type EventKeysPayload = dict[str, Any]
+type EventKey = tuple[UUID, date]
+
+
+def encode_events(events: list[Event]) -> dict[str, Any]:
+    """
+    A batch as columns of plain JSON values, so that field names, user ids, event
+    types and the keys of properties and user traits are sent once per batch instead
+    of once per event:
+
+        {
+            "v": 1,
+            "ids": "<32 hex digits per event>",
+            "user_ids": [["u_1", "u_2"], [0, 1, 0]],  # distinct values, indexes
+            "types": [["signup_completed"], [0, 0, 0]],
+            "timestamps": [<microseconds since epoch>, ...],
+            "dates": [<proleptic ordinal>, ...],
+            "properties": [[["amount", "currency"]], [[0, 10.5, "EUR"], ...]],
+            "user_traits": [[["email"]], [[0, "a@example.com"], ...]],
+        }
+    """
+    return {
+        "v": COLUMNAR_VERSION,
+        "ids": "".join(event.id.hex for event in events),
+        "user_ids": _dictionary_encode([event.user_id for event in events]),
+        "types": _dictionary_encode([event.type for event in events]),
+        "timestamps": [_to_microseconds(event.event_timestamp) for event in events],
+        "dates": [event.event_date.toordinal() for event in events],
+        "properties": _shape_encode([event.properties for event in events]),
+        "user_traits": _shape_encode([event.user_traits for event in events]),
+    }
+
+
+def decode_events(payload: EventsPayload) -> list[Event]:
+    """
+    Also reads the list of per event dicts sent before the columnar layout, so
+    messages still queued during a deploy are not lost
+    """
+    if isinstance(payload, list):
+        return [_dict_to_event(data) for data in payload]
+
+    if payload.get("v") != COLUMNAR_VERSION:
+        raise ValueError(f"Unsupported events payload version: {payload.get('v')!r}")
+
+    ids = payload["ids"]
+    user_ids = _dictionary_decode(payload["user_ids"])
+    types = _dictionary_decode(payload["types"])
+    properties = _shape_decode(payload["properties"])
+    user_traits = _shape_decode(payload["user_traits"])
+
+    events = []
+    for i, (timestamp, ordinal) in enumerate(
+        zip(payload["timestamps"], payload["dates"], strict=True)
+    ):
+        event = Event()
+        event.id = UUID(hex=ids[i * 32 : (i + 1) * 32])
+        event.user_id = user_ids[i]
+        event.type = types[i]
+        event.event_timestamp = _EPOCH + timedelta(microseconds=timestamp)
+        event.event_date = date.fromordinal(ordinal)
+        event.properties = properties[i]
+        event.user_traits = user_traits[i]
+        events.append(event)
+    return events
+
+
+def encode_event_keys(events: list[Event]) -> dict[str, Any]:
+    """
+    Only the primary keys of a batch, for workers loading the events from Postgres:
+
+        {"v": 1, "ids": "<32 hex digits per event>", "dates": [<ordinal>, ...]}
+    """
+    return {
+        "v": COLUMNAR_VERSION,
+        "ids": "".join(event.id.hex for event in events),
+        "dates": [event.event_date.toordinal() for event in events],
+    }
+
+
+def decode_event_keys(payload: EventKeysPayload) -> list[EventKey]:
+    if payload.get("v") != COLUMNAR_VERSION:
+        raise ValueError(
+            f"Unsupported event keys payload version: {payload.get('v')!r}"
+        )
+
+    ids = payload["ids"]
+    return [
+        (UUID(hex=ids[i * 32 : (i + 1) * 32]), date.fromordinal(ordinal))
+        for i, ordinal in enumerate(payload["dates"])
+    ]
+
+
+def _to_microseconds(timestamp: datetime) -> int:
+    """
+    Only the instant is kept, decoded timestamps are in UTC. Naive ones are taken
+    as UTC, as asyncpg does when saving them.
+    """
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=UTC)
+    return (timestamp - _EPOCH) // timedelta(microseconds=1)
+
+
+def _dict_to_event(data: dict) -> Event:
+    event = Event()
+    event.id = UUID(data["id"])
+    event.user_id = data["user_id"]
+    event.type = data["type"]
+    event.event_timestamp = datetime.fromisoformat(data["event_timestamp"])
+    event.event_date = date.fromisoformat(data["event_date"])
+    event.properties = data["properties"]
+    event.user_traits = data["user_traits"]
+    return event
+
+
+def _dictionary_encode(values: list[str]) -> list[list]:
+    """
+    Values as [distinct values, index of every value among them]
+    """
+    indexes: dict[str, int] = {}
+    positions = [indexes.setdefault(value, len(indexes)) for value in values]
+    return [list(indexes), positions]
+
+
+def _dictionary_decode(column: list[list]) -> list[str]:
+    distinct, positions = column
+    return [distinct[position] for position in positions]
+
+
+def _shape_encode(dicts: list[dict]) -> list[list]:
+    """
+    Dicts as rows of [shape index, *values], where a shape is the list of keys of a
+    dict; nested values are left as they are
+    """
+    shapes: dict[tuple[str, ...], int] = {}
+    rows = []
+    for value in dicts:
+        shape = tuple(value)
+        rows.append([shapes.setdefault(shape, len(shapes)), *value.values()])
+    return [[list(shape) for shape in shapes], rows]
+
+
+def _shape_decode(column: list[list]) -> list[dict]:
+    shapes, rows = column
+    return [dict(zip(shapes[row[0]], row[1:], strict=True)) for row in rows]
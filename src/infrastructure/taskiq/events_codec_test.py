@@ -0,0 +1,102 @@
+import json
+from datetime import UTC, date, datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from domain import Event
+from infrastructure.taskiq.events_codec import (
+    decode_event_keys,
+    decode_events,
+    encode_event_keys,
+    encode_events,
+)
+
+
+def _event(user_id: str, event_type: str, properties: dict) -> Event:
+    event = Event()
+    event.id = uuid4()
+    event.user_id = user_id
+    event.type = event_type
+    event.event_timestamp = datetime(2025, 10, 31, 23, 30, 0, 123456, tzinfo=UTC)
+    event.event_date = event.event_timestamp.date()
+    event.properties = properties
+    event.user_traits = {"email": f"{user_id}@example.com", "opt_in": True}
+    return event
+
+
+def _fields(event: Event) -> tuple:
+    return (
+        event.id,
+        event.user_id,
+        event.type,
+        event.event_timestamp,
+        event.event_date,
+        event.properties,
+        event.user_traits,
+    )
+
+
+def test_encode_events__json_round_trip__same_events():
+    events = [
+        _event("u_1", "payment_failed", {"amount": 10.5, "reason": {"code": "NSF"}}),
+        _event("u_2", "payment_failed", {"amount": 3, "reason": None}),
+        _event("u_1", "signup_completed", {}),
+    ]
+
+    payload = json.loads(json.dumps(encode_events(events)))
+
+    assert [_fields(e) for e in decode_events(payload)] == [_fields(e) for e in events]
+    # keys, user ids and types are sent once
+    assert payload["user_ids"] == [["u_1", "u_2"], [0, 1, 0]]
+    assert payload["properties"][0] == [["amount", "reason"], []]
+
+
+def test_encode_events__other_offset_or_naive__same_instant_in_utc():
+    offset = _event("u_1", "signup_completed", {})
+    offset.event_timestamp = datetime(
+        2025, 11, 1, 1, 30, tzinfo=timezone(timedelta(hours=2))
+    )
+    offset.event_date = date(2025, 11, 1)
+    naive = _event("u_1", "signup_completed", {})
+    naive.event_timestamp = datetime(2025, 10, 31, 23, 30)
+
+    decoded = decode_events(encode_events([offset, naive]))
+
+    assert decoded[0].event_timestamp == offset.event_timestamp
+    assert decoded[0].event_timestamp.tzinfo is UTC
+    # the date is the one the event was saved with, not the one of the UTC instant
+    assert decoded[0].event_date == date(2025, 11, 1)
+    assert decoded[1].event_timestamp == naive.event_timestamp.replace(tzinfo=UTC)
+
+
+def test_decode_events__list_of_dicts_from_before__still_read():
+    event = _event("u_1", "signup_completed", {"a": 1})
+    legacy = {
+        "id": str(event.id),
+        "user_id": event.user_id,
+        "type": event.type,
+        "event_timestamp": event.event_timestamp.isoformat(),
+        "event_date": event.event_date.isoformat(),
+        "properties": event.properties,
+        "user_traits": event.user_traits,
+    }
+
+    assert [_fields(e) for e in decode_events([legacy])] == [_fields(event)]
+
+
+def test_decode_events__unknown_version__refused():
+    with pytest.raises(ValueError):
+        decode_events({**encode_events([]), "v": 2})
+
+
+def test_encode_event_keys__json_round_trip__keys_in_order():
+    events = [
+        _event("u_1", "payment_failed", {"amount": 10.5}),
+        _event("u_2", "signup_completed", {}),
+    ]
+
+    payload = json.loads(json.dumps(encode_event_keys(events)))
+
+    assert decode_event_keys(payload) == [(e.id, e.event_date) for e in events]
+    assert set(payload) == {"v", "ids", "dates"}
@@ -1,82 +1,102 @@
-from datetime import date, datetime
-from uuid import UUID
-
 from dishka import FromDishka
 from dishka.integrations.taskiq import inject
 
+from app.audit import AuditFeed, AuditUpdate
 from app.logging import Logger
 from app.notifications.trigger_notifications_use_case import (
     TriggerNotificationsUseCase,
 )
+from app.persistence.event_repository import EventRepository
 from domain import Event
 from infrastructure.taskiq.broker import broker
+from infrastructure.taskiq.claim_check import load_events
+from infrastructure.taskiq.events_codec import (
+    EventKeysPayload,
+    EventsPayload,
+    decode_event_keys,
+    decode_events,
+)
 
 
-def _dict_to_event(data: dict) -> Event:
-    event = Event()
-    event.id = UUID(data["id"])
-    event.user_id = data["user_id"]
-    event.type = data["type"]
-    event.event_timestamp = datetime.fromisoformat(data["event_timestamp"])
-    event.event_date = date.fromisoformat(data["event_date"])
-    event.properties = data["properties"]
-    event.user_traits = data["user_traits"]
-    return event
+@broker.task
+@inject
+async def events_received(
+    events: EventsPayload,
+    logger: FromDishka[Logger],
+    audit_feed: FromDishka[AuditFeed],
+) -> None:
+    async with broker.state.dishka_container() as container:
+        updates = await _process(
+            decode_events(events),
+            logger,
+            await container.get(TriggerNotificationsUseCase),
+        )
+    # committed once the request scope is closed
+    await audit_feed.publish(updates)
 
 
 @broker.task
 @inject
-async def events_received(
-    events: list[dict],
+async def event_keys_received(
+    keys: EventKeysPayload,
     logger: FromDishka[Logger],
-    trigger_notifications_usecase: FromDishka[TriggerNotificationsUseCase],
+    audit_feed: FromDishka[AuditFeed],
 ) -> None:
-    logger.info("Events received for processing", count=len(events))
+    async with broker.state.dishka_container() as container:
+        domain_events, missing = await load_events(
+            await container.get(EventRepository), decode_event_keys(keys)
+        )
+        if missing:
+            # deleted after the outbox relay sent them
+            logger.warning(
+                "Received events not found, skipping them",
+                count=len(missing),
+                event_ids=[str(event_id) for event_id, _ in missing],
+            )
 
-    for idx, event_dict in enumerate(events):
-        logger.debug(
-            "Converting event from dict",
-            event_index=idx,
-            event_id=event_dict.get("id"),
+        updates = await _process(
+            domain_events, logger, await container.get(TriggerNotificationsUseCase)
         )
+    # committed once the request scope is closed
+    await audit_feed.publish(updates)
 
-        event = _dict_to_event(event_dict)
 
-        logger.debug(
-            "Processing event",
-            event_id=str(event.id),
-            event_type=event.type,
-            user_id=event.user_id,
-            properties_count=len(event.properties),
-        )
+async def _process(
+    domain_events: list[Event],
+    logger: Logger,
+    trigger_notifications_usecase: TriggerNotificationsUseCase,
+) -> list[AuditUpdate]:
+    logger.info("Events received for processing", count=len(domain_events))
 
-        try:
-            response = await trigger_notifications_usecase.handle(event)
+    try:
+        responses = await trigger_notifications_usecase.handle_batch(domain_events)
+    except Exception as e:
+        logger.error(
+            "Failed to process events for notifications",
+            count=len(domain_events),
+            event_ids=[str(event.id) for event in domain_events],
+            error=str(e),
+        )
+        raise
 
-            if response.intents:
-                logger.info(
-                    "Notification intents triggered",
-                    event_id=str(event.id),
-                    event_type=event.type,
-                    user_id=event.user_id,
-                    intents=[intent.notification_type for intent in response.intents],
-                    intent_count=len(response.intents),
-                )
-            else:
-                logger.debug(
-                    "No notification intents triggered",
-                    event_id=str(event.id),
-                    event_type=event.type,
-                    user_id=event.user_id,
-                )
-        except Exception as e:
-            logger.error(
-                "Failed to process event for notifications",
+    for event, response in zip(domain_events, responses, strict=True):
+        if response.intents:
+            logger.info(
+                "Notification intents triggered",
                 event_id=str(event.id),
                 event_type=event.type,
                 user_id=event.user_id,
-                error=str(e),
+                intents=[intent.notification_type for intent in response.intents],
+                intent_count=len(response.intents),
             )
-            raise
+        else:
+            logger.debug(
+                "No notification intents triggered",
+                event_id=str(event.id),
+                event_type=event.type,
+                user_id=event.user_id,
+            )
+
+    logger.info("Events processing completed", processed_count=len(domain_events))
 
-    logger.info("Events processing completed", processed_count=len(events))
+    return [update for response in responses for update in response.audit_updates]
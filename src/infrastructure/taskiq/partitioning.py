@@ -0,0 +1,34 @@
+import zlib
+from collections.abc import Iterable
+
+from infrastructure.env_config import EnvConfig
+
+QUEUE_NAME_PREFIX = "visible-notify:events"
+
+
+def partition_for(user_id: str, partitions: int) -> int:
+    """
+    Stable across processes and restarts, unlike hash()
+    """
+    return zlib.crc32(user_id.encode()) % partitions
+
+
+def partition_queue_name(partition: int) -> str:
+    return f"{QUEUE_NAME_PREFIX}:{partition}"
+
+
+def owned_partitions(settings: EnvConfig) -> list[int]:
+    """
+    Partitions this worker reads, all of them unless configured otherwise
+    """
+    owned: Iterable[int] = settings.events_worker_partitions or range(
+        settings.events_partitions
+    )
+    partitions = sorted(set(owned))
+
+    out_of_range = [p for p in partitions if not 0 <= p < settings.events_partitions]
+    if out_of_range:
+        raise ValueError(
+            f"Worker partitions {out_of_range} are out of range for {settings.events_partitions} partitions"
+        )
+    return partitions
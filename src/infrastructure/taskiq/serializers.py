@@ -0,0 +1,63 @@
+from compression import zstd
+from typing import Any
+
+import pydantic_core
+from taskiq.abc.serializer import TaskiqSerializer
+from taskiq.serializers import JSONSerializer
+
+from infrastructure.env_config import EnvConfig, EventsQueueSerializer
+
+# every zstd frame starts with it, while JSON never does
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+class PydanticCoreSerializer(TaskiqSerializer):
+    """
+    JSON through pydantic-core, written in Rust. The same JSON as the default
+    serializer produces, so either end can be switched first.
+    """
+
+    def dumpb(self, value: Any) -> bytes:
+        return pydantic_core.to_json(value)
+
+    def loadb(self, value: bytes) -> Any:
+        return pydantic_core.from_json(value)
+
+
+class ZstdSerializer(TaskiqSerializer):
+    """
+    Compresses what another serializer produces once it is larger than compress_above
+    bytes; uncompressed messages are still read, so it can be enabled while messages
+    of the other serializer are queued
+    """
+
+    def __init__(
+        self, serializer: TaskiqSerializer, compress_above: int, level: int = 3
+    ) -> None:
+        self.serializer = serializer
+        self.compress_above = compress_above
+        self.level = level
+
+    def dumpb(self, value: Any) -> bytes:
+        data = self.serializer.dumpb(value)
+        if len(data) <= self.compress_above:
+            return data
+        return zstd.compress(data, level=self.level)
+
+    def loadb(self, value: bytes) -> Any:
+        if value.startswith(ZSTD_MAGIC):
+            value = zstd.decompress(value)
+        return self.serializer.loadb(value)
+
+
+def make_serializer(settings: EnvConfig) -> TaskiqSerializer:
+    serializer: TaskiqSerializer
+    match settings.events_queue_serializer:
+        case EventsQueueSerializer.PYDANTIC_CORE:
+            serializer = PydanticCoreSerializer()
+        case _:
+            serializer = JSONSerializer()
+
+    if settings.events_queue_compress_above is None:
+        return serializer
+    return ZstdSerializer(serializer, settings.events_queue_compress_above)
@@ -0,0 +1,47 @@
+import json
+
+from taskiq.serializers import JSONSerializer
+
+from infrastructure.env_config import EnvConfig, EventsQueueSerializer
+from infrastructure.taskiq.serializers import (
+    ZSTD_MAGIC,
+    PydanticCoreSerializer,
+    ZstdSerializer,
+    make_serializer,
+)
+
+MESSAGE = {"task_name": "events_received", "args": [{"ids": "ab" * 16}], "kwargs": {}}
+
+
+def test_pydantic_core_serializer__reads_and_writes_the_same_json_as_default():
+    default, pydantic_core = JSONSerializer(), PydanticCoreSerializer()
+
+    assert pydantic_core.loadb(default.dumpb(MESSAGE)) == MESSAGE
+    assert default.loadb(pydantic_core.dumpb(MESSAGE)) == MESSAGE
+    assert json.loads(pydantic_core.dumpb(MESSAGE)) == MESSAGE
+
+
+def test_zstd_serializer__only_large_messages_compressed_both_read():
+    serializer = ZstdSerializer(PydanticCoreSerializer(), compress_above=1000)
+    large = {**MESSAGE, "args": [{"ids": "ab" * 16_000}]}
+
+    small_data, large_data = serializer.dumpb(MESSAGE), serializer.dumpb(large)
+
+    assert not small_data.startswith(ZSTD_MAGIC)
+    assert large_data.startswith(ZSTD_MAGIC)
+    assert len(large_data) < len(PydanticCoreSerializer().dumpb(large)) / 10
+    assert serializer.loadb(small_data) == MESSAGE
+    assert serializer.loadb(large_data) == large
+
+
+def test_make_serializer__from_settings():
+    assert isinstance(make_serializer(EnvConfig()), JSONSerializer)
+
+    serializer = make_serializer(
+        EnvConfig(
+            events_queue_serializer=EventsQueueSerializer.PYDANTIC_CORE,
+            events_queue_compress_above=4096,
+        )
+    )
+    assert isinstance(serializer, ZstdSerializer)
+    assert isinstance(serializer.serializer, PydanticCoreSerializer)
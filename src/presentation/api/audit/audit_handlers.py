@@ -1,15 +1,28 @@
-from datetime import datetime
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta
 from http import HTTPStatus
 
 from dishka import FromDishka
 from dishka.integrations.fastapi import inject
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from app.audit import GetUserAuditRequest, GetUserAuditUseCase
+from app.audit import (
+    AuditUpdate,
+    GetUserAuditRequest,
+    GetUserAuditUseCase,
+    WatchUserAuditRequest,
+    WatchUserAuditUseCase,
+)
+from app.audit.get_user_audit_use_case import MAX_PAGE_SIZE
 
 router = APIRouter()
 
+# a comment is sent when nothing else was for this long, so proxies keep the
+# connection open and closed ones are noticed
+STREAM_HEARTBEAT = timedelta(seconds=15)
+
 
 class EventAuditDTO(BaseModel):
     event_id: str
@@ -30,6 +43,10 @@ class UserAuditResponse(BaseModel):
     user_id: str
     recent_events: list[EventAuditDTO]
     notification_history: list[NotificationAuditDTO]
+    # pass as events_cursor / notifications_cursor for the next, older page; null
+    # once there is none
+    next_events_cursor: str | None
+    next_notifications_cursor: str | None
 
 
 @router.get("/audit/{user_id}", status_code=HTTPStatus.OK)
@@ -37,10 +54,31 @@ class UserAuditResponse(BaseModel):
 async def get_user_audit(
     user_id: str,
     get_user_audit_usecase: FromDishka[GetUserAuditUseCase],
-    limit: int = 50,
+    limit: int = Query(default=50, ge=1, le=MAX_PAGE_SIZE),
+    since: datetime | None = None,
+    until: datetime | None = None,
+    event_type: list[str] = Query(default=[]),
+    notification_type: list[str] = Query(default=[]),
+    events_cursor: str | None = None,
+    notifications_cursor: str | None = None,
 ) -> UserAuditResponse:
+    """
+    The newest events and notifications of the user, each list paged on its own:
+    pass the next_*_cursor of a page to get the one before it, with the same filters.
+    since and until bound event_timestamp / created_at, event_type and
+    notification_type may be repeated.
+    """
     result = await get_user_audit_usecase.handle(
-        GetUserAuditRequest(user_id=user_id, limit=limit)
+        GetUserAuditRequest(
+            user_id=user_id,
+            limit=limit,
+            since=since,
+            until=until,
+            event_types=event_type,
+            notification_types=notification_type,
+            events_cursor=events_cursor,
+            notifications_cursor=notifications_cursor,
+        )
     )
 
     return UserAuditResponse(
@@ -64,4 +102,47 @@ async def get_user_audit(
             )
             for notif in result.notification_history
         ],
+        next_events_cursor=result.next_events_cursor,
+        next_notifications_cursor=result.next_notifications_cursor,
+    )
+
+
+@router.get(
+    "/audit/{user_id}/stream",
+    response_class=StreamingResponse,
+    responses={HTTPStatus.OK: {"content": {"text/event-stream": {}}}},
+)
+@inject
+async def stream_user_audit(
+    user_id: str,
+    watch_user_audit_usecase: FromDishka[WatchUserAuditUseCase],
+) -> StreamingResponse:
+    """
+    Server-Sent Events: an `event` or a `notification` for every new one of the user,
+    shaped as in GET /audit/{user_id}. The first comment is sent once subscribed, so
+    the audit loaded after it misses nothing.
+    """
+    updates = await watch_user_audit_usecase.handle(
+        WatchUserAuditRequest(user_id=user_id, heartbeat=STREAM_HEARTBEAT)
+    )
+    return StreamingResponse(
+        server_sent_events(updates),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
+
+
+async def server_sent_events(
+    updates: AsyncIterator[AuditUpdate | None],
+) -> AsyncIterator[str]:
+    async for update in updates:
+        if update is None:
+            yield ": keepalive\n\n"
+        elif update.event is not None:
+            event = EventAuditDTO.model_validate(update.event, from_attributes=True)
+            yield f"event: event\ndata: {event.model_dump_json()}\n\n"
+        elif update.notification is not None:
+            notification = NotificationAuditDTO.model_validate(
+                update.notification, from_attributes=True
+            )
+            yield f"event: notification\ndata: {notification.model_dump_json()}\n\n"
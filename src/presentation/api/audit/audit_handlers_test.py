@@ -1,7 +1,18 @@
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime
 from http import HTTPStatus
 
+import pytest
 from fastapi.testclient import TestClient
 
+from app.audit import AuditUpdate
+from app.audit.get_user_audit_use_case import (
+    MAX_PAGE_SIZE,
+    EventAuditItem,
+    NotificationAuditItem,
+)
+from presentation.api.audit.audit_handlers import server_sent_events
+
 
 def test_get_audit__user_with_events_and_notifications__returns_audit_data(
     client: TestClient,
@@ -123,3 +134,91 @@ def test_get_audit__returns_events_in_correct_format(client: TestClient):
     # notification_history might be empty if worker isn't running
     # but the structure should still be correct
     assert isinstance(data["notification_history"], list)
+
+
+def test_get_audit__paged_with_cursor__every_event_once(client: TestClient):
+    client.post(
+        "/api/v1/events",
+        json=[
+            {
+                "user_id": "u_paged_test",
+                "event_type": event_type,
+                "event_timestamp": f"2025-10-31T19:0{minute}:00Z",
+                "properties": {},
+                "user_traits": {},
+            }
+            for minute, event_type in enumerate(
+                ["signup_completed", "payment_initiated", "login", "payment_initiated"]
+            )
+        ],
+    )
+
+    event_timestamps, cursor = [], None
+    while True:
+        params = {"limit": 1, "event_type": ["payment_initiated", "signup_completed"]}
+        if cursor is not None:
+            params["events_cursor"] = cursor
+        response = client.get("/audit/u_paged_test", params=params)
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        event_timestamps += [e["event_timestamp"] for e in data["recent_events"]]
+        cursor = data["next_events_cursor"]
+        if cursor is None:
+            break
+
+    assert event_timestamps == [
+        "2025-10-31T19:03:00Z",
+        "2025-10-31T19:01:00Z",
+        "2025-10-31T19:00:00Z",
+    ]
+
+
+def test_get_audit__invalid_cursor__bad_request(client: TestClient):
+    response = client.get("/audit/u_12345", params={"events_cursor": "not a cursor"})
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json()["code"] == "E_INVALID_AUDIT_CURSOR"
+
+
+def test_get_audit__limit_above_the_cap__rejected(client: TestClient):
+    response = client.get("/audit/u_12345", params={"limit": MAX_PAGE_SIZE + 1})
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.anyio
+async def test_server_sent_events__updates_and_heartbeats__one_message_each():
+    async def updates() -> AsyncIterator[AuditUpdate | None]:
+        yield None
+        yield AuditUpdate(
+            user_id="u_1",
+            event=EventAuditItem(
+                event_id="e_1",
+                event_type="signup_completed",
+                event_timestamp=datetime(2025, 10, 31, 19, 0, tzinfo=UTC),
+                properties={},
+            ),
+        )
+        yield AuditUpdate(
+            user_id="u_1",
+            notification=NotificationAuditItem(
+                notification_type="WELCOME_EMAIL",
+                trigger_event="signup_completed",
+                status="sent",
+                created_at=datetime(2025, 10, 31, 19, 0, 1, tzinfo=UTC),
+                suppression_reason=None,
+            ),
+        )
+
+    messages = [message async for message in server_sent_events(updates())]
+
+    assert messages == [
+        ": keepalive\n\n",
+        "event: event\n"
+        'data: {"event_id":"e_1","event_type":"signup_completed",'
+        '"event_timestamp":"2025-10-31T19:00:00Z","properties":{}}\n\n',
+        "event: notification\n"
+        'data: {"notification_type":"WELCOME_EMAIL","trigger_event":"signup_completed",'
+        '"status":"sent","created_at":"2025-10-31T19:00:01Z","suppression_reason":null}'
+        "\n\n",
+    ]
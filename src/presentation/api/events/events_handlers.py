@@ -1,59 +1,162 @@
 import logging
-from datetime import datetime
 from http import HTTPStatus
-from typing import Any
-from uuid import uuid4
 
-from dishka import FromDishka
+from dishka import AsyncContainer, FromDishka
 from dishka.integrations.fastapi import inject
-from fastapi import APIRouter
-from pydantic import BaseModel
+from fastapi import APIRouter, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
 
-from app.events import SaveEventsRequest, SaveEventsUseCase
+from app.events import (
+    QueueEventsRequest,
+    QueueEventsUseCase,
+    SaveEventsRequest,
+    SaveEventsUseCase,
+    UnsupportedMediaTypeException,
+)
 from domain import Event
+from presentation.api.events.events_validation import EventDTO, validate_events
+from presentation.api.events.ndjson import NDJSON_MEDIA_TYPES, split_lines
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-
-class EventDTO(BaseModel):
-    user_id: str
-    event_type: str
-    event_timestamp: datetime
-    properties: dict[str, Any]
-    user_traits: dict[str, Any]
-
-    def to_domain(self) -> Event:
-        return Event(
-            id=uuid4(),
-            user_id=self.user_id,
-            type=self.event_type,
-            event_timestamp=self.event_timestamp,
-            event_date=self.event_timestamp.date(),
-            properties=self.properties,
-            user_traits=self.user_traits,
-        )
+# events saved at once while an NDJSON body streams in
+STREAM_CHUNK_SIZE = 1000
+# longer lines are rejected without being buffered
+STREAM_MAX_LINE_BYTES = 1024 * 1024
+# how many rejected items of a batch get their errors logged
+LOGGED_REJECTIONS = 10
 
 
 class PostEventsResponse(BaseModel):
     accepted: int
 
 
-@router.post("/api/v1/events", status_code=HTTPStatus.ACCEPTED)
+@router.post(
+    "/api/v1/events",
+    status_code=HTTPStatus.ACCEPTED,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": EventDTO.model_json_schema()}
+                }
+            },
+        }
+    },
+)
 @inject
 async def post(
-    events: list[EventDTO | Any],
+    request: Request,
     save_events: FromDishka[SaveEventsUseCase],
 ) -> PostEventsResponse:
+    """
+    Invalid items are skipped, the valid ones are accepted
+    """
+    try:
+        validated = validate_events(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(
+            [
+                {**error, "loc": ("body", *error["loc"])}
+                for error in e.errors(include_url=False, include_input=False)
+            ]
+        ) from e
+
+    if validated.rejected:
+        logger.warning(
+            "Events validation failed",
+            extra={
+                "rejected": len(validated.rejected),
+                "errors": [
+                    {"index": rejected.index, "errors": rejected.errors}
+                    for rejected in validated.rejected[:LOGGED_REJECTIONS]
+                ],
+            },
+        )
+
+    result = await save_events.handle(
+        SaveEventsRequest(events=[dto.to_domain() for dto in validated.events])
+    )
+    return PostEventsResponse(accepted=result.saved_count)
+
+
+class PostEventsStreamResponse(BaseModel):
+    accepted: int
+    rejected: int
+
+
+@router.post(
+    "/api/v1/events/stream",
+    status_code=HTTPStatus.ACCEPTED,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                media_type: {"schema": {"type": "string"}}
+                for media_type in NDJSON_MEDIA_TYPES
+            },
+        }
+    },
+)
+@inject
+async def post_stream(
+    request: Request,
+    queue_events: FromDishka[QueueEventsUseCase],
+) -> PostEventsStreamResponse:
+    """
+    One event per line, saved in chunks as the body streams in, so the body is never
+    held in memory as a whole. Each chunk is committed in a transaction of its own,
+    then queued to the workers, so no transaction lasts as long as the upload, and
+    a stream failing halfway keeps the chunks saved and queued before it failed.
+    """
+    container: AsyncContainer = request.app.state.dishka_container
+
+    async def save(events: list[Event]) -> int:
+        async with container() as chunk_container:
+            save_events = await chunk_container.get(SaveEventsUseCase)
+            result = await save_events.handle(
+                SaveEventsRequest(events=events, queue=False)
+            )
+        # committed once the scope is closed
+        await queue_events.handle(QueueEventsRequest(events=events))
+        return result.saved_count
+
+    media_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if media_type not in NDJSON_MEDIA_TYPES:
+        raise UnsupportedMediaTypeException(media_type, NDJSON_MEDIA_TYPES)
+
+    accepted, rejected = 0, 0
     domain_events: list[Event] = []
-    for event in events:
+
+    line_number = 0
+    async for line in split_lines(request.stream(), STREAM_MAX_LINE_BYTES):
+        line_number += 1
+        if line is None:
+            logger.warning("Event line too long", extra={"line": line_number})
+            rejected += 1
+            continue
+        if not line.strip():
+            continue
+
         try:
-            dto = EventDTO.model_validate(event)
-            domain_events.append(dto.to_domain())
-        except ValueError as e:
-            logger.warning("Event validation failed", extra={"event": event, "error": str(e)})
+            domain_events.append(EventDTO.model_validate_json(line).to_domain())
+        except ValidationError as e:
+            logger.warning(
+                "Event validation failed",
+                extra={"line": line_number, "error": str(e)},
+            )
+            rejected += 1
             continue
 
-    result = await save_events.handle(SaveEventsRequest(events=domain_events))
-    return PostEventsResponse(accepted=result.saved_count)
+        if len(domain_events) >= STREAM_CHUNK_SIZE:
+            accepted += await save(domain_events)
+            domain_events = []
+
+    if domain_events:
+        accepted += await save(domain_events)
+
+    return PostEventsStreamResponse(accepted=accepted, rejected=rejected)
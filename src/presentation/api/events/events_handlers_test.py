@@ -1,3 +1,4 @@
+import json
 from http import HTTPStatus
 
 from fastapi.testclient import TestClient
@@ -140,3 +141,42 @@ def test_post_events__input_malformed__not_processed(client: TestClient):
     )
 
     assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_post_events_stream__ndjson__valid_lines_accepted_the_rest_rejected(
+    client: TestClient,
+):
+    def lines():
+        for i in range(2500):
+            yield (
+                json.dumps(
+                    {
+                        "user_id": f"u_{i}",
+                        "event_type": "signup_completed",
+                        "event_timestamp": "2025-10-31T19:00:00Z",
+                        "properties": {"signup_method": "email"},
+                        "user_traits": {"marketing_opt_in": False},
+                    }
+                ).encode()
+                + b"\n"
+            )
+        yield b"\n"
+        yield b"not json at all\n"
+        yield b'{"user_id": "u_1"}\n'
+        yield b"[1, 2, 3]"
+
+    response = client.post(
+        "/api/v1/events/stream",
+        content=lines(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == HTTPStatus.ACCEPTED
+    assert response.json() == {"accepted": 2500, "rejected": 3}
+
+
+def test_post_events_stream__not_ndjson__unsupported_media_type(client: TestClient):
+    response = client.post("/api/v1/events/stream", json=[])
+
+    assert response.status_code == HTTPStatus.UNSUPPORTED_MEDIA_TYPE
+    assert response.json()["code"] == "E_UNSUPPORTED_MEDIA_TYPE"
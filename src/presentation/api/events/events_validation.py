@@ -0,0 +1,70 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+from uuid import uuid4
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from pydantic_core import ErrorDetails
+
+from domain import Event
+
+
+class EventDTO(BaseModel):
+    user_id: str
+    event_type: str
+    event_timestamp: datetime
+    properties: dict[str, Any]
+    user_traits: dict[str, Any]
+
+    def to_domain(self) -> Event:
+        return Event(
+            id=uuid4(),
+            user_id=self.user_id,
+            type=self.event_type,
+            event_timestamp=self.event_timestamp,
+            event_date=self.event_timestamp.date(),
+            properties=self.properties,
+            user_traits=self.user_traits,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class RejectedEvent:
+    # position of the item in the batch
+    index: int
+    # without the input, so logging them never dumps the payload
+    errors: list[ErrorDetails]
+
+
+@dataclass(frozen=True, slots=True)
+class ValidatedEvents:
+    events: list[EventDTO]
+    rejected: list[RejectedEvent]
+
+
+# parses the raw body and validates every item in the same pass: a valid item comes
+# out as an EventDTO, anything else as it was in the body
+_EVENTS_ADAPTER = TypeAdapter(list[EventDTO | Any])
+
+
+def validate_events(body: bytes) -> ValidatedEvents:
+    """
+    The valid events of a JSON array, and why the other items are not. Only the
+    invalid items are validated again, to get their errors. Raises ValidationError if
+    the body is not a JSON array at all.
+    """
+    events, rejected = [], []
+    for index, item in enumerate(_EVENTS_ADAPTER.validate_json(body)):
+        if isinstance(item, EventDTO):
+            events.append(item)
+            continue
+
+        try:
+            events.append(EventDTO.model_validate(item))
+        except ValidationError as e:
+            rejected.append(
+                RejectedEvent(
+                    index=index, errors=e.errors(include_url=False, include_input=False)
+                )
+            )
+    return ValidatedEvents(events=events, rejected=rejected)
@@ -0,0 +1,41 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from presentation.api.events.events_validation import validate_events
+
+SIGNUP = {
+    "user_id": "u_12345",
+    "event_type": "signup_completed",
+    "event_timestamp": "2025-10-31T19:00:00Z",
+    "properties": {"signup_method": "email"},
+    "user_traits": {"marketing_opt_in": True},
+}
+
+
+def test_validate_events__valid_items__all_events():
+    validated = validate_events(json.dumps([SIGNUP, SIGNUP]).encode())
+
+    assert validated.rejected == []
+    assert [event.event_type for event in validated.events] == ["signup_completed"] * 2
+    assert validated.events[0].to_domain().event_date.isoformat() == "2025-10-31"
+
+
+def test_validate_events__invalid_items__rejected_by_index_without_input():
+    body = json.dumps(
+        [{"user_id": "u_secret"}, SIGNUP, 42, {**SIGNUP, "event_timestamp": "soon"}]
+    ).encode()
+
+    validated = validate_events(body)
+
+    assert len(validated.events) == 1
+    assert [rejected.index for rejected in validated.rejected] == [0, 2, 3]
+    assert all(rejected.errors for rejected in validated.rejected)
+    assert "u_secret" not in str([r.errors for r in validated.rejected])
+
+
+@pytest.mark.parametrize("body", [b'"not an array"', b"[{", b""])
+def test_validate_events__not_a_json_array__raises(body: bytes):
+    with pytest.raises(ValidationError):
+        validate_events(body)
@@ -0,0 +1,38 @@
+from collections.abc import AsyncIterable, AsyncIterator
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/jsonl")
+
+
+async def split_lines(
+    chunks: AsyncIterable[bytes], max_line_bytes: int
+) -> AsyncIterator[bytes | None]:
+    """
+    Lines of a streamed body, as they complete, without their line breaks. A line
+    longer than max_line_bytes is yielded as None once it ends, and is never buffered
+    in full, so memory stays bounded whatever the body is like.
+    """
+    buffer = bytearray()
+    oversized = False
+
+    async for chunk in chunks:
+        start = 0
+        while (end := chunk.find(b"\n", start)) != -1:
+            if oversized or len(buffer) + end - start > max_line_bytes:
+                yield None
+            else:
+                buffer += chunk[start:end]
+                yield bytes(buffer)
+            buffer.clear()
+            oversized = False
+            start = end + 1
+
+        if not oversized:
+            buffer += chunk[start:]
+            if len(buffer) > max_line_bytes:
+                buffer.clear()
+                oversized = True
+
+    if oversized:
+        yield None
+    elif buffer:
+        yield bytes(buffer)
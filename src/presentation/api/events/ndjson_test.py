@@ -0,0 +1,48 @@
+from collections.abc import AsyncIterator
+
+import pytest
+
+from presentation.api.events.ndjson import split_lines
+
+
+async def _chunks(*chunks: bytes) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+async def _lines(*chunks: bytes, max_line_bytes: int = 100) -> list[bytes | None]:
+    return [line async for line in split_lines(_chunks(*chunks), max_line_bytes)]
+
+
+@pytest.mark.anyio
+async def test_split_lines__lines_across_chunks__joined():
+    assert await _lines(b'{"a":', b' 1}\n{"b"', b": 2}\n", b'{"c": 3}') == [
+        b'{"a": 1}',
+        b'{"b": 2}',
+        b'{"c": 3}',
+    ]
+
+
+@pytest.mark.anyio
+async def test_split_lines__empty_lines__kept_for_the_caller_to_skip():
+    assert await _lines(b"\n\na\n") == [b"", b"", b"a"]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "chunks",
+    [
+        (b"x" * 11 + b"\nok\n",),
+        (b"x" * 6, b"x" * 5, b"\nok\n"),
+        (b"x" * 6, b"x" * 6, b"x" * 6, b"\nok\n"),
+    ],
+)
+async def test_split_lines__too_long__none_and_the_next_line_intact(
+    chunks: tuple[bytes, ...],
+):
+    assert await _lines(*chunks, max_line_bytes=10) == [None, b"ok"]
+
+
+@pytest.mark.anyio
+async def test_split_lines__too_long_last_line__none():
+    assert await _lines(b"ok\n", b"x" * 20, max_line_bytes=10) == [b"ok", None]